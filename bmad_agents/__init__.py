@@ -0,0 +1,13 @@
+"""
+BMAD content agents.
+
+Importing the package is cheap: agent modules are imported by the registry only when an
+agent is first used, e.g. `get_agent_class("seo_blog_agent")`.
+"""
+import logging
+
+from .interface import BMADAgentInterface
+from .registry import AgentRegistry, AgentSpec, registry, get_agent_class, create_agent, available_agents
+
+# Applications configure logging; the agents' example scripts do so in their __main__ blocks
+logging.getLogger(__name__).addHandler(logging.NullHandler())
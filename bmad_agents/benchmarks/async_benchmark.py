@@ -0,0 +1,160 @@
+"""
+Compares Workflow.run() on a thread pool with Workflow.arun() on one event loop for
+I/O-bound workflows. Each workflow drafts a post with a fake model backend, builds it with
+SEOBlogAgent, writes an image prompt per keyword with ImagePromptAgent and "renders" each
+prompt with the fake backend again, so four of its six agent calls wait on the backend.
+The backend only sleeps for an injected latency (with jitter), like a remote model
+endpoint would.
+
+Reports throughput, workflow latency, the most backend calls in flight at once and the
+threads used.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.async_benchmark --workflows 2000 --latency-ms 50
+"""
+import argparse
+import asyncio
+import logging
+import random
+import statistics
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict
+
+from ..image_prompt_agent.agent import ImagePromptAgent
+from ..interface import BMADAgentInterface
+from ..orchestrator import Workflow
+from ..seo_blog_agent.agent import SEOBlogAgent
+
+
+class FakeBackend:
+    """
+    Stands in for a model endpoint: every call takes `latency` seconds, give or take `jitter`.
+    """
+    def __init__(self, latency: float, jitter: float = 0.2, seed: int = 7):
+        self.latency = latency
+        self.jitter = jitter
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def _enter(self) -> float:
+        with self._lock:
+            self.calls += 1
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+            return self.latency * (1 + self._random.uniform(-self.jitter, self.jitter))
+
+    def _exit(self) -> None:
+        with self._lock:
+            self.in_flight -= 1
+
+    def complete(self, prompt: str) -> str:
+        delay = self._enter()
+        try:
+            time.sleep(delay)
+        finally:
+            self._exit()
+        return f"completion of {prompt}"
+
+    async def acomplete(self, prompt: str) -> str:
+        delay = self._enter()
+        try:
+            await asyncio.sleep(delay)
+        finally:
+            self._exit()
+        return f"completion of {prompt}"
+
+
+class FakeModelAgent(BMADAgentInterface):
+    """
+    An agent whose work is a single call to the backend passed in its config.
+    """
+    agent_name = "fake_model_agent"
+    metadata = {"dependencies": []}
+
+    def initialize(self, config: Dict[str, Any] = None) -> None:
+        self.backend = config["backend"]
+
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"completion": self.backend.complete(input_data["prompt"])}
+
+    async def arun(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"completion": await self.backend.acomplete(input_data["prompt"])}
+
+    def shutdown(self) -> None:
+        pass
+
+
+def build_workflow(backend: FakeBackend, **options) -> Workflow:
+    workflow = Workflow(validate_inputs=False, **options)
+    workflow.add_node(FakeModelAgent, name="draft", config={"backend": backend},
+                      build_input=lambda context: {"prompt": f"outline {context['input']['topic']}"})
+    workflow.add_node(SEOBlogAgent, depends_on=["draft"],
+                      build_input=lambda context: {"topic": context["input"]["topic"],
+                                                   "keywords": ["soil", "light", "water"]})
+    workflow.add_node(ImagePromptAgent, fan_out=True, depends_on=["seo_blog_agent"],
+                      build_input=lambda context: ({"base_subject": prompt}
+                                                   for prompt in context["seo_blog_agent"]["image_prompts"]))
+    workflow.add_node(FakeModelAgent, name="render", fan_out=True, depends_on=["image_prompt_agent"],
+                      config={"backend": backend},
+                      build_input=lambda context: ({"prompt": output["prompt"]}
+                                                   for output in context["image_prompt_agent"]))
+    return workflow
+
+
+def timed_run(workflow, workflow_input):
+    start = time.perf_counter()
+    workflow.run(workflow_input)
+    return time.perf_counter() - start
+
+
+async def timed_arun(workflow, workflow_input):
+    start = time.perf_counter()
+    await workflow.arun(workflow_input)
+    return time.perf_counter() - start
+
+
+def report(label, backend, seconds, latencies, threads, count):
+    latencies.sort()
+    print(f"{label:<30}{count / seconds:>10.0f}{statistics.median(latencies) * 1000:>10.0f}"
+          f"{latencies[int(len(latencies) * 0.99) - 1] * 1000:>10.0f}{backend.max_in_flight:>11}{threads:>9}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workflows", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--threads", type=int, default=64, help="threads for run(), both outer and per workflow")
+    parser.add_argument("--concurrency", type=int, default=2048, help="max_concurrency for arun()")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    inputs = [{"topic": f"container gardening {i}"} for i in range(args.workflows)]
+
+    print(f"{'':<30}{'wf/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'in flight':>11}{'threads':>9}")
+    backend = FakeBackend(args.latency_ms / 1000)
+    with build_workflow(backend, max_workers=args.threads) as workflow, \
+            ThreadPoolExecutor(max_workers=args.threads) as pool:
+        start = time.perf_counter()
+        latencies = list(pool.map(timed_run, [workflow] * len(inputs), inputs))
+        seconds = time.perf_counter() - start
+        report(f"run() on {args.threads}+{args.threads} threads", backend, seconds, latencies,
+               threading.active_count(), len(inputs))
+
+    backend = FakeBackend(args.latency_ms / 1000)
+
+    async def run_all(workflow):
+        start = time.perf_counter()
+        latencies = await asyncio.gather(*(timed_arun(workflow, workflow_input) for workflow_input in inputs))
+        return time.perf_counter() - start, list(latencies), threading.active_count()
+
+    with build_workflow(backend, max_concurrency=args.concurrency) as workflow:
+        seconds, latencies, threads = asyncio.run(run_all(workflow))
+        report("arun() on one event loop", backend, seconds, latencies, threads, len(inputs))
+
+
+if __name__ == "__main__":
+    main()
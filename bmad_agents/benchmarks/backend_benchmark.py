@@ -0,0 +1,92 @@
+"""
+Measures HTTPModelBackend against the local stub model server (StubModelServer): a new
+connection per request versus pooled keep-alive connections, one request per prompt
+versus the batch endpoint, and the async client. The stub adds a fixed latency to every
+request and fails a fraction of them, which the backend retries with jittered backoff.
+
+Reports prompts per second, the HTTP requests and TCP connections each run took, the
+retries the client made, and whether every prompt got its completion.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.backend_benchmark --prompts 2000 --latency-ms 5 --error-rate 0.02
+"""
+import argparse
+import asyncio
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..model_backends import HTTPModelBackend
+from ..model_stub_server import StubModelServer
+
+
+def threaded(backend, prompts, threads):
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        return list(pool.map(backend.generate, prompts))
+
+
+def measure(label, server, backend, call):
+    before = server.stats()
+    start = time.perf_counter()
+    completions = call()
+    seconds = time.perf_counter() - start
+    after = server.stats()
+    backend.close()
+    expected = [server.complete(prompt, {}) for prompt in call.prompts]
+    print(f"{label:<40}{len(completions) / seconds:>11.0f}{after['requests'] - before['requests']:>10}"
+          f"{after['connections'] - before['connections']:>13}{backend.retries:>9}"
+          f"{'yes' if completions == expected else 'NO':>10}")
+
+
+class Call:
+    """
+    A benchmark run: `function(prompts)`, remembered with its prompts so the results can be checked.
+    """
+    def __init__(self, function, prompts):
+        self.function = function
+        self.prompts = prompts
+
+    def __call__(self):
+        return self.function(self.prompts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--prompts", type=int, default=2000)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--threads", type=int, default=16, help="caller threads, and connections per pool")
+    parser.add_argument("--batch-size", type=int, default=32)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    prompts = [f"Write a headline about container gardening, take {i}" for i in range(args.prompts)]
+    options = {"max_connections": args.threads, "max_retries": 10, "backoff_base": 0.005, "seed": 7}
+
+    print(f"{'':<40}{'prompts/s':>11}{'requests':>10}{'connections':>13}{'retries':>9}{'complete':>10}")
+    with StubModelServer(latency=args.latency_ms / 1000, error_rate=args.error_rate, seed=7) as server:
+        backend = HTTPModelBackend(server.url, keep_alive=False, **options)
+        measure(f"{args.threads} threads, connection per request", server, backend,
+                Call(lambda batch: threaded(backend, batch, args.threads), prompts))
+
+        backend = HTTPModelBackend(server.url, **options)
+        measure(f"{args.threads} threads, keep-alive pool", server, backend,
+                Call(lambda batch: threaded(backend, batch, args.threads), prompts))
+
+        backend = HTTPModelBackend(server.url, **options)
+        measure("generate_many(), request per prompt", server, backend, Call(backend.generate_many, prompts))
+
+        backend = HTTPModelBackend(server.url, batch_path=server.batch_path, batch_size=args.batch_size, **options)
+        measure(f"generate_many(), batches of {args.batch_size}", server, backend,
+                Call(backend.generate_many, prompts))
+
+        backend = HTTPModelBackend(server.url, **options)
+        measure("agenerate_many(), request per prompt", server, backend,
+                Call(lambda batch: asyncio.run(backend.agenerate_many(batch)), prompts))
+
+        backend = HTTPModelBackend(server.url, max_connections=256, max_retries=10, backoff_base=0.005, seed=7)
+        measure("agenerate_many(), 256 connections", server, backend,
+                Call(lambda batch: asyncio.run(backend.agenerate_many(batch)), prompts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,71 @@
+"""
+Compares the per-record cost of looping over process()/output() with process_batch().
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.batch_benchmark --records 50000
+"""
+import argparse
+import logging
+import os
+import time
+
+from ..image_prompt_agent.agent import ImagePromptAgent
+from ..keyword_expander_agent.agent import KeywordExpanderAgent
+from ..content_formatter_agent.agent import ContentFormatterAgent
+
+
+def make_inputs(agent_class, n):
+    if agent_class is ImagePromptAgent:
+        return [{
+            "base_subject": f"a lighthouse on a cliff number {i}",
+            "style": "cinematic",
+            "model": "midjourney",
+            "lighting": "golden hour",
+            "modifiers": ["8k", "hyperdetailed"]
+        } for i in range(n)]
+    if agent_class is KeywordExpanderAgent:
+        return [{"seed_keywords": [f"seed {i}", f"topic {i}"], "num_variations": 5} for i in range(n)]
+    return [{"content": f"Paragraph {i} of the blog post.", "format": "html"} for i in range(n)]
+
+
+def run_single(agent, inputs):
+    outputs = []
+    for input_data in inputs:
+        agent.process(input_data)
+        outputs.append(agent.output())
+    return outputs
+
+
+def run_batch(agent, inputs):
+    return agent.process_batch(inputs)
+
+
+def measure(fn, agent, inputs):
+    start = time.perf_counter()
+    fn(agent, inputs)
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=20000)
+    args = parser.parse_args()
+
+    # Keep the agents' INFO logging active (it is part of the per-call cost) but discard the output.
+    devnull = open(os.devnull, "w")
+    logging.basicConfig(level=logging.INFO, stream=devnull)
+
+    print(f"{'agent':<24}{'single us/rec':>15}{'batch us/rec':>15}{'speedup':>10}")
+    for agent_class in (ImagePromptAgent, KeywordExpanderAgent, ContentFormatterAgent):
+        agent = agent_class()
+        agent.initialize()
+        inputs = make_inputs(agent_class, args.records)
+        single = measure(run_single, agent, inputs)
+        batch = measure(run_batch, agent, inputs)
+        agent.shutdown()
+        print(f"{agent_class.agent_name:<24}{single / args.records * 1e6:>15.2f}"
+              f"{batch / args.records * 1e6:>15.2f}{single / batch:>9.1f}x")
+
+
+if __name__ == "__main__":
+    main()
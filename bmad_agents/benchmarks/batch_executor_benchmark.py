@@ -0,0 +1,62 @@
+"""
+Measures BatchExecutor throughput for the blog + images workflow in thread and process
+mode as the number of workers grows. Process mode should scale with the core count;
+thread mode stays flat because the mock agents are CPU-bound and share the GIL.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.batch_executor_benchmark --workflows 2000
+"""
+import argparse
+import logging
+import os
+import time
+
+from ..orchestrator import BatchExecutor
+from ..orchestrator_example import build_blog_workflow
+
+
+def single_threaded_workflow():
+    return build_blog_workflow(max_workers=1)
+
+
+def worker_counts(limit):
+    counts = []
+    n = 1
+    while n < limit:
+        counts.append(n)
+        n *= 2
+    counts.append(limit)
+    return counts
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workflows", type=int, default=2000)
+    parser.add_argument("--chunksize", type=int, default=32)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    args = parser.parse_args()
+    logging.disable(logging.CRITICAL)
+
+    inputs = [{
+        "topic": f"Seasonal gardening guide {i}",
+        "keywords": [f"keyword {i}-{k}" for k in range(10)],
+        "use_keyword_expander": True
+    } for i in range(args.workflows)]
+
+    print(f"{args.workflows} workflows, {os.cpu_count()} CPU(s)")
+    print(f"{'mode':<10}{'workers':>8}{'seconds':>10}{'workflows/s':>14}")
+    for mode in ("thread", "process"):
+        for workers in worker_counts(args.max_workers):
+            with BatchExecutor(single_threaded_workflow, mode=mode, max_workers=workers,
+                               chunksize=args.chunksize) as executor:
+                executor.map(inputs[:workers])  # Start workers and warm their agents
+                start = time.perf_counter()
+                results = executor.map(inputs)
+                elapsed = time.perf_counter() - start
+            failed = sum(1 for result in results if not result.ok)
+            print(f"{mode:<10}{workers:>8}{elapsed:>10.2f}{args.workflows / elapsed:>14.0f}"
+                  + (f"  ({failed} failed)" if failed else ""))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,59 @@
+"""
+Measures single-flight coalescing on bursts of identical requests. A thread pool sends
+SEOBlogAgent requests drawn from a few distinct topics, as several campaigns asking for
+the same post at the same moment would, to one shared agent whose sections come from the
+local stub model server. Runs the burst with and without a SingleFlight and reports
+requests per second, the model calls the burst took and the follower counters.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.coalescing_benchmark --requests 2000 --distinct 20 --threads 64
+"""
+import argparse
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from ..model_stub_server import StubModelServer
+from ..seo_blog_agent.agent import SEOBlogAgent
+from ..single_flight import SingleFlight
+
+
+def burst(agent, inputs, threads):
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        start = time.perf_counter()
+        outputs = list(pool.map(agent.run, inputs))
+        return outputs, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--distinct", type=int, default=20, help="distinct inputs among the requests")
+    parser.add_argument("--threads", type=int, default=64)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    inputs = [{"topic": f"container gardening {i % args.distinct}", "keywords": ["soil", "light"]}
+              for i in range(args.requests)]
+
+    print(f"{'':<22}{'req/s':>10}{'model calls':>13}{'followers':>11}{'max followers':>15}{'sessions':>10}")
+    with StubModelServer(latency=args.latency_ms / 1000, seed=7) as server:
+        for single_flight in (None, SingleFlight()):
+            agent = SEOBlogAgent()
+            agent.initialize({"model_backend": {"url": server.url, "max_connections": args.threads}})
+            if single_flight is not None:
+                single_flight.coalesce(agent)
+            before = server.stats()["requests"]
+            outputs, seconds = burst(agent, inputs, args.threads)
+            calls = server.stats()["requests"] - before
+            agent.shutdown()
+            stats = single_flight.stats() if single_flight is not None else {"followers": 0, "max_followers": 0}
+            # Every caller must still get a session of its own
+            sessions = len({output_data["context_id"] for output_data in outputs})
+            label = "single flight" if single_flight is not None else "uncoalesced"
+            print(f"{label:<22}{len(inputs) / seconds:>10.0f}{calls:>13}{stats['followers']:>11}"
+                  f"{stats['max_followers']:>15}{sessions:>10}")
+
+
+if __name__ == "__main__":
+    main()
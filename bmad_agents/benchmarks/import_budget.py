@@ -0,0 +1,84 @@
+"""
+Enforces the cold-start import budget of the bmad_agents package.
+
+Every measurement runs in a fresh interpreter. The check fails (exit status 1) when
+- importing the package imports any agent module,
+- resolving one agent by name imports any other agent's module, or
+- the median time to import the package and load one agent exceeds --budget-ms.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.import_budget
+    python -m bmad_agents.benchmarks.import_budget --budget-ms 30 --runs 9
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from ..registry import available_agents
+
+PACKAGE_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+# Runs in the child interpreter; prints the timings and the agent modules that got imported
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import bmad_agents
+package_imported = time.perf_counter()
+agent_modules = lambda: sorted(m for m in sys.modules if m.startswith("bmad_agents.") and m.endswith(".agent"))
+after_package = agent_modules()
+bmad_agents.get_agent_class(sys.argv[1])
+print(json.dumps({
+    "package_ms": (package_imported - started) * 1000,
+    "total_ms": (time.perf_counter() - started) * 1000,
+    "after_package": after_package,
+    "after_agent": agent_modules()
+}))
+"""
+
+
+def probe(agent_name):
+    completed = subprocess.run(
+        [sys.executable, "-c", PROBE, agent_name], cwd=PACKAGE_ROOT,
+        capture_output=True, text=True, check=True
+    )
+    return json.loads(completed.stdout)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget-ms", type=float, default=50.0,
+                        help="Allowed median milliseconds to import the package and load one agent (default 50).")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+
+    failures = []
+    print(f"{'agent':<26}{'package ms':>12}{'total ms':>10}")
+    for agent_name in available_agents():
+        runs = [probe(agent_name) for _ in range(args.runs)]
+        package_ms = statistics.median(run["package_ms"] for run in runs)
+        total_ms = statistics.median(run["total_ms"] for run in runs)
+        print(f"{agent_name:<26}{package_ms:>12.2f}{total_ms:>10.2f}")
+
+        expected = f"bmad_agents.{agent_name}.agent"
+        if runs[0]["after_package"]:
+            failures.append(f"importing bmad_agents imported {runs[0]['after_package']}")
+        unexpected = [module for module in runs[0]["after_agent"] if module != expected]
+        if unexpected:
+            failures.append(f"loading {agent_name} also imported {unexpected}")
+        if total_ms > args.budget_ms:
+            failures.append(f"loading {agent_name} took {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+
+    if failures:
+        print("\nImport budget exceeded:")
+        for failure in sorted(set(failures)):
+            print(f"  {failure}")
+        return 1
+    print(f"\nAll agents load within {args.budget_ms:.0f} ms.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,77 @@
+"""
+Times near-duplicate keyword clustering on synthetic keyword lists in which about half of
+the keywords are variants (plurals, typos, case changes) of another keyword, and reports
+how many near-duplicate pairs the LSH path misses compared with exact all-pairs similarity
+on a subset small enough to compare exhaustively.
+
+Requires NumPy.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.keyword_cluster_benchmark --sizes 10000 100000 1000000
+"""
+import argparse
+import random
+import resource
+import string
+import time
+
+from ..keyword_expander_agent.clustering import cluster_keywords
+
+
+def make_keywords(n, rng):
+    words = ["".join(rng.choice(string.ascii_lowercase) for _ in range(rng.randint(3, 9))) for _ in range(5000)]
+    keywords = []
+    while len(keywords) < n:
+        base = " ".join(rng.choice(words) for _ in range(rng.randint(2, 4)))
+        keywords.append(base)
+        for _ in range(rng.randint(0, 3)):
+            kind = rng.random()
+            if kind < 0.4:
+                keywords.append(base + "s")
+            elif kind < 0.7:
+                i = rng.randrange(len(base))
+                keywords.append(base[:i] + rng.choice(string.ascii_lowercase) + base[i + 1:])
+            else:
+                keywords.append(base.upper())
+    return keywords[:n]
+
+
+def missed_pairs(keywords, threshold):
+    # Fraction of keyword pairs grouped by the exact path that the LSH path puts in different clusters
+    exact = cluster_keywords(keywords, threshold, exact_limit=len(keywords)).labels
+    lsh = cluster_keywords(keywords, threshold, exact_limit=0).labels
+    grouped = missed = 0
+    first_of = {}
+    for i, label in enumerate(exact.tolist()):
+        if label in first_of:
+            grouped += 1
+            missed += lsh[i] != lsh[first_of[label]]
+        else:
+            first_of[label] = i
+    return missed / grouped if grouped else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10000, 100000, 1000000])
+    parser.add_argument("--threshold", type=float, default=0.8)
+    parser.add_argument("--check-size", type=int, default=10000,
+                        help="keywords compared against exact all-pairs similarity")
+    args = parser.parse_args()
+    rng = random.Random(42)
+
+    print(f"{'keywords':>10}{'clusters':>10}{'seconds':>10}{'max RSS MiB':>13}")
+    for size in args.sizes:
+        keywords = make_keywords(size, rng)
+        start = time.perf_counter()
+        clusters = cluster_keywords(keywords, args.threshold)
+        seconds = time.perf_counter() - start
+        rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+        print(f"{size:>10}{len(clusters):>10}{seconds:>10.2f}{rss:>13.0f}")
+
+    missed = missed_pairs(make_keywords(args.check_size, rng), args.threshold)
+    print(f"\nLSH vs exact on {args.check_size} keywords: {missed:.2%} of grouped keywords split off")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+"""
+Compares the time and peak memory of KeywordExpanderAgent.process(), which builds the
+whole expanded list, with paged expansion under each deduplication mode.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.keyword_stream_benchmark --seeds 100000 --variations 10
+"""
+import argparse
+import gc
+import logging
+import time
+import tracemalloc
+
+from ..keyword_expander_agent.agent import KeywordExpanderAgent
+
+
+def measure(fn):
+    # Timed and traced in separate runs: tracemalloc slows allocation-heavy code several-fold
+    gc.collect()
+    start = time.perf_counter()
+    count = fn()
+    seconds = time.perf_counter() - start
+    gc.collect()
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1]
+    tracemalloc.stop()
+    return count, seconds, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seeds", type=int, default=100000)
+    parser.add_argument("--variations", type=int, default=10)
+    parser.add_argument("--page-size", type=int, default=10000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    agent = KeywordExpanderAgent()
+    agent.initialize()
+    # Every tenth seed repeats an earlier one, as overlapping seed lists do
+    seeds = [f"seed keyword {i if i % 10 else i // 10}" for i in range(args.seeds)]
+    input_data = {"seed_keywords": seeds, "num_variations": args.variations}
+
+    def full_list():
+        agent.process(input_data)
+        count = len(agent.output()["expanded_keywords"])
+        agent.output_data = None
+        return count
+
+    def paged(dedupe):
+        def run():
+            return sum(len(page["expanded_keywords"])
+                       for page in agent.iter_pages({**input_data, "dedupe": dedupe}, args.page_size))
+        return run
+
+    print(f"{'mode':<20}{'keywords':>12}{'seconds':>10}{'peak MiB':>10}")
+    for name, fn in (("process()", full_list), ("paged, none", paged("none")),
+                     ("paged, exact", paged("exact")), ("paged, bloom", paged("bloom"))):
+        count, seconds, peak = measure(fn)
+        print(f"{name:<20}{count:>12}{seconds:>10.2f}{peak / 2 ** 20:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
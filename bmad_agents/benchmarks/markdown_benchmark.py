@@ -0,0 +1,117 @@
+"""
+Measures the streaming Markdown renderer of ContentFormatterAgent on multi-MB blog-style
+documents: throughput of rendering a document held in memory, throughput and peak memory
+of streaming it from a file to a file, and how both scale with document size. Also
+compares rendering HTML, normalized Markdown and plain text with one call per format
+against one parse fanned out to all three, and against re-rendering a cached parse.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.markdown_benchmark --megabytes 4 16 64
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+from ..content_formatter_agent.agent import ContentFormatterAgent
+from ..content_formatter_agent.document import DocumentCache, render_formats
+from ..content_formatter_agent.markdown import render_markdown
+
+FORMATS = ("html", "markdown", "text")
+
+SECTION = """## Section {i}
+
+This is paragraph {i} of the post, with *emphasis*, **strong text**, a [link](https://example.com/posts/{i}?ref=feed&page=2 "Post {i}")
+and `inline code`. It wraps over a second line & mentions <raw tags> that must be escaped.
+
+- first point about topic {i}
+- second point with a nested list:
+  - nested item one
+  - nested item two
+1. ordered step
+2. another step
+
+> A quoted remark about section {i}.
+
+```python
+def section_{i}(value):
+    return value * {i}  # <not a tag>
+```
+
+![diagram {i}](https://example.com/images/{i}.png)
+
+---
+"""
+
+
+def write_document(path, megabytes):
+    # Writes sections until the file reaches the requested size; returns its size in bytes
+    size, i = 0, 0
+    target = megabytes * 1024 * 1024
+    with open(path, "w", encoding="utf-8") as f:
+        while size < target:
+            section = SECTION.format(i=i)
+            f.write(section)
+            size += len(section)
+            i += 1
+    return size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--megabytes", type=int, nargs="+", default=[4, 16, 64])
+    parser.add_argument("--chunk-size", type=int, default=65536)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    agent = ContentFormatterAgent()
+    agent.initialize()
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_path = os.path.join(directory, "post.md")
+        target_path = os.path.join(directory, "post.html")
+        for megabytes in args.megabytes:
+            size = write_document(source_path, megabytes)
+            mb = size / (1024 * 1024)
+
+            with open(source_path, encoding="utf-8") as f:
+                content = f.read()
+            start = time.perf_counter()
+            html = render_markdown(content)
+            seconds = time.perf_counter() - start
+            print(f"{mb:6.1f} MB in memory: {seconds:.2f}s ({mb / seconds:.1f} MB/s), {len(html) / size:.2f}x output")
+            del html
+
+            start = time.perf_counter()
+            for target_format in FORMATS:
+                render_markdown(content, target_format=target_format)
+            separate = time.perf_counter() - start
+            start = time.perf_counter()
+            render_formats(content, FORMATS)
+            fanned_out = time.perf_counter() - start
+            cache = DocumentCache(max_chars=size)
+            cache.render(content, ["html"])
+            start = time.perf_counter()
+            cache.render(content, ["markdown", "text"])
+            cached = time.perf_counter() - start
+            print(f"{mb:6.1f} MB to {len(FORMATS)} formats: {separate:.2f}s one call per format, "
+                  f"{fanned_out:.2f}s fanned out from one parse, {cached:.2f}s for two more from the cache")
+            del content, cache
+
+            start = time.perf_counter()
+            with open(source_path, encoding="utf-8") as source, open(target_path, "w", encoding="utf-8") as target:
+                agent.format_stream(source, target, "html", chunk_size=args.chunk_size)
+            seconds = time.perf_counter() - start
+
+            tracemalloc.start()
+            with open(source_path, encoding="utf-8") as source, open(target_path, "w", encoding="utf-8") as target:
+                agent.format_stream(source, target, "html", chunk_size=args.chunk_size)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{mb:6.1f} MB streamed:  {seconds:.2f}s ({mb / seconds:.1f} MB/s), "
+                  f"peak traced memory {peak / 1024:.0f} KiB")
+
+
+if __name__ == "__main__":
+    main()
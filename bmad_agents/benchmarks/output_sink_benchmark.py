@@ -0,0 +1,90 @@
+"""
+Compares two ways of writing the outputs of a large fan-out workflow, as
+orchestrator_example does for image prompts. The first collects every output and then
+json.dumps() the whole result. The second streams each output as a JSON line through a
+FileSink while the workflow runs. Reports total time, time to the first byte written and
+peak traced memory, and which JSON serializer the sink uses.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.output_sink_benchmark --items 10000
+"""
+import argparse
+import json
+import logging
+import os
+import tempfile
+import time
+import tracemalloc
+
+from .. import output_sinks
+from ..image_prompt_agent.agent import ImagePromptAgent
+from ..orchestrator import Workflow
+from ..output_sinks import FileSink
+
+
+def build_inputs(context):
+    for i in range(context["input"]["items"]):
+        yield {"base_subject": f"a lighthouse number {i}", "style": "cinematic", "lighting": "golden hour",
+               "modifiers": ["8k", "hyperdetailed"]}
+
+
+class TimedFile:
+    # A binary file that remembers when it was first written to
+    def __init__(self, path):
+        self._file = open(path, "wb")
+        self.first_write = None
+
+    def write(self, data):
+        if self.first_write is None:
+            self.first_write = time.perf_counter()
+        return self._file.write(data)
+
+    def flush(self):
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+
+def accumulate(workflow, items, path):
+    target = TimedFile(path)
+    start = time.perf_counter()
+    results = workflow.run({"items": items})
+    target.write(json.dumps(results, indent=2).encode("utf-8"))
+    target.close()
+    return time.perf_counter() - start, target.first_write - start
+
+
+def stream(workflow, items, path):
+    target = TimedFile(path)
+    start = time.perf_counter()
+    with FileSink(target) as sink:
+        workflow.run({"items": items}, sink=sink)
+    target.close()
+    return time.perf_counter() - start, target.first_write - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=10000)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    print(f"serializer: {'orjson' if output_sinks.orjson is not None else 'json (orjson not installed)'}")
+
+    workflow = Workflow(validate_inputs=False)
+    workflow.add_node(ImagePromptAgent, build_input=build_inputs, fan_out=True)
+    with tempfile.TemporaryDirectory() as directory, workflow:
+        path = os.path.join(directory, "outputs.json")
+        workflow.run({"items": 10})
+        for label, run in (("accumulate + json.dumps", accumulate), ("stream to JSON lines", stream)):
+            seconds, first_byte = run(workflow, args.items, path)
+            tracemalloc.start()
+            run(workflow, args.items, path)
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            print(f"{label:24} {args.items} outputs in {seconds:.2f}s, first byte after {first_byte * 1000:.0f} ms, "
+                  f"peak traced memory {peak / 1024:.0f} KiB, {os.path.getsize(path) / 1024:.0f} KiB written")
+
+
+if __name__ == "__main__":
+    main()
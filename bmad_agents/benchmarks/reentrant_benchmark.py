@@ -0,0 +1,140 @@
+"""
+Compares two ways of serving concurrent requests from a thread pool: creating and
+initializing an agent for every request and calling process()/output(), and sharing one
+warm instance per agent type through its reentrant run(). Reports requests per second for
+each agent, and checks that the shared instance returns what a private one would.
+With --persistent, agents keep their state in SQLite files, as they would across worker
+processes, so initializing one opens a database and loads what is in it.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.reentrant_benchmark --requests 5000 --threads 8 [--persistent]
+"""
+import argparse
+import logging
+import os
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta
+
+from ..content_formatter_agent.agent import ContentFormatterAgent
+from ..image_prompt_agent.agent import ImagePromptAgent
+from ..keyword_expander_agent.agent import KeywordExpanderAgent
+from ..publish_scheduler_agent.agent import PublishSchedulerAgent
+from ..seo_blog_agent.agent import SEOBlogAgent
+from ..video_script_agent.agent import VideoScriptAgent
+
+START = datetime(2030, 1, 1)
+
+
+def make_inputs(agent_class, n):
+    if agent_class is SEOBlogAgent:
+        return [{"topic": f"container gardening {i}", "keywords": ["small spaces", "urban farming"]} for i in range(n)]
+    if agent_class is VideoScriptAgent:
+        return [{"topic": f"quantum computing {i}", "video_length_minutes": 2, "characters": 2} for i in range(n)]
+    if agent_class is ImagePromptAgent:
+        return [{"base_subject": f"a lighthouse number {i}", "style": "cinematic", "lighting": "golden hour",
+                 "modifiers": ["8k", "hyperdetailed"]} for i in range(n)]
+    if agent_class is KeywordExpanderAgent:
+        return [{"seed_keywords": [f"seed {i}", f"topic {i}"], "num_variations": 5} for i in range(n)]
+    if agent_class is ContentFormatterAgent:
+        return [{"content": f"## Part {i}\n\nSome **bold** text and a [link](https://example.com/{i}).\n\n- one\n- two",
+                 "format": "html", "formats": ["text"]} for i in range(n)]
+    return [{"content_id": f"post-{i}", "platform": "blog",
+             "publish_datetime": (START + timedelta(minutes=i)).isoformat()} for i in range(n)]
+
+
+def make_config(agent_class, directory):
+    if directory is None:
+        return None
+    if agent_class is SEOBlogAgent:
+        return {"context_store": {"backend": "sqlite", "path": os.path.join(directory, "contexts.db")}}
+    if agent_class is ImagePromptAgent:
+        return {"asset_index": {"path": os.path.join(directory, "assets.db")}}
+    if agent_class is PublishSchedulerAgent:
+        return {"schedule_store": {"path": os.path.join(directory, "schedules.db")}}
+    return None
+
+
+def per_request(agent_class, config, pool, inputs):
+    def serve(input_data):
+        agent = agent_class()
+        agent.initialize(config)
+        try:
+            agent.process(input_data)
+            return agent.output()
+        finally:
+            agent.shutdown()
+    return list(pool.map(serve, inputs))
+
+
+def shared(agent, pool, inputs):
+    return list(pool.map(agent.run, inputs))
+
+
+def check_sessions(pool, sessions, turns):
+    # Every session continues on the one shared instance from several threads at once
+    agent = SEOBlogAgent()
+    agent.initialize()
+
+    def converse(i):
+        output_data = agent.run({"topic": f"session {i}", "keywords": ["pots"]})
+        for turn in range(turns):
+            output_data = agent.run({"topic": f"session {i} turn {turn}", "keywords": ["soil"],
+                                     "context_id": output_data["context_id"]})
+        return output_data["content"].count(f"Expanding on session {i} turn") == turns
+
+    ok = all(pool.map(converse, range(sessions)))
+    agent.shutdown()
+    return ok
+
+
+def comparable(agent_class, output_data):
+    # Fields that differ between any two calls, whoever serves them
+    if agent_class is SEOBlogAgent:
+        return {k: v for k, v in output_data.items() if k != "context_id"}
+    if agent_class is VideoScriptAgent:
+        return output_data["title"], output_data["total_estimated_duration_seconds"]
+    if agent_class is PublishSchedulerAgent:
+        return output_data["content_id"], output_data["publish_datetime"]
+    return output_data
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--persistent", action="store_true")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    with tempfile.TemporaryDirectory() as directory:
+        compare(args, directory if args.persistent else None)
+
+
+def compare(args, directory):
+    print(f"{'agent':<26}{'per request req/s':>19}{'shared run() req/s':>20}{'speedup':>10}{'same output':>13}")
+    with ThreadPoolExecutor(max_workers=args.threads) as pool:
+        for agent_class in (SEOBlogAgent, VideoScriptAgent, ImagePromptAgent, KeywordExpanderAgent,
+                            ContentFormatterAgent, PublishSchedulerAgent):
+            inputs = make_inputs(agent_class, args.requests)
+            config = make_config(agent_class, directory)
+            start = time.perf_counter()
+            expected = per_request(agent_class, config, pool, inputs)
+            fresh = time.perf_counter() - start
+
+            agent = agent_class()
+            agent.initialize(config)
+            start = time.perf_counter()
+            outputs = shared(agent, pool, inputs)
+            warm = time.perf_counter() - start
+            agent.shutdown()
+
+            same = all(comparable(agent_class, a) == comparable(agent_class, b) for a, b in zip(expected, outputs))
+            print(f"{agent_class.agent_name:<26}{args.requests / fresh:>19.0f}{args.requests / warm:>20.0f}"
+                  f"{fresh / warm:>9.1f}x{'yes' if same else 'NO':>13}")
+        print(f"concurrent multi-turn sessions on one instance intact: "
+              f"{'yes' if check_sessions(pool, 64, 5) else 'NO'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,86 @@
+"""
+Measures ResultCache on a workload that repeats inputs, as campaigns do: each call draws
+from a pool of --unique distinct inputs. Reports the per-call cost without the cache, on
+a first pass with memory and disk tiers, in a fresh worker whose disk tier is already
+warm, and for a pure memory hit, plus the first pass's hit ratio.
+
+The bundled agents are mocks whose calls cost about as much as a cache hit; the savings
+grow with the cost of the agent call that a hit replaces.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.result_cache_benchmark --calls 20000 --unique 2000
+"""
+import argparse
+import logging
+import os
+import random
+import tempfile
+import time
+
+from ..image_prompt_agent.agent import ImagePromptAgent
+from ..keyword_expander_agent.agent import KeywordExpanderAgent
+from ..content_formatter_agent.agent import ContentFormatterAgent
+from ..result_cache import ResultCache
+
+
+def make_pool(agent_class, n):
+    if agent_class is ImagePromptAgent:
+        return [{"base_subject": f"a lighthouse number {i}", "style": "cinematic", "model": "midjourney",
+                 "lighting": "golden hour", "modifiers": ["8k", "hyperdetailed"]} for i in range(n)]
+    if agent_class is KeywordExpanderAgent:
+        return [{"seed_keywords": [f"seed {i}", f"topic {i}", f"niche {i}"], "num_variations": 20} for i in range(n)]
+    return [{"content": f"Paragraph {i} of the blog post. " * 20, "format": "html"} for i in range(n)]
+
+
+def run(agent, inputs):
+    start = time.perf_counter()
+    for input_data in inputs:
+        agent.process(input_data)
+        agent.output()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    parser.add_argument("--unique", type=int, default=2000)
+    args = parser.parse_args()
+
+    # Keep the agents' INFO logging active (it is part of the per-call cost) but discard the output.
+    devnull = open(os.devnull, "w")
+    logging.basicConfig(level=logging.INFO, stream=devnull)
+    rng = random.Random(42)
+
+    print(f"{'agent':<26}{'plain us':>10}{'first us':>10}{'cold us':>10}{'hit us':>10}{'hit ratio':>11}")
+    with tempfile.TemporaryDirectory() as directory:
+        for agent_class in (ImagePromptAgent, KeywordExpanderAgent, ContentFormatterAgent):
+            pool = make_pool(agent_class, args.unique)
+            inputs = [rng.choice(pool) for _ in range(args.calls)]
+
+            plain = agent_class()
+            plain.initialize()
+            plain_seconds = run(plain, inputs)
+
+            path = os.path.join(directory, f"{agent_class.agent_name}.db")
+            cache = ResultCache(disk_path=path)
+            memoized = cache.memoize(agent_class())
+            memoized.initialize()
+            memory_seconds = run(memoized, inputs)
+            hit_ratio = cache.stats()["hit_ratio"]
+            cache.close()
+
+            # A fresh worker: empty memory tier, disk tier already warm
+            cold = ResultCache(disk_path=path)
+            memoized = cold.memoize(agent_class())
+            memoized.initialize()
+            disk_seconds = run(memoized, inputs)
+            hit_seconds = run(memoized, inputs)
+            cold.close()
+
+            n = args.calls
+            print(f"{agent_class.agent_name:<26}{plain_seconds / n * 1e6:>10.2f}{memory_seconds / n * 1e6:>10.2f}"
+                  f"{disk_seconds / n * 1e6:>10.2f}{hit_seconds / n * 1e6:>10.2f}{hit_ratio:>11.1%}")
+
+
+if __name__ == "__main__":
+    main()
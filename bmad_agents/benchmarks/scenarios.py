@@ -0,0 +1,147 @@
+"""
+Benchmark scenarios for the BMAD agents, one set per agent.
+
+Each scenario has a `setup()` that returns the state for one operation and a `run(state)`
+that performs it. Only `run()` is timed.
+"""
+from datetime import datetime, timedelta
+
+
+from ..seo_blog_agent.agent import SEOBlogAgent
+from ..video_script_agent.agent import VideoScriptAgent
+from ..image_prompt_agent.agent import ImagePromptAgent
+from ..keyword_expander_agent.agent import KeywordExpanderAgent
+from ..content_formatter_agent.agent import ContentFormatterAgent
+from ..publish_scheduler_agent.agent import PublishSchedulerAgent
+
+
+class Scenario:
+    """
+    A named, repeatable benchmark operation.
+    """
+    def __init__(self, name, agent_name, setup, run, iterations=20):
+        self.name = name
+        self.agent_name = agent_name
+        self.setup = setup
+        self.run = run
+        self.iterations = iterations
+
+
+def _initialized(agent_class, config=None):
+    agent = agent_class()
+    agent.initialize(config)
+    return agent
+
+
+def _seo_multi_turn(state):
+    agent, turns = state
+    agent.process({"topic": "Container Gardening", "keywords": ["small space gardening", "urban farming"],
+                   "use_keyword_expander": True})
+    context_id = agent.output()["context_id"]
+    for i in range(turns):
+        agent.process({"topic": f"follow-up {i}", "keywords": ["pottery", "drainage"], "context_id": context_id})
+    return agent.output()
+
+
+def _video_long(state):
+    agent, input_data = state
+    agent.process(input_data)
+    return agent.output()
+
+
+def _process_one(state):
+    agent, input_data = state
+    agent.process(input_data)
+    return agent.output()
+
+
+def _process_many(state):
+    agent, inputs = state
+    for input_data in inputs:
+        agent.process(input_data)
+        agent.output()
+
+
+def _process_batch(state):
+    agent, inputs = state
+    return agent.process_batch(inputs)
+
+
+def _fresh_scheduler():
+    # Every iteration, and the memory run, schedules into a new agent with an empty store
+    return _initialized(PublishSchedulerAgent, {"schedule_store": {}}), _schedule_inputs(1000)
+
+
+def _schedule_many(state):
+    # One scheduling pass; its peak memory includes the entries the store keeps, which
+    # process() has stored since the scheduler became a persistent schedule store
+    agent, inputs = state
+    for input_data in inputs:
+        agent.process(input_data)
+
+
+def _large_document(paragraphs):
+    blocks = []
+    for i in range(paragraphs):
+        blocks.append(f"## Section {i}\n\nThis is paragraph {i} with a [link](https://example.com/{i}) and `code`.\n"
+                      f"- first point about <topic {i}>\n- second point & more\n")
+    return "\n".join(blocks)
+
+
+def _warm_formatter(input_data):
+    # Parses the document into the formatter's cache, as an earlier request for another format would
+    agent = _initialized(ContentFormatterAgent, {"document_cache": {}})
+    agent.process(dict(input_data, format="html"))
+    return agent, input_data
+
+
+def _schedule_inputs(n):
+    start = datetime(2030, 1, 1)
+    return [{
+        "content_id": f"post-{i}",
+        "publish_datetime": (start + timedelta(minutes=i)).isoformat(),
+        "platform": ("blog", "youtube", "twitter")[i % 3]
+    } for i in range(n)]
+
+
+SCENARIOS = [
+    Scenario("seo_blog.multi_turn_50", "seo_blog_agent",
+             lambda: (_initialized(SEOBlogAgent), 50), _seo_multi_turn),
+    Scenario("video_script.long_180min", "video_script_agent",
+             lambda: (_initialized(VideoScriptAgent),
+                      {"topic": "History of Flight", "video_length_minutes": 180, "style": "documentary",
+                       "characters": 3}),
+             _video_long, iterations=10),
+    Scenario("image_prompt.single_x1000", "image_prompt_agent",
+             lambda: (_initialized(ImagePromptAgent),
+                      [{"base_subject": f"lighthouse {i}", "style": "cinematic", "lighting": "golden hour",
+                        "modifiers": ["8k"]} for i in range(1000)]),
+             _process_many, iterations=10),
+    Scenario("image_prompt.batch_x1000", "image_prompt_agent",
+             lambda: (_initialized(ImagePromptAgent),
+                      [{"base_subject": f"lighthouse {i}", "style": "cinematic", "lighting": "golden hour",
+                        "modifiers": ["8k"]} for i in range(1000)]),
+             _process_batch, iterations=10),
+    Scenario("keyword_expander.1000_seeds_x50", "keyword_expander_agent",
+             lambda: (_initialized(KeywordExpanderAgent),
+                      {"seed_keywords": [f"seed keyword {i}" for i in range(1000)], "num_variations": 50}),
+             _process_one, iterations=10),
+    Scenario("content_formatter.html_1mb", "content_formatter_agent",
+             lambda: (_initialized(ContentFormatterAgent, {"document_cache": False}),
+                      {"content": _large_document(6000), "format": "html"}),
+             _process_one, iterations=10),
+    Scenario("content_formatter.markdown_1mb", "content_formatter_agent",
+             lambda: (_initialized(ContentFormatterAgent, {"document_cache": False}),
+                      {"content": _large_document(6000), "format": "markdown"}),
+             _process_one, iterations=10),
+    Scenario("content_formatter.fanout_1mb", "content_formatter_agent",
+             lambda: (_initialized(ContentFormatterAgent, {"document_cache": False}),
+                      {"content": _large_document(6000), "format": "html", "formats": ["markdown", "text"]}),
+             _process_one, iterations=10),
+    Scenario("content_formatter.cached_text_1mb", "content_formatter_agent",
+             lambda: _warm_formatter({"content": _large_document(6000), "format": "text"}),
+             _process_one, iterations=10),
+    Scenario("publish_scheduler.schedule_x1000", "publish_scheduler_agent",
+             _fresh_scheduler,
+             _schedule_many, iterations=10),
+]
@@ -0,0 +1,93 @@
+"""
+Measures ScheduleStore with a large number of pending publications spread over a year:
+bulk insert, next-due lookup, the due poll, range queries, cancel and reschedule, and
+the reload of a persistent store after a restart.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.scheduler_benchmark --items 1000000
+"""
+import argparse
+import logging
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from ..publish_scheduler_agent.schedule_store import ScheduleStore
+
+PLATFORMS = ("blog", "youtube", "twitter")
+YEAR = 365 * 24 * 3600
+
+
+def per_call_us(fn, calls):
+    samples = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1e6)
+    samples.sort()
+    return statistics.median(samples), samples[int(len(samples) * 0.99)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=1000000)
+    parser.add_argument("--batch", type=int, default=10000, help="items per schedule_many() transaction")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    rng = random.Random(42)
+    base = time.time()
+    items = [(f"content-{i}", rng.choice(PLATFORMS),
+              time.strftime("%Y-%m-%dT%H:%M:%S", time.localtime(base + rng.uniform(0, YEAR))))
+             for i in range(args.items)]
+
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "schedules.db")
+        for label, store_path in (("memory", None), ("sqlite", path)):
+            store = ScheduleStore(store_path)
+            start = time.perf_counter()
+            for i in range(0, len(items), args.batch):
+                store.schedule_many(items[i:i + args.batch])
+            insert_seconds = time.perf_counter() - start
+            print(f"[{label}] inserted {len(store)} items in {insert_seconds:.2f}s "
+                  f"({insert_seconds / len(store) * 1e6:.1f} us/item)")
+
+            median, p99 = per_call_us(store.next_due, 10000)
+            print(f"[{label}] next_due: median {median:.2f} us, p99 {p99:.2f} us")
+            pending = list(store._entries)
+            median, p99 = per_call_us(lambda: store.schedule(f"extra-{rng.random()}", "blog",
+                                                             items[rng.randrange(len(items))][2]), 2000)
+            print(f"[{label}] schedule: median {median:.1f} us, p99 {p99:.1f} us")
+            median, p99 = per_call_us(lambda: store.reschedule(rng.choice(pending), items[rng.randrange(len(items))][2]), 2000)
+            print(f"[{label}] reschedule: median {median:.1f} us, p99 {p99:.1f} us")
+            cancelled = set()
+
+            def cancel_one():
+                schedule_id = rng.choice(pending)
+                if schedule_id not in cancelled:
+                    cancelled.add(schedule_id)
+                    store.cancel(schedule_id)
+            median, p99 = per_call_us(cancel_one, 2000)
+            print(f"[{label}] cancel: median {median:.1f} us, p99 {p99:.1f} us")
+
+            window_start = base + YEAR / 2
+            median, p99 = per_call_us(lambda: store.range(window_start, window_start + 6 * 3600, "youtube"), 200)
+            found = len(store.range(window_start, window_start + 6 * 3600, "youtube"))
+            print(f"[{label}] range (6 h, one platform, {found} hits): median {median:.1f} us, p99 {p99:.1f} us")
+            start = time.perf_counter()
+            due = store.due(base + 24 * 3600)
+            print(f"[{label}] due peek ({len(due)} items): {(time.perf_counter() - start) * 1e3:.2f} ms")
+            start = time.perf_counter()
+            popped = store.pop_due(base + 24 * 3600)
+            print(f"[{label}] pop_due ({len(popped)} items): {(time.perf_counter() - start) * 1e3:.2f} ms")
+            store.close()
+
+        start = time.perf_counter()
+        reloaded = ScheduleStore(path)
+        print(f"[sqlite] reloaded {len(reloaded)} pending items in {time.perf_counter() - start:.2f}s")
+        reloaded.close()
+
+
+if __name__ == "__main__":
+    main()
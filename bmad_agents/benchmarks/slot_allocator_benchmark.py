@@ -0,0 +1,74 @@
+"""
+Bulk-schedules posts that all request the same publish time, as a campaign import does,
+through PublishSchedulerAgent with `allocate_slot`. Compares one process_batch() call,
+which places the whole batch in one sweep per platform, with one process() call per item,
+which rescans the items already placed after the requested time. Also checks that every
+platform's schedules conform to its limits afterwards.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.slot_allocator_benchmark --items 20000 --per-item 2000
+"""
+import argparse
+import collections
+import logging
+import time
+from datetime import datetime, timedelta
+
+from ..publish_scheduler_agent.agent import PublishSchedulerAgent
+
+PLATFORMS = ("blog", "youtube", "twitter")
+
+
+def make_inputs(n, requested):
+    return [{"content_id": f"post-{i}", "platform": PLATFORMS[i % 3], "publish_datetime": requested,
+             "allocate_slot": True} for i in range(n)]
+
+
+def violations(agent):
+    # Re-checks every platform's pending schedules against its token bucket and spacing
+    count = 0
+    for platform in PLATFORMS:
+        limits = agent.slot_allocator.limits_for(platform)
+        arrival, previous = float("-inf"), None
+        for entry in agent.schedule_store.iter_platform(platform, float("-inf")):
+            if entry.publish_at < arrival - limits.tolerance - 1e-6:
+                count += 1
+            if previous is not None and entry.publish_at - previous < limits.min_spacing_seconds - 1e-6:
+                count += 1
+            arrival = max(arrival, entry.publish_at) + limits.emission_interval
+            previous = entry.publish_at
+    return count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=20000)
+    parser.add_argument("--per-item", type=int, default=2000, help="items for the one-call-per-item comparison")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+    requested = (datetime.now() + timedelta(days=1)).replace(microsecond=0).isoformat()
+
+    agent = PublishSchedulerAgent()
+    agent.initialize()
+    start = time.perf_counter()
+    outputs = agent.process_batch(make_inputs(args.items, requested))
+    seconds = time.perf_counter() - start
+    reasons = collections.Counter(output["slot_reason"] for output in outputs)
+    last = max(outputs, key=lambda output: output["publish_datetime"])["publish_datetime"]
+    print(f"process_batch: {args.items} items in {seconds:.2f}s ({seconds / args.items * 1e6:.1f} us/item), "
+          f"last slot {last}")
+    print(f"  reasons: {dict(reasons)}")
+    print(f"  limit violations: {violations(agent)}")
+
+    agent = PublishSchedulerAgent()
+    agent.initialize()
+    start = time.perf_counter()
+    for input_data in make_inputs(args.per_item, requested):
+        agent.process(input_data)
+    seconds = time.perf_counter() - start
+    print(f"process per item: {args.per_item} items in {seconds:.2f}s ({seconds / args.per_item * 1e6:.1f} us/item)")
+    print(f"  limit violations: {violations(agent)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,140 @@
+"""
+Benchmark suite for the BMAD agents with regression baselines.
+
+For every scenario in `scenarios.py` the suite reports ops/sec, p50/p99 latency of one
+operation and the peak memory allocated during one operation (measured with tracemalloc
+in a separate, untimed run). Results are compared with `baseline.json` and the suite
+exits with status 1 when a scenario is slower or allocates more than the threshold allows.
+Baselines are machine-specific: regenerate them with --save-baseline on the machine that
+runs the comparison.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.suite                     # run and compare with baseline.json
+    python -m bmad_agents.benchmarks.suite --save-baseline     # run and overwrite baseline.json
+    python -m bmad_agents.benchmarks.suite --scenario video --threshold 0.1
+"""
+import argparse
+import gc
+import json
+import logging
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+from .scenarios import SCENARIOS
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+
+
+def percentile(sorted_values, q):
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+def measure(scenario, iterations):
+    # Warm up caches, lazy imports and allocator pools before timing
+    scenario.run(scenario.setup())
+    latencies = []
+    for _ in range(iterations):
+        state = scenario.setup()
+        gc.collect()
+        start = time.perf_counter()
+        scenario.run(state)
+        latencies.append(time.perf_counter() - start)
+    latencies.sort()
+
+    state = scenario.setup()
+    gc.collect()
+    tracemalloc.start()
+    scenario.run(state)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    median = statistics.median(latencies)
+    return {
+        "agent": scenario.agent_name,
+        "iterations": iterations,
+        "ops_per_sec": 1.0 / median if median > 0 else float("inf"),
+        "p50_ms": percentile(latencies, 0.50) * 1000,
+        "p99_ms": percentile(latencies, 0.99) * 1000,
+        "peak_memory_kib": peak / 1024
+    }
+
+
+def compare(results, baseline, threshold, memory_threshold):
+    """
+    Returns a list of human-readable regressions.
+    """
+    regressions = []
+    for name, result in results.items():
+        base = baseline.get(name)
+        if base is None:
+            continue
+        if result["ops_per_sec"] < base["ops_per_sec"] * (1 - threshold):
+            regressions.append(f"{name}: {result['ops_per_sec']:.1f} ops/sec vs baseline "
+                               f"{base['ops_per_sec']:.1f} (-{1 - result['ops_per_sec'] / base['ops_per_sec']:.0%})")
+        if result["peak_memory_kib"] > base["peak_memory_kib"] * (1 + memory_threshold):
+            regressions.append(f"{name}: peak {result['peak_memory_kib']:.0f} KiB vs baseline "
+                               f"{base['peak_memory_kib']:.0f} KiB (+{result['peak_memory_kib'] / base['peak_memory_kib'] - 1:.0%})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenario", default="", help="Only run scenarios whose name contains this string.")
+    parser.add_argument("--iterations", type=int, help="Override the per-scenario iteration count.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE)
+    parser.add_argument("--save-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative drop in ops/sec before failing (default 0.25).")
+    parser.add_argument("--memory-threshold", type=float, default=0.25,
+                        help="Allowed relative growth in peak memory before failing (default 0.25).")
+    parser.add_argument("--output", help="Also write the results JSON to this path.")
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    results = {}
+    print(f"{'scenario':<38}{'ops/sec':>12}{'p50 ms':>10}{'p99 ms':>10}{'peak KiB':>12}")
+    for scenario in SCENARIOS:
+        if args.scenario not in scenario.name:
+            continue
+        result = measure(scenario, args.iterations or scenario.iterations)
+        results[scenario.name] = result
+        print(f"{scenario.name:<38}{result['ops_per_sec']:>12.1f}{result['p50_ms']:>10.2f}"
+              f"{result['p99_ms']:>10.2f}{result['peak_memory_kib']:>12.0f}")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+
+    if args.save_baseline:
+        baseline = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        baseline.update(results)
+        with open(args.baseline, "w") as f:
+            json.dump(baseline, f, indent=2, sort_keys=True)
+            f.write("\n")
+        print(f"Baseline written to {args.baseline}")
+        return 0
+
+    if not os.path.exists(args.baseline):
+        print(f"No baseline at {args.baseline}; run with --save-baseline to create one.")
+        return 0
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    regressions = compare(results, baseline, args.threshold, args.memory_threshold)
+    if regressions:
+        print("\nRegressions:")
+        for regression in regressions:
+            print(f"  {regression}")
+        return 1
+    print("\nNo regressions against baseline.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
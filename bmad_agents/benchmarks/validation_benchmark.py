@@ -0,0 +1,80 @@
+"""
+Compares the cost of validating an input (and output) against the agent schemas with the
+cost of the agent call itself.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.validation_benchmark --records 20000
+"""
+import argparse
+import logging
+import os
+import time
+
+from ..validation import validator_for
+from ..seo_blog_agent.agent import SEOBlogAgent
+from ..image_prompt_agent.agent import ImagePromptAgent
+from ..video_script_agent.agent import VideoScriptAgent
+from ..keyword_expander_agent.agent import KeywordExpanderAgent
+from ..content_formatter_agent.agent import ContentFormatterAgent
+from ..publish_scheduler_agent.agent import PublishSchedulerAgent
+
+
+def make_inputs(agent_class, n):
+    if agent_class is SEOBlogAgent:
+        return [{"topic": f"Topic {i}", "keywords": ["seo", "python"], "tone": "casual", "length": 800} for i in range(n)]
+    if agent_class is ImagePromptAgent:
+        return [{"base_subject": f"a lighthouse number {i}", "style": "cinematic", "model": "midjourney",
+                 "lighting": "golden hour", "modifiers": ["8k", "hyperdetailed"]} for i in range(n)]
+    if agent_class is VideoScriptAgent:
+        return [{"topic": f"Topic {i}", "video_length_minutes": 1, "style": "tutorial", "characters": 2} for i in range(n)]
+    if agent_class is KeywordExpanderAgent:
+        return [{"seed_keywords": [f"seed {i}", f"topic {i}"], "num_variations": 5} for i in range(n)]
+    if agent_class is ContentFormatterAgent:
+        return [{"content": f"Paragraph {i} of the blog post.", "format": "html"} for i in range(n)]
+    return [{"content_id": f"post-{i}", "publish_datetime": "2030-01-01T09:00:00", "platform": "blog",
+             "metadata": {"title": "Post"}} for i in range(n)]
+
+
+def elapsed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=5000)
+    args = parser.parse_args()
+
+    # Keep the agents' INFO logging active (it is part of the per-call cost) but discard the output.
+    devnull = open(os.devnull, "w")
+    logging.basicConfig(level=logging.INFO, stream=devnull)
+
+    print(f"{'agent':<24}{'call us':>10}{'input us':>10}{'output us':>11}{'many us':>10}{'overhead':>10}")
+    for agent_class in (SEOBlogAgent, ImagePromptAgent, VideoScriptAgent, KeywordExpanderAgent,
+                        ContentFormatterAgent, PublishSchedulerAgent):
+        agent = agent_class()
+        agent.initialize()
+        inputs = make_inputs(agent_class, args.records)
+        input_validator = validator_for(agent, "input")
+        output_validator = validator_for(agent, "output")
+        outputs = []
+
+        def call():
+            for input_data in inputs:
+                agent.process(input_data)
+                outputs.append(agent.output())
+
+        call_seconds = elapsed(call)
+        input_seconds = elapsed(lambda: [input_validator.validate(i) for i in inputs])
+        output_seconds = elapsed(lambda: [output_validator.validate(o) for o in outputs])
+        many_seconds = elapsed(lambda: input_validator.validate_many(inputs))
+        agent.shutdown()
+        n = args.records
+        print(f"{agent_class.agent_name:<24}{call_seconds / n * 1e6:>10.2f}{input_seconds / n * 1e6:>10.2f}"
+              f"{output_seconds / n * 1e6:>11.2f}{many_seconds / n * 1e6:>10.2f}"
+              f"{(input_seconds + output_seconds) / call_seconds:>9.1%}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+"""
+Compares the memory held by VideoScriptAgent scripts as scene dicts versus the compact
+CompactScript representation.
+
+Usage (from the repository root):
+    python -m bmad_agents.benchmarks.video_memory_benchmark --videos 20 --minutes 180 --characters 4
+"""
+import argparse
+import logging
+import tracemalloc
+
+from ..video_script_agent.agent import VideoScriptAgent
+from ..video_script_agent.compact import CompactScript
+
+
+def build_dict_scripts(agent, inputs):
+    return [[event["scene"] for event in agent.iter_scenes(input_data)] for input_data in inputs]
+
+
+def build_compact_scripts(agent, inputs):
+    scripts = []
+    for input_data in inputs:
+        script = CompactScript()
+        for row in agent._scene_rows(input_data):
+            script.add_scene(*row)
+        scripts.append(script)
+    return scripts
+
+
+def retained_bytes(build, agent, inputs):
+    tracemalloc.start()
+    scripts = build(agent, inputs)
+    current, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    del scripts
+    return current, peak
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--videos", type=int, default=20)
+    parser.add_argument("--minutes", type=int, default=180)
+    parser.add_argument("--characters", type=int, default=4)
+    args = parser.parse_args()
+    logging.disable(logging.INFO)
+
+    agent = VideoScriptAgent()
+    inputs = [{
+        "topic": f"Long-form documentary part {i}",
+        "video_length_minutes": args.minutes,
+        "style": "documentary",
+        "characters": args.characters
+    } for i in range(args.videos)]
+    scenes = args.videos * args.minutes * 2
+
+    dict_current, dict_peak = retained_bytes(build_dict_scripts, agent, inputs)
+    compact_current, compact_peak = retained_bytes(build_compact_scripts, agent, inputs)
+
+    print(f"{scenes} scenes, {args.characters} characters per scene")
+    print(f"{'representation':<16}{'retained MiB':>14}{'peak MiB':>12}{'bytes/scene':>14}")
+    for name, current, peak in (("dicts", dict_current, dict_peak), ("compact", compact_current, compact_peak)):
+        print(f"{name:<16}{current / 2**20:>14.2f}{peak / 2**20:>12.2f}{current / scenes:>14.0f}")
+    print(f"compact retains {dict_current / compact_current:.1f}x less memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,11 @@
 import json
 import logging
-from typing import Dict, Any
+import threading
+from typing import Dict, Any, List
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+from ..interface import BMADAgentInterface, offload
 
-class BMADAgentInterface:
-    """
-    BMADAgentInterface defines the standard methods for all BMAD agents.
-    """
-    def initialize(self, config: Dict[str, Any]) -> None:
-        raise NotImplementedError
-
-    def process(self, input_data: Dict[str, Any]) -> None:
-        raise NotImplementedError
-
-    def output(self) -> Dict[str, Any]:
-        raise NotImplementedError
-
-    def shutdown(self) -> None:
-        raise NotImplementedError
+logger = logging.getLogger(__name__)
 
 class ContentFormatterAgent(BMADAgentInterface):
     """
@@ -33,44 +18,60 @@ class ContentFormatterAgent(BMADAgentInterface):
         "input_schema": "input_schema.json",
         "output_schema": "output_schema.json",
         "dependencies": [],
-        "version": "1.0.0"
+        "deterministic": True,
+        "version": "1.2.0" # Markdown output changes and the text format
     }
 
+    INLINE_CHARS = 64 * 1024  # arun() formats longer content off the event loop
+
     def __init__(self):
         self.config = None
         self.output_data = None
+        self._document_cache = None
+        self._document_cache_lock = threading.Lock()
 
     def initialize(self, config: Dict[str, Any] = None) -> None:
         """
         Initializes the agent with a given configuration.
+        `document_cache` is a `DocumentCache`, a dict of its options, or False to parse every
+        document afresh; by default agents share one process-wide cache of parsed documents.
         """
         self.config = config if config else {}
+        self._document_cache = None
         logger.info(f"Content Formatter Agent initialized with config: {self.config}")
 
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Formats the content and returns the result, without keeping it on the instance, so
+        one agent can serve concurrent requests.
+        The content is read as Markdown (see `markdown.py` for the syntax) and rendered to
+        `format`. With `formats`, it is parsed once and rendered to every listed format in
+        one pass, returned under `formatted`.
+        """
+        return self._generate(input_data)
+
+    async def arun(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async counterpart of `run()`. Content up to `INLINE_CHARS` characters is formatted
+        inline on the event loop; longer documents take milliseconds per format and are
+        rendered on the default executor.
+        """
+        if len(input_data.get('content') or "") > self.INLINE_CHARS:
+            return await offload(self._generate, input_data)
+        return self._generate(input_data)
+
     def process(self, input_data: Dict[str, Any]) -> None:
         """
-        Processes the input data to format the content.
-        This is a mock implementation.
+        Processes the input data to format the content, for `output()` to return.
         """
-        logger.info(f"Processing input data: {input_data}")
+        self.output_data = self._generate(input_data)
+
+    def _generate(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        logger.debug("Processing input data: %s", input_data)
         try:
-            content = input_data['content']
-            target_format = input_data.get('format', 'markdown')
-
-            formatted_content = ""
-            if target_format == "html":
-                # Simple mock conversion to HTML
-                formatted_content = f"<h1>Content</h1><p>{content}</p>"
-            elif target_format == "markdown":
-                # Assume raw content is already close to markdown
-                formatted_content = f"# Content\n\n{content}"
-            else:
-                formatted_content = content
-
-            self.output_data = {
-                "formatted_content": formatted_content
-            }
-            logger.info(f"Successfully formatted content to {target_format}.")
+            output_data = self._format_record(input_data)
+            logger.info(f"Successfully formatted content to {input_data.get('format', 'markdown')}.")
+            return output_data
 
         except KeyError as e:
             logger.error(f"Missing required input key: {e}")
@@ -79,6 +80,94 @@ class ContentFormatterAgent(BMADAgentInterface):
             logger.error(f"An error occurred during processing: {e}")
             raise
 
+    def process_batch(self, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Formats many documents at once, logging once per batch instead of once per record.
+        """
+        logger.info(f"Processing batch of {len(inputs)} formatting inputs.")
+        format_record = self._format_record
+        outputs = []
+        try:
+            for input_data in inputs:
+                outputs.append(format_record(input_data))
+        except KeyError as e:
+            logger.error(f"Missing required input key: {e} (batch record {len(outputs)})")
+            raise ValueError(f"Missing required input key: {e} (batch record {len(outputs)})")
+        except Exception as e:
+            logger.error(f"An error occurred during batch processing: {e}")
+            raise
+        if outputs:
+            self.output_data = outputs[-1]
+        logger.info(f"Successfully formatted {len(outputs)} documents.")
+        return outputs
+
+    def _format_record(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        target_format = input_data.get('format', 'markdown')
+        formats = input_data.get('formats')
+        if not formats:
+            return {"formatted_content": self._format(input_data['content'], target_format)}
+        formatted = self._format_many(input_data['content'], [target_format] + list(formats))
+        return {
+            "formatted_content": formatted[target_format],
+            "formatted": {target: formatted[target] for target in formats}
+        }
+
+    def _documents(self):
+        """
+        Returns the cache of parsed documents, or None if caching is turned off.
+        """
+        if self._document_cache is None:
+            # Imported on first use: compiling the parser's patterns would double the agent's load time
+            from .document import DocumentCache, shared_document_cache
+            option = (self.config or {}).get("document_cache")
+            if option is False:
+                return None
+            with self._document_cache_lock:
+                # Checked again so that concurrent first calls build a configured cache only once
+                if self._document_cache is None:
+                    if isinstance(option, DocumentCache):
+                        self._document_cache = option
+                    elif isinstance(option, dict):
+                        self._document_cache = DocumentCache(**option)
+                    else:
+                        self._document_cache = shared_document_cache()
+        return self._document_cache
+
+    def _format(self, content: str, target_format: str) -> str:
+        """
+        Converts a single document to the target format.
+        """
+        return self._format_many(content, [target_format])[target_format]
+
+    def _format_many(self, content: str, formats: List[str]) -> Dict[str, str]:
+        """
+        Parses the document once (or takes it from the cache) and renders every format in
+        one pass over it. Formats without a renderer get the content unchanged.
+        """
+        from .document import render_formats
+        from .markdown import SINKS
+        rendered = [target for target in dict.fromkeys(formats) if target in SINKS]
+        outputs = {target: content for target in formats}
+        if rendered:
+            outputs.update(render_formats(content, rendered, self._documents()))
+        return outputs
+
+    def format_stream(self, source, writer, target_format: str = "html", chunk_size: int = 65536) -> None:
+        """
+        Formats a document too large to pass around as one string. `source` is a text file
+        object (read `chunk_size` characters at a time) or an iterable of text chunks, and the
+        result is written to `writer` as it is produced, so memory stays bounded by the
+        longest line rather than the document. Streamed documents bypass the document cache.
+        """
+        from .markdown import SINKS, render_markdown_stream
+        if target_format in SINKS:
+            render_markdown_stream(source, writer, chunk_size=chunk_size, target_format=target_format)
+        else:
+            chunks = iter(lambda: source.read(chunk_size), "") if hasattr(source, "read") else source
+            for chunk in chunks:
+                writer.write(chunk)
+        logger.info(f"Successfully streamed content to {target_format}.")
+
     def output(self) -> Dict[str, Any]:
         """
         Returns the generated output data.
@@ -97,12 +186,14 @@ class ContentFormatterAgent(BMADAgentInterface):
 
 # Example of how the BMAD orchestrator might use this agent
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     formatter_agent = ContentFormatterAgent()
     formatter_agent.initialize()
 
     example_input = {
-        "content": "This is the raw text that needs to be formatted.",
-        "format": "html"
+        "content": "## Launch notes\n\nThis is the **raw text** that needs to be [formatted](https://example.com).\n\n- fast\n- safe",
+        "format": "html",
+        "formats": ["markdown", "text"]
     }
 
     try:
@@ -0,0 +1,299 @@
+import hashlib
+import io
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from .markdown import DEFAULT_MAX_LINE_LENGTH, MarkdownParser, MarkdownSink, create_sink, feed_text
+
+_EVENTS = ("open_quote", "close_quote", "open_list", "close_list", "open_item", "close_item", "heading",
+           "open_paragraph", "paragraph_text", "close_paragraph", "open_code", "code_text", "close_code",
+           "thematic_break")
+
+
+class Document:
+    """
+    A parsed Markdown document: the calls `MarkdownParser` made to its sink, in order, with
+    their inline tokens. This is the document tree written out depth-first (each container
+    is an open and a close event around its children), which keeps it compact and lets it
+    be rendered to any number of formats without parsing the text again.
+    """
+    __slots__ = ("events", "source_length")
+
+    def __init__(self, events: List[tuple], source_length: int):
+        self.events = events
+        self.source_length = source_length
+
+    def replay(self, sinks: Sequence[MarkdownSink]) -> None:
+        """
+        Sends every event to each of `sinks` in one pass over the document, then closes them.
+        """
+        tables = [{name: getattr(sink, name) for name in _EVENTS} for sink in sinks]
+        if len(tables) == 1:
+            table = tables[0]
+            for event in self.events:
+                table[event[0]](*event[1:])
+        else:
+            for event in self.events:
+                name = event[0]
+                args = event[1:]
+                for table in tables:
+                    table[name](*args)
+        for sink in sinks:
+            sink.close()
+
+    def render(self, formats: Iterable[str]) -> Dict[str, str]:
+        """
+        Renders the document to each of `formats` ("html", "markdown", "text") and returns
+        the results by format.
+        """
+        outputs, sinks = _outputs(formats)
+        self.replay(sinks)
+        return {target_format: output.getvalue() for target_format, output in outputs.items()}
+
+
+def _outputs(formats: Iterable[str]):
+    outputs = {target_format: io.StringIO() for target_format in formats}
+    return outputs, [create_sink(target_format, output, 1 << 30) for target_format, output in outputs.items()]
+
+
+class DocumentBuilder(MarkdownSink):
+    """
+    A sink that records the parser's calls into a `Document`.
+    """
+    def __init__(self):
+        self.events: List[tuple] = []
+
+    def open_quote(self) -> None:
+        self.events.append(("open_quote",))
+
+    def close_quote(self) -> None:
+        self.events.append(("close_quote",))
+
+    def open_list(self, ordered: bool, start: int, marker: str) -> None:
+        self.events.append(("open_list", ordered, start, marker))
+
+    def close_list(self) -> None:
+        self.events.append(("close_list",))
+
+    def open_item(self) -> None:
+        self.events.append(("open_item",))
+
+    def close_item(self) -> None:
+        self.events.append(("close_item",))
+
+    def heading(self, level: int, source: str, tokens: Sequence) -> None:
+        self.events.append(("heading", level, source, tokens))
+
+    def open_paragraph(self, tight: bool) -> None:
+        self.events.append(("open_paragraph", tight))
+
+    def paragraph_text(self, source: str, tokens: Sequence, joiner: Optional[str]) -> None:
+        self.events.append(("paragraph_text", source, tokens, joiner))
+
+    def close_paragraph(self, tight: bool) -> None:
+        self.events.append(("close_paragraph", tight))
+
+    def open_code(self, language: str, fence: Optional[str]) -> None:
+        self.events.append(("open_code", language, fence))
+
+    def code_text(self, text: str, eol: bool) -> None:
+        self.events.append(("code_text", text, eol))
+
+    def close_code(self) -> None:
+        self.events.append(("close_code",))
+
+    def thematic_break(self) -> None:
+        self.events.append(("thematic_break",))
+
+
+class TeeSink(MarkdownSink):
+    """
+    Passes every call on to each of `sinks`, so one parse feeds several outputs.
+    """
+    def __init__(self, sinks: Sequence[MarkdownSink]):
+        self.sinks = list(sinks)
+
+    def open_quote(self) -> None:
+        for sink in self.sinks:
+            sink.open_quote()
+
+    def close_quote(self) -> None:
+        for sink in self.sinks:
+            sink.close_quote()
+
+    def open_list(self, ordered: bool, start: int, marker: str) -> None:
+        for sink in self.sinks:
+            sink.open_list(ordered, start, marker)
+
+    def close_list(self) -> None:
+        for sink in self.sinks:
+            sink.close_list()
+
+    def open_item(self) -> None:
+        for sink in self.sinks:
+            sink.open_item()
+
+    def close_item(self) -> None:
+        for sink in self.sinks:
+            sink.close_item()
+
+    def heading(self, level: int, source: str, tokens: Sequence) -> None:
+        for sink in self.sinks:
+            sink.heading(level, source, tokens)
+
+    def open_paragraph(self, tight: bool) -> None:
+        for sink in self.sinks:
+            sink.open_paragraph(tight)
+
+    def paragraph_text(self, source: str, tokens: Sequence, joiner: Optional[str]) -> None:
+        for sink in self.sinks:
+            sink.paragraph_text(source, tokens, joiner)
+
+    def close_paragraph(self, tight: bool) -> None:
+        for sink in self.sinks:
+            sink.close_paragraph(tight)
+
+    def open_code(self, language: str, fence: Optional[str]) -> None:
+        for sink in self.sinks:
+            sink.open_code(language, fence)
+
+    def code_text(self, text: str, eol: bool) -> None:
+        for sink in self.sinks:
+            sink.code_text(text, eol)
+
+    def close_code(self) -> None:
+        for sink in self.sinks:
+            sink.close_code()
+
+    def thematic_break(self) -> None:
+        for sink in self.sinks:
+            sink.thematic_break()
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
+
+
+def parse_document(text: str, max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> Document:
+    """
+    Parses a Markdown document held in memory.
+    """
+    builder = DocumentBuilder()
+    feed_text(MarkdownParser(builder, max_line_length), text)
+    return Document(builder.events, len(text))
+
+
+class DocumentCache:
+    """
+    Keeps parsed documents by a hash of their content, so formatting unchanged content
+    again, for the same or another format, only pays for rendering. An LRU bounded by
+    `max_entries` documents and `max_chars` characters of source; documents larger than
+    `max_chars` are parsed but not kept. A parsed document takes roughly ten to fifteen
+    times the memory of its text. Safe to share between threads.
+    """
+    def __init__(self, max_entries: int = 256, max_chars: int = 8 * 1024 * 1024):
+        if max_entries < 1 or max_chars < 1:
+            raise ValueError("max_entries and max_chars must be positive")
+        self.max_entries = max_entries
+        self.max_chars = max_chars
+        self._documents: "OrderedDict[tuple, Document]" = OrderedDict()
+        self._chars = 0
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(text: str, max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> tuple:
+        digest = hashlib.blake2b(text.encode("utf-8", "surrogatepass"), digest_size=16).digest()
+        return digest, max_line_length
+
+    def get(self, text: str, max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> Document:
+        """
+        Returns the parsed document for `text`, parsing it on a miss.
+        """
+        key = self.key(text, max_line_length)
+        document = self._lookup(key)
+        if document is None:
+            document = parse_document(text, max_line_length)
+            self._store(key, document)
+        return document
+
+    def render(self, text: str, formats: Iterable[str],
+               max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> Dict[str, str]:
+        """
+        Renders `text` to each of `formats`. On a miss the document is parsed, recorded and
+        rendered in the same pass.
+        """
+        key = self.key(text, max_line_length)
+        document = self._lookup(key)
+        if document is not None:
+            return document.render(formats)
+        outputs, sinks = _outputs(formats)
+        if len(text) > self.max_chars:
+            feed_text(MarkdownParser(TeeSink(sinks), max_line_length), text)
+        else:
+            builder = DocumentBuilder()
+            feed_text(MarkdownParser(TeeSink([builder] + sinks), max_line_length), text)
+            self._store(key, Document(builder.events, len(text)))
+        return {target_format: output.getvalue() for target_format, output in outputs.items()}
+
+    def _lookup(self, key: tuple) -> Optional[Document]:
+        with self._lock:
+            document = self._documents.get(key)
+            if document is not None:
+                self._documents.move_to_end(key)
+                self.hits += 1
+            else:
+                self.misses += 1
+            return document
+
+    def _store(self, key: tuple, document: Document) -> None:
+        # Two threads that miss on the same text both parse it; the second store replaces the first
+        if document.source_length > self.max_chars:
+            return
+        with self._lock:
+            previous = self._documents.pop(key, None)
+            if previous is not None:
+                self._chars -= previous.source_length
+            self._documents[key] = document
+            self._chars += document.source_length
+            while len(self._documents) > self.max_entries or self._chars > self.max_chars:
+                self._chars -= self._documents.popitem(last=False)[1].source_length
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            return {"entries": len(self._documents), "chars": self._chars, "hits": self.hits, "misses": self.misses}
+
+    def clear(self) -> None:
+        with self._lock:
+            self._documents.clear()
+            self._chars = 0
+
+
+def render_formats(text: str, formats: Iterable[str], cache: Optional[DocumentCache] = None,
+                   max_line_length: int = DEFAULT_MAX_LINE_LENGTH) -> Dict[str, str]:
+    """
+    Parses `text` once and renders it to each of `formats`, through `cache` if given.
+    """
+    if cache is not None:
+        return cache.render(text, formats, max_line_length)
+    outputs, sinks = _outputs(formats)
+    feed_text(MarkdownParser(sinks[0] if len(sinks) == 1 else TeeSink(sinks), max_line_length), text)
+    return {target_format: output.getvalue() for target_format, output in outputs.items()}
+
+
+_shared_cache: Optional[DocumentCache] = None
+_shared_cache_lock = threading.Lock()
+
+
+def shared_document_cache() -> DocumentCache:
+    """
+    Returns the process-wide cache that formatter agents use unless configured otherwise,
+    so agent instances created per thread or per workflow still share parsed documents.
+    """
+    global _shared_cache
+    with _shared_cache_lock:
+        if _shared_cache is None:
+            _shared_cache = DocumentCache()
+        return _shared_cache
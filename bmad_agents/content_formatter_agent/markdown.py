@@ -0,0 +1,1244 @@
+import html
+import io
+import re
+import unicodedata
+from bisect import bisect_right
+from html.entities import html5
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import quote
+
+DEFAULT_CHUNK_SIZE = 65536
+DEFAULT_MAX_LINE_LENGTH = 1 << 20
+DEFAULT_BUFFER_SIZE = 65536
+
+# Inline tokens. Plain text is a str; markup is a tuple whose first item is one of these kinds:
+CODE = 0  # (CODE, content)
+ENTITY = 1  # (ENTITY, "&name;")
+DELIMITER = 2  # (DELIMITER, closed tags, unmatched "*"/"_" characters, opened tags), e.g. ((), "", ("em",))
+LINK = 3  # (LINK, destination, title or None)
+LINK_END = 4  # (LINK_END,)
+IMAGE = 5  # (IMAGE, destination, title or None, alt text)
+AUTOLINK = 6  # (AUTOLINK, href, text)
+
+_ASCII_PUNCTUATION = frozenset("!\"#$%&'()*+,-./:;<=>?@[\\]^_`{|}~")
+
+# Characters that may start inline markup; everything between them is plain text
+_INLINE_SPECIAL = re.compile(r"[\\`*_\[\]!<&]")
+_BACKTICKS = re.compile(r"`+")
+_DELIMITER_RUN = re.compile(r"\*+|_+")
+_SPACES = re.compile(r"[ \t]*")
+_SPACE_RUNS = re.compile(r"[ \t]+")
+_PAREN_TOKENS = re.compile(r"\\.|[()]")
+_ENTITY = re.compile(r"&(?:#[xX][0-9a-fA-F]{1,6}|#[0-9]{1,7}|([A-Za-z][A-Za-z0-9]{1,31}));")
+_URI_AUTOLINK = re.compile(r"<([A-Za-z][A-Za-z0-9+.\-]{1,31}:[^\s<>]*)>")
+_EMAIL_AUTOLINK = re.compile(r"<([A-Za-z0-9.!#$%&'*+/=?^_`{|}~\-]+@[A-Za-z0-9](?:[A-Za-z0-9\-]{0,61}[A-Za-z0-9])?"
+                             r"(?:\.[A-Za-z0-9](?:[A-Za-z0-9\-]{0,61}[A-Za-z0-9])?)*)>")
+_BACKSLASH_ESCAPE = re.compile(r"\\([!-/:-@\[-`{-~])")
+_CONTROL = re.compile(r"[\x00-\x20]+")
+# The common link target shape, `(destination "title")` without nested parentheses; it cannot
+# scan past the next parenthesis, so trying it at every `](` stays linear
+_SIMPLE_TARGET = re.compile(r"""\([ \t]*([^\s()<>\\]*)(?:[ \t]+("[^"\\]*"|'[^'\\]*'))?[ \t]*\)""")
+
+_BLOCK_START = frozenset("#>-+*_=`~0123456789")
+_LIST_MARKER = re.compile(r"(?:([-+*])|([0-9]{1,9})([.)]))(?=[ \t]|$)")
+_ATX_HEADING = re.compile(r"(#{1,6})(?=[ \t]|$)")
+_FENCE = re.compile(r"`{3,}|~{3,}")
+_SETEXT_UNDERLINE = re.compile(r"(?:=+|-+)[ \t]*\Z")
+
+_PLAIN_URL = re.compile(r"[A-Za-z0-9\-._~%/:=&?#+!$,;'@()*\[\]]*\Z")
+_URL_SAFE = "%/:=&?~#+!$,;'@()*[]"
+_UNSAFE_SCHEMES = ("javascript:", "vbscript:", "file:", "data:")
+_SAFE_DATA_IMAGES = ("data:image/png", "data:image/gif", "data:image/jpeg", "data:image/webp")
+
+
+def escape_html(text: str) -> str:
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;").replace('"', "&quot;")
+
+
+def _is_punctuation(ch: str) -> bool:
+    if ch < "\x80":
+        return ch in _ASCII_PUNCTUATION
+    return unicodedata.category(ch)[0] in "PS"
+
+
+def _url(destination: str, image: bool = False) -> str:
+    """
+    Returns a link destination ready for an href/src attribute: backslash escapes resolved,
+    percent-encoded, attribute-escaped, and emptied for script and file URLs.
+    """
+    if "\\" in destination:
+        destination = _BACKSLASH_ESCAPE.sub(r"\1", destination)
+    if ":" in destination:
+        probe = _CONTROL.sub("", destination[:64]).lower()
+        if probe.startswith(_UNSAFE_SCHEMES) and not (image and probe.startswith(_SAFE_DATA_IMAGES)):
+            return ""
+    if not _PLAIN_URL.match(destination):
+        destination = quote(destination, safe=_URL_SAFE)
+    return escape_html(destination)
+
+
+def _title(title: Optional[str]) -> str:
+    if title is None:
+        return ""
+    if "\\" in title:
+        title = _BACKSLASH_ESCAPE.sub(r"\1", title)
+    return f' title="{escape_html(title)}"'
+
+
+class _InlineScanner:
+    """
+    Parses the inline markup of one line (or line piece) into tokens in a single
+    left-to-right pass: code spans, backslash escapes, entities, autolinks, links, images
+    and emphasis.
+
+    Everything that would need a rescan is looked up instead: closing backtick runs by
+    length, matching parentheses and whitespace runs are indexed once per line, and
+    emphasis uses the CommonMark delimiter stack with its openers-bottom bound, so the
+    work stays linear in the line length.
+    """
+    __slots__ = ("text", "out", "delimiters", "brackets", "_runs", "_parens", "_space_starts", "_space_ends")
+
+    def __init__(self, text: str):
+        self.text = text
+        self.out: list = []
+        # [out index, char, remaining count, original count, can open, can close, open tags, close tags]
+        self.delimiters: List[list] = []
+        # [out index, delimiter stack height, is image, active]
+        self.brackets: List[list] = []
+        self._runs: Optional[Dict[int, List[int]]] = None
+        self._parens: Optional[Dict[int, int]] = None
+        self._space_starts: Optional[List[int]] = None
+        self._space_ends: Optional[List[int]] = None
+
+    def scan(self) -> list:
+        text, out = self.text, self.out
+        length = len(text)
+        search = _INLINE_SPECIAL.search
+        pos = 0
+        while True:
+            match = search(text, pos)
+            if match is None:
+                if pos < length:
+                    out.append(text[pos:])
+                break
+            i = match.start()
+            if i > pos:
+                out.append(text[pos:i])
+            ch = text[i]
+            if ch == "\\":
+                escaped = text[i + 1:i + 2]
+                if escaped and escaped in _ASCII_PUNCTUATION:
+                    out.append(escaped)
+                    pos = i + 2
+                else:
+                    out.append("\\")
+                    pos = i + 1
+            elif ch == "`":
+                pos = self._code_span(i)
+            elif ch == "*" or ch == "_":
+                pos = self._delimiter_run(i)
+            elif ch == "[":
+                self.brackets.append([len(out), len(self.delimiters), False, True])
+                out.append("[")
+                pos = i + 1
+            elif ch == "!":
+                if text.startswith("[", i + 1):
+                    self.brackets.append([len(out), len(self.delimiters), True, True])
+                    out.append("![")
+                    pos = i + 2
+                else:
+                    out.append("!")
+                    pos = i + 1
+            elif ch == "]":
+                pos = self._close_bracket(i)
+            elif ch == "<":
+                pos = self._autolink(i)
+            else:
+                entity = _ENTITY.match(text, i)
+                if entity is not None and (entity.group(1) is None or entity.group(1) + ";" in html5):
+                    out.append((ENTITY, entity.group(0)))
+                    pos = entity.end()
+                else:
+                    out.append("&")
+                    pos = i + 1
+        self._emphasis(0)
+        return out
+
+    def _code_span(self, i: int) -> int:
+        text = self.text
+        end = _BACKTICKS.match(text, i).end()
+        width = end - i
+        if self._runs is None:
+            self._runs = {}
+            for run in _BACKTICKS.finditer(text):
+                self._runs.setdefault(run.end() - run.start(), []).append(run.start())
+        starts = self._runs.get(width, ())
+        k = bisect_right(starts, i)
+        if k == len(starts):
+            self.out.append("`" * width)
+            return end
+        closer = starts[k]
+        code = text[end:closer]
+        if len(code) > 2 and code[0] == " " and code[-1] == " " and code.strip(" "):
+            code = code[1:-1]
+        self.out.append((CODE, code))
+        return closer + width
+
+    def _delimiter_run(self, i: int) -> int:
+        text = self.text
+        end = _DELIMITER_RUN.match(text, i).end()
+        ch = text[i]
+        before = text[i - 1] if i > 0 else " "
+        after = text[end] if end < len(text) else " "
+        before_space, after_space = before.isspace(), after.isspace()
+        before_punct, after_punct = _is_punctuation(before), _is_punctuation(after)
+        left = not after_space and (not after_punct or before_space or before_punct)
+        right = not before_space and (not before_punct or after_space or after_punct)
+        if ch == "*":
+            can_open, can_close = left, right
+        else:
+            can_open = left and (not right or before_punct)
+            can_close = right and (not left or after_punct)
+        if can_open or can_close:
+            self.delimiters.append([len(self.out), ch, end - i, end - i, can_open, can_close, [], []])
+        self.out.append(text[i:end])
+        return end
+
+    def _autolink(self, i: int) -> int:
+        text = self.text
+        match = _URI_AUTOLINK.match(text, i)
+        if match is not None:
+            self.out.append((AUTOLINK, match.group(1), match.group(1)))
+            return match.end()
+        match = _EMAIL_AUTOLINK.match(text, i)
+        if match is not None:
+            self.out.append((AUTOLINK, "mailto:" + match.group(1), match.group(1)))
+            return match.end()
+        self.out.append("<")
+        return i + 1
+
+    def _skip_spaces(self, pos: int) -> int:
+        k = bisect_right(self._space_starts, pos) - 1
+        if k >= 0 and self._space_ends[k] > pos:
+            return self._space_ends[k]
+        return pos
+
+    def _next_space(self, pos: int, limit: int) -> int:
+        k = bisect_right(self._space_ends, pos)
+        if k < len(self._space_starts):
+            return min(max(self._space_starts[k], pos), limit)
+        return limit
+
+    def _link_target(self, open_paren: int) -> Optional[Tuple[str, Optional[str], int]]:
+        """
+        Parses `(destination "title")` starting at `open_paren`. Returns the destination, the
+        title and the position after the closing parenthesis, or None.
+        """
+        text = self.text
+        simple = _SIMPLE_TARGET.match(text, open_paren)
+        if simple is not None:
+            title = simple.group(2)
+            return simple.group(1), (title[1:-1] if title else None), simple.end()
+        if self._parens is None:
+            self._parens, stack = {}, []
+            for token in _PAREN_TOKENS.finditer(text):
+                if token.group() == "(":
+                    stack.append(token.start())
+                elif token.group() == ")" and stack:
+                    self._parens[stack.pop()] = token.start()
+            self._space_starts, self._space_ends = [], []
+            for run in _SPACE_RUNS.finditer(text):
+                self._space_starts.append(run.start())
+                self._space_ends.append(run.end())
+        close = self._parens.get(open_paren)
+        if close is None:
+            return None
+        start = self._skip_spaces(open_paren + 1)
+        if start >= close:
+            return "", None, close + 1
+        end = self._next_space(start, close)
+        destination, title = text[start:end], None
+        if end < close:
+            title_start = self._skip_spaces(end)
+            if title_start < close:
+                title_end = close
+                k = bisect_right(self._space_ends, close) - 1
+                if k >= 0 and self._space_ends[k] == close:
+                    title_end = self._space_starts[k]
+                quote_char = text[title_start]
+                closing = ")" if quote_char == "(" else quote_char
+                if quote_char not in "\"'(" or title_end - title_start < 2 or text[title_end - 1] != closing:
+                    return None
+                title = text[title_start + 1:title_end - 1]
+        return destination, title, close + 1
+
+    def _close_bracket(self, i: int) -> int:
+        out, brackets = self.out, self.brackets
+        if not brackets:
+            out.append("]")
+            return i + 1
+        opener = brackets.pop()
+        index, height, image, active = opener
+        target = self._link_target(i + 1) if active and self.text.startswith("(", i + 1) else None
+        if target is None:
+            out.append("]")
+            return i + 1
+        destination, title, end = target
+        self._emphasis(height)
+        if image:
+            out[index:] = [(IMAGE, destination, title, tokens_text(out[index + 1:]))]
+        else:
+            out[index] = (LINK, destination, title)
+            out.append((LINK_END,))
+            # Links cannot contain other links
+            for bracket in brackets:
+                if not bracket[2]:
+                    bracket[3] = False
+        return end
+
+    def _emphasis(self, bottom: int) -> None:
+        """
+        Matches the delimiter runs above `bottom` on the stack into <em>/<strong> (the
+        CommonMark "process emphasis" procedure), writes them into the output and pops them.
+        """
+        records = self.delimiters[bottom:]
+        if not records:
+            return
+        count = len(records)
+        if count == 2:
+            opener, closer = records
+            if opener[1] == closer[1] and opener[4] and not opener[5] and closer[5] and not closer[4]:
+                # A plain opener/closer pair, the usual case: the rule of three cannot apply
+                while opener[2] and closer[2]:
+                    used = 2 if opener[2] >= 2 and closer[2] >= 2 else 1
+                    tag = "strong" if used == 2 else "em"
+                    opener[2] -= used
+                    closer[2] -= used
+                    opener[6].append(tag)
+                    closer[7].append(tag)
+                self._finish_delimiters(bottom, records)
+                return
+        previous = list(range(-1, count - 1))
+        following = list(range(1, count + 1))
+        openers_bottom: Dict[tuple, int] = {}
+        current = 0
+        while current < count:
+            closer = records[current]
+            if not closer[5]:
+                current = following[current]
+                continue
+            char, closer_length = closer[1], closer[3]
+            key = (char, closer[4], closer_length % 3)
+            floor = openers_bottom.get(key, -1)
+            candidate = previous[current]
+            opener = None
+            while candidate > floor:
+                record = records[candidate]
+                if record[1] == char and record[4]:
+                    both = record[5] or closer[4]
+                    total = record[3] + closer_length
+                    if not (both and total % 3 == 0 and (record[3] % 3 or closer_length % 3)):
+                        opener = record
+                        break
+                candidate = previous[candidate]
+            if opener is None:
+                before, after = previous[current], following[current]
+                openers_bottom[key] = before
+                if not closer[4]:
+                    # Unlink the closer: it cannot open anything either
+                    if before >= 0:
+                        following[before] = after
+                    if after < count:
+                        previous[after] = before
+                current = after
+                continue
+            used = 2 if opener[2] >= 2 and closer[2] >= 2 else 1
+            tag = "strong" if used == 2 else "em"
+            opener[2] -= used
+            closer[2] -= used
+            opener[6].append(tag)
+            closer[7].append(tag)
+            # Delimiters between the pair can no longer match anything
+            following[candidate] = current
+            previous[current] = candidate
+            if opener[2] == 0:
+                before = previous[candidate]
+                previous[current] = before
+                if before >= 0:
+                    following[before] = current
+            if closer[2] == 0:
+                before, after = previous[current], following[current]
+                if before >= 0:
+                    following[before] = after
+                if after < count:
+                    previous[after] = before
+                current = after
+        self._finish_delimiters(bottom, records)
+
+    def _finish_delimiters(self, bottom: int, records: List[list]) -> None:
+        out = self.out
+        for index, char, remaining, _, _, _, opens, closes in records:
+            # A closer uses the inner (left) characters of its run, an opener the inner (right) ones
+            if opens or closes:
+                out[index] = (DELIMITER, tuple(closes), char * remaining, tuple(reversed(opens)))
+        del self.delimiters[bottom:]
+
+
+def inline_tokens(text: str) -> Sequence:
+    """
+    Parses the inline Markdown of one line into tokens (see CODE, LINK, ...).
+    """
+    if _INLINE_SPECIAL.search(text) is None:
+        return (text,)
+    return _InlineScanner(text).scan()
+
+
+def tokens_html(tokens: Sequence) -> str:
+    if len(tokens) == 1 and tokens[0].__class__ is str:
+        return escape_html(tokens[0])
+    parts = []
+    append = parts.append
+    for token in tokens:
+        if token.__class__ is str:
+            append(escape_html(token))
+            continue
+        kind = token[0]
+        if kind == CODE:
+            append(f"<code>{escape_html(token[1])}</code>")
+        elif kind == DELIMITER:
+            for tag in token[1]:
+                append(f"</{tag}>")
+            append(token[2])
+            for tag in token[3]:
+                append(f"<{tag}>")
+        elif kind == LINK:
+            append(f'<a href="{_url(token[1])}"{_title(token[2])}>')
+        elif kind == LINK_END:
+            append("</a>")
+        elif kind == IMAGE:
+            append(f'<img src="{_url(token[1], image=True)}" alt="{escape_html(token[3])}"{_title(token[2])} />')
+        elif kind == AUTOLINK:
+            append(f'<a href="{_url(token[1])}">{escape_html(token[2])}</a>')
+        else:
+            append(token[1])
+    return "".join(parts)
+
+
+def tokens_text(tokens: Sequence) -> str:
+    """
+    Returns the plain text of inline tokens: markup is dropped, entities are decoded and
+    images contribute their alt text.
+    """
+    parts = []
+    append = parts.append
+    for token in tokens:
+        if token.__class__ is str:
+            append(token)
+            continue
+        kind = token[0]
+        if kind == CODE or kind == ENTITY:
+            append(token[1] if kind == CODE else html.unescape(token[1]))
+        elif kind == DELIMITER:
+            append(token[2])
+        elif kind == IMAGE:
+            append(token[3])
+        elif kind == AUTOLINK:
+            append(token[2])
+    return "".join(parts)
+
+
+def render_inline(text: str) -> str:
+    """
+    Renders the inline Markdown of one line to HTML.
+    """
+    return tokens_html(inline_tokens(text))
+
+
+class MarkdownSink:
+    """
+    Receives the block structure of a document from `MarkdownParser` in document order.
+    Inline content arrives both as its Markdown source and as its tokens (see
+    `inline_tokens()`), so sinks for any output format share one parse.
+
+    `paragraph_text()` is called once per paragraph line; `joiner` says what ends it:
+    "soft" or "hard" for a line break, "" when the next call continues an over-long line,
+    and None for the last line of the paragraph. The first call comes after
+    `open_paragraph()`, which is only called once the paragraph is known not to be a
+    setext heading.
+    """
+    def open_quote(self) -> None:
+        pass
+
+    def close_quote(self) -> None:
+        pass
+
+    def open_list(self, ordered: bool, start: int, marker: str) -> None:
+        pass
+
+    def close_list(self) -> None:
+        pass
+
+    def open_item(self) -> None:
+        pass
+
+    def close_item(self) -> None:
+        pass
+
+    def heading(self, level: int, source: str, tokens: Sequence) -> None:
+        pass
+
+    def open_paragraph(self, tight: bool) -> None:
+        pass
+
+    def paragraph_text(self, source: str, tokens: Sequence, joiner: Optional[str]) -> None:
+        pass
+
+    def close_paragraph(self, tight: bool) -> None:
+        pass
+
+    def open_code(self, language: str, fence: Optional[str]) -> None:
+        pass
+
+    def code_text(self, text: str, eol: bool) -> None:
+        pass
+
+    def close_code(self) -> None:
+        pass
+
+    def thematic_break(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+
+class _WriterSink(MarkdownSink):
+    # Collects output and passes it to `writer.write()` in blocks of about `buffer_size` characters
+    def __init__(self, writer, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        self._write = writer.write
+        self.buffer_size = buffer_size
+        self._out: List[str] = []
+        self._out_size = 0
+
+    def _emit(self, text: str) -> None:
+        self._out.append(text)
+        self._out_size += len(text)
+        if self._out_size >= self.buffer_size:
+            self.flush()
+
+    def flush(self) -> None:
+        if self._out:
+            self._write("".join(self._out))
+            self._out = []
+            self._out_size = 0
+
+    def close(self) -> None:
+        self.flush()
+
+
+class HtmlSink(_WriterSink):
+    """
+    Writes HTML. Paragraphs of tight list items are written without <p>.
+    """
+    def __init__(self, writer, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        super().__init__(writer, buffer_size)
+        self._lists: List[str] = []
+        self._line_start = True
+
+    def _block(self, html: str) -> None:
+        # Block-level tags start on a line of their own
+        if not self._line_start:
+            html = "\n" + html
+        self._emit(html)
+        self._line_start = html.endswith("\n")
+
+    def open_quote(self) -> None:
+        self._block("<blockquote>\n")
+
+    def close_quote(self) -> None:
+        self._block("</blockquote>\n")
+
+    def open_list(self, ordered: bool, start: int, marker: str) -> None:
+        if not ordered:
+            self._lists.append("ul")
+            self._block("<ul>\n")
+        else:
+            self._lists.append("ol")
+            self._block(f'<ol start="{start}">\n' if start != 1 else "<ol>\n")
+
+    def close_list(self) -> None:
+        self._emit(f"</{self._lists.pop()}>\n")
+        self._line_start = True
+
+    def open_item(self) -> None:
+        self._emit("<li>")
+        self._line_start = False
+
+    def close_item(self) -> None:
+        self._emit("</li>\n")
+        self._line_start = True
+
+    def heading(self, level: int, source: str, tokens: Sequence) -> None:
+        self._block(f"<h{level}>{tokens_html(tokens)}</h{level}>\n")
+
+    def open_paragraph(self, tight: bool) -> None:
+        if not tight:
+            self._block("<p>")
+
+    def paragraph_text(self, source: str, tokens: Sequence, joiner: Optional[str]) -> None:
+        if joiner == "soft":
+            self._emit(tokens_html(tokens) + "\n")
+        elif joiner == "hard":
+            self._emit(tokens_html(tokens) + "<br />\n")
+        else:
+            self._emit(tokens_html(tokens))
+        self._line_start = False
+
+    def close_paragraph(self, tight: bool) -> None:
+        if not tight:
+            self._emit("</p>\n")
+        self._line_start = not tight
+
+    def open_code(self, language: str, fence: Optional[str]) -> None:
+        if language:
+            self._block(f'<pre><code class="language-{escape_html(language)}">')
+        else:
+            self._block("<pre><code>")
+
+    def code_text(self, text: str, eol: bool) -> None:
+        self._emit(escape_html(text) + "\n" if eol else escape_html(text))
+
+    def close_code(self) -> None:
+        self._emit("</code></pre>\n")
+        self._line_start = True
+
+    def thematic_break(self) -> None:
+        self._block("<hr />\n")
+
+
+# Blocks that need a blank line before them inside a list item when they follow one of
+# _NEEDS_SEPARATION: they could not interrupt it, or would continue it lazily
+_SEPARATED_IN_ITEM = frozenset(("paragraph", "code", "numbered list"))
+_NEEDS_SEPARATION = frozenset(("paragraph", "quote", "list", "numbered list"))
+
+
+class _LineSink(_WriterSink):
+    """
+    Base for the line-oriented text formats: keeps the prefix that container blocks put in
+    front of each line ("> " for quotes, the item marker and then its indent for list
+    items) and the blank lines between blocks.
+    """
+    quote_prefix = "> "
+
+    def __init__(self, writer, buffer_size: int = DEFAULT_BUFFER_SIZE):
+        super().__init__(writer, buffer_size)
+        # One frame per open container: [first-line prefix or None, prefix, last block, is item]
+        self._frames: List[list] = [[None, "", None, False]]
+        self._prefix = ""
+        self._pending_marker = False
+        self._lists: List[list] = []  # [next item number, marker] per open list
+        self._at_line_start = True
+        self._fence: Optional[str] = None
+
+    def _line_prefix(self) -> str:
+        if not self._pending_marker:
+            return self._prefix
+        # The first line of a list item carries its marker instead of the indent
+        parts = []
+        for frame in self._frames:
+            parts.append(frame[1] if frame[0] is None else frame[0])
+            frame[0] = None
+        self._pending_marker = False
+        return "".join(parts)
+
+    def _push(self, first: Optional[str], prefix: str, item: bool) -> None:
+        self._frames.append([first, prefix, None, item])
+        self._prefix += prefix
+        self._pending_marker = self._pending_marker or first is not None
+
+    def _pop(self) -> None:
+        frame = self._frames[-1]
+        if frame[2] is None:
+            # An empty container still needs its marker to exist
+            prefix = self._line_prefix().rstrip()
+            if prefix:
+                self._emit(prefix + "\n")
+        self._frames.pop()
+        self._prefix = self._prefix[:len(self._prefix) - len(frame[1])]
+
+    def _begin(self, kind: str, loose: bool = False) -> None:
+        # Separates a new block from the previous one in the same container by a blank line
+        frame = self._frames[-1]
+        previous = frame[2]
+        frame[2] = kind
+        if previous is None:
+            return
+        if frame[3] and not loose and not (kind in _SEPARATED_IN_ITEM and previous in _NEEDS_SEPARATION):
+            # A blank line would make the list item loose
+            return
+        self._emit(self._prefix.rstrip() + "\n")
+
+    def _line(self, text: str) -> None:
+        self._emit(self._line_prefix() + text + "\n")
+
+    def open_quote(self) -> None:
+        self._begin("quote")
+        self._push(None, self.quote_prefix, False)
+
+    def close_quote(self) -> None:
+        self._pop()
+
+    def open_list(self, ordered: bool, start: int, marker: str) -> None:
+        self._begin("numbered list" if ordered and start != 1 else "list")
+        self._lists.append([start if ordered else None, marker])
+
+    def close_list(self) -> None:
+        self._lists.pop()
+
+    def open_item(self) -> None:
+        numbered = self._lists[-1]
+        if numbered[0] is None:
+            marker = numbered[1] + " "
+        else:
+            marker = f"{numbered[0]}{numbered[1]} "
+            numbered[0] += 1
+        self._push(marker, " " * len(marker), True)
+
+    def close_item(self) -> None:
+        self._pop()
+
+    def _inline(self, source: str, tokens: Sequence) -> str:
+        raise NotImplementedError
+
+    def open_paragraph(self, tight: bool) -> None:
+        self._begin("paragraph", not tight)
+
+    def paragraph_text(self, source: str, tokens: Sequence, joiner: Optional[str]) -> None:
+        text = self._inline(source, tokens)
+        if self._at_line_start:
+            text = self._line_prefix() + text
+        if joiner == "":
+            self._emit(text)
+            self._at_line_start = False
+        else:
+            self._emit(text + self.hard_break if joiner == "hard" else text + "\n")
+            self._at_line_start = True
+
+    def open_code(self, language: str, fence: Optional[str]) -> None:
+        self._begin("fence" if fence else "code")
+        self._fence = fence
+
+    def code_text(self, text: str, eol: bool) -> None:
+        if self._at_line_start:
+            text = self._line_prefix() + self._code_indent() + text
+            if eol and not text.strip():
+                text = text.rstrip()
+        self._emit(text + "\n" if eol else text)
+        self._at_line_start = eol
+
+    def _code_indent(self) -> str:
+        return ""
+
+
+class MarkdownTextSink(_LineSink):
+    """
+    Writes normalized Markdown: inline text is kept as written, while the block structure
+    is written in one canonical form (ATX headings, "-" or "1." style markers as in the
+    source, fences for fenced code and four-space indents for indented code, "***"
+    breaks). Rendering the result to HTML gives the same HTML as the original.
+    """
+    hard_break = "\\\n"
+
+    def _inline(self, source: str, tokens: Sequence) -> str:
+        return source
+
+    def heading(self, level: int, source: str, tokens: Sequence) -> None:
+        self._begin("heading")
+        if not source:
+            self._line("#" * level)
+        elif source.endswith("#"):
+            # A closing sequence keeps trailing #s part of the text
+            self._line(f"{'#' * level} {source} #")
+        else:
+            self._line(f"{'#' * level} {source}")
+
+    def open_code(self, language: str, fence: Optional[str]) -> None:
+        super().open_code(language, fence)
+        if fence:
+            self._line(fence + language)
+
+    def _code_indent(self) -> str:
+        return "" if self._fence else "    "
+
+    def close_code(self) -> None:
+        if not self._at_line_start:
+            self._emit("\n")
+            self._at_line_start = True
+        if self._fence:
+            self._line(self._fence)
+
+    def thematic_break(self) -> None:
+        self._begin("break")
+        self._line("***")
+
+
+class PlainTextSink(_LineSink):
+    """
+    Writes plain text: inline markup is reduced to its text, entities are decoded, code is
+    written as is and thematic breaks are dropped. List markers are kept and quotes are
+    only separated by blank lines.
+    """
+    quote_prefix = ""
+    hard_break = "\n"
+
+    def _inline(self, source: str, tokens: Sequence) -> str:
+        return tokens_text(tokens)
+
+    def heading(self, level: int, source: str, tokens: Sequence) -> None:
+        self._begin("heading")
+        self._line(tokens_text(tokens))
+
+    def close_code(self) -> None:
+        if not self._at_line_start:
+            self._emit("\n")
+            self._at_line_start = True
+
+
+class _Container:
+    # An open blockquote or list; `indent` is the content indent of the list's current item
+    __slots__ = ("kind", "marker", "indent", "loose_item")
+
+    def __init__(self, kind: str, marker: str = "", indent: int = 0):
+        self.kind = kind
+        self.marker = marker
+        self.indent = indent
+        # A blank line was seen in the current list item
+        self.loose_item = False
+
+
+class MarkdownParser:
+    """
+    Incremental Markdown parser with CommonMark-style block and inline syntax.
+
+    Text is pushed in arbitrary chunks with `feed()`, and the document is reported to
+    `sink` (a `MarkdownSink`) as soon as each block is known, so it is parsed in one pass
+    and in memory bounded by the longest line rather than the document. `close()` ends the
+    document and closes the sink.
+
+    Supported: ATX headings, single-line setext headings, paragraphs with hard breaks,
+    bullet and ordered lists (nested, tight), blockquotes, fenced and indented code blocks,
+    thematic breaks, code spans, emphasis, inline links and images, autolinks, backslash
+    escapes and entities. Raw HTML is treated as text, and javascript:, vbscript:, file:
+    and (except for images) data: URLs are dropped. Reference-style links would need the
+    whole document and are kept as text. Lines longer than `max_line_length` are parsed in
+    pieces split at whitespace; inline markup that spans a split is left as text.
+    """
+    def __init__(self, sink: MarkdownSink, max_line_length: int = DEFAULT_MAX_LINE_LENGTH):
+        if max_line_length < 1:
+            raise ValueError("max_line_length must be positive")
+        self.sink = sink
+        self.max_line_length = max_line_length
+        self._partial: List[str] = []
+        self._partial_size = 0
+        self._continued = False
+        self._containers: List[_Container] = []
+        # None, "paragraph", "fence" or "code"
+        self._leaf: Optional[str] = None
+        self._paragraph: Optional[str] = None  # last paragraph line, not reported yet
+        self._paragraph_lines = 0
+        self._tight = False
+        self._fence: Tuple[str, int, int] = ("", 0, 0)  # character, length, indent
+        self._code_blanks = 0
+        self._closed = False
+
+    # Input
+
+    def feed(self, chunk: str) -> None:
+        """
+        Parses the complete lines in `chunk` and keeps a trailing partial line for later.
+        """
+        if self._closed:
+            raise ValueError(f"Cannot feed a closed {type(self).__name__}")
+        lines = chunk.split("\n")
+        tail = lines.pop()
+        if lines:
+            if self._partial:
+                self._partial.append(lines[0])
+                lines[0] = "".join(self._partial)
+                self._partial = []
+                self._partial_size = 0
+            parse_line = self._line
+            for line in lines:
+                if line.endswith("\r"):
+                    line = line[:-1]
+                parse_line(line, True)
+        if tail:
+            self._partial.append(tail)
+            self._partial_size += len(tail)
+            if self._partial_size > self.max_line_length:
+                self._split_partial()
+
+    def _split_partial(self) -> None:
+        text = "".join(self._partial)
+        limit = self.max_line_length
+        while len(text) > limit:
+            cut = max(text.rfind(" ", 0, limit), text.rfind("\t", 0, limit)) + 1
+            if cut <= 0:
+                cut = limit
+            self._line(text[:cut], False)
+            text = text[cut:]
+        self._partial = [text] if text else []
+        self._partial_size = len(text)
+
+    def close(self) -> None:
+        """
+        Parses the last line, closes every open block and closes the sink.
+        """
+        if self._closed:
+            return
+        if self._partial:
+            line = "".join(self._partial)
+            self._partial = []
+            self._line(line[:-1] if line.endswith("\r") else line, True)
+        self._close_leaf()
+        self._close_containers(0)
+        self.sink.close()
+        self._closed = True
+
+    # Blocks
+
+    def _close_leaf(self) -> None:
+        leaf = self._leaf
+        if leaf == "paragraph":
+            self._flush_paragraph(None)
+            self.sink.close_paragraph(self._tight)
+        elif leaf == "fence" or leaf == "code":
+            self.sink.close_code()
+        self._leaf = None
+        self._code_blanks = 0
+
+    def _close_containers(self, depth: int) -> None:
+        containers = self._containers
+        if len(containers) > depth:
+            self._close_leaf()
+        sink = self.sink
+        while len(containers) > depth:
+            if containers.pop().kind == "quote":
+                sink.close_quote()
+            else:
+                sink.close_item()
+                sink.close_list()
+
+    def _flush_paragraph(self, joiner: Optional[str]) -> None:
+        """
+        Reports the pending paragraph line. `joiner` is what follows it: "\n" for another
+        line (trailing double spaces or a backslash become a hard break), "" for the next
+        piece of the same line, None for the end of the paragraph.
+        """
+        text = self._paragraph
+        if text is None:
+            return
+        self._paragraph = None
+        sink = self.sink
+        if self._paragraph_lines == 1:
+            sink.open_paragraph(self._tight)
+        if joiner == "\n":
+            stripped = text.rstrip(" \t")
+            backslashes = len(stripped) - len(stripped.rstrip("\\"))
+            if backslashes % 2:
+                stripped = stripped[:-1]
+                sink.paragraph_text(stripped, inline_tokens(stripped), "hard")
+            elif len(text) - len(stripped) >= 2:
+                sink.paragraph_text(stripped, inline_tokens(stripped), "hard")
+            else:
+                sink.paragraph_text(stripped, inline_tokens(stripped), "soft")
+        elif joiner == "":
+            sink.paragraph_text(text, inline_tokens(text), "")
+        else:
+            text = text.rstrip(" \t")
+            sink.paragraph_text(text, inline_tokens(text), None)
+
+    def _add_paragraph_line(self, text: str, joiner: str = "\n") -> None:
+        if self._leaf != "paragraph":
+            self._close_leaf()
+            self._leaf = "paragraph"
+            self._paragraph_lines = 0
+            innermost = self._containers[-1] if self._containers else None
+            self._tight = innermost is not None and innermost.kind != "quote" and not innermost.loose_item
+            self._paragraph = text.lstrip(" \t")
+        else:
+            self._flush_paragraph(joiner)
+            self._paragraph = text if joiner == "" else text.lstrip(" \t")
+        self._paragraph_lines += 1
+
+    def _code_line(self, text: str, eol: bool) -> None:
+        code_text = self.sink.code_text
+        while self._code_blanks:
+            code_text("", True)
+            self._code_blanks -= 1
+        code_text(text, eol)
+
+    def _starts_block(self, line: str, pos: int, depth: int) -> bool:
+        # Whether the rest of the line would start a block instead of lazily continuing a paragraph
+        start = _SPACES.match(line, pos).end()
+        if start - pos >= 4:
+            return False
+        ch = line[start]
+        if ch == ">":
+            return True
+        if ch in "-*_" and self._thematic_break(line, start):
+            return True
+        marker = _LIST_MARKER.match(line, start)
+        if marker is not None:
+            if self._containers[depth].kind != "quote":
+                # Another item of the list whose item the line does not continue
+                return True
+            return bool(marker.group(1) or marker.group(2) == "1") and _SPACES.match(line, marker.end()).end() < len(line)
+        if ch == "#":
+            return _ATX_HEADING.match(line, start) is not None
+        return _FENCE.match(line, start) is not None
+
+    @staticmethod
+    def _thematic_break(line: str, start: int) -> bool:
+        ch = line[start]
+        rest = line[start:]
+        return rest.count(ch) >= 3 and not rest.replace(ch, "").replace(" ", "").replace("\t", "")
+
+    def _line(self, line: str, eol: bool) -> None:
+        continued = self._continued
+        self._continued = not eol
+        if continued:
+            # The next piece of an over-long line belongs to the block its first piece opened
+            if self._leaf == "paragraph":
+                self._add_paragraph_line(line, "")
+            elif self._leaf == "fence" or self._leaf == "code":
+                self._code_line(line, eol)
+            else:
+                self._add_paragraph_line(line)
+            return
+
+        if "\t" in line:
+            indent = _SPACES.match(line).end()
+            if "\t" in line[:indent]:
+                line = line[:indent].expandtabs(4) + line[indent:]
+        length = len(line)
+        containers = self._containers
+        pos = 0
+        depth = 0
+        for container in containers:
+            start = _SPACES.match(line, pos).end()
+            if container.kind == "quote":
+                if start - pos > 3 or not line.startswith(">", start):
+                    break
+                pos = start + 1
+                if line.startswith(" ", pos):
+                    pos += 1
+            elif start == length:
+                pos = length
+            elif start - pos >= container.indent:
+                pos += container.indent
+            else:
+                break
+            depth += 1
+
+        start = _SPACES.match(line, pos).end()
+        if self._leaf == "fence" and depth == len(containers):
+            char, fence_length, fence_indent = self._fence
+            if start - pos <= 3 and line.startswith(char * fence_length, start) \
+                    and not line[start:].rstrip(" \t").strip(char):
+                self._close_leaf()
+            else:
+                self._code_line(line[min(start, pos + fence_indent):], eol)
+            return
+
+        if start < length and start - pos < 4 and depth == len(containers) and line[start] not in _BLOCK_START:
+            # Paragraph text: nothing else can start with this character
+            self._add_paragraph_line(line[start:])
+            return
+        if start == length:
+            # Blank line
+            if depth < len(containers) and containers[depth].kind == "quote":
+                self._close_containers(depth)
+            if self._leaf == "code":
+                self._code_blanks += 1
+            elif self._leaf == "paragraph":
+                self._close_leaf()
+            for container in containers[:depth]:
+                if container.kind != "quote":
+                    container.loose_item = True
+            return
+
+        if depth < len(containers) and self._leaf == "paragraph" and not self._starts_block(line, pos, depth):
+            self._add_paragraph_line(line[pos:])
+            return
+
+        sink = self.sink
+        level = depth
+        while True:
+            start = _SPACES.match(line, pos).end()
+            indent = start - pos
+            if indent >= 4 or start == length:
+                break
+            ch = line[start]
+            if ch not in _BLOCK_START:
+                break
+            if ch == ">":
+                self._close_containers(level)
+                self._close_leaf()
+                sink.open_quote()
+                containers.append(_Container("quote"))
+                level += 1
+                pos = start + 1
+                if line.startswith(" ", pos):
+                    pos += 1
+                continue
+            if ch in "-*_" and self._thematic_break(line, start):
+                break
+            marker = _LIST_MARKER.match(line, start)
+            if marker is None:
+                break
+            bullet, number, delimiter = marker.groups()
+            content = _SPACES.match(line, marker.end()).end()
+            empty = content == length
+            if self._leaf == "paragraph" and level == len(containers) \
+                    and (empty or (number is not None and number != "1")):
+                # Only items that start with text, and ordered lists starting at 1, interrupt a paragraph
+                break
+            gap = content - marker.end()
+            width = marker.end() - start
+            item_indent = indent + width + (1 if empty or gap > 4 else gap)
+            kind = "ul" if bullet else "ol"
+            marker_key = bullet or delimiter
+            if level < len(containers) and containers[level].kind == kind and containers[level].marker == marker_key:
+                self._close_containers(level + 1)
+                self._close_leaf()
+                container = containers[level]
+                sink.close_item()
+                container.indent = item_indent
+                container.loose_item = False
+            else:
+                self._close_containers(level)
+                self._close_leaf()
+                containers.append(_Container(kind, marker_key, item_indent))
+                sink.open_list(kind == "ol", int(number) if number else 1, marker_key)
+            sink.open_item()
+            level += 1
+            pos = min(start + width + (1 if gap > 4 else gap), length)
+
+        if level < len(containers):
+            self._close_containers(level)
+        start = _SPACES.match(line, pos).end()
+        if start == length:
+            return
+        indent = start - pos
+        leaf = self._leaf
+        if indent >= 4:
+            if leaf == "paragraph":
+                self._add_paragraph_line(line[pos:])
+            else:
+                if leaf != "code":
+                    self._close_leaf()
+                    sink.open_code("", None)
+                    self._leaf = "code"
+                self._code_line(line[pos + 4:], eol)
+            return
+        ch = line[start]
+        if ch == "#":
+            heading = _ATX_HEADING.match(line, start)
+            if heading is not None:
+                self._close_leaf()
+                text = line[heading.end():].strip(" \t")
+                stripped = text.rstrip("#")
+                if not stripped:
+                    text = ""
+                elif stripped[-1] in " \t":
+                    text = stripped.rstrip(" \t")
+                sink.heading(heading.end() - start, text, inline_tokens(text))
+                return
+        elif ch == "`" or ch == "~":
+            fence = _FENCE.match(line, start)
+            if fence is not None:
+                info = line[fence.end():].strip(" \t")
+                if ch == "~" or "`" not in info:
+                    self._close_leaf()
+                    self._leaf = "fence"
+                    self._fence = (ch, fence.end() - start, indent)
+                    language = info.split(None, 1)[0] if info else ""
+                    sink.open_code(_BACKSLASH_ESCAPE.sub(r"\1", language), fence.group())
+                    return
+        if ch in "=-" and leaf == "paragraph" and self._paragraph_lines == 1 and level == len(containers) \
+                and _SETEXT_UNDERLINE.match(line, start):
+            text = self._paragraph.rstrip(" \t")
+            self._paragraph = None
+            self._leaf = None
+            sink.heading(1 if ch == "=" else 2, text, inline_tokens(text))
+            return
+        if ch in "-*_" and self._thematic_break(line, start):
+            self._close_leaf()
+            sink.thematic_break()
+            return
+        self._add_paragraph_line(line[start:])
+
+
+class MarkdownRenderer(MarkdownParser):
+    """
+    Incremental Markdown to HTML renderer: a `MarkdownParser` writing to an `HtmlSink`.
+    HTML is written to `writer` (any object with a `write(str)` method) as soon as each
+    block is known; `close()` ends the document and flushes what is left.
+    """
+    def __init__(self, writer, max_line_length: int = DEFAULT_MAX_LINE_LENGTH,
+                 buffer_size: int = DEFAULT_BUFFER_SIZE):
+        super().__init__(HtmlSink(writer, buffer_size), max_line_length)
+
+    def flush(self) -> None:
+        self.sink.flush()
+
+
+# Output formats that `render_markdown()` and `render_markdown_stream()` can write
+SINKS = {"html": HtmlSink, "markdown": MarkdownTextSink, "text": PlainTextSink}
+
+
+def create_sink(target_format: str, writer, buffer_size: int = DEFAULT_BUFFER_SIZE) -> MarkdownSink:
+    """
+    Returns the sink that writes `target_format` to `writer`.
+    """
+    if target_format not in SINKS:
+        raise ValueError(f"Unsupported target format: {target_format}. Use one of {sorted(SINKS)}.")
+    return SINKS[target_format](writer, buffer_size)
+
+
+def feed_text(parser: MarkdownParser, text: str) -> None:
+    """
+    Feeds a document held in memory to `parser` and closes it.
+    """
+    for start in range(0, len(text), DEFAULT_CHUNK_SIZE):
+        parser.feed(text[start:start + DEFAULT_CHUNK_SIZE])
+    parser.close()
+
+
+def render_markdown(text: str, max_line_length: int = DEFAULT_MAX_LINE_LENGTH,
+                    target_format: str = "html") -> str:
+    """
+    Renders a Markdown document held in memory to "html", "markdown" (normalized) or
+    "text" and returns the result.
+    """
+    output = io.StringIO()
+    feed_text(MarkdownParser(create_sink(target_format, output, 1 << 30), max_line_length), text)
+    return output.getvalue()
+
+
+def render_markdown_stream(source, writer, chunk_size: int = DEFAULT_CHUNK_SIZE,
+                           max_line_length: int = DEFAULT_MAX_LINE_LENGTH, target_format: str = "html") -> None:
+    """
+    Renders Markdown from `source` to `writer`. `source` is a text file object, read
+    `chunk_size` characters at a time, or an iterable of text chunks.
+    """
+    parser = MarkdownParser(create_sink(target_format, writer), max_line_length=max_line_length)
+    chunks: Iterable[str]
+    if hasattr(source, "read"):
+        chunks = iter(lambda: source.read(chunk_size), "")
+    else:
+        chunks = source
+    for chunk in chunks:
+        parser.feed(chunk)
+    parser.close()
@@ -1,28 +1,15 @@
 import json
 import logging
 import uuid
-from typing import Dict, Any
-from datetime import datetime
+from typing import Dict, Any, List
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
+from ..interface import BMADAgentInterface
+from .asset_index import AssetIndex, asset_key, create_asset_index
 
-class BMADAgentInterface:
-    """
-    BMADAgentInterface defines the standard methods for all BMAD agents.
-    """
-    def initialize(self, config: Dict[str, Any]) -> None:
-        raise NotImplementedError
-
-    def process(self, input_data: Dict[str, Any]) -> None:
-        raise NotImplementedError
-
-    def output(self) -> Dict[str, Any]:
-        raise NotImplementedError
+logger = logging.getLogger(__name__)
 
-    def shutdown(self) -> None:
-        raise NotImplementedError
+# A generic negative prompt shared by every generated image prompt
+NEGATIVE_PROMPT = "low quality, blurry, watermark, text, signature, ugly, deformed, extra limbs"
 
 class ImagePromptAgent(BMADAgentInterface):
     """
@@ -35,91 +22,60 @@ class ImagePromptAgent(BMADAgentInterface):
         "input_schema": "input_schema.json",
         "output_schema": "output_schema.json",
         "dependencies": [],
-        "version": "1.1.0" # Updated version
+        "deterministic": True,
+        "volatile_output_fields": ["already_generated"],
+        "version": "1.2.0" # Content-addressed filenames
     }
 
     def __init__(self):
         self.config = None
         self.output_data = None
+        self.asset_index = AssetIndex()
 
     def initialize(self, config: Dict[str, Any] = None) -> None:
         """
         Initializes the agent with a given configuration.
+        `asset_index` is an `AssetIndex` (pass the same instance to share it between agents)
+        or a dict of its options, e.g. {"path": "assets.db"}.
         """
         self.config = config if config else {}
+        index = self.config.get("asset_index")
+        if isinstance(index, AssetIndex):
+            self.asset_index = index
+        elif index is not None:
+            self.asset_index = create_asset_index(index)
         logger.info(f"Image Prompt Agent initialized with config: {self.config}")
 
-    def process(self, input_data: Dict[str, Any]) -> None:
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Processes the input data to generate an image prompt.
+        Generates an image prompt and returns it, without keeping it on the instance, so one
+        agent can serve concurrent requests.
         This is a mock implementation with enhanced features.
+        The filename is derived from the prompt's `asset_key`, and `already_generated` says
+        whether the asset index already holds that image, so the render can be skipped.
+        """
+        return self._generate(input_data)
+
+    async def arun(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        logger.info(f"Processing input data: {input_data}")
+        Async counterpart of `run()`. Building a prompt takes microseconds and the asset
+        index is consulted in memory, so it runs inline on the event loop.
+        """
+        return self._generate(input_data)
+
+    def process(self, input_data: Dict[str, Any]) -> None:
+        """
+        Processes the input data to generate an image prompt, for `output()` to return.
+        """
+        self.output_data = self._generate(input_data)
+
+    def _generate(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        logger.debug("Processing input data: %s", input_data)
         try:
-            base_subject = input_data['base_subject']
-            style = input_data.get('style', 'photorealistic')
-            aspect_ratio = input_data.get('aspect_ratio', '16:9')
-            model = input_data.get('model', 'midjourney')
-            lighting = input_data.get('lighting')
-            perspective = input_data.get('perspective')
-            composition = input_data.get('composition')
-            modifiers = input_data.get('modifiers', [])
-
-            # Construct the prompt
-            prompt_parts = [f"{style} image of {base_subject}"]
-            if composition:
-                prompt_parts.append(composition)
-            if perspective:
-                prompt_parts.append(perspective)
-            if lighting:
-                prompt_parts.append(lighting)
-            if modifiers:
-                prompt_parts.append(", ".join(modifiers))
-
-            # Model-specific adjustments
-            if model == 'midjourney':
-                prompt_parts.append(f"--ar {aspect_ratio}")
-            elif model == 'stable-diffusion':
-                # Stable Diffusion often uses weighted prompts, but we'll keep it simple for this mock
-                prompt_parts.append(f"aspect ratio {aspect_ratio}")
-            else: # DALL-E
-                prompt_parts.append(f"in a {aspect_ratio} aspect ratio")
-
-            prompt = ", ".join(prompt_parts)
-
-            # Construct a generic negative prompt
-            negative_prompt = "low quality, blurry, watermark, text, signature, ugly, deformed, extra limbs"
-
-            # Suggest models based on style
-            model_suggestions = []
-            if style in ["photorealistic", "cinematic"]:
-                model_suggestions.extend(["Midjourney v6", "DALL-E 3"])
-            elif style == "illustration":
-                model_suggestions.append("Midjourney Niji")
-            else:
-                model_suggestions.extend(["Stable Diffusion XL", "DALL-E 3"])
-
-            # Generate a filename
-            slug = base_subject.lower().replace(" ", "-")[:30]
-            timestamp = datetime.now().strftime("%Y%m%d%H%M%S")
-            filename = f"{slug}-{timestamp}.png"
-
-            self.output_data = {
-                "prompt": prompt,
-                "negative_prompt": negative_prompt,
-                "filename": filename,
-                "parameters": {
-                    "style": style,
-                    "aspect_ratio": aspect_ratio,
-                    "model": model,
-                    "lighting": lighting,
-                    "perspective": perspective,
-                    "composition": composition,
-                    "modifiers": modifiers
-                },
-                "model_suggestions": model_suggestions
-            }
+            output_data = self._build_prompt(input_data)
+            output_data["already_generated"] = output_data["asset_key"] in self.asset_index
             logger.info("Successfully generated enhanced image prompt.")
+            return output_data
 
         except KeyError as e:
             logger.error(f"Missing required input key: {e}")
@@ -128,6 +84,117 @@ class ImagePromptAgent(BMADAgentInterface):
             logger.error(f"An error occurred during processing: {e}")
             raise
 
+    def process_batch(self, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Generates image prompts for many inputs at once.
+        Logging is done once per batch instead of once per record, and the asset index is
+        asked about the whole batch in one bulk lookup.
+        """
+        logger.info(f"Processing batch of {len(inputs)} image prompt inputs.")
+        build_prompt = self._build_prompt
+        outputs = []
+        try:
+            for input_data in inputs:
+                outputs.append(build_prompt(input_data))
+        except KeyError as e:
+            logger.error(f"Missing required input key: {e} (batch record {len(outputs)})")
+            raise ValueError(f"Missing required input key: {e} (batch record {len(outputs)})")
+        except Exception as e:
+            logger.error(f"An error occurred during batch processing: {e}")
+            raise
+        generated = self.asset_index.contains_many([output_data["asset_key"] for output_data in outputs])
+        for output_data, already_generated in zip(outputs, generated):
+            output_data["already_generated"] = already_generated
+        if outputs:
+            self.output_data = outputs[-1]
+        logger.info(f"Successfully generated {len(outputs)} image prompts.")
+        return outputs
+
+    def _build_prompt(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Builds the output for a single input, apart from `already_generated`.
+        Raises KeyError if `base_subject` is missing.
+        """
+        base_subject = input_data['base_subject']
+        style = input_data.get('style', 'photorealistic')
+        aspect_ratio = input_data.get('aspect_ratio', '16:9')
+        model = input_data.get('model', 'midjourney')
+        lighting = input_data.get('lighting')
+        perspective = input_data.get('perspective')
+        composition = input_data.get('composition')
+        modifiers = input_data.get('modifiers', [])
+
+        # Construct the prompt
+        prompt_parts = [f"{style} image of {base_subject}"]
+        if composition:
+            prompt_parts.append(composition)
+        if perspective:
+            prompt_parts.append(perspective)
+        if lighting:
+            prompt_parts.append(lighting)
+        if modifiers:
+            prompt_parts.append(", ".join(modifiers))
+
+        # Model-specific adjustments
+        if model == 'midjourney':
+            prompt_parts.append(f"--ar {aspect_ratio}")
+        elif model == 'stable-diffusion':
+            # Stable Diffusion often uses weighted prompts, but we'll keep it simple for this mock
+            prompt_parts.append(f"aspect ratio {aspect_ratio}")
+        else: # DALL-E
+            prompt_parts.append(f"in a {aspect_ratio} aspect ratio")
+
+        prompt = ", ".join(prompt_parts)
+
+        # Suggest models based on style
+        if style in ["photorealistic", "cinematic"]:
+            model_suggestions = ["Midjourney v6", "DALL-E 3"]
+        elif style == "illustration":
+            model_suggestions = ["Midjourney Niji"]
+        else:
+            model_suggestions = ["Stable Diffusion XL", "DALL-E 3"]
+
+        parameters = {
+            "style": style,
+            "aspect_ratio": aspect_ratio,
+            "model": model,
+            "lighting": lighting,
+            "perspective": perspective,
+            "composition": composition,
+            "modifiers": modifiers
+        }
+        key = asset_key(prompt, NEGATIVE_PROMPT, parameters)
+        return {
+            "prompt": prompt,
+            "negative_prompt": NEGATIVE_PROMPT,
+            "filename": self._filename(base_subject, key),
+            "asset_key": key,
+            "parameters": parameters,
+            "model_suggestions": model_suggestions
+        }
+
+    def volatile_output(self, input_data: Dict[str, Any], output_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Returns whether the image has been generated since, the only part of the output
+        that is not determined by the input.
+        """
+        return {"already_generated": output_data["asset_key"] in self.asset_index}
+
+    @staticmethod
+    def _filename(base_subject: str, key: str) -> str:
+        # The slug keeps names readable; the key makes them unique and stable
+        slug = base_subject.lower().replace(" ", "-")[:30]
+        return f"{slug}-{key[:16]}.png"
+
+    def mark_generated(self, outputs: List[Dict[str, Any]], uri: str = None) -> None:
+        """
+        Records in the asset index that the images of these outputs have been rendered,
+        optionally stored at `uri`. Later outputs for the same prompts report
+        `already_generated`.
+        """
+        self.asset_index.add_many([(output_data["asset_key"], output_data["filename"], uri)
+                                   for output_data in outputs])
+
     def output(self) -> Dict[str, Any]:
         """
         Returns the generated output data.
@@ -143,9 +210,13 @@ class ImagePromptAgent(BMADAgentInterface):
         """
         logger.info("Image Prompt Agent is shutting down.")
         self.output_data = None
+        if not isinstance((self.config or {}).get("asset_index"), AssetIndex):
+            # A shared index belongs to whoever passed it in
+            self.asset_index.close()
 
 # Example of how the BMAD orchestrator might use this agent
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     image_agent = ImagePromptAgent()
     image_agent.initialize()
 
@@ -165,6 +236,11 @@ if __name__ == '__main__':
         prompt_output = image_agent.output()
         print("Generated Image Prompt:")
         print(json.dumps(prompt_output, indent=2))
+
+        # After rendering the image, record it; the same request is then known to be done
+        image_agent.mark_generated([prompt_output])
+        image_agent.process(example_input)
+        print(f"Already generated on the second request: {image_agent.output()['already_generated']}")
     except ValueError as e:
         print(f"Error processing input: {e}")
     finally:
@@ -0,0 +1,179 @@
+import hashlib
+import os
+import threading
+import time
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+
+def asset_key(prompt: str, negative_prompt: str, parameters: Dict[str, Any]) -> str:
+    """
+    Returns the content address of an image: a BLAKE2b digest (32 hex characters) of its
+    prompt, negative prompt and generation parameters. Identical requests get the same key
+    no matter when or where they are made. Unset and empty parameters hash alike, since
+    they build the same prompt.
+    """
+    # Joined with ASCII separators rather than serialized as JSON: this runs once per
+    # output and JSON encoding would cost twice as much as the rest of the agent
+    canonical = "\x1f".join((
+        prompt, negative_prompt,
+        parameters.get("style") or "", parameters.get("aspect_ratio") or "", parameters.get("model") or "",
+        parameters.get("lighting") or "", parameters.get("perspective") or "", parameters.get("composition") or "",
+        "\x1e".join(parameters.get("modifiers") or ())
+    ))
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=16).hexdigest()
+
+
+class AssetRecord:
+    """
+    An image that has been generated: its content key, filename and where it was stored.
+    """
+    __slots__ = ("key", "filename", "uri", "created_at")
+
+    def __init__(self, key: str, filename: str, uri: Optional[str] = None, created_at: float = None):
+        self.key = key
+        self.filename = filename
+        self.uri = uri
+        self.created_at = created_at if created_at is not None else time.time()
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"asset_key": self.key, "filename": self.filename, "uri": self.uri, "created_at": self.created_at}
+
+
+class AssetIndex:
+    """
+    Index of generated images by content key, so a pipeline can skip rendering an image
+    it already has.
+
+    Lookups are dictionary hits (O(1)); `contains_many()` and `get_many()` answer a whole
+    batch under one lock acquisition. With a `path`, every record is committed to a SQLite
+    journal before it is added to memory, and a new index on the same path reloads them.
+    A lookup that misses also picks up records that other processes have committed to the
+    journal since, at the cost of one `PRAGMA data_version` query when nothing changed.
+    Without a path, the index is in-memory only. All methods are thread-safe.
+    """
+    def __init__(self, path: Optional[str] = None, timeout: float = 30.0):
+        self.path = path
+        self._records: Dict[str, AssetRecord] = {}
+        self._lock = threading.Lock()
+        self._conn = None
+        self._data_version = None
+        self._last_rowid = 0
+        if path is not None:
+            # Imported on first use to keep the agent's import time down
+            import sqlite3
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS assets ("
+                    "asset_key TEXT PRIMARY KEY, filename TEXT NOT NULL, uri TEXT, created_at REAL NOT NULL)"
+                )
+            self._refresh()
+
+    def _refresh(self) -> None:
+        # Reads the rows committed by other connections since the last read; the caller holds
+        # the lock. data_version only changes when another connection has committed.
+        if self._conn is None:
+            return
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version == self._data_version:
+            return
+        self._data_version = data_version
+        rows = self._conn.execute(
+            "SELECT rowid, asset_key, filename, uri, created_at FROM assets WHERE rowid > ? ORDER BY rowid",
+            (self._last_rowid,)
+        ).fetchall()
+        records = self._records
+        for _, key, filename, uri, created_at in rows:
+            if key not in records:
+                records[key] = AssetRecord(key, filename, uri, created_at)
+        if rows:
+            self._last_rowid = rows[-1][0]
+
+    def __contains__(self, key: str) -> bool:
+        if key in self._records:
+            return True
+        if self._conn is None:
+            return False
+        with self._lock:
+            self._refresh()
+            return key in self._records
+
+    def __len__(self) -> int:
+        return len(self._records)
+
+    def get(self, key: str) -> Optional[AssetRecord]:
+        record = self._records.get(key)
+        if record is not None or self._conn is None:
+            return record
+        with self._lock:
+            self._refresh()
+            return self._records.get(key)
+
+    def contains_many(self, keys: Sequence[str]) -> List[bool]:
+        """
+        Returns, for each key in order, whether its image has been generated.
+        """
+        with self._lock:
+            records = self._records
+            found = [key in records for key in keys]
+            if self._conn is not None and not all(found):
+                self._refresh()
+                found = [key in records for key in keys]
+            return found
+
+    def get_many(self, keys: Iterable[str]) -> Dict[str, Optional[AssetRecord]]:
+        """
+        Returns the record of each key, or None for keys not generated yet.
+        """
+        with self._lock:
+            records = self._records
+            found = {key: records.get(key) for key in keys}
+            if self._conn is not None and None in found.values():
+                self._refresh()
+                found = {key: records.get(key) for key in found}
+            return found
+
+    def add(self, key: str, filename: str, uri: Optional[str] = None) -> AssetRecord:
+        """
+        Records that the image for `key` has been generated. Recording a key again keeps
+        the first record.
+        """
+        return self.add_many([(key, filename, uri)])[0]
+
+    def add_many(self, items: Sequence[Tuple[str, str, Optional[str]]]) -> List[AssetRecord]:
+        """
+        Records many generated images, given as (key, filename, uri) tuples, in one
+        transaction. Returns the record of each key in order.
+        """
+        with self._lock:
+            now = time.time()
+            added: Dict[str, AssetRecord] = {}
+            for key, filename, uri in items:
+                if key not in self._records and key not in added:
+                    added[key] = AssetRecord(key, filename, uri, now)
+            if added and self._conn is not None:
+                with self._conn:
+                    self._conn.executemany(
+                        "INSERT OR IGNORE INTO assets (asset_key, filename, uri, created_at) VALUES (?, ?, ?, ?)",
+                        [(record.key, record.filename, record.uri, record.created_at) for record in added.values()]
+                    )
+            self._records.update(added)
+            return [self._records[key] for key, _, _ in items]
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_asset_index(options: Dict[str, Any] = None) -> AssetIndex:
+    """
+    Builds an asset index from the `asset_index` section of the agent config: "path" (a
+    SQLite journal; in-memory if omitted) and "timeout".
+    """
+    return AssetIndex(**dict(options or {}))
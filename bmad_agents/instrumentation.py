@@ -0,0 +1,379 @@
+import bisect
+import json
+import logging
+import random
+import threading
+import time
+import uuid
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Dict, Any, Iterable, List, TextIO, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the latency histogram buckets
+DEFAULT_BUCKETS = (0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+INSTRUMENTED_METHODS = ("initialize", "run", "process", "process_batch", "output", "shutdown")
+ASYNC_INSTRUMENTED_METHODS = ("arun",)
+
+
+class LatencyHistogram:
+    """
+    A fixed-bucket latency histogram, cumulative in the Prometheus sense when exported.
+    """
+    __slots__ = ("buckets", "counts", "count", "total")
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot counts observations above every bucket
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float) -> None:
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    def quantile(self, q: float) -> float:
+        """
+        Returns the upper bound of the bucket holding the q-th quantile (inf if above every bucket).
+        """
+        if self.count == 0:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, bucket_count in zip(self.buckets, self.counts):
+            seen += bucket_count
+            if seen >= rank:
+                return bound
+        return float("inf")
+
+
+class Span:
+    """
+    A timed agent operation.
+    """
+    __slots__ = ("span_id", "agent", "operation", "start_time", "duration_seconds", "status", "error", "attributes")
+
+    def __init__(self, agent: str, operation: str, attributes: Dict[str, Any] = None):
+        self.span_id = uuid.uuid4().hex[:16]
+        self.agent = agent
+        self.operation = operation
+        self.start_time = time.time()
+        self.duration_seconds = 0.0
+        self.status = "ok"
+        self.error = None
+        self.attributes = attributes or {}
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "span_id": self.span_id,
+            "agent": self.agent,
+            "operation": self.operation,
+            "start_time": self.start_time,
+            "duration_seconds": self.duration_seconds,
+            "status": self.status,
+            "error": self.error,
+            "attributes": self.attributes
+        }
+
+
+class SpanSink:
+    """
+    SpanSink receives every finished span.
+    """
+    def export(self, span: Span) -> None:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        pass
+
+
+class InMemorySink(SpanSink):
+    """
+    Keeps the most recent spans in memory, mainly for tests and debugging.
+    """
+    def __init__(self, max_spans: int = 10000):
+        self.spans = deque(maxlen=max_spans)
+
+    def export(self, span: Span) -> None:
+        self.spans.append(span)
+
+
+class JsonLinesSink(SpanSink):
+    """
+    Writes one JSON object per span to a file path or an open text stream.
+    """
+    def __init__(self, target, flush_every: int = 100):
+        if isinstance(target, str):
+            self.stream: TextIO = open(target, "a", encoding="utf-8")
+            self._owns_stream = True
+        else:
+            self.stream = target
+            self._owns_stream = False
+        self.flush_every = flush_every
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        with self._lock:
+            self.stream.write(line)
+            self._pending += 1
+            if self._pending >= self.flush_every:
+                self.stream.flush()
+                self._pending = 0
+
+    def close(self) -> None:
+        with self._lock:
+            self.stream.flush()
+            if self._owns_stream:
+                self.stream.close()
+
+
+class AgentMetrics:
+    """
+    Per-agent, per-operation call counters, error counters and latency histograms.
+    """
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.histograms: Dict[Tuple[str, str], LatencyHistogram] = {}
+        self.errors: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def record(self, span: Span) -> None:
+        key = (span.agent, span.operation)
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = LatencyHistogram(self.buckets)
+            histogram.observe(span.duration_seconds)
+            if span.status == "error":
+                self.errors[key] = self.errors.get(key, 0) + 1
+
+    def snapshot(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """
+        Returns {agent: {operation: {calls, errors, mean_seconds, p50_seconds, p99_seconds}}}.
+        """
+        result: Dict[str, Dict[str, Dict[str, float]]] = {}
+        with self._lock:
+            for (agent, operation), histogram in sorted(self.histograms.items()):
+                result.setdefault(agent, {})[operation] = {
+                    "calls": histogram.count,
+                    "errors": self.errors.get((agent, operation), 0),
+                    "mean_seconds": histogram.total / histogram.count if histogram.count else 0.0,
+                    "p50_seconds": histogram.quantile(0.5),
+                    "p99_seconds": histogram.quantile(0.99)
+                }
+        return result
+
+    def prometheus_text(self) -> str:
+        """
+        Renders the metrics in the Prometheus text exposition format.
+        """
+        lines = [
+            "# HELP bmad_agent_call_duration_seconds Latency of agent method calls.",
+            "# TYPE bmad_agent_call_duration_seconds histogram"
+        ]
+        error_lines = [
+            "# HELP bmad_agent_errors_total Agent method calls that raised.",
+            "# TYPE bmad_agent_errors_total counter"
+        ]
+        with self._lock:
+            for (agent, operation), histogram in sorted(self.histograms.items()):
+                labels = f'agent="{agent}",operation="{operation}"'
+                cumulative = 0
+                for bound, bucket_count in zip(histogram.buckets, histogram.counts):
+                    cumulative += bucket_count
+                    lines.append(f'bmad_agent_call_duration_seconds_bucket{{{labels},le="{bound}"}} {cumulative}')
+                lines.append(f'bmad_agent_call_duration_seconds_bucket{{{labels},le="+Inf"}} {histogram.count}')
+                lines.append(f"bmad_agent_call_duration_seconds_sum{{{labels}}} {histogram.total}")
+                lines.append(f"bmad_agent_call_duration_seconds_count{{{labels}}} {histogram.count}")
+                error_lines.append(f"bmad_agent_errors_total{{{labels}}} {self.errors.get((agent, operation), 0)}")
+        return "\n".join(lines + error_lines) + "\n"
+
+
+class PrometheusSink(SpanSink):
+    """
+    Serves the `AgentMetrics` of an `Instrumentation` as a Prometheus text endpoint.
+    Spans are already aggregated into those metrics, so `export()` has nothing to do.
+    `collectors` are other objects with a `prometheus_text()` method (e.g. a `SingleFlight`)
+    whose metrics are served alongside. Call `serve(port)` to start a background HTTP server
+    answering on /metrics.
+    """
+    def __init__(self, metrics: AgentMetrics = None, collectors: Iterable[Any] = ()):
+        self.metrics = metrics or AgentMetrics()
+        self.collectors = list(collectors)
+        self._server = None
+
+    def export(self, span: Span) -> None:
+        pass
+
+    def prometheus_text(self) -> str:
+        return self.metrics.prometheus_text() + "".join(c.prometheus_text() for c in self.collectors)
+
+    def serve(self, port: int = 9464, host: str = "127.0.0.1") -> ThreadingHTTPServer:
+        sink = self
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split("?")[0] != "/metrics":
+                    self.send_error(404)
+                    return
+                body = sink.prometheus_text().encode("utf-8")
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, format, *args):
+                logger.debug(format, *args)
+
+        self._server = ThreadingHTTPServer((host, port), MetricsHandler)
+        threading.Thread(target=self._server.serve_forever, name="bmad-metrics", daemon=True).start()
+        logger.info(f"Serving Prometheus metrics on http://{host}:{self._server.server_port}/metrics")
+        return self._server
+
+    def close(self) -> None:
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
+
+
+class _TruncatedRepr:
+    """
+    Defers formatting a payload until a log handler actually renders the record.
+    """
+    __slots__ = ("value", "max_chars")
+
+    def __init__(self, value: Any, max_chars: int):
+        self.value = value
+        self.max_chars = max_chars
+
+    def __str__(self) -> str:
+        text = repr(self.value)
+        if len(text) > self.max_chars:
+            return f"{text[:self.max_chars]}... ({len(text)} chars)"
+        return text
+
+
+class SampledPayloadLogger:
+    """
+    Logs a sample of agent input payloads, formatted lazily and truncated.
+    Unsampled calls cost one random draw; nothing is formatted unless the record is emitted.
+    """
+    def __init__(self, sample_rate: float = 0.01, max_chars: int = 512, level: int = logging.INFO,
+                 payload_logger: logging.Logger = None):
+        self.sample_rate = sample_rate
+        self.max_chars = max_chars
+        self.level = level
+        self.logger = payload_logger or logging.getLogger("bmad.payloads")
+
+    def log(self, agent: str, operation: str, payload: Any) -> None:
+        if self.sample_rate <= 0 or random.random() >= self.sample_rate:
+            return
+        if self.logger.isEnabledFor(self.level):
+            self.logger.log(self.level, "%s.%s payload: %s", agent, operation, _TruncatedRepr(payload, self.max_chars))
+
+
+class Instrumentation:
+    """
+    Wraps agent methods with spans, latency histograms and error counters.
+
+    `instrument(agent)` replaces `initialize`, `run`, `arun`, `process`, `process_batch`,
+    `output` and `shutdown` on the instance with timed wrappers. Every finished span goes to
+    `metrics` and to each configured sink; inputs to `run`/`arun`/`process`/`process_batch`
+    go to the sampled payload logger. An `arun` span covers the whole await and ends with
+    status "cancelled" if its task is cancelled.
+    """
+    def __init__(self, sinks: Iterable[SpanSink] = (), payload_logger: SampledPayloadLogger = None,
+                 metrics: AgentMetrics = None):
+        self.sinks: List[SpanSink] = list(sinks)
+        self.payload_logger = payload_logger or SampledPayloadLogger()
+        self.metrics = metrics or AgentMetrics()
+        for sink in self.sinks:
+            if isinstance(sink, PrometheusSink):
+                sink.metrics = self.metrics
+
+    def _finish(self, span: Span, started: float) -> None:
+        span.duration_seconds = time.perf_counter() - started
+        self.metrics.record(span)
+        for sink in self.sinks:
+            try:
+                sink.export(span)
+            except Exception as e:
+                logger.error(f"Span sink {type(sink).__name__} failed: {e}")
+
+    def _wrap(self, agent_name: str, operation: str, method):
+        payload_logger = self.payload_logger
+
+        def traced(*args, **kwargs):
+            if args and operation in ("run", "process", "process_batch"):
+                payload_logger.log(agent_name, operation, args[0])
+            attributes = {"batch_size": len(args[0])} if operation == "process_batch" and args else None
+            span = Span(agent_name, operation, attributes)
+            started = time.perf_counter()
+            try:
+                return method(*args, **kwargs)
+            except Exception as e:
+                span.status = "error"
+                span.error = f"{type(e).__name__}: {e}"
+                raise
+            finally:
+                self._finish(span, started)
+
+        traced.__wrapped__ = method
+        traced.__name__ = getattr(method, "__name__", operation)
+        traced.__doc__ = getattr(method, "__doc__", None)
+        return traced
+
+    def _wrap_async(self, agent_name: str, operation: str, method):
+        payload_logger = self.payload_logger
+
+        async def traced(*args, **kwargs):
+            if args:
+                payload_logger.log(agent_name, operation, args[0])
+            span = Span(agent_name, operation)
+            started = time.perf_counter()
+            try:
+                return await method(*args, **kwargs)
+            except Exception as e:
+                span.status = "error"
+                span.error = f"{type(e).__name__}: {e}"
+                raise
+            except BaseException:
+                # asyncio.CancelledError: the awaiting task was cancelled, which is not an agent error
+                span.status = "cancelled"
+                raise
+            finally:
+                self._finish(span, started)
+
+        traced.__wrapped__ = method
+        traced.__name__ = getattr(method, "__name__", operation)
+        traced.__doc__ = getattr(method, "__doc__", None)
+        return traced
+
+    def instrument(self, agent):
+        """
+        Instruments an agent instance in place and returns it. Instrumenting twice is a no-op.
+        """
+        if getattr(agent, "_bmad_instrumentation", None) is not None:
+            return agent
+        agent_name = getattr(agent, "agent_name", type(agent).__name__)
+        for operation in INSTRUMENTED_METHODS:
+            method = getattr(agent, operation, None)
+            if method is not None:
+                setattr(agent, operation, self._wrap(agent_name, operation, method))
+        for operation in ASYNC_INSTRUMENTED_METHODS:
+            method = getattr(agent, operation, None)
+            if method is not None:
+                setattr(agent, operation, self._wrap_async(agent_name, operation, method))
+        agent._bmad_instrumentation = self
+        return agent
+
+    def close(self) -> None:
+        for sink in self.sinks:
+            sink.close()
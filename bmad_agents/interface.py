@@ -0,0 +1,92 @@
+import threading
+from typing import Any, Callable, Dict, List
+
+
+async def offload(function: Callable, *args: Any) -> Any:
+    """
+    Runs a blocking call on the event loop's default executor and returns its result, so
+    the loop keeps serving other requests in the meantime. If the awaiting task is
+    cancelled, the call still runs to completion on its thread.
+    """
+    import asyncio  # Imported on first use; it would dominate the agents' import time
+
+    return await asyncio.get_running_loop().run_in_executor(None, function, *args)
+
+
+def loggable_config(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Returns an agent config that is safe to log. A `model_backend` options dict is reduced
+    to its type and URL: its other options, such as `api_key` and `headers`, carry
+    credentials, and so can the URL's user info and query string.
+    """
+    backend = config.get("model_backend")
+    if not isinstance(backend, dict):
+        return config
+    scheme, separator, rest = str(backend.get("url", "")).partition("://")
+    location = rest.partition("?")[0].rpartition("@")[2]
+    return {**config, "model_backend": {"type": backend.get("type", "http"), "url": f"{scheme}{separator}{location}"}}
+
+
+class BMADAgentInterface:
+    """
+    BMADAgentInterface defines the standard methods for all BMAD agents.
+    """
+    def initialize(self, config: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def process(self, input_data: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def output(self) -> Dict[str, Any]:
+        raise NotImplementedError
+
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Processes one input and returns its output, keeping no per-call state on the instance,
+        so one initialized agent can serve many threads at once. `process()` followed by
+        `output()` is the older, single-caller form of the same call.
+
+        Agents override this with a reentrant implementation. The default serializes callers
+        on a per-instance lock around `process()` and `output()`.
+        """
+        lock = self.__dict__.get("_run_lock") or self.__dict__.setdefault("_run_lock", threading.Lock())
+        with lock:
+            # The class's methods, so wrappers installed on the instance around run() do not apply twice
+            type(self).process(self, input_data)
+            return type(self).output(self)
+
+    async def arun(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async counterpart of `run()`, for event loops serving many requests at once. Agents
+        override it to answer inline when the work is short and non-blocking. The default
+        calls `run()` on the loop's default executor, so a blocking agent never stalls the
+        loop.
+        """
+        return await offload(type(self).run, self, input_data)
+
+    def process_batch(self, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Processes many inputs and returns their outputs in input order.
+        Agents override this with a native path that hoists per-call work out of the loop.
+        """
+        run = type(self).run
+        return [run(self, input_data) for input_data in inputs]
+
+    def volatile_output(self, input_data: Dict[str, Any], output_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Returns fresh values for the output fields listed in `metadata["volatile_output_fields"]`.
+        Result caches call this to complete a replayed output, passing the cached fields as
+        `output_data`; agents without volatile fields keep the default.
+        """
+        return {}
+
+    def coalesced_output(self, input_data: Dict[str, Any], output_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Returns the output for a call that was coalesced with an identical, concurrent one,
+        given a copy of that call's output. Agents whose outputs carry something that must
+        not be shared between callers, such as a session id, override this.
+        """
+        return output_data
+
+    def shutdown(self) -> None:
+        raise NotImplementedError
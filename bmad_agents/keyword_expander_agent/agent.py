@@ -1,26 +1,17 @@
 import json
 import logging
-from typing import Dict, Any
+import re
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Iterator, List
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-class BMADAgentInterface:
-    """
-    BMADAgentInterface defines the standard methods for all BMAD agents.
-    """
-    def initialize(self, config: Dict[str, Any]) -> None:
-        raise NotImplementedError
-
-    def process(self, input_data: Dict[str, Any]) -> None:
-        raise NotImplementedError
+from ..interface import BMADAgentInterface, offload, loggable_config
+from .streaming import KeywordPager
 
-    def output(self) -> Dict[str, Any]:
-        raise NotImplementedError
+logger = logging.getLogger(__name__)
 
-    def shutdown(self) -> None:
-        raise NotImplementedError
+# Bullets and numbering a model may put in front of each keyword of its list
+_LIST_MARKER = re.compile(r"^\s*(?:[-*\u2022]|\d+[.)])\s+")
 
 class KeywordExpanderAgent(BMADAgentInterface):
     """
@@ -33,39 +24,86 @@ class KeywordExpanderAgent(BMADAgentInterface):
         "input_schema": "input_schema.json",
         "output_schema": "output_schema.json",
         "dependencies": [],
+        "deterministic": True,
         "version": "1.0.0"
     }
 
+    MAX_OPEN_PAGERS = 8  # Live pagers kept so that sequential page requests skip the cursor replay
+    INLINE_KEYWORDS = 10000  # arun() builds larger expansions (or pages) off the event loop
+
     def __init__(self):
         self.config = None
         self.output_data = None
+        self._pagers: "OrderedDict[str, KeywordPager]" = OrderedDict()
+        self._pagers_lock = threading.Lock()
+        self.model_backend = None # Expands the seeds; mocked when None
 
     def initialize(self, config: Dict[str, Any] = None) -> None:
         """
         Initializes the agent with a given configuration.
         """
         self.config = config if config else {}
-        logger.info(f"Keyword Expander Agent initialized with config: {self.config}")
+        backend = self.config.get("model_backend")
+        if isinstance(backend, dict):
+            from ..model_backends import create_model_backend
+            backend = create_model_backend(backend)
+        self.model_backend = backend
+        logger.info(f"Keyword Expander Agent initialized with config: {loggable_config(self.config)}")
 
-    def process(self, input_data: Dict[str, Any]) -> None:
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Expands the keywords and returns them, without keeping them on the instance, so one
+        agent can serve concurrent requests. The model backend, if there is one, writes the
+        expansions of every seed; otherwise this is a mock implementation.
+
+        With `page_size` in the input, only the next page is returned, deduplicated, together
+        with the `next_cursor` to pass back for the page after it. With `collapse_near_duplicates`,
+        near-duplicate keywords are collapsed to one representative each (requires NumPy).
         """
-        Processes the input data to expand keywords.
-        This is a mock implementation.
+        return self._generate(input_data)
+
+    async def arun(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        logger.info(f"Processing input data: {input_data}")
-        try:
-            seed_keywords = input_data['seed_keywords']
-            num_variations = input_data.get('num_variations', 10)
+        Async counterpart of `run()`. Small expansions are built inline on the event loop;
+        expansions of more than `INLINE_KEYWORDS` keywords and near-duplicate collapsing
+        run on the default executor. Expansions from a model backend are awaited from it.
+        """
+        if self.model_backend is not None and input_data.get('page_size') is None:
+            try:
+                generated = await self.model_backend.agenerate_many(
+                    self._expansion_prompts(input_data), {"n": input_data.get('num_variations', 10)})
+            except KeyError as e:
+                logger.error(f"Missing required input key: {e}")
+                raise ValueError(f"Missing required input key: {e}")
+            if input_data.get('collapse_near_duplicates'):
+                return await offload(lambda: {"expanded_keywords": self._expand(input_data, generated)})
+            return {"expanded_keywords": self._expand(input_data, generated)}
+        size = input_data.get('page_size') or (
+            len(input_data.get('seed_keywords') or ()) * input_data.get('num_variations', 10))
+        if input_data.get('collapse_near_duplicates') or size > self.INLINE_KEYWORDS:
+            return await offload(self._generate, input_data)
+        return self._generate(input_data)
 
-            expanded_keywords = []
-            for seed in seed_keywords:
-                for i in range(num_variations):
-                    expanded_keywords.append(f"{seed} variation {i+1}")
+    def process(self, input_data: Dict[str, Any]) -> None:
+        """
+        Processes the input data to expand keywords, for `output()` to return.
+        """
+        self.output_data = self._generate(input_data)
 
-            self.output_data = {
-                "expanded_keywords": expanded_keywords
+    def _generate(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        logger.debug("Processing input data: %s", input_data)
+        try:
+            if input_data.get('page_size') is not None:
+                if input_data.get('collapse_near_duplicates'):
+                    raise ValueError("collapse_near_duplicates needs the whole list and cannot be combined with page_size")
+                output_data = self._next_page(input_data)
+                logger.info(f"Returned {len(output_data['expanded_keywords'])} expanded keywords.")
+                return output_data
+            output_data = {
+                "expanded_keywords": self._expand(input_data)
             }
             logger.info("Successfully expanded keywords.")
+            return output_data
 
         except KeyError as e:
             logger.error(f"Missing required input key: {e}")
@@ -74,6 +112,137 @@ class KeywordExpanderAgent(BMADAgentInterface):
             logger.error(f"An error occurred during processing: {e}")
             raise
 
+    def process_batch(self, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Expands many seed lists at once, logging once per batch instead of once per record.
+        With a model backend, the seeds of all records are sent to it together.
+        """
+        logger.info(f"Processing batch of {len(inputs)} keyword expansion inputs.")
+        expand = self._expand
+        outputs = []
+        try:
+            generated = [None] * len(inputs)
+            if self.model_backend is not None:
+                generated = self._generate_expansions(inputs)
+            for input_data, texts in zip(inputs, generated):
+                outputs.append({"expanded_keywords": expand(input_data, texts)})
+        except KeyError as e:
+            logger.error(f"Missing required input key: {e} (batch record {len(outputs)})")
+            raise ValueError(f"Missing required input key: {e} (batch record {len(outputs)})")
+        except Exception as e:
+            logger.error(f"An error occurred during batch processing: {e}")
+            raise
+        if outputs:
+            self.output_data = outputs[-1]
+        logger.info(f"Successfully expanded {len(outputs)} keyword sets.")
+        return outputs
+
+    def _expand(self, input_data: Dict[str, Any], generated: List[str] = None) -> List[str]:
+        """
+        Expands the seed keywords of a single input. Raises KeyError if `seed_keywords` is missing.
+        `generated` holds the model backend's completion for each seed, if already requested.
+        """
+        seed_keywords = input_data['seed_keywords']
+        num_variations = input_data.get('num_variations', 10)
+        if generated is None and self.model_backend is not None:
+            generated = self.model_backend.generate_many(self._expansion_prompts(input_data), {"n": num_variations})
+        if generated is not None:
+            expanded_keywords = [keyword for text in generated for keyword in self._keywords(text, num_variations)]
+        else:
+            suffixes = [f" variation {i+1}" for i in range(num_variations)]
+            expanded_keywords = [seed + suffix for seed in seed_keywords for suffix in suffixes]
+        if input_data.get('collapse_near_duplicates'):
+            # Imported here so that NumPy is only loaded (and only required) when collapsing is requested
+            from .clustering import collapse_near_duplicates
+            expanded_keywords = collapse_near_duplicates(expanded_keywords, input_data.get('similarity_threshold', 0.8))
+        return expanded_keywords
+
+    @staticmethod
+    def _expansion_prompts(input_data: Dict[str, Any]) -> List[str]:
+        num_variations = input_data.get('num_variations', 10)
+        return [f"List {num_variations} search keywords related to \"{seed}\", one per line."
+                for seed in input_data['seed_keywords']]
+
+    @staticmethod
+    def _keywords(text: str, limit: int) -> List[str]:
+        """
+        Reads the keywords out of a completion, one per line, without list markers or blank lines.
+        """
+        keywords = [_LIST_MARKER.sub("", line).strip() for line in text.splitlines()]
+        return [keyword for keyword in keywords if keyword][:limit]
+
+    def _generate_expansions(self, inputs: List[Dict[str, Any]]) -> List[List[str]]:
+        """
+        Requests the completions of every seed of every input from the model backend, in one
+        `generate_many()` per distinct `num_variations`, and returns them per input.
+        """
+        groups: Dict[int, List[int]] = {}
+        for index, input_data in enumerate(inputs):
+            groups.setdefault(input_data.get('num_variations', 10), []).append(index)
+        generated: List[List[str]] = [None] * len(inputs)
+        for num_variations, indexes in groups.items():
+            prompts = [prompt for index in indexes for prompt in self._expansion_prompts(inputs[index])]
+            texts = iter(self.model_backend.generate_many(prompts, {"n": num_variations}))
+            for index in indexes:
+                generated[index] = [next(texts) for _ in inputs[index]['seed_keywords']]
+        return generated
+
+    @property
+    def cache_scope(self) -> str:
+        # Cached expansions are only valid for the backend (or mock) that produced them
+        return self.model_backend.fingerprint if self.model_backend is not None else ""
+
+    def pager(self, input_data: Dict[str, Any], page_size: int = None) -> KeywordPager:
+        """
+        Returns a `KeywordPager` over the input's expansions, resumed at `input_data["cursor"]` if given.
+        Deduplication defaults to "exact"; pass "dedupe": "bloom" for a fixed-size filter or "none".
+        Paging walks the mock expansions, so it is not available with a model backend.
+        """
+        if self.model_backend is not None:
+            raise ValueError("Paging is not supported with a model backend; request the whole expansion instead")
+        return KeywordPager(
+            input_data['seed_keywords'],
+            input_data.get('num_variations', 10),
+            page_size or input_data.get('page_size') or 1000,
+            cursor=input_data.get('cursor'),
+            dedupe=input_data.get('dedupe', 'exact')
+        )
+
+    def iter_keywords(self, input_data: Dict[str, Any]) -> Iterator[str]:
+        """
+        Yields the deduplicated expansions one at a time, holding at most one page in memory.
+        """
+        for page in self.pager(input_data):
+            yield from page
+
+    def iter_pages(self, input_data: Dict[str, Any], page_size: int = 1000) -> Iterator[Dict[str, Any]]:
+        """
+        Yields `{"expanded_keywords": [...], "next_cursor": ...}` pages until the expansion is exhausted.
+        """
+        pager = self.pager(input_data, page_size)
+        while not pager.done:
+            yield pager.page_output()
+
+    def _next_page(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        # Continue with the live pager that issued this cursor, if it is still open; the cursor
+        # embeds the input's fingerprint, so it identifies both the input and the position.
+        # A popped pager belongs to this call alone; a concurrent request with the same
+        # cursor finds none and replays the cursor instead.
+        cursor = input_data.get('cursor')
+        with self._pagers_lock:
+            pager = self._pagers.pop(cursor, None) if cursor else None
+        if pager is None:
+            pager = self.pager(input_data)
+        else:
+            pager.page_size = input_data['page_size']
+        output_data = pager.page_output()
+        if output_data["next_cursor"] is not None:
+            with self._pagers_lock:
+                self._pagers[output_data["next_cursor"]] = pager
+                while len(self._pagers) > self.MAX_OPEN_PAGERS:
+                    self._pagers.popitem(last=False)
+        return output_data
+
     def output(self) -> Dict[str, Any]:
         """
         Returns the generated output data.
@@ -89,9 +258,15 @@ class KeywordExpanderAgent(BMADAgentInterface):
         """
         logger.info("Keyword Expander Agent is shutting down.")
         self.output_data = None
+        with self._pagers_lock:
+            self._pagers.clear()
+        if isinstance((self.config or {}).get("model_backend"), dict):
+            # A backend instance from the config is shared and belongs to whoever passed it in
+            self.model_backend.close()
 
 # Example of how the BMAD orchestrator might use this agent
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     keyword_agent = KeywordExpanderAgent()
     keyword_agent.initialize()
 
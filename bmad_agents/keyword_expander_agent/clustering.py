@@ -0,0 +1,329 @@
+import logging
+import re
+from typing import Dict, List, Sequence
+
+try:
+    import numpy as np
+except ImportError:  # NumPy is optional; only clustering needs it
+    np = None
+
+logger = logging.getLogger(__name__)
+
+_WHITESPACE = re.compile(r"\s+")
+
+# Odd 64-bit multipliers for the n-gram rolling hash and the feature hash
+_NGRAM_PRIME = 0x100000001B3
+_MIX = 0x9E3779B97F4A7C15
+
+
+def _require_numpy() -> None:
+    if np is None:
+        raise ImportError("Keyword clustering requires NumPy; install it with `pip install numpy`.")
+
+
+def normalize_keyword(keyword: str) -> str:
+    return _WHITESPACE.sub(" ", keyword.strip().lower())
+
+
+class NgramMatrix:
+    """
+    L2-normalized TF-IDF weights of hashed character n-grams, one row per keyword,
+    in CSR form: row i's features are `indices[indptr[i]:indptr[i + 1]]`, sorted.
+    """
+    __slots__ = ("indptr", "indices", "data", "num_features")
+
+    def __init__(self, indptr, indices, data, num_features: int):
+        self.indptr = indptr
+        self.indices = indices
+        self.data = data
+        self.num_features = num_features
+
+    @property
+    def num_rows(self) -> int:
+        return len(self.indptr) - 1
+
+    def row_ids(self):
+        return np.repeat(np.arange(self.num_rows, dtype=np.int64), np.diff(self.indptr))
+
+    def weighted_keys(self, value_bits: int = 24):
+        """
+        Returns `feature << value_bits | quantized weight` for every entry, in CSR order (so
+        sorted within each row), followed by one sentinel above every real key.
+        """
+        weights = np.rint(self.data * ((1 << value_bits) - 1)).astype(np.int64)
+        keys = (self.indices.astype(np.int64) << value_bits) | weights
+        return np.append(keys, np.int64(self.num_features) << value_bits)
+
+    def dense(self, rows=None):
+        """
+        Returns the given rows (default: all) as a dense matrix over the features they use,
+        for blockwise exact similarity of small sets.
+        """
+        rows = np.arange(self.num_rows) if rows is None else np.asarray(rows)
+        starts, ends = self.indptr[rows], self.indptr[rows + 1]
+        counts = ends - starts
+        entries = np.repeat(starts - np.cumsum(counts) + counts, counts) + np.arange(counts.sum())
+        used, columns = np.unique(self.indices[entries], return_inverse=True)
+        matrix = np.zeros((len(rows), len(used)), dtype=np.float32)
+        matrix[np.repeat(np.arange(len(rows)), counts), columns] = self.data[entries]
+        return matrix
+
+
+def ngram_tfidf(keywords: Sequence[str], n: int = 3, feature_bits: int = 18, max_chars: int = 64) -> NgramMatrix:
+    """
+    Builds the TF-IDF matrix of character n-grams (keywords padded with one space on each
+    side and truncated to `max_chars`), hashed into 2**feature_bits features. Everything
+    after joining the strings is vectorized.
+    """
+    _require_numpy()
+    texts = [f" {keyword[:max_chars]} ".ljust(n) for keyword in keywords]
+    num_rows = len(texts)
+    lengths = np.fromiter(map(len, texts), dtype=np.int64, count=num_rows)
+    codes = np.frombuffer("".join(texts).encode("utf-32-le"), dtype=np.uint32)
+    counts = lengths - n + 1
+    # Start offset of every n-gram in the joined text: each keyword's last n - 1 characters start none
+    positions = np.arange(int(counts.sum()), dtype=np.int64)
+    positions += np.repeat(np.arange(num_rows, dtype=np.int64) * (n - 1), counts)
+
+    # Hash the n-grams in place (the intermediates are the largest arrays built here)
+    hashes = codes[positions].astype(np.uint64)
+    for _ in range(n - 1):
+        positions += 1
+        hashes *= np.uint64(_NGRAM_PRIME)
+        hashes += codes[positions]
+    del positions
+    hashes *= np.uint64(_MIX)
+    hashes >>= np.uint64(64 - feature_bits)
+    keys = hashes.view(np.int64)
+    keys |= np.repeat(np.arange(num_rows, dtype=np.int64), counts) << feature_bits
+
+    # Term frequencies: one entry per distinct (row, feature), sorted by row then feature
+    keys.sort()
+    boundaries = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]])
+    term_counts = np.diff(np.append(boundaries, len(keys)))
+    keys = keys[boundaries]
+    rows = keys >> feature_bits
+    features = (keys & ((1 << feature_bits) - 1)).astype(np.int32)
+    del keys
+    document_frequency = np.bincount(features, minlength=1 << feature_bits)
+    idf = np.log((1 + num_rows) / (1 + document_frequency)).astype(np.float32) + 1
+    data = term_counts.astype(np.float32) * idf[features]
+    norms = np.sqrt(np.bincount(rows, weights=data.astype(np.float64) ** 2, minlength=num_rows)).astype(np.float32)
+    data /= norms[rows]
+    indptr = np.zeros(num_rows + 1, dtype=np.int64)
+    np.cumsum(np.bincount(rows, minlength=num_rows), out=indptr[1:])
+    return NgramMatrix(indptr, features, data, 1 << feature_bits)
+
+
+def _splitmix64(values):
+    # SplitMix64 finalizer: a fast, well-mixed 64-bit hash of integer keys
+    values = values + np.uint64(_MIX)
+    values = (values ^ (values >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+    values = (values ^ (values >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+    return values ^ (values >> np.uint64(31))
+
+
+def minhash_signatures(matrix: NgramMatrix, num_hashes: int = 64, seed: int = 0):
+    """
+    MinHash signatures of each row's n-gram set, as a (rows x num_hashes) uint32 array: two
+    rows agree on a given column with probability equal to the Jaccard similarity of their
+    sets. The i-th hash function is the base feature hash xor-ed with a random key and
+    multiplied by a random odd constant, and its per-row minimum is one `reduceat` pass.
+    """
+    rng = np.random.default_rng(seed)
+    keys = rng.integers(0, 2 ** 32, size=num_hashes, dtype=np.uint32)
+    multipliers = rng.integers(0, 2 ** 31, size=num_hashes, dtype=np.uint32) * np.uint32(2) + np.uint32(1)
+    base = (_splitmix64(matrix.indices.astype(np.uint64)) >> np.uint64(32)).astype(np.uint32)
+    starts = matrix.indptr[:-1]
+    signatures = np.empty((matrix.num_rows, num_hashes), dtype=np.uint32)
+    hashed = np.empty_like(base)
+    for column in range(num_hashes):
+        np.bitwise_xor(base, keys[column], out=hashed)
+        np.multiply(hashed, multipliers[column], out=hashed)
+        signatures[:, column] = np.minimum.reduceat(hashed, starts)
+    return signatures
+
+
+def _candidate_pairs(signatures, bands: int, window: int):
+    """
+    LSH banding: the signature is cut into `bands` bands, and rows whose band matches
+    exactly share a bucket. Within each bucket (in input order), a row is paired with the next
+    `window` rows rather than with every member, which keeps large buckets of mutually similar
+    keywords linear while still chaining them into one cluster.
+    """
+    rows_per_band = signatures.shape[1] // bands
+    pairs = []
+    for band in range(bands):
+        block = signatures[:, band * rows_per_band:(band + 1) * rows_per_band].astype(np.uint64)
+        codes = block[:, 0]
+        for column in range(1, rows_per_band):
+            codes = _splitmix64(codes ^ block[:, column])
+        order = np.argsort(codes, kind="stable")
+        sorted_codes = codes[order]
+        for step in range(1, window + 1):
+            same = sorted_codes[:-step] == sorted_codes[step:]
+            pairs.append(order[:-step][same] * len(codes) + order[step:][same])
+    if not pairs:
+        return np.empty((0, 2), dtype=np.int64)
+    # Encode each pair as one integer so duplicates across bands drop out of a 1-D sort
+    encoded = np.sort(np.concatenate(pairs))
+    encoded = encoded[np.r_[True, encoded[1:] != encoded[:-1]]]
+    return np.stack([encoded // len(codes), encoded % len(codes)], axis=1)
+
+
+def pair_similarities(matrix: NgramMatrix, pairs, value_bits: int = 24, chunk_size: int = 65536):
+    """
+    Exact cosine similarity of row pairs, in chunks. Each row of a pair is gathered as its
+    sorted `weighted_keys()` padded with the sentinel, the two are concatenated and stably
+    sorted, which for two sorted runs is a single linear merge, and equal adjacent features
+    then contribute the product of their (quantized) weights.
+    """
+    keys = matrix.weighted_keys(value_bits)
+    sentinel_index = len(keys) - 1
+    sentinel = keys[-1] >> value_bits
+    weight_mask = (1 << value_bits) - 1
+    scale = float(weight_mask) ** 2
+    starts, counts = matrix.indptr[:-1], np.diff(matrix.indptr)
+    similarities = np.empty(len(pairs), dtype=np.float64)
+    # Chunks of pairs with similar widths, so that short keywords are not padded to the longest
+    order = np.argsort(np.maximum(counts[pairs[:, 0]], counts[pairs[:, 1]]), kind="stable")
+    for start in range(0, len(pairs), chunk_size):
+        chunk = pairs[order[start:start + chunk_size]]
+        rows = np.concatenate([chunk[:, 0], chunk[:, 1]])
+        columns = np.arange(int(counts[rows].max()))
+        positions = np.where(columns < counts[rows][:, None], starts[rows][:, None] + columns, sentinel_index)
+        gathered = keys[positions]
+        merged = np.sort(np.concatenate([gathered[:len(chunk)], gathered[len(chunk):]], axis=1), axis=1, kind="stable")
+        features = merged >> value_bits
+        weights = (merged & weight_mask).astype(np.float64)
+        equal = (features[:, 1:] == features[:, :-1]) & (features[:, 1:] != sentinel)
+        similarities[order[start:start + chunk_size]] = (weights[:, 1:] * weights[:, :-1] * equal).sum(axis=1) / scale
+    return similarities
+
+
+def _block_edges(matrix: NgramMatrix, threshold: float, block_size: int):
+    # Exact all-pairs cosine similarity, one block of rows against all later rows at a time
+    dense = matrix.dense()
+    edges = []
+    for start in range(0, len(dense), block_size):
+        block = dense[start:start + block_size] @ dense[start:].T
+        a, b = np.nonzero(block >= threshold)
+        later = start + a < start + b
+        edges.append(np.stack([start + a[later], start + b[later]], axis=1))
+    return np.concatenate(edges) if edges else np.empty((0, 2), dtype=np.int64)
+
+
+def _components(num_nodes: int, edges):
+    # Connected components by min-label propagation with pointer jumping
+    labels = np.arange(num_nodes, dtype=np.int64)
+    if len(edges) == 0:
+        return labels
+    a, b = edges[:, 0], edges[:, 1]
+    while True:
+        low = np.minimum(labels[a], labels[b])
+        previous = labels.copy()
+        np.minimum.at(labels, a, low)
+        np.minimum.at(labels, b, low)
+        while True:
+            jumped = labels[labels]
+            if np.array_equal(jumped, labels):
+                break
+            labels = jumped
+        if np.array_equal(labels, previous):
+            return labels
+
+
+class KeywordClusters:
+    """
+    The result of `cluster_keywords()`: `labels[i]` is the cluster of `keywords[i]`, and
+    clusters are numbered in order of their first keyword.
+    """
+    def __init__(self, keywords: Sequence[str], labels, representatives: List[str]):
+        self.keywords = keywords
+        self.labels = labels
+        self.representatives = representatives
+
+    def __len__(self) -> int:
+        return len(self.representatives)
+
+    def collapse(self) -> List[str]:
+        """
+        Returns one representative keyword per cluster, in order of first appearance.
+        """
+        return list(self.representatives)
+
+    def members(self) -> Dict[str, List[str]]:
+        """
+        Returns {representative: distinct keywords of its cluster in input order}.
+        """
+        groups: Dict[str, List[str]] = {rep: [] for rep in self.representatives}
+        seen = set()
+        for keyword, label in zip(self.keywords, self.labels.tolist()):
+            if keyword not in seen:
+                seen.add(keyword)
+                groups[self.representatives[label]].append(keyword)
+        return groups
+
+
+def cluster_keywords(keywords: Sequence[str], threshold: float = 0.8, ngram: int = 3,
+                     feature_bits: int = 18, exact_limit: int = 4096, bands: int = 16,
+                     rows_per_band: int = 3, window: int = 2, block_size: int = 1024) -> KeywordClusters:
+    """
+    Groups near-duplicate keywords: those whose character n-gram TF-IDF vectors have a cosine
+    similarity of at least `threshold`, joined transitively. Each cluster is represented by
+    its shortest keyword (the earliest one on ties).
+
+    Keywords are compared after lower-casing and collapsing whitespace, so exact duplicates
+    cost nothing. Up to `exact_limit` distinct keywords, every pair is compared with blocked
+    dense matrix products. Above it, candidate pairs come from MinHash LSH blocking (`bands`
+    bands of `rows_per_band` hashes) and are then checked exactly, so a near-duplicate pair
+    is occasionally missed but never falsely merged.
+    """
+    _require_numpy()
+    if not 0 < threshold <= 1:
+        raise ValueError("threshold must be in (0, 1]")
+    index: Dict[str, int] = {}
+    unique_ids = np.fromiter(
+        (index.setdefault(normalize_keyword(keyword), len(index)) for keyword in keywords),
+        dtype=np.int64, count=len(keywords)
+    )
+    if not index:
+        return KeywordClusters(keywords, unique_ids, [])
+    matrix = ngram_tfidf(list(index), ngram, feature_bits)
+
+    if len(index) <= exact_limit:
+        edges = _block_edges(matrix, threshold, block_size)
+    else:
+        signatures = minhash_signatures(matrix, bands * rows_per_band)
+        pairs = _candidate_pairs(signatures, bands, window)
+        edges = pairs[pair_similarities(matrix, pairs) >= threshold - 1e-6]
+    components = _components(len(index), edges)
+
+    # Representative: shortest original spelling in the cluster, earliest on ties
+    first_seen = np.full(len(index), len(keywords), dtype=np.int64)
+    np.minimum.at(first_seen, unique_ids, np.arange(len(keywords)))
+    lengths = np.array([len(keywords[i]) for i in first_seen])
+    order = np.lexsort((first_seen, lengths, components))
+    leaders = order[np.r_[True, components[order][1:] != components[order][:-1]]]
+    leader_of = np.empty(len(index), dtype=np.int64)
+    leader_of[components[leaders]] = leaders  # component label -> leader; labels are node ids
+
+    # Number clusters by the first appearance of any of their keywords
+    cluster_first = np.full(len(index), len(keywords), dtype=np.int64)
+    np.minimum.at(cluster_first, components, first_seen)
+    roots = np.unique(components)
+    roots = roots[np.argsort(cluster_first[roots], kind="stable")]
+    cluster_of_root = np.empty(len(index), dtype=np.int64)
+    cluster_of_root[roots] = np.arange(len(roots))
+    labels = cluster_of_root[components[unique_ids]]
+    representatives = [keywords[first_seen[leader_of[root]]] for root in roots.tolist()]
+    return KeywordClusters(keywords, labels, representatives)
+
+
+def collapse_near_duplicates(keywords: List[str], threshold: float = 0.8) -> List[str]:
+    """
+    Collapses near-duplicate keywords to one representative each, keeping first-appearance order.
+    """
+    clusters = cluster_keywords(keywords, threshold)
+    logger.info(f"Collapsed {len(keywords)} keywords into {len(clusters)} near-duplicate clusters.")
+    return clusters.collapse()
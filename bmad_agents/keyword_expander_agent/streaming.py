@@ -0,0 +1,233 @@
+import base64
+import hashlib
+import json
+import math
+from array import array
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+
+
+# Both filters use the interpreter's 64-bit string hash, which is cached on each string and
+# much cheaper than a cryptographic digest. It is salted per process, which is fine because a
+# filter never leaves the process that built it: a pager resumed from a cursor rebuilds it.
+_HASH_MASK = (1 << 64) - 1
+
+
+class ExactDeduper:
+    """
+    A compact set of the 64-bit hashes of the keywords seen so far.
+
+    Hashes live in an open-addressing table backed by an `array` of signed 64-bit slots
+    (0 marks an empty slot), about 16 bytes per keyword at the 50% load it keeps, against
+    roughly 70 bytes per entry for a Python set of ints and far more for one of strings.
+    Distinct keywords collide with negligible probability (about n^2 / 2^65).
+    """
+    __slots__ = ("_slots", "_mask", "count")
+
+    def __init__(self, expected_items: int = 1024):
+        capacity = 16
+        while capacity < 2 * expected_items:
+            capacity *= 2
+        self._slots = array("q", [0]) * capacity
+        self._mask = capacity - 1
+        self.count = 0
+
+    def add(self, keyword: str) -> bool:
+        """
+        Records `keyword` and returns True if it had not been seen before.
+        """
+        fingerprint = hash(keyword) or 1
+        slots, mask = self._slots, self._mask
+        index = fingerprint & mask
+        while True:
+            value = slots[index]
+            if value == 0:
+                break
+            if value == fingerprint:
+                return False
+            index = (index + 1) & mask
+        slots[index] = fingerprint
+        self.count += 1
+        if 2 * self.count > len(slots):
+            self._grow()
+        return True
+
+    def _grow(self) -> None:
+        old = self._slots
+        self._slots = array("q", [0]) * (2 * len(old))
+        self._mask = len(self._slots) - 1
+        slots, mask = self._slots, self._mask
+        for fingerprint in old:
+            if fingerprint:
+                index = fingerprint & mask
+                while slots[index]:
+                    index = (index + 1) & mask
+                slots[index] = fingerprint
+
+    def __len__(self) -> int:
+        return self.count
+
+
+class BloomDeduper:
+    """
+    A Bloom filter sized for `expected_items` at `false_positive_rate`.
+
+    Memory is fixed up front (about 1.2 MB per million keywords at 1%), but a false positive
+    drops a keyword that was not actually a duplicate, at roughly `false_positive_rate`.
+    """
+    __slots__ = ("num_bits", "num_hashes", "bits", "count")
+
+    def __init__(self, expected_items: int, false_positive_rate: float = 0.01):
+        if not 0 < false_positive_rate < 1:
+            raise ValueError("false_positive_rate must be between 0 and 1")
+        expected_items = max(expected_items, 1)
+        self.num_bits = max(8, int(-expected_items * math.log(false_positive_rate) / math.log(2) ** 2))
+        self.num_hashes = max(1, round(self.num_bits / expected_items * math.log(2)))
+        self.bits = bytearray((self.num_bits + 7) // 8)
+        self.count = 0
+
+    def add(self, keyword: str) -> bool:
+        """
+        Records `keyword` and returns True if it was (probably) not seen before.
+        """
+        # Double hashing: the k bit positions are h1 + i * h2 for i in 0..k-1, with h2 derived
+        # from h1 by a multiplicative mix
+        h1 = hash(keyword) & _HASH_MASK
+        h2 = ((h1 * 0x9E3779B97F4A7C15) >> 17 | 1) & _HASH_MASK
+        bits, num_bits = self.bits, self.num_bits
+        new = False
+        for i in range(self.num_hashes):
+            position = (h1 + i * h2) % num_bits
+            mask = 1 << (position & 7)
+            if not bits[position >> 3] & mask:
+                bits[position >> 3] |= mask
+                new = True
+        if new:
+            self.count += 1
+        return new
+
+    def __len__(self) -> int:
+        return self.count
+
+
+def make_deduper(mode: Optional[str], expected_items: int, false_positive_rate: float = 0.01):
+    if mode is None or mode == "none":
+        return None
+    if mode == "exact":
+        return ExactDeduper(expected_items)
+    if mode == "bloom":
+        return BloomDeduper(expected_items, false_positive_rate)
+    raise ValueError(f"Unsupported dedupe mode: {mode}")
+
+
+def input_fingerprint(seed_keywords: Sequence[str], num_variations: int, dedupe: Optional[str]) -> str:
+    """
+    Identifies the input a cursor belongs to, so a cursor cannot be replayed against another seed list.
+    """
+    digest = hashlib.blake2b(digest_size=8)
+    digest.update(f"{num_variations}\0{dedupe}\0".encode("utf-8"))
+    for seed in seed_keywords:
+        digest.update(seed.encode("utf-8"))
+        digest.update(b"\0")
+    return digest.hexdigest()
+
+
+def encode_cursor(fingerprint: str, seed_index: int, variation: int, emitted: int) -> str:
+    payload = json.dumps({"f": fingerprint, "s": seed_index, "v": variation, "n": emitted}, separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str, fingerprint: str) -> Tuple[int, int, int]:
+    """
+    Returns (seed_index, variation, emitted) from a cursor, raising ValueError if it is
+    malformed or was issued for a different input.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        payload = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        position = (int(payload["s"]), int(payload["v"]), int(payload["n"]))
+    except (ValueError, KeyError, TypeError) as e:
+        raise ValueError(f"Invalid cursor: {e}")
+    if payload.get("f") != fingerprint:
+        raise ValueError("Cursor was issued for a different input")
+    return position
+
+
+class KeywordPager:
+    """
+    Expands seed keywords lazily, in a stable order (seed by seed, variation by variation),
+    and hands them out in pages of at most `page_size` keywords.
+
+    Only the current page and the deduplication filter are held in memory. `cursor` marks
+    the position after the last page; a pager built with that cursor resumes there. A live
+    pager continues with its filter; a pager resumed from a cursor in another process first
+    rebuilds the filter by re-hashing the keywords before the cursor, without keeping them.
+    """
+    def __init__(self, seed_keywords: Sequence[str], num_variations: int = 10, page_size: int = 1000,
+                 cursor: Optional[str] = None, dedupe: Optional[str] = "exact",
+                 false_positive_rate: float = 0.01):
+        if page_size < 1:
+            raise ValueError("page_size must be at least 1")
+        self.seed_keywords = seed_keywords
+        self.page_size = page_size
+        self.suffixes = [f" variation {i+1}" for i in range(num_variations)]
+        self.fingerprint = input_fingerprint(seed_keywords, num_variations, dedupe)
+        self.deduper = make_deduper(dedupe, len(seed_keywords) * num_variations, false_positive_rate)
+        self.seed_index, self.variation, self.emitted = 0, 0, 0
+        if cursor:
+            self.seed_index, self.variation, self.emitted = decode_cursor(cursor, self.fingerprint)
+            if self.deduper is not None:
+                self._replay()
+
+    def _replay(self) -> None:
+        add = self.deduper.add
+        for seed in self.seed_keywords[:self.seed_index]:
+            for suffix in self.suffixes:
+                add(seed + suffix)
+        if self.seed_index < len(self.seed_keywords):
+            seed = self.seed_keywords[self.seed_index]
+            for suffix in self.suffixes[:self.variation]:
+                add(seed + suffix)
+
+    @property
+    def done(self) -> bool:
+        return self.seed_index >= len(self.seed_keywords)
+
+    @property
+    def cursor(self) -> Optional[str]:
+        """
+        The cursor of the next page, or None once every keyword has been handed out.
+        """
+        if self.done:
+            return None
+        return encode_cursor(self.fingerprint, self.seed_index, self.variation, self.emitted)
+
+    def next_page(self) -> List[str]:
+        page: List[str] = []
+        seeds, suffixes, page_size = self.seed_keywords, self.suffixes, self.page_size
+        add = self.deduper.add if self.deduper is not None else None
+        seed_index, variation = self.seed_index, self.variation
+        while seed_index < len(seeds) and len(page) < page_size:
+            seed = seeds[seed_index]
+            while variation < len(suffixes) and len(page) < page_size:
+                keyword = seed + suffixes[variation]
+                variation += 1
+                if add is None or add(keyword):
+                    page.append(keyword)
+            if variation >= len(suffixes):
+                seed_index, variation = seed_index + 1, 0
+        self.seed_index, self.variation = seed_index, variation
+        self.emitted += len(page)
+        return page
+
+    def __iter__(self) -> Iterator[List[str]]:
+        while not self.done:
+            page = self.next_page()
+            if page:
+                yield page
+
+    def page_output(self) -> Dict[str, Any]:
+        """
+        Returns the next page in the agent's output shape.
+        """
+        page = self.next_page()
+        return {"expanded_keywords": page, "next_cursor": self.cursor}
@@ -0,0 +1,450 @@
+import asyncio
+import http.client
+import itertools
+import json
+import logging
+import random
+import ssl
+import threading
+import time
+import weakref
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from .interface import offload
+
+logger = logging.getLogger(__name__)
+
+# Answers worth retrying: the request may well succeed if sent again a little later
+RETRY_STATUSES = frozenset({408, 425, 429, 500, 502, 503, 504})
+
+_RETRY = object()
+
+
+class ModelBackendError(RuntimeError):
+    """
+    Raised when a backend cannot produce a completion: the API rejected the request, or it
+    kept failing until the retries ran out. `status` is the last HTTP status, if there was one.
+    """
+    def __init__(self, message: str, status: Optional[int] = None):
+        self.status = status
+        super().__init__(message)
+
+
+class ModelBackend:
+    """
+    Where agents send their generation requests. A request is a prompt plus optional
+    `parameters` (e.g. {"max_tokens": 200}); the completion is text.
+
+    Subclasses implement `generate()`. The other methods fall back on it: `generate_many()`
+    calls it once per prompt and the async methods run it on the default executor, so a
+    backend with a batch API or a native async client should override them.
+    """
+    # Identifies the model behind the backend; results cached for an agent are keyed by it
+    fingerprint = "model"
+
+    def generate(self, prompt: str, parameters: Optional[Dict[str, Any]] = None) -> str:
+        raise NotImplementedError
+
+    def generate_many(self, prompts: Sequence[str], parameters: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+        Returns the completions of several prompts, in order.
+        """
+        return [self.generate(prompt, parameters) for prompt in prompts]
+
+    async def agenerate(self, prompt: str, parameters: Optional[Dict[str, Any]] = None) -> str:
+        return await offload(self.generate, prompt, parameters)
+
+    async def agenerate_many(self, prompts: Sequence[str],
+                             parameters: Optional[Dict[str, Any]] = None) -> List[str]:
+        return await offload(self.generate_many, list(prompts), parameters)
+
+    def close(self) -> None:
+        pass
+
+    def __enter__(self) -> "ModelBackend":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class _AsyncPool:
+    """
+    The idle keep-alive connections of one event loop, and the slots that cap how many
+    requests it has open at once.
+    """
+    def __init__(self, size: int):
+        self.slots = asyncio.Semaphore(size)
+        self.idle: List[Tuple[asyncio.StreamReader, asyncio.StreamWriter]] = []
+
+
+class HTTPModelBackend(ModelBackend):
+    """
+    Calls a JSON completion API over HTTP/1.1, reusing keep-alive connections.
+
+    `POST <url><generate_path>` takes {"model", "prompt", "parameters"} and answers {"text"}.
+    If the API has a batch endpoint, pass it as `batch_path`: it takes {"model", "requests":
+    [{"prompt", "parameters"}, ...]} and answers {"responses": [{"text"}, ...]} in the same
+    order, and `generate_many()` sends up to `batch_size` prompts per request. Without one,
+    `generate_many()` sends the prompts concurrently over the pool.
+
+    Up to `max_connections` connections are open at once and idle ones are kept for the next
+    request. Sync callers share a pool of `http.client` connections; async callers get a pool
+    per event loop that speaks HTTP over asyncio streams, so an awaited completion holds no
+    thread. With `keep_alive=False` every request opens a new connection.
+
+    Connection errors, timeouts and 408/425/429/5xx answers are retried up to `max_retries`
+    times. Before each retry the client sleeps for a random time between 0 and
+    `backoff_base * 2 ** attempt` seconds (at most `backoff_max`, and at least the server's
+    Retry-After), so that clients which failed together do not all retry at the same moment.
+    """
+    def __init__(self, url: str, model: Optional[str] = None, api_key: Optional[str] = None,
+                 generate_path: str = "/v1/generate", batch_path: Optional[str] = None,
+                 batch_size: int = 32, max_connections: int = 16, keep_alive: bool = True,
+                 timeout: float = 30.0, max_retries: int = 3, backoff_base: float = 0.1,
+                 backoff_max: float = 10.0, headers: Optional[Dict[str, str]] = None,
+                 seed: Optional[int] = None):
+        parts = urlsplit(url)
+        if parts.scheme not in ("http", "https") or not parts.hostname:
+            raise ValueError(f"Invalid model backend URL: {url}. Expected http(s)://host[:port][/prefix].")
+        if batch_size < 1 or max_connections < 1 or max_retries < 0:
+            raise ValueError("batch_size and max_connections must be at least 1, max_retries at least 0")
+        self.url = url.rstrip("/")
+        self.model = model
+        self.generate_path = generate_path
+        self.batch_path = batch_path
+        self.batch_size = batch_size
+        self.max_connections = max_connections
+        self.keep_alive = keep_alive
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.fingerprint = f"{self.url}#{model or ''}"
+        self.requests = 0
+        self.retries = 0
+        self.connections_opened = 0
+
+        self._tls = parts.scheme == "https"
+        self._host = parts.hostname
+        self._port = parts.port or (443 if self._tls else 80)
+        self._prefix = parts.path.rstrip("/")
+        self._headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        if api_key:
+            self._headers["Authorization"] = f"Bearer {api_key}"
+        if not keep_alive:
+            self._headers["Connection"] = "close"
+        self._headers.update(headers or {})
+        # The async client writes the request head itself; only Content-Length varies
+        host = parts.netloc.rpartition("@")[2]
+        self._head_lines = "".join(f"{name}: {value}\r\n" for name, value in {"Host": host, **self._headers}.items())
+        self._ssl_context = ssl.create_default_context() if self._tls else None
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._idle: List[http.client.HTTPConnection] = []
+        self._slots = threading.BoundedSemaphore(max_connections)
+        self._async_pools: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, _AsyncPool]" = \
+            weakref.WeakKeyDictionary()
+        self._executor: Optional[ThreadPoolExecutor] = None
+
+    def generate(self, prompt: str, parameters: Optional[Dict[str, Any]] = None) -> str:
+        return self._text(self._post(self.generate_path, self._payload(prompt, parameters)))
+
+    def generate_many(self, prompts: Sequence[str], parameters: Optional[Dict[str, Any]] = None) -> List[str]:
+        """
+        Returns the completions of several prompts, in order, in batches of `batch_size` if
+        the API has a batch endpoint and one request per prompt otherwise. Requests are
+        sent concurrently, up to `max_connections` at a time.
+        """
+        prompts = list(prompts)
+        if self.batch_path is None:
+            return self._map(lambda prompt: self.generate(prompt, parameters), prompts)
+        batches = self._batches(prompts)
+        replies = self._map(lambda batch: self._post(self.batch_path, self._batch_payload(batch, parameters)),
+                            batches)
+        return [text for batch, reply in zip(batches, replies) for text in self._texts(reply, len(batch))]
+
+    async def agenerate(self, prompt: str, parameters: Optional[Dict[str, Any]] = None) -> str:
+        return self._text(await self._apost(self.generate_path, self._payload(prompt, parameters)))
+
+    async def agenerate_many(self, prompts: Sequence[str],
+                             parameters: Optional[Dict[str, Any]] = None) -> List[str]:
+        prompts = list(prompts)
+        if self.batch_path is None:
+            return list(await asyncio.gather(*(self.agenerate(prompt, parameters) for prompt in prompts)))
+        batches = self._batches(prompts)
+        replies = await asyncio.gather(*(self._apost(self.batch_path, self._batch_payload(batch, parameters))
+                                         for batch in batches))
+        return [text for batch, reply in zip(batches, replies) for text in self._texts(reply, len(batch))]
+
+    def close(self) -> None:
+        """
+        Closes the idle connections and the threads `generate_many()` sends requests from.
+        The backend can still be used afterwards; it opens new connections as needed.
+        """
+        with self._lock:
+            idle, self._idle = self._idle, []
+            pools = list(self._async_pools.values())
+            self._async_pools.clear()
+            executor, self._executor = self._executor, None
+        for connection in idle:
+            connection.close()
+        for pool in pools:
+            for streams in pool.idle:
+                self._aclose(streams)
+        if executor is not None:
+            executor.shutdown(wait=False)
+
+    # Requests and replies
+
+    def _payload(self, prompt: str, parameters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        payload = {"prompt": prompt, "parameters": parameters or {}}
+        if self.model is not None:
+            payload["model"] = self.model
+        return payload
+
+    def _batch_payload(self, prompts: List[str], parameters: Optional[Dict[str, Any]]) -> Dict[str, Any]:
+        payload = {"requests": [{"prompt": prompt, "parameters": parameters or {}} for prompt in prompts]}
+        if self.model is not None:
+            payload["model"] = self.model
+        return payload
+
+    def _batches(self, prompts: List[str]) -> List[List[str]]:
+        return [prompts[i:i + self.batch_size] for i in range(0, len(prompts), self.batch_size)]
+
+    def _text(self, reply: Any) -> str:
+        if not isinstance(reply, dict) or not isinstance(reply.get("text"), str):
+            raise ModelBackendError(f"Unexpected reply from {self.url}: expected an object with a 'text' string")
+        return reply["text"]
+
+    def _texts(self, reply: Any, count: int) -> List[str]:
+        responses = reply.get("responses") if isinstance(reply, dict) else None
+        if not isinstance(responses, list) or len(responses) != count:
+            raise ModelBackendError(f"Unexpected batch reply from {self.url}: expected {count} responses")
+        return [self._text(response) for response in responses]
+
+    def _check(self, path: str, status: int, data: bytes) -> Any:
+        """
+        Returns the decoded reply of a successful request, `_RETRY` if the request should be
+        retried, and raises for any other answer.
+        """
+        if 200 <= status < 300:
+            try:
+                return json.loads(data)
+            except ValueError:
+                raise ModelBackendError(f"{self.url}{path} answered with invalid JSON", status)
+        if status in RETRY_STATUSES:
+            return _RETRY
+        detail = data[:200].decode("utf-8", "replace")
+        raise ModelBackendError(f"{self.url}{path} answered HTTP {status}: {detail}", status)
+
+    def _backoff(self, path: str, attempt: int, failure: Any, status: Optional[int],
+                 retry_after: Optional[str]) -> float:
+        """
+        Returns how long to wait before retrying, or raises once the retries are used up.
+        """
+        if attempt >= self.max_retries:
+            raise ModelBackendError(f"POST {self.url}{path} failed after {attempt + 1} attempts: {failure}", status)
+        with self._lock:
+            self.retries += 1
+            # Full jitter: anywhere up to the exponential cap rather than the cap itself
+            delay = self._random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+        if retry_after:
+            try:
+                delay = max(delay, min(float(retry_after), self.backoff_max))
+            except ValueError:
+                pass  # An HTTP date; the jittered delay is used instead
+        logger.debug(f"Retrying POST {self.url}{path} in {delay:.3f}s after: {failure}")
+        return delay
+
+    def _map(self, function, items: List[Any]) -> List[Any]:
+        if len(items) <= 1:
+            return [function(item) for item in items]
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_connections,
+                                                    thread_name_prefix="model-backend")
+            executor = self._executor
+        return list(executor.map(function, items))
+
+    # Sync client
+
+    def _post(self, path: str, payload: Dict[str, Any]) -> Any:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        for attempt in itertools.count():
+            retry_after = status = None
+            try:
+                status, retry_after, data = self._send(path, body)
+            except (OSError, http.client.HTTPException) as e:
+                failure = e
+            else:
+                reply = self._check(path, status, data)
+                if reply is not _RETRY:
+                    return reply
+                failure = f"HTTP {status}"
+            time.sleep(self._backoff(path, attempt, failure, status, retry_after))
+
+    def _send(self, path: str, body: bytes) -> Tuple[int, Optional[str], bytes]:
+        with self._slots:
+            with self._lock:
+                connection = self._idle.pop() if self._idle else None
+            reused = connection is not None
+            if not reused:
+                connection = self._connect()
+            try:
+                try:
+                    return self._exchange(connection, path, body)
+                except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError):
+                    if not reused:
+                        raise
+                    # The server closed the connection while it was idle; the request never got there
+                    connection.close()
+                    connection = self._connect()
+                    return self._exchange(connection, path, body)
+            except BaseException:
+                connection.close()
+                raise
+
+    def _connect(self) -> http.client.HTTPConnection:
+        with self._lock:
+            self.connections_opened += 1
+        if self._tls:
+            return http.client.HTTPSConnection(self._host, self._port, timeout=self.timeout,
+                                               context=self._ssl_context)
+        return http.client.HTTPConnection(self._host, self._port, timeout=self.timeout)
+
+    def _exchange(self, connection: http.client.HTTPConnection, path: str,
+                  body: bytes) -> Tuple[int, Optional[str], bytes]:
+        with self._lock:
+            self.requests += 1
+        connection.request("POST", self._prefix + path, body, self._headers)
+        response = connection.getresponse()
+        data = response.read()
+        if self.keep_alive and not response.will_close:
+            with self._lock:
+                self._idle.append(connection)
+        else:
+            connection.close()
+        return response.status, response.getheader("Retry-After"), data
+
+    # Async client
+
+    async def _apost(self, path: str, payload: Dict[str, Any]) -> Any:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        for attempt in itertools.count():
+            retry_after = status = None
+            try:
+                status, retry_after, data = await self._asend(path, body)
+            except (OSError, EOFError, asyncio.TimeoutError, http.client.HTTPException) as e:
+                failure = e
+            else:
+                reply = self._check(path, status, data)
+                if reply is not _RETRY:
+                    return reply
+                failure = f"HTTP {status}"
+            await asyncio.sleep(self._backoff(path, attempt, failure, status, retry_after))
+
+    def _async_pool(self) -> _AsyncPool:
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            pool = self._async_pools.get(loop)
+            if pool is None:
+                pool = self._async_pools[loop] = _AsyncPool(self.max_connections)
+            return pool
+
+    async def _asend(self, path: str, body: bytes) -> Tuple[int, Optional[str], bytes]:
+        pool = self._async_pool()
+        async with pool.slots:
+            reused = bool(pool.idle)
+            streams = pool.idle.pop() if reused else await self._aconnect()
+            try:
+                try:
+                    return await asyncio.wait_for(self._aexchange(pool, streams, path, body), self.timeout)
+                except (ConnectionError, EOFError):
+                    if not reused:
+                        raise
+                    # The server closed the connection while it was idle; the request never got there
+                    self._aclose(streams)
+                    streams = await self._aconnect()
+                    return await asyncio.wait_for(self._aexchange(pool, streams, path, body), self.timeout)
+            except BaseException:
+                self._aclose(streams)
+                raise
+
+    async def _aconnect(self) -> Tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        with self._lock:
+            self.connections_opened += 1
+        return await asyncio.wait_for(
+            asyncio.open_connection(self._host, self._port, ssl=self._ssl_context), self.timeout)
+
+    @staticmethod
+    def _aclose(streams: Tuple[asyncio.StreamReader, asyncio.StreamWriter]) -> None:
+        try:
+            streams[1].close()
+        except RuntimeError:
+            pass  # Its event loop is already closed, and the transport with it
+
+    async def _aexchange(self, pool: _AsyncPool, streams: Tuple[asyncio.StreamReader, asyncio.StreamWriter],
+                         path: str, body: bytes) -> Tuple[int, Optional[str], bytes]:
+        reader, writer = streams
+        with self._lock:
+            self.requests += 1
+        head = f"POST {self._prefix}{path} HTTP/1.1\r\n{self._head_lines}Content-Length: {len(body)}\r\n\r\n"
+        writer.write(head.encode("latin-1") + body)
+        await writer.drain()
+
+        status_line = await reader.readline()
+        if not status_line:
+            raise http.client.RemoteDisconnected("Remote end closed connection without response")
+        version, _, rest = status_line.decode("latin-1").partition(" ")
+        status = rest[:3]
+        if not version.startswith("HTTP/") or not status.isdigit():
+            raise http.client.BadStatusLine(status_line.decode("latin-1"))
+        headers = {}
+        while True:
+            line = await reader.readline()
+            if line in (b"\r\n", b"\n", b""):
+                break
+            name, _, value = line.decode("latin-1").partition(":")
+            headers[name.strip().lower()] = value.strip()
+
+        close = version == "HTTP/1.0" or headers.get("connection", "").lower() == "close"
+        if headers.get("transfer-encoding", "").lower() == "chunked":
+            data = await self._read_chunked(reader)
+        elif "content-length" in headers:
+            data = await reader.readexactly(int(headers["content-length"]))
+        else:
+            data, close = await reader.read(), True
+        if self.keep_alive and not close:
+            pool.idle.append(streams)
+        else:
+            self._aclose(streams)
+        return int(status), headers.get("retry-after"), data
+
+    @staticmethod
+    async def _read_chunked(reader: asyncio.StreamReader) -> bytes:
+        chunks = []
+        while True:
+            size = int((await reader.readline()).split(b";", 1)[0], 16)
+            if size == 0:
+                # Skip any trailers up to the blank line that ends the message
+                while (await reader.readline()) not in (b"\r\n", b"\n", b""):
+                    pass
+                return b"".join(chunks)
+            chunks.append(await reader.readexactly(size))
+            await reader.readexactly(2)
+
+
+def create_model_backend(options: Dict[str, Any]) -> ModelBackend:
+    """
+    Builds a backend from config options, e.g. {"type": "http", "url": "http://localhost:8400"}.
+    "http" is the default type; the other options are passed to the backend.
+    """
+    options = dict(options)
+    backend_type = options.pop("type", "http")
+    if backend_type == "http":
+        return HTTPModelBackend(**options)
+    raise ValueError(f"Unsupported model backend type: {backend_type}. Supported types: http.")
@@ -0,0 +1,185 @@
+import argparse
+import json
+import logging
+import random
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class _StubHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # Keeps connections open between requests
+    # Headers and body are written separately; without this, Nagle's algorithm holds the
+    # body back until the client's delayed ACK of the headers on a kept-alive connection
+    disable_nagle_algorithm = True
+    server: "_StubHTTPServer"
+
+    def do_POST(self) -> None:
+        stub = self.server.stub
+        body = self.rfile.read(int(self.headers.get("Content-Length") or 0))
+        if self.path not in (stub.generate_path, stub.batch_path):
+            self._reply(404, {"error": f"Unknown path: {self.path}"})
+            return
+        try:
+            payload = json.loads(body)
+            if self.path == stub.batch_path:
+                requests = payload["requests"]
+                if len(requests) > stub.max_batch:
+                    self._reply(413, {"error": f"At most {stub.max_batch} requests per batch"})
+                    return
+            else:
+                requests = None
+                prompt, parameters = payload["prompt"], payload.get("parameters") or {}
+        except (ValueError, KeyError, TypeError) as e:
+            self._reply(400, {"error": f"Malformed request: {e}"})
+            return
+
+        fail, delay = stub._draw(len(requests) if requests is not None else 1)
+        time.sleep(delay)
+        if fail:
+            self._reply(stub.error_status, {"error": "Injected failure"}, {"Retry-After": "0"})
+        elif requests is None:
+            self._reply(200, {"text": stub.complete(prompt, parameters)})
+        else:
+            self._reply(200, {"responses": [{"text": stub.complete(request["prompt"], request.get("parameters") or {})}
+                                            for request in requests]})
+
+    def _reply(self, status: int, payload: Dict[str, Any], headers: Optional[Dict[str, str]] = None) -> None:
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format: str, *args) -> None:
+        logger.debug(format, *args)
+
+
+class _StubHTTPServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 1024
+
+    def __init__(self, address, stub: "StubModelServer"):
+        self.stub = stub
+        super().__init__(address, _StubHandler)
+
+    def process_request(self, request, client_address) -> None:
+        self.stub._count("connections")
+        super().process_request(request, client_address)
+
+
+class StubModelServer:
+    """
+    A local stand-in for a model API, for testing backends and measuring throughput offline.
+    It speaks the protocol `HTTPModelBackend` expects, keeps connections alive, and counts
+    the connections, requests and prompts it serves.
+
+    Every request takes `latency` seconds, give or take `jitter` (a fraction), plus
+    `batch_latency` seconds per prompt of a batch, and fails with `error_status` (and
+    Retry-After: 0) with probability `error_rate`. A completion is the prompt echoed back,
+    once per line for `parameters["n"]` lines.
+
+    Use it as a context manager, or call `start()` and `stop()`; port 0 picks a free port.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.05, jitter: float = 0.2,
+                 batch_latency: float = 0.0, error_rate: float = 0.0, error_status: int = 503,
+                 max_batch: int = 256, generate_path: str = "/v1/generate",
+                 batch_path: str = "/v1/generate/batch", seed: Optional[int] = None):
+        if not 0 <= error_rate <= 1:
+            raise ValueError("error_rate must be between 0 and 1")
+        self.latency = latency
+        self.jitter = jitter
+        self.batch_latency = batch_latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.max_batch = max_batch
+        self.generate_path = generate_path
+        self.batch_path = batch_path
+        self.connections = 0
+        self.requests = 0
+        self.prompts = 0
+        self.errors = 0
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._server = _StubHTTPServer((host, port), self)
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def url(self) -> str:
+        host, port = self._server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def complete(self, prompt: str, parameters: Dict[str, Any]) -> str:
+        return "\n".join(f"{prompt} ({i + 1})" for i in range(int(parameters.get("n", 1))))
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {"connections": self.connections, "requests": self.requests,
+                    "prompts": self.prompts, "errors": self.errors}
+
+    def _count(self, counter: str) -> None:
+        with self._lock:
+            setattr(self, counter, getattr(self, counter) + 1)
+
+    def _draw(self, prompts: int):
+        with self._lock:
+            self.requests += 1
+            self.prompts += prompts
+            fail = self._random.random() < self.error_rate
+            if fail:
+                self.errors += 1
+            delay = self.latency * (1 + self._random.uniform(-self.jitter, self.jitter))
+        return fail, delay + self.batch_latency * prompts
+
+    def start(self) -> "StubModelServer":
+        self._thread = threading.Thread(target=self._server.serve_forever, name="model-stub-server", daemon=True)
+        self._thread.start()
+        logger.info(f"Stub model server listening on {self.url}")
+        return self
+
+    def stop(self) -> None:
+        if self._thread is not None:
+            self._server.shutdown()
+            self._thread.join()
+            self._thread = None
+        self._server.server_close()
+
+    def serve_forever(self) -> None:
+        logger.info(f"Stub model server listening on {self.url}")
+        try:
+            self._server.serve_forever()
+        finally:
+            self._server.server_close()
+
+    def __enter__(self) -> "StubModelServer":
+        return self.start()
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.stop()
+
+
+if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    parser = argparse.ArgumentParser(description="Serves a local stub of a model API.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8400)
+    parser.add_argument("--latency-ms", type=float, default=50.0)
+    parser.add_argument("--jitter", type=float, default=0.2, help="latency varies by up to this fraction")
+    parser.add_argument("--batch-latency-ms", type=float, default=0.0, help="added per prompt in a batch")
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--error-status", type=int, default=503)
+    parser.add_argument("--seed", type=int)
+    args = parser.parse_args()
+    server = StubModelServer(args.host, args.port, latency=args.latency_ms / 1000, jitter=args.jitter,
+                             batch_latency=args.batch_latency_ms / 1000, error_rate=args.error_rate,
+                             error_status=args.error_status, seed=args.seed)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,607 @@
+import logging
+import os
+import threading
+import weakref
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from typing import Dict, Any, Callable, Iterable, List, Optional, Sequence, Tuple, Union
+
+from .interface import BMADAgentInterface
+from .registry import get_agent_class
+from .validation import validator_for
+
+logger = logging.getLogger("Orchestrator")
+
+# Builds a node's input from the workflow context. Fan-out nodes return an iterable of inputs.
+InputBuilder = Callable[[Dict[str, Any]], Union[Dict[str, Any], Iterable[Dict[str, Any]]]]
+
+
+def _workflow_input(context: Dict[str, Any]) -> Dict[str, Any]:
+    return context["input"]
+
+
+def _is_reentrant(agent_class: type) -> bool:
+    # Agents that implement run() keep no per-call state on the instance; the interface's
+    # default serializes callers instead
+    return getattr(agent_class, "run", None) is not BMADAgentInterface.run
+
+
+class WorkflowNode:
+    """
+    A single step of a workflow: an agent class plus the recipe for building its input.
+    """
+    def __init__(self, name: str, agent_class: type, build_input: InputBuilder,
+                 fan_out: bool, depends_on: Optional[List[str]], config: Dict[str, Any]):
+        self.name = name
+        self.agent_class = agent_class
+        self.agent_name = agent_class.agent_name
+        self.build_input = build_input
+        self.fan_out = fan_out
+        self.depends_on = depends_on
+        self.config = config
+
+
+class Workflow:
+    """
+    Executes a DAG of BMAD agents concurrently on a thread pool.
+
+    Edges are derived from each agent's `metadata["dependencies"]`: the agents it lists run
+    before it, and their outputs are in the context its input is built from (e.g. a node for
+    `VideoScriptAgent`, which lists `image_prompt_agent`, waits for the image prompt node).
+    `depends_on` replaces the derived edges of a node, e.g. to feed it from an agent that
+    does not list it. Nodes whose upstream nodes have all finished run concurrently. A fan-out node turns one upstream
+    output into many inputs, e.g. one image prompt per keyword, and processes them in parallel.
+
+    Agents are called through their reentrant `run()`, so each node holds one warm,
+    initialized instance that every worker thread shares. Agents that only implement
+    `process()`/`output()` keep per-call state on the instance, so every worker thread holds
+    its own instance of those. Instances are reused across `run()` calls. When an
+    `Instrumentation` is given, every instance is instrumented before it is initialized.
+
+    Inputs are checked against each agent's compiled `metadata["input_schema"]` before
+    the agent runs, so bad data fails with a SchemaValidationError naming every problem
+    instead of a KeyError deep inside the agent. Outputs can be checked as well.
+
+    With a `ResultCache`, agents whose metadata declares them `deterministic` are memoized,
+    so repeated inputs skip the agent call. With a `SingleFlight` (`single_flight.py`),
+    concurrent identical calls to a node share one execution, unless the agent's metadata
+    sets `coalesce` to False; followers that miss the cache wait for the leader's result
+    instead of computing it again.
+
+    `run()` can also stream each output to a `JsonLinesSink` (`output_sinks.py`) as soon
+    as its task finishes, instead of returning everything at the end.
+
+    `arun()` runs the same DAG on an asyncio event loop through the agents' `arun()`, for
+    I/O-bound agents: thousands of workflows can be in flight in one process, with at most
+    `max_concurrency` agent calls running at a time across all of them.
+    """
+    def __init__(self, max_workers: int = 8, instrumentation=None,
+                 validate_inputs: bool = True, validate_outputs: bool = False, result_cache=None,
+                 max_concurrency: int = 256, single_flight=None):
+        if max_concurrency < 1:
+            raise ValueError("max_concurrency must be positive")
+        self.max_workers = max_workers
+        self.max_concurrency = max_concurrency
+        self.instrumentation = instrumentation
+        self.result_cache = result_cache
+        self.single_flight = single_flight
+        self.validate_inputs = validate_inputs
+        self.validate_outputs = validate_outputs
+        self.nodes: Dict[str, WorkflowNode] = {}
+        self._executor = None
+        self._local = threading.local()
+        self._shared: Dict[str, Any] = {}
+        self._lock = threading.Lock()
+        self._instances = []
+        self._semaphores = weakref.WeakKeyDictionary()  # event loop -> semaphore bounding arun()'s agent calls
+
+    def add_node(self, agent: Union[type, str], build_input: InputBuilder = None, name: str = None,
+                 fan_out: bool = False, depends_on: List[str] = None,
+                 config: Dict[str, Any] = None) -> "Workflow":
+        """
+        Adds an agent to the workflow. `agent` is an agent class or an `agent_name`, which is
+        resolved through the agent registry so only the agents a workflow uses are imported.
+
+        `build_input` receives a context dict holding the workflow input under "input" and
+        the output of every upstream node under its name; it defaults to passing the workflow
+        input through. `depends_on` overrides the edges derived from agent metadata, which
+        make the node wait for every node whose agent is listed in its `metadata["dependencies"]`.
+        """
+        agent_class = get_agent_class(agent) if isinstance(agent, str) else agent
+        name = name or agent_class.agent_name
+        if name in self.nodes or name == "input":
+            raise ValueError(f"Duplicate workflow node name: {name}")
+        self.nodes[name] = WorkflowNode(
+            name, agent_class, build_input or _workflow_input, fan_out, depends_on, config or {}
+        )
+        return self
+
+    def dependencies_of(self, name: str) -> List[str]:
+        """
+        Returns the names of the nodes that must finish before `name` can run.
+        """
+        node = self.nodes[name]
+        if node.depends_on is not None:
+            for upstream in node.depends_on:
+                if upstream not in self.nodes:
+                    raise ValueError(f"Node '{name}' depends on unknown node '{upstream}'")
+            return list(node.depends_on)
+        dependencies = node.agent_class.metadata.get("dependencies", [])
+        return [
+            other.name for other in self.nodes.values()
+            if other is not node and other.agent_name in dependencies
+        ]
+
+    def topological_order(self) -> List[str]:
+        """
+        Returns the node names in dependency order, raising ValueError on cycles.
+        """
+        parents = {name: self.dependencies_of(name) for name in self.nodes}
+        order = []
+        state = {}  # name -> "visiting" | "done"
+
+        def visit(name, path):
+            if state.get(name) == "done":
+                return
+            if state.get(name) == "visiting":
+                raise ValueError(f"Dependency cycle in workflow: {' -> '.join(path + [name])}")
+            state[name] = "visiting"
+            for upstream in parents[name]:
+                visit(upstream, path + [name])
+            state[name] = "done"
+            order.append(name)
+
+        for name in self.nodes:
+            visit(name, [])
+        return order
+
+    def _agent_for(self, node: WorkflowNode):
+        if _is_reentrant(node.agent_class):
+            agent = self._shared.get(node.name)
+            if agent is None:
+                with self._lock:
+                    agent = self._shared.get(node.name)
+                    if agent is None:
+                        agent = self._shared[node.name] = self._new_agent(node)
+                        self._instances.append(agent)
+            return agent
+        agents = getattr(self._local, "agents", None)
+        if agents is None:
+            agents = self._local.agents = {}
+        agent = agents.get(node.name)
+        if agent is None:
+            agent = agents[node.name] = self._new_agent(node)
+            with self._lock:
+                self._instances.append(agent)
+        return agent
+
+    def _new_agent(self, node: WorkflowNode):
+        agent = node.agent_class()
+        if self.result_cache is not None and node.agent_class.metadata.get("deterministic"):
+            self.result_cache.memoize(agent)
+        if (self.single_flight is not None and _is_reentrant(node.agent_class)
+                and node.agent_class.metadata.get("coalesce", True)):
+            # Applied over the cache, so a burst of identical misses takes one lookup and one call
+            self.single_flight.coalesce(agent)
+        if self.instrumentation is not None:
+            self.instrumentation.instrument(agent)
+        agent.initialize(node.config)
+        return agent
+
+    def _call(self, node: WorkflowNode, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        metadata = node.agent_class.metadata
+        if self.validate_inputs and "input_schema" in metadata:
+            validator_for(node.agent_class, "input").validate(input_data)
+        output_data = self._agent_for(node).run(input_data)
+        if self.validate_outputs and "output_schema" in metadata:
+            validator_for(node.agent_class, "output").validate(output_data)
+        return output_data
+
+    def _call_streaming(self, node: WorkflowNode, input_data: Dict[str, Any], sink, index: Optional[int],
+                        keep: bool) -> Optional[Dict[str, Any]]:
+        # Writes the output from the worker thread, so it leaves as soon as it is ready
+        output_data = self._call(node, input_data)
+        _write_output(sink, node, index, output_data)
+        return output_data if keep else None
+
+    async def _acall(self, node: WorkflowNode, input_data: Dict[str, Any], sink, index: Optional[int],
+                     keep: bool) -> Optional[Dict[str, Any]]:
+        metadata = node.agent_class.metadata
+        if self.validate_inputs and "input_schema" in metadata:
+            validator_for(node.agent_class, "input").validate(input_data)
+        output_data = await self._agent_for(node).arun(input_data)
+        if self.validate_outputs and "output_schema" in metadata:
+            validator_for(node.agent_class, "output").validate(output_data)
+        if sink is not None:
+            _write_output(sink, node, index, output_data)
+        return output_data if keep else None
+
+    def _plan(self, sink) -> Tuple[List[str], Dict[str, List[str]], Dict[str, List[str]], set]:
+        # Node order, upstream and downstream nodes, and the nodes whose outputs are only streamed
+        order = self.topological_order()
+        parents = {name: self.dependencies_of(name) for name in order}
+        children = {name: [] for name in order}
+        for name in order:
+            for upstream in parents[name]:
+                children[upstream].append(name)
+        streamed_only = {name for name in order if sink is not None and not children[name]}
+        return order, parents, children, streamed_only
+
+    def run(self, workflow_input: Dict[str, Any], sink=None) -> Dict[str, Any]:
+        """
+        Runs the workflow once and returns a dict of node name -> output.
+        Fan-out nodes map to a list of outputs in the order their inputs were produced.
+        The first failing node cancels all pending work and its exception is re-raised.
+
+        With `sink`, each output is written to it by its worker as soon as the task finishes,
+        as {"node": name, "output": ...} plus the input's "index" for fan-out nodes. Outputs
+        of nodes that no other node consumes are then only streamed, not kept, so the
+        returned dict holds the other nodes' outputs. A successful run flushes the sink;
+        closing it is up to the caller.
+        """
+        order, parents, children, streamed_only = self._plan(sink)
+        waiting_on = {name: len(parents[name]) for name in order}
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bmad-worker")
+
+        results: Dict[str, Any] = {}
+        partial: Dict[str, Dict[int, Any]] = {}
+        outstanding: Dict[str, int] = {}
+        pending = {}  # future -> (node name, fan-out index)
+
+        def complete(name):
+            outputs = partial.pop(name)
+            if name not in streamed_only:
+                if self.nodes[name].fan_out:
+                    results[name] = [outputs[i] for i in range(len(outputs))]
+                else:
+                    results[name] = outputs[0]
+            logger.info(f"Node '{name}' finished.")
+            for child in children[name]:
+                waiting_on[child] -= 1
+                if waiting_on[child] == 0:
+                    schedule(child)
+
+        def schedule(name):
+            node = self.nodes[name]
+            context = {"input": workflow_input}
+            for upstream in parents[name]:
+                context[upstream] = results[upstream]
+            built = node.build_input(context)
+            inputs = built if node.fan_out else [built]
+            partial[name] = {}
+            outstanding[name] = 0
+            # Fan-out inputs may come from a generator; submit each one as soon as it is produced.
+            for index, input_data in enumerate(inputs):
+                if sink is None:
+                    future = self._executor.submit(self._call, node, input_data)
+                else:
+                    future = self._executor.submit(self._call_streaming, node, input_data, sink,
+                                                   index if node.fan_out else None, name not in streamed_only)
+                pending[future] = (name, index)
+                outstanding[name] += 1
+            logger.info(f"Node '{name}' scheduled with {outstanding[name]} task(s).")
+            if outstanding[name] == 0:
+                complete(name)
+
+        for name in order:
+            if waiting_on[name] == 0 and name not in partial and name not in results:
+                schedule(name)
+
+        while pending:
+            done, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in done:
+                name, index = pending.pop(future)
+                try:
+                    partial[name][index] = future.result()
+                except Exception as e:
+                    logger.error(f"Node '{name}' failed: {e}")
+                    for other in pending:
+                        other.cancel()
+                    raise
+                outstanding[name] -= 1
+                if outstanding[name] == 0:
+                    complete(name)
+
+        if sink is not None:
+            sink.flush()
+
+        return results
+
+    async def arun(self, workflow_input: Dict[str, Any], sink=None) -> Dict[str, Any]:
+        """
+        Async counterpart of `run()`, with the same result and `sink` behaviour. Each node
+        runs as a task on the current event loop once its upstream nodes have finished, and
+        calls its agent's `arun()`.
+
+        Agent calls of every concurrent `arun()` of this workflow share `max_concurrency`
+        slots, and a fan-out node draws each input from `build_input` only once a slot is
+        free, so large fan-outs do not pile up tasks. The first failing call cancels every
+        other task of the run and its exception is re-raised. Cancelling the task awaiting
+        `arun()` cancels the whole run in the same way.
+        """
+        import asyncio  # Imported on first use; synchronous workflows never need it
+
+        order, parents, _, streamed_only = self._plan(sink)
+        semaphore = self._semaphore(asyncio)
+        results: Dict[str, Any] = {}
+        finished = {name: asyncio.Event() for name in order}
+
+        def release(_):
+            semaphore.release()
+
+        async def run_node(name):
+            for upstream in parents[name]:
+                await finished[upstream].wait()
+            node = self.nodes[name]
+            context = {"input": workflow_input}
+            for upstream in parents[name]:
+                context[upstream] = results[upstream]
+            built = node.build_input(context)
+            inputs = built if node.fan_out else [built]
+            keep = name not in streamed_only
+            calls = []
+            try:
+                for index, input_data in enumerate(inputs):
+                    await semaphore.acquire()
+                    # Released when the call finishes, even if it is cancelled before it starts
+                    call = asyncio.ensure_future(
+                        self._acall(node, input_data, sink, index if node.fan_out else None, keep))
+                    call.add_done_callback(release)
+                    calls.append(call)
+                logger.info(f"Node '{name}' scheduled with {len(calls)} task(s).")
+                outputs = await asyncio.gather(*calls)
+            except BaseException:
+                for call in calls:
+                    call.cancel()
+                raise
+            if keep:
+                results[name] = outputs if node.fan_out else outputs[0]
+            logger.info(f"Node '{name}' finished.")
+            finished[name].set()
+
+        tasks = {asyncio.ensure_future(run_node(name)): name for name in order}
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                if not task.cancelled() and task.exception() is not None:
+                    logger.error(f"Node '{tasks[task]}' failed: {task.exception()}")
+                    raise task.exception()
+        finally:
+            pending = [task for task in tasks if not task.done()]
+            for task in pending:
+                task.cancel()
+            if pending:
+                await asyncio.gather(*pending, return_exceptions=True)
+
+        if sink is not None:
+            sink.flush()
+
+        return results
+
+    def _semaphore(self, asyncio):
+        # asyncio primitives belong to one event loop, so each loop gets its own slots
+        loop = asyncio.get_running_loop()
+        with self._lock:
+            semaphore = self._semaphores.get(loop)
+            if semaphore is None:
+                semaphore = self._semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+            return semaphore
+
+    def shutdown(self) -> None:
+        """
+        Stops the worker pool and shuts down every agent instance it created.
+        """
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        with self._lock:
+            for agent in self._instances:
+                agent.shutdown()
+            self._instances = []
+            self._shared = {}
+        self._local = threading.local()
+
+    def __enter__(self) -> "Workflow":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
+
+
+def _write_output(sink, node: WorkflowNode, index: Optional[int], output_data: Dict[str, Any]) -> None:
+    if index is None:
+        sink.write({"node": node.name, "output": output_data})
+    else:
+        sink.write({"node": node.name, "index": index, "output": output_data})
+
+
+class WorkflowResult:
+    """
+    The outcome of one workflow input in a batch: its outputs, or the error that stopped it.
+    """
+    __slots__ = ("index", "output", "error")
+
+    def __init__(self, index: int, output: Dict[str, Any] = None, error: str = None):
+        self.index = index
+        self.output = output
+        self.error = error
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {"index": self.index, "ok": self.ok, "output": self.output, "error": self.error}
+
+
+def _run_isolated(workflow: Workflow, index: int, workflow_input: Dict[str, Any]) -> WorkflowResult:
+    try:
+        return WorkflowResult(index, output=workflow.run(workflow_input))
+    except Exception as e:
+        logger.error(f"Workflow input {index} failed: {e}")
+        return WorkflowResult(index, error=f"{type(e).__name__}: {e}")
+
+
+# Per-process state of BatchExecutor workers in "process" mode
+_worker_workflow: Optional[Workflow] = None
+
+
+def _init_process_worker(workflow_factory: Callable[[], Workflow]) -> None:
+    global _worker_workflow
+    _worker_workflow = workflow_factory()
+
+
+def _run_chunk(chunk: List[Tuple[int, Dict[str, Any]]]) -> List[WorkflowResult]:
+    return [_run_isolated(_worker_workflow, index, workflow_input) for index, workflow_input in chunk]
+
+
+class BatchExecutor:
+    """
+    Runs one workflow over many inputs, either on threads in this process or sharded across
+    a process pool so CPU-bound agents can use every core.
+
+    `workflow_factory` is a zero-argument callable returning a configured `Workflow`; in
+    "process" mode it must be picklable (a module-level function), and each worker process
+    calls it once so its agents stay warm across chunks. Inputs are dispatched in chunks of
+    `chunksize` and results come back in input order. A failing input only fails its own
+    `WorkflowResult`. At most `max_workers` chunks are in flight at a time; if a worker
+    process dies, only those chunks are retried, together, on a fresh pool, and a chunk that
+    crashes a worker again is bisected on its own so only the input that does it is reported
+    as failed.
+    """
+    MODES = ("thread", "process")
+
+    def __init__(self, workflow_factory: Callable[[], Workflow], mode: str = "process",
+                 max_workers: int = None, chunksize: int = 16):
+        if mode not in self.MODES:
+            raise ValueError(f"Unknown executor mode: {mode}. Expected one of {self.MODES}.")
+        self.workflow_factory = workflow_factory
+        self.mode = mode
+        self.max_workers = max_workers or os.cpu_count() or 1
+        self.chunksize = max(1, chunksize)
+        self._pool = None
+        self._workflow = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.mode == "process":
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    initializer=_init_process_worker,
+                    initargs=(self.workflow_factory,)
+                )
+            else:
+                self._workflow = self.workflow_factory()
+                self._pool = ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="bmad-batch")
+        return self._pool
+
+    def _reset_pool(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+    def map(self, inputs: Sequence[Dict[str, Any]]) -> List[WorkflowResult]:
+        """
+        Runs the workflow for every input and returns one WorkflowResult per input, in order.
+        """
+        results: List[Optional[WorkflowResult]] = [None] * len(inputs)
+        indexed = list(enumerate(inputs))
+        chunks = [indexed[i:i + self.chunksize] for i in range(0, len(indexed), self.chunksize)]
+        logger.info(f"Dispatching {len(inputs)} workflow inputs in {len(chunks)} chunk(s) ({self.mode} mode).")
+
+        if self.mode == "thread":
+            pool = self._get_pool()
+            futures = [pool.submit(self._run_thread_chunk, chunk) for chunk in chunks]
+            for future in futures:
+                for result in future.result():
+                    results[result.index] = result
+            return results
+
+        remaining = chunks
+        while remaining:
+            crashed, remaining = self._dispatch(remaining, results)
+            if crashed:
+                # Retry the chunks that were in flight when a worker died together on the new
+                # pool; only those that crash it again are split up to find the culprit input.
+                logger.warning(f"A worker process died; retrying {len(crashed)} chunk(s) that were in flight.")
+                crashed, unsent = self._dispatch(crashed, results)
+                # Chunks the fresh pool broke before taking are isolated too, so every input
+                # ends with a result or an error
+                for chunk in crashed + unsent:
+                    self._isolate(chunk, results)
+        return results
+
+    def _dispatch(self, chunks: List[List[Tuple[int, Dict[str, Any]]]],
+                  results: List[Optional[WorkflowResult]]) -> Tuple[list, list]:
+        """
+        Runs chunks on the process pool, at most `max_workers` at a time, and stores their
+        results. If a worker dies, stops submitting and resets the pool; returns the chunks
+        that were in flight then and the chunks that were not submitted yet.
+        """
+        pool = self._get_pool()
+        pending = list(reversed(chunks))
+        running = {}
+        crashed = []
+        broken = False
+        while running or (pending and not broken):
+            while pending and not broken and len(running) < self.max_workers:
+                try:
+                    running[pool.submit(_run_chunk, pending[-1])] = pending[-1]
+                except BrokenProcessPool:
+                    broken = True
+                    break
+                pending.pop()
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for future in done:
+                chunk = running.pop(future)
+                try:
+                    for result in future.result():
+                        results[result.index] = result
+                except BrokenProcessPool:
+                    broken = True
+                    crashed.append(chunk)
+        if broken:
+            self._reset_pool()
+        return crashed, pending[::-1]
+
+    def _isolate(self, chunk: List[Tuple[int, Dict[str, Any]]], results: List[Optional[WorkflowResult]]) -> None:
+        """
+        Runs a chunk that crashed its worker twice on its own, halving it while it still does
+        so only the input that kills a worker is reported as failed.
+        """
+        try:
+            for result in self._get_pool().submit(_run_chunk, chunk).result():
+                results[result.index] = result
+            return
+        except BrokenProcessPool as e:
+            self._reset_pool()
+            if len(chunk) == 1:
+                index = chunk[0][0]
+                logger.error(f"Workflow input {index} crashed its worker process: {e}")
+                results[index] = WorkflowResult(index, error=f"BrokenProcessPool: {e}")
+                return
+        middle = len(chunk) // 2
+        self._isolate(chunk[:middle], results)
+        self._isolate(chunk[middle:], results)
+
+    def _run_thread_chunk(self, chunk: List[Tuple[int, Dict[str, Any]]]) -> List[WorkflowResult]:
+        return [_run_isolated(self._workflow, index, workflow_input) for index, workflow_input in chunk]
+
+    def shutdown(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(wait=True)
+            self._pool = None
+        if self._workflow is not None:
+            self._workflow.shutdown()
+            self._workflow = None
+
+    def __enter__(self) -> "BatchExecutor":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.shutdown()
@@ -1,25 +1,50 @@
 import json
 import logging
-from seo_blog_agent.agent import SEOBlogAgent
-from image_prompt_agent.agent import ImagePromptAgent
+import sys
+
+from .orchestrator import Workflow
+from .output_sinks import create_output_sink
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
 logger = logging.getLogger("Orchestrator")
 
-def main():
+def build_image_inputs(context):
+    """
+    Fans the blog post out into one ImagePromptAgent input per generated image prompt.
+    """
+    for prompt_subject in context["seo_blog_agent"].get("image_prompts", []):
+        logger.info(f"Processing image prompt for: '{prompt_subject}'")
+        yield {
+            "base_subject": prompt_subject,
+            "style": "photorealistic",
+            "aspect_ratio": "4:3",
+            "model": "dall-e",
+            "modifiers": ["serene", "natural light"]
+        }
+
+def build_blog_workflow(max_workers=8):
+    """
+    Builds the blog + images workflow: image prompts run after the blog post, concurrently,
+    one per prompt the post suggests. The post is built from the workflow input alone, so its
+    node has no upstream nodes even though SEOBlogAgent lists image_prompt_agent among its
+    dependencies. Module-level so BatchExecutor can ship it to worker processes.
+    """
+    workflow = Workflow(max_workers=max_workers)
+    workflow.add_node("seo_blog_agent", depends_on=[])
+    workflow.add_node("image_prompt_agent", build_input=build_image_inputs, fan_out=True,
+                      depends_on=["seo_blog_agent"])
+    return workflow
+
+def main(output: str = "-"):
     """
     Demonstrates a multi-agent workflow where the SEOBlogAgent and ImagePromptAgent
     work together to create a blog post and its associated image prompts.
+    Every agent output is written as a JSON line to `output` (see `create_output_sink()`)
+    as soon as it is produced, so nothing waits for the whole batch.
     """
     logger.info("--- Starting Multi-Agent Workflow ---")
 
-    # 1. Initialize Agents
-    seo_agent = SEOBlogAgent()
-    image_agent = ImagePromptAgent()
-
-    seo_agent.initialize()
-    image_agent.initialize()
+    # 1. Build the workflow
+    workflow = build_blog_workflow()
 
     # 2. Define Initial Input for the SEO Blog Agent
     blog_input = {
@@ -31,48 +56,27 @@ def main():
     }
     logger.info(f"Initial input for SEOBlogAgent: {json.dumps(blog_input, indent=2)}")
 
+    sink = create_output_sink(output)
     try:
-        # 3. Process the input with the SEO Blog Agent
-        seo_agent.process(blog_input)
-        blog_output = seo_agent.output()
-        logger.info("SEOBlogAgent finished processing.")
-        print("\n--- SEO Blog Agent Output ---")
-        print(json.dumps(blog_output, indent=2))
-
-        # 4. Use the output from the SEO agent as input for the Image Prompt Agent
-        image_prompts_from_blog = blog_output.get("image_prompts", [])
-        if not image_prompts_from_blog:
+        # 3. Run the workflow, streaming each output to the sink as it finishes
+        if output == "-":
+            print("\n--- Agent Outputs (JSON lines) ---", flush=True)
+        results = workflow.run(blog_input, sink=sink)
+        if not results["seo_blog_agent"].get("image_prompts"):
             logger.warning("No image prompts were generated by the SEOBlogAgent.")
             return
 
-        logger.info(f"Image prompts received from SEOBlogAgent: {image_prompts_from_blog}")
-
-        # 5. Process each image prompt with the Image Prompt Agent
-        generated_images_data = []
-        for prompt_subject in image_prompts_from_blog:
-            logger.info(f"Processing image prompt for: '{prompt_subject}'")
-            image_input = {
-                "base_subject": prompt_subject,
-                "style": "photorealistic",
-                "aspect_ratio": "4:3",
-                "model": "dall-e",
-                "modifiers": ["serene", "natural light"]
-            }
-            image_agent.process(image_input)
-            image_output = image_agent.output()
-            generated_images_data.append(image_output)
-
-        logger.info("ImagePromptAgent finished processing all prompts.")
-        print("\n--- Image Prompt Agent Outputs ---")
-        print(json.dumps(generated_images_data, indent=2))
+        logger.info(f"ImagePromptAgent finished processing all prompts ({sink.records} outputs written).")
 
     except ValueError as e:
         logger.error(f"An error occurred in the workflow: {e}")
     finally:
-        # 6. Shutdown all agents
-        seo_agent.shutdown()
-        image_agent.shutdown()
+        # 4. Shutdown the worker pool and all agents, and close the output
+        workflow.shutdown()
+        sink.close()
         logger.info("--- Multi-Agent Workflow Finished ---")
 
 if __name__ == '__main__':
-    main()
\ No newline at end of file
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+    # Optional argument: where to write the outputs ("-", a file path, tcp://host:port or unix:///path)
+    main(sys.argv[1] if len(sys.argv) > 1 else "-")
\ No newline at end of file
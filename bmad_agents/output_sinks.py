@@ -0,0 +1,211 @@
+import json
+import logging
+import socket
+import sys
+import threading
+from typing import Any, Dict, Iterable, Optional, Tuple, Union
+
+try:
+    import orjson
+except ImportError:  # orjson is optional; the standard library encoder is the fallback
+    orjson = None
+
+logger = logging.getLogger(__name__)
+
+# Built once: json.dumps() with non-default options constructs a new encoder on every call
+_ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False, default=str)
+
+
+def dumps_line(record: Any) -> bytes:
+    """
+    Serializes `record` to one line of compact UTF-8 JSON, newline included. Values JSON
+    has no type for are written as their str().
+    """
+    if orjson is not None:
+        return orjson.dumps(record, default=str, option=orjson.OPT_APPEND_NEWLINE | orjson.OPT_NON_STR_KEYS)
+    return (_ENCODER.encode(record) + "\n").encode("utf-8")
+
+
+class JsonLinesSink:
+    """
+    Writes records as JSON lines, serializing each one as soon as it is written and
+    passing the bytes on in bulk.
+
+    Lines are buffered until `buffer_bytes` have accumulated, but never for longer than
+    `window_seconds`: the first line written into an empty buffer starts a timer that
+    flushes it. A window of 0 flushes every record as it is written; None only flushes on
+    size, `flush()` and `close()`. Safe to write from several threads.
+
+    Subclasses implement `_send(data)` and, if they own a resource, `_close_target()`.
+    """
+    def __init__(self, buffer_bytes: int = 64 * 1024, window_seconds: Optional[float] = 1.0):
+        if buffer_bytes < 0 or (window_seconds is not None and window_seconds < 0):
+            raise ValueError("buffer_bytes and window_seconds must not be negative")
+        self.buffer_bytes = buffer_bytes
+        self.window_seconds = window_seconds
+        self.records = 0
+        self.flushes = 0
+        self._buffer = []
+        self._size = 0
+        self._timer: Optional[threading.Timer] = None
+        self._closed = False
+        self._lock = threading.Lock()
+
+    def write(self, record: Any) -> None:
+        """
+        Serializes one record and buffers its line.
+        """
+        self._append([dumps_line(record)])
+
+    def write_many(self, records: Iterable[Any]) -> None:
+        self._append([dumps_line(record) for record in records])
+
+    def _append(self, lines) -> None:
+        with self._lock:
+            if self._closed:
+                raise ValueError(f"Cannot write to a closed {type(self).__name__}")
+            self._buffer.extend(lines)
+            self._size += sum(len(line) for line in lines)
+            self.records += len(lines)
+            if self._size >= self.buffer_bytes or self.window_seconds == 0:
+                self._flush_locked()
+            elif self._timer is None and self.window_seconds is not None:
+                self._timer = threading.Timer(self.window_seconds, self._flush_window)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _flush_window(self) -> None:
+        try:
+            self.flush()
+        except Exception as e:
+            # Raised on a timer thread, where no caller would see it; the next write or flush retries
+            logger.error(f"Flushing {type(self).__name__} failed: {e}")
+
+    def flush(self) -> None:
+        """
+        Passes every buffered line on to the target.
+        """
+        with self._lock:
+            self._flush_locked()
+
+    def _flush_locked(self) -> None:
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._buffer:
+            return
+        data = b"".join(self._buffer)
+        self._send(data)
+        self._buffer = []
+        self._size = 0
+        self.flushes += 1
+
+    def close(self) -> None:
+        """
+        Flushes what is left and releases the target. Closing twice is a no-op.
+        """
+        with self._lock:
+            if self._closed:
+                return
+            try:
+                self._flush_locked()
+            finally:
+                self._closed = True
+                self._close_target()
+
+    def _send(self, data: bytes) -> None:
+        raise NotImplementedError
+
+    def _close_target(self) -> None:
+        pass
+
+    def __enter__(self) -> "JsonLinesSink":
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close()
+
+
+class FileSink(JsonLinesSink):
+    """
+    Writes JSON lines to a file path (truncated, or appended to with `append`) or to an
+    open binary file object, which is flushed but left open.
+    """
+    def __init__(self, target: Union[str, Any], append: bool = False, **options):
+        super().__init__(**options)
+        if isinstance(target, str):
+            self._file = open(target, "ab" if append else "wb")
+            self._owned = True
+        else:
+            self._file = target
+            self._owned = False
+
+    def _send(self, data: bytes) -> None:
+        self._file.write(data)
+        self._file.flush()
+
+    def _close_target(self) -> None:
+        if self._owned:
+            self._file.close()
+
+
+class StdoutSink(JsonLinesSink):
+    """
+    Writes JSON lines to standard output, after anything already printed to it.
+    """
+    def _send(self, data: bytes) -> None:
+        stdout = sys.stdout
+        stdout.flush()
+        if hasattr(stdout, "buffer"):
+            stdout.buffer.write(data)
+            stdout.buffer.flush()
+        else:
+            stdout.write(data.decode("utf-8"))
+            stdout.flush()
+
+
+class SocketSink(JsonLinesSink):
+    """
+    Streams JSON lines over a TCP connection to `address` (a (host, port) tuple) or, when
+    `address` is a str, a Unix domain socket at that path.
+    """
+    def __init__(self, address: Union[Tuple[str, int], str], timeout: Optional[float] = 10.0, **options):
+        super().__init__(**options)
+        if isinstance(address, str):
+            self._socket = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+            self._socket.settimeout(timeout)
+            try:
+                self._socket.connect(address)
+            except OSError:
+                self._socket.close()
+                raise
+        else:
+            self._socket = socket.create_connection(address, timeout=timeout)
+
+    def _send(self, data: bytes) -> None:
+        self._socket.sendall(data)
+
+    def _close_target(self) -> None:
+        try:
+            self._socket.shutdown(socket.SHUT_WR)
+        except OSError:
+            pass
+        self._socket.close()
+
+
+def create_output_sink(target: str, **options: Dict[str, Any]) -> JsonLinesSink:
+    """
+    Builds a sink from a target string: "-" for standard output, "tcp://host:port" for a
+    TCP connection, "unix:///path" for a Unix domain socket, and anything else is a file
+    path. `options` are passed on to the sink (e.g. `window_seconds`).
+    """
+    if target == "-":
+        return StdoutSink(**options)
+    if target.startswith("tcp://"):
+        host, _, port = target[len("tcp://"):].rpartition(":")
+        if not host or not port.isdigit():
+            raise ValueError(f"Invalid TCP output target: {target}. Expected tcp://host:port.")
+        return SocketSink((host.strip("[]"), int(port)), **options)
+    if target.startswith("unix://"):
+        return SocketSink(target[len("unix://"):], **options)
+    return FileSink(target, **options)
@@ -1,28 +1,13 @@
 import json
 import logging
-import uuid
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional
 from datetime import datetime
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-class BMADAgentInterface:
-    """
-    BMADAgentInterface defines the standard methods for all BMAD agents.
-    """
-    def initialize(self, config: Dict[str, Any]) -> None:
-        raise NotImplementedError
-
-    def process(self, input_data: Dict[str, Any]) -> None:
-        raise NotImplementedError
-
-    def output(self) -> Dict[str, Any]:
-        raise NotImplementedError
+from ..interface import BMADAgentInterface, offload
+from .schedule_store import ScheduleEntry, ScheduleStore, create_schedule_store
+from .slot_allocator import PlatformLimits, SlotAllocator, SlotAssignment
 
-    def shutdown(self) -> None:
-        raise NotImplementedError
+logger = logging.getLogger(__name__)
 
 class PublishSchedulerAgent(BMADAgentInterface):
     """
@@ -35,26 +20,59 @@ class PublishSchedulerAgent(BMADAgentInterface):
         "input_schema": "input_schema.json",
         "output_schema": "output_schema.json",
         "dependencies": [],
+        "coalesce": False,  # Every call books a schedule entry, so identical calls are not duplicates
         "version": "1.0.0"
     }
 
     def __init__(self):
         self.config = None
         self.output_data = None
+        self.schedule_store = ScheduleStore()
+        self.slot_allocator = SlotAllocator(self.schedule_store)
 
     def initialize(self, config: Dict[str, Any] = None) -> None:
         """
         Initializes the agent with a given configuration.
         """
         self.config = config if config else {}
+        store = self.config.get("schedule_store")
+        if isinstance(store, ScheduleStore):
+            self.schedule_store = store
+        elif store is not None:
+            self.schedule_store = create_schedule_store(store)
+        limits = {platform: PlatformLimits(**options)
+                  for platform, options in self.config.get("platform_limits", {}).items()}
+        self.slot_allocator = SlotAllocator(self.schedule_store, limits)
         logger.info(f"Publish Scheduler Agent initialized with config: {self.config}")
 
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Schedules the content for publishing and returns the schedule, without keeping it on
+        the instance, so one agent can serve concurrent requests.
+        The schedule is stored in `schedule_store`; `poll_due()` hands it out once its time has come.
+        With `allocate_slot`, the content is placed at the earliest time at or after
+        `publish_datetime` that respects the platform's limits, and the output says why.
+        """
+        return self._generate(input_data)
+
+    async def arun(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async counterpart of `run()`. An in-memory schedule store is updated inline on the
+        event loop; a store with a journal commits to SQLite, so it is used from the default
+        executor.
+        """
+        if self.schedule_store.path is not None:
+            return await offload(self._generate, input_data)
+        return self._generate(input_data)
+
     def process(self, input_data: Dict[str, Any]) -> None:
         """
-        Processes the input data to schedule the content for publishing.
-        This is a mock implementation.
+        Processes the input data to schedule the content, for `output()` to return.
         """
-        logger.info(f"Processing input data: {input_data}")
+        self.output_data = self._generate(input_data)
+
+    def _generate(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        logger.debug("Processing input data: %s", input_data)
         try:
             content_id = input_data['content_id']
             publish_datetime_str = input_data['publish_datetime']
@@ -67,17 +85,14 @@ class PublishSchedulerAgent(BMADAgentInterface):
                 logger.error(f"Invalid datetime format: {publish_datetime_str}")
                 raise ValueError("Invalid datetime format. Please use ISO 8601 format.")
 
-            # Mock scheduling logic
-            schedule_id = str(uuid.uuid4())
-
-            self.output_data = {
-                "schedule_id": schedule_id,
-                "content_id": content_id,
-                "publish_datetime": publish_datetime.isoformat(),
-                "platform": platform,
-                "status": "scheduled"
-            }
-            logger.info(f"Successfully scheduled content {content_id} for publishing on {platform} at {publish_datetime}.")
+            if input_data.get('allocate_slot'):
+                entry, assignment = self.slot_allocator.schedule([(content_id, platform, publish_datetime)])[0]
+                output_data = self._allocated_output(entry, assignment, publish_datetime_str)
+            else:
+                entry = self.schedule_store.schedule(content_id, platform, publish_datetime)
+                output_data = entry.to_dict()
+            logger.info(f"Successfully scheduled content {content_id} for publishing on {platform} at {entry.publish_datetime}.")
+            return output_data
 
         except KeyError as e:
             logger.error(f"Missing required input key: {e}")
@@ -86,6 +101,82 @@ class PublishSchedulerAgent(BMADAgentInterface):
             logger.error(f"An error occurred during processing: {e}")
             raise
 
+    def process_batch(self, inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Schedules many items in one store transaction: the plain items are stored first, then
+        the items with `allocate_slot` are placed around them together in one sweep per
+        platform. If any item fails, none of the batch is stored.
+        """
+        logger.info(f"Processing batch of {len(inputs)} scheduling inputs.")
+        items = []
+        try:
+            for input_data in inputs:
+                items.append((input_data['content_id'], input_data['platform'],
+                              datetime.fromisoformat(input_data['publish_datetime'])))
+        except KeyError as e:
+            logger.error(f"Missing required input key: {e} (batch record {len(items)})")
+            raise ValueError(f"Missing required input key: {e} (batch record {len(items)})")
+        except ValueError:
+            logger.error(f"Invalid datetime format (batch record {len(items)})")
+            raise ValueError(f"Invalid datetime format. Please use ISO 8601 format. (batch record {len(items)})")
+
+        allocated = [i for i, input_data in enumerate(inputs) if input_data.get('allocate_slot')]
+        plain = [i for i, input_data in enumerate(inputs) if not input_data.get('allocate_slot')]
+        outputs: List[Dict[str, Any]] = [None] * len(inputs)
+        with self.schedule_store.transaction():
+            for i, entry in zip(plain, self.schedule_store.schedule_many([items[i] for i in plain])):
+                outputs[i] = entry.to_dict()
+            for i, (entry, assignment) in zip(allocated, self.slot_allocator.schedule([items[i] for i in allocated])):
+                outputs[i] = self._allocated_output(entry, assignment, inputs[i]['publish_datetime'])
+        if outputs:
+            self.output_data = outputs[-1]
+        logger.info(f"Successfully scheduled {len(outputs)} items ({len(allocated)} with slot allocation).")
+        return outputs
+
+    @staticmethod
+    def _allocated_output(entry: ScheduleEntry, assignment: SlotAssignment, requested_datetime: str) -> Dict[str, Any]:
+        output_data = entry.to_dict()
+        output_data["requested_datetime"] = requested_datetime
+        output_data["slot_reason"] = assignment.reason
+        return output_data
+
+    def reschedule(self, schedule_id: str, publish_datetime: str) -> Dict[str, Any]:
+        """
+        Moves a pending schedule to a new ISO 8601 datetime and returns it in the output shape.
+        """
+        entry = self.schedule_store.reschedule(schedule_id, publish_datetime)
+        logger.info(f"Rescheduled {schedule_id} to {entry.publish_datetime}.")
+        return entry.to_dict()
+
+    def cancel(self, schedule_id: str) -> Dict[str, Any]:
+        """
+        Cancels a pending schedule and returns it with status "cancelled".
+        """
+        entry = self.schedule_store.cancel(schedule_id)
+        logger.info(f"Cancelled schedule {schedule_id}.")
+        return entry.to_dict()
+
+    def poll_due(self, now: float = None, limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Hands out the schedules whose time has come (earliest first) with status "published".
+        Each schedule is returned by exactly one poll.
+        """
+        return [entry.to_dict() for entry in self.schedule_store.pop_due(now, limit)]
+
+    def upcoming(self, platform: str = None, start: str = None, end: str = None,
+                 limit: int = None) -> List[Dict[str, Any]]:
+        """
+        Lists pending schedules in [start, end), optionally for one platform, ordered by time.
+        """
+        return [entry.to_dict() for entry in self.schedule_store.range(start, end, platform, limit)]
+
+    def next_due(self) -> Optional[Dict[str, Any]]:
+        """
+        Returns the earliest pending schedule, or None if nothing is pending.
+        """
+        entry = self.schedule_store.next_due()
+        return entry.to_dict() if entry is not None else None
+
     def output(self) -> Dict[str, Any]:
         """
         Returns the generated output data.
@@ -101,9 +192,13 @@ class PublishSchedulerAgent(BMADAgentInterface):
         """
         logger.info("Publish Scheduler Agent is shutting down.")
         self.output_data = None
+        if not isinstance((self.config or {}).get("schedule_store"), ScheduleStore):
+            # A shared store belongs to whoever passed it in
+            self.schedule_store.close()
 
 # Example of how the BMAD orchestrator might use this agent
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     scheduler_agent = PublishSchedulerAgent()
     scheduler_agent.initialize()
 
@@ -122,6 +217,10 @@ if __name__ == '__main__':
         schedule_output = scheduler_agent.output()
         print("Scheduling Result:")
         print(json.dumps(schedule_output, indent=2))
+        print("Next due:")
+        print(json.dumps(scheduler_agent.next_due(), indent=2))
+        print("Due in two hours:")
+        print(json.dumps(scheduler_agent.poll_due(now=now.timestamp() + 7200), indent=2))
     except ValueError as e:
         print(f"Error processing input: {e}")
     finally:
@@ -0,0 +1,432 @@
+import bisect
+import heapq
+import logging
+import os
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime
+from typing import Dict, Any, Callable, Iterable, Iterator, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKET_SECONDS = 3600.0
+
+
+class ScheduleEntry:
+    """
+    One pending publication. `publish_at` is the POSIX timestamp of `publish_datetime`;
+    `seq` changes on every reschedule, so that heap items for earlier times can be told
+    apart from the current one.
+    """
+    __slots__ = ("schedule_id", "content_id", "platform", "publish_datetime", "publish_at", "status", "seq")
+
+    def __init__(self, schedule_id: str, content_id: str, platform: str, publish_datetime: str,
+                 publish_at: float, status: str = "scheduled", seq: int = 0):
+        self.schedule_id = schedule_id
+        self.content_id = content_id
+        self.platform = platform
+        self.publish_datetime = publish_datetime
+        self.publish_at = publish_at
+        self.status = status
+        self.seq = seq
+
+    def to_dict(self) -> Dict[str, Any]:
+        """
+        Returns the entry in the PublishSchedulerAgent output shape.
+        """
+        return {
+            "schedule_id": self.schedule_id,
+            "content_id": self.content_id,
+            "publish_datetime": self.publish_datetime,
+            "platform": self.platform,
+            "status": self.status
+        }
+
+
+def parse_publish_datetime(value) -> Tuple[str, float]:
+    """
+    Returns (ISO 8601 string, POSIX timestamp) for a datetime or an ISO 8601 string.
+    Naive datetimes are taken as local time, as `datetime.timestamp()` does.
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value)
+        except ValueError:
+            raise ValueError("Invalid datetime format. Please use ISO 8601 format.")
+    return value.isoformat(), value.timestamp()
+
+
+class ScheduleStore:
+    """
+    Pending publications indexed for a scheduler loop.
+
+    - A min-heap of (publish_at, seq, schedule_id) gives the next due entry in O(1) and
+      insert, cancel and reschedule in O(log n). Cancelling or rescheduling does not search
+      the heap: the old item is left in place and skipped when it reaches the top, because
+      its seq no longer matches the entry (lazy deletion). The heap is rebuilt once stale
+      items outnumber live ones.
+    - A per-platform time-bucket index (entries grouped by `publish_at // bucket_seconds`,
+      with the occupied bucket numbers kept sorted) answers range queries by visiting only
+      the buckets that overlap the window.
+    - With a `path`, every change is committed to a SQLite journal (WAL mode) before the
+      in-memory index is updated, and a new store on the same path reloads the pending
+      entries, so a crash loses nothing that was acknowledged. Without one, the store is
+      in-memory only.
+
+    Only pending entries are kept in memory. Cancelled and published ones stay in the journal.
+    All methods are thread-safe. Hold the reentrant `lock` to combine several calls atomically,
+    or use `transaction()` to also commit several `schedule_many()` calls as one.
+    """
+    def __init__(self, path: Optional[str] = None, bucket_seconds: float = DEFAULT_BUCKET_SECONDS,
+                 timeout: float = 30.0, clock: Callable[[], float] = time.time):
+        if bucket_seconds <= 0:
+            raise ValueError("bucket_seconds must be positive")
+        self.path = path
+        self.bucket_seconds = bucket_seconds
+        self.timeout = timeout
+        self.clock = clock
+        self.lock = threading.RLock()
+        self._entries: Dict[str, ScheduleEntry] = {}
+        self._heap: List[Tuple[float, int, str]] = []
+        self._stale = 0
+        self._seq = 0
+        self._buckets: Dict[str, Dict[int, set]] = {}  # platform -> bucket number -> schedule ids
+        self._bucket_keys: Dict[str, List[int]] = {}  # platform -> sorted occupied bucket numbers
+        self._conn = None
+        self._added: Optional[List[ScheduleEntry]] = None  # Entries added in the open transaction()
+        if path is not None:
+            # sqlite3 and uuid are imported on first use; together they are an eighth of the agent's import budget
+            import sqlite3
+            directory = os.path.dirname(os.path.abspath(path))
+            os.makedirs(directory, exist_ok=True)
+            self._conn = sqlite3.connect(path, timeout=timeout, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS schedules ("
+                    "schedule_id TEXT PRIMARY KEY, content_id TEXT NOT NULL, platform TEXT NOT NULL, "
+                    "publish_datetime TEXT NOT NULL, publish_at REAL NOT NULL, status TEXT NOT NULL)"
+                )
+                self._conn.execute("CREATE INDEX IF NOT EXISTS schedules_by_status ON schedules (status)")
+            self._reload()
+
+    def _reload(self) -> None:
+        # Rebuild the index from the pending entries; heapify is O(n)
+        rows = self._conn.execute(
+            "SELECT schedule_id, content_id, platform, publish_datetime, publish_at FROM schedules "
+            "WHERE status = 'scheduled'"
+        ).fetchall()
+        heap = []
+        for seq, (schedule_id, content_id, platform, publish_datetime, publish_at) in enumerate(rows):
+            entry = ScheduleEntry(schedule_id, content_id, platform, publish_datetime, publish_at, seq=seq)
+            self._entries[schedule_id] = entry
+            heap.append((publish_at, seq, schedule_id))
+            self._bucket_add(entry)
+        heapq.heapify(heap)
+        self._heap = heap
+        self._seq = len(rows)
+        if rows:
+            logger.info(f"Reloaded {len(rows)} pending schedules from {self.path}.")
+
+    def _bucket_add(self, entry: ScheduleEntry) -> None:
+        number = int(entry.publish_at // self.bucket_seconds)
+        buckets = self._buckets.setdefault(entry.platform, {})
+        bucket = buckets.get(number)
+        if bucket is None:
+            bucket = buckets[number] = set()
+            bisect.insort(self._bucket_keys.setdefault(entry.platform, []), number)
+        bucket.add(entry.schedule_id)
+
+    def _bucket_remove(self, entry: ScheduleEntry) -> None:
+        number = int(entry.publish_at // self.bucket_seconds)
+        buckets = self._buckets[entry.platform]
+        bucket = buckets[number]
+        bucket.discard(entry.schedule_id)
+        if not bucket:
+            del buckets[number]
+            keys = self._bucket_keys[entry.platform]
+            del keys[bisect.bisect_left(keys, number)]
+
+    def _push(self, entry: ScheduleEntry) -> None:
+        self._seq += 1
+        entry.seq = self._seq
+        heapq.heappush(self._heap, (entry.publish_at, entry.seq, entry.schedule_id))
+
+    def _is_live(self, item: Tuple[float, int, str]) -> bool:
+        entry = self._entries.get(item[2])
+        return entry is not None and entry.seq == item[1]
+
+    def _discard_stale_top(self) -> None:
+        heap = self._heap
+        while heap and not self._is_live(heap[0]):
+            heapq.heappop(heap)
+            self._stale -= 1
+
+    def _mark_stale(self) -> None:
+        self._stale += 1
+        if self._stale > len(self._entries) and self._stale > 1024:
+            self._heap = [item for item in self._heap if self._is_live(item)]
+            heapq.heapify(self._heap)
+            self._stale = 0
+
+    def schedule(self, content_id: str, platform: str, publish_datetime, schedule_id: str = None) -> ScheduleEntry:
+        """
+        Adds a pending publication and returns its entry. `publish_datetime` is a datetime or
+        an ISO 8601 string.
+        """
+        return self.schedule_many([(content_id, platform, publish_datetime)],
+                                  [schedule_id] if schedule_id else None)[0]
+
+    def schedule_many(self, items: Iterable[Tuple[str, str, Any]],
+                      schedule_ids: List[str] = None) -> List[ScheduleEntry]:
+        """
+        Adds many (content_id, platform, publish_datetime) items in one journal transaction.
+        """
+        import uuid
+        entries = []
+        for i, (content_id, platform, publish_datetime) in enumerate(items):
+            iso, publish_at = parse_publish_datetime(publish_datetime)
+            schedule_id = schedule_ids[i] if schedule_ids else str(uuid.uuid4())
+            entries.append(ScheduleEntry(schedule_id, content_id, platform, iso, publish_at))
+        with self.lock:
+            if any(entry.schedule_id in self._entries for entry in entries):
+                raise ValueError("Schedule id already exists")
+            if self._conn is not None:
+                rows = [(e.schedule_id, e.content_id, e.platform, e.publish_datetime, e.publish_at) for e in entries]
+                insert = ("INSERT INTO schedules (schedule_id, content_id, platform, publish_datetime, publish_at, "
+                          "status) VALUES (?, ?, ?, ?, ?, 'scheduled')")
+                if self._added is not None:
+                    # Committed when the transaction() block exits
+                    self._conn.executemany(insert, rows)
+                else:
+                    with self._conn:
+                        self._conn.executemany(insert, rows)
+            if self._added is not None:
+                self._added.extend(entries)
+            for entry in entries:
+                self._entries[entry.schedule_id] = entry
+                self._push(entry)
+                self._bucket_add(entry)
+        return entries
+
+    @contextmanager
+    def transaction(self):
+        """
+        Holds the lock and makes the `schedule_many()` calls in the block one journal
+        transaction. Their entries are visible inside the block as they are added; if the
+        block raises, the journal is rolled back and the entries are dropped again. Other
+        changes commit the journal, so make only `schedule_many()` calls in the block. A
+        nested block joins the outer one.
+        """
+        with self.lock:
+            if self._added is not None:
+                yield
+                return
+            self._added = added = []
+            try:
+                yield
+                if self._conn is not None:
+                    self._conn.commit()
+            except BaseException:
+                if self._conn is not None:
+                    self._conn.rollback()
+                for entry in added:
+                    if self._entries.get(entry.schedule_id) is entry:
+                        del self._entries[entry.schedule_id]
+                        self._bucket_remove(entry)
+                        self._mark_stale()
+                raise
+            finally:
+                self._added = None
+
+    def _pending(self, schedule_id: str) -> ScheduleEntry:
+        entry = self._entries.get(schedule_id)
+        if entry is None:
+            raise ValueError(f"No pending schedule with id {schedule_id}")
+        return entry
+
+    def reschedule(self, schedule_id: str, publish_datetime) -> ScheduleEntry:
+        """
+        Moves a pending publication to a new time.
+        """
+        iso, publish_at = parse_publish_datetime(publish_datetime)
+        with self.lock:
+            entry = self._pending(schedule_id)
+            if self._conn is not None:
+                with self._conn:
+                    self._conn.execute(
+                        "UPDATE schedules SET publish_datetime = ?, publish_at = ? WHERE schedule_id = ?",
+                        (iso, publish_at, schedule_id)
+                    )
+            self._bucket_remove(entry)
+            entry.publish_datetime, entry.publish_at = iso, publish_at
+            self._bucket_add(entry)
+            self._push(entry)
+            self._mark_stale()
+        return entry
+
+    def cancel(self, schedule_id: str) -> ScheduleEntry:
+        """
+        Cancels a pending publication and returns its entry with status "cancelled".
+        """
+        with self.lock:
+            entry = self._pending(schedule_id)
+            self._finish([entry], "cancelled")
+            self._mark_stale()
+        return entry
+
+    def _finish(self, entries: List[ScheduleEntry], status: str) -> None:
+        if self._conn is not None:
+            with self._conn:
+                self._conn.executemany("UPDATE schedules SET status = ? WHERE schedule_id = ?",
+                                       [(status, entry.schedule_id) for entry in entries])
+        for entry in entries:
+            del self._entries[entry.schedule_id]
+            self._bucket_remove(entry)
+            entry.status = status
+
+    def get(self, schedule_id: str) -> Optional[ScheduleEntry]:
+        """
+        Returns the entry for `schedule_id`, reading finished entries from the journal.
+        """
+        with self.lock:
+            entry = self._entries.get(schedule_id)
+            if entry is not None or self._conn is None:
+                return entry
+            row = self._conn.execute(
+                "SELECT content_id, platform, publish_datetime, publish_at, status FROM schedules WHERE schedule_id = ?",
+                (schedule_id,)
+            ).fetchone()
+        return ScheduleEntry(schedule_id, *row) if row else None
+
+    def next_due(self) -> Optional[ScheduleEntry]:
+        """
+        Returns the pending entry with the earliest publish time, without removing it.
+        """
+        with self.lock:
+            self._discard_stale_top()
+            return self._entries[self._heap[0][2]] if self._heap else None
+
+    def due(self, now: float = None, limit: int = None) -> List[ScheduleEntry]:
+        """
+        Returns pending entries whose time has come (`publish_at <= now`), earliest first,
+        without removing them. Walks only the top of the heap: O(k log k) for k results.
+        """
+        now = self.clock() if now is None else now
+        with self.lock:
+            heap, found = self._heap, []
+            frontier = [(heap[0], 0)] if heap else []
+            while frontier and (limit is None or len(found) < limit):
+                item, index = heapq.heappop(frontier)
+                if item[0] > now:
+                    break
+                if self._is_live(item):
+                    found.append(self._entries[item[2]])
+                for child in (2 * index + 1, 2 * index + 2):
+                    if child < len(heap):
+                        heapq.heappush(frontier, (heap[child], child))
+            return found
+
+    def pop_due(self, now: float = None, limit: int = None) -> List[ScheduleEntry]:
+        """
+        Removes and returns the entries whose time has come, earliest first, marking them
+        "published" in one journal transaction. Each entry is handed out once, even across a
+        crash and reload.
+        """
+        now = self.clock() if now is None else now
+        with self.lock:
+            heap, popped = self._heap, []
+            while heap and heap[0][0] <= now and (limit is None or len(popped) < limit):
+                item = heapq.heappop(heap)
+                if self._is_live(item):
+                    popped.append(self._entries[item[2]])
+                else:
+                    self._stale -= 1
+            if popped:
+                self._finish(popped, "published")
+            return popped
+
+    def range(self, start=None, end=None, platform: str = None, limit: int = None) -> List[ScheduleEntry]:
+        """
+        Returns pending entries with `start <= publish time < end`, optionally for one platform,
+        ordered by time. `start` and `end` are datetimes, ISO 8601 strings or timestamps; either
+        may be None for an open-ended window.
+        """
+        low = float("-inf") if start is None else self._timestamp(start)
+        high = float("inf") if end is None else self._timestamp(end)
+        with self.lock:
+            platforms = [platform] if platform is not None else list(self._buckets)
+            found = []
+            for name in platforms:
+                keys = self._bucket_keys.get(name, [])
+                buckets = self._buckets[name] if keys else {}
+                first = 0 if low == float("-inf") else bisect.bisect_left(keys, int(low // self.bucket_seconds))
+                last = len(keys) if high == float("inf") else bisect.bisect_right(keys, int(high // self.bucket_seconds))
+                for number in keys[first:last]:
+                    for schedule_id in buckets[number]:
+                        entry = self._entries[schedule_id]
+                        if low <= entry.publish_at < high:
+                            found.append(entry)
+        found.sort(key=lambda entry: (entry.publish_at, entry.seq))
+        return found[:limit] if limit is not None else found
+
+    def iter_platform(self, platform: str, start: float, reverse: bool = False) -> Iterator[ScheduleEntry]:
+        """
+        Lazily yields one platform's pending entries in time order, from the first at or after
+        the timestamp `start` onwards, or with `reverse` from the last before `start` backwards.
+        Only the buckets actually reached are sorted, so a caller that stops early pays
+        for the entries it looked at.
+        """
+        with self.lock:
+            keys = self._bucket_keys.get(platform, [])
+            if start in (float("inf"), float("-inf")):
+                keys = keys[::-1] if reverse else list(keys)
+            elif reverse:
+                keys = keys[:bisect.bisect_right(keys, int(start // self.bucket_seconds))][::-1]
+            else:
+                keys = keys[bisect.bisect_left(keys, int(start // self.bucket_seconds)):]
+        for number in keys:
+            with self.lock:
+                bucket = self._buckets.get(platform, {}).get(number, ())
+                entries = [self._entries[schedule_id] for schedule_id in bucket]
+            entries.sort(key=lambda entry: (entry.publish_at, entry.seq), reverse=reverse)
+            for entry in entries:
+                if (entry.publish_at < start) == reverse:
+                    yield entry
+
+    @staticmethod
+    def _timestamp(value) -> float:
+        if isinstance(value, (int, float)):
+            return float(value)
+        return parse_publish_datetime(value)[1]
+
+    def stats(self) -> Dict[str, int]:
+        with self.lock:
+            return {
+                "pending": len(self._entries),
+                "heap_items": len(self._heap),
+                "stale_heap_items": self._stale,
+                "buckets": sum(len(keys) for keys in self._bucket_keys.values())
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, schedule_id: str) -> bool:
+        return schedule_id in self._entries
+
+    def close(self) -> None:
+        with self.lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+
+def create_schedule_store(options: Dict[str, Any] = None) -> ScheduleStore:
+    """
+    Builds a schedule store from the `schedule_store` section of the agent config:
+    "path" (a SQLite journal; in-memory if omitted) and "bucket_seconds".
+    """
+    return ScheduleStore(**dict(options or {}))
@@ -0,0 +1,272 @@
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Any, Iterator, List, Optional, Sequence, Tuple
+
+from .schedule_store import ScheduleEntry, ScheduleStore, parse_publish_datetime
+
+logger = logging.getLogger(__name__)
+
+# Why an item was placed where it was
+REASON_REQUESTED = "requested_time"  # free at the requested time
+REASON_RATE_LIMIT = "rate_limit"  # delayed until the platform's token bucket had a token
+REASON_MIN_SPACING = "min_spacing"  # delayed to keep min spacing from the batch's previous item
+REASON_CONFLICT = "conflict"  # delayed past an existing schedule it would collide with or starve
+
+
+class PlatformLimits:
+    """
+    Publication limits of one platform: a token bucket refilled with `max_posts` tokens every
+    `per_seconds` and holding at most `burst` tokens, plus a minimum gap between posts.
+
+    The bucket is checked as the equivalent GCRA (virtual scheduling): each post advances a
+    theoretical arrival time by the emission interval, and a post conforms if it is no earlier
+    than that time minus the burst tolerance.
+    """
+    __slots__ = ("max_posts", "per_seconds", "burst", "min_spacing_seconds")
+
+    def __init__(self, max_posts: int = 1, per_seconds: float = 3600.0, burst: int = 1,
+                 min_spacing_seconds: float = 0.0):
+        if max_posts < 1 or per_seconds <= 0 or burst < 1 or min_spacing_seconds < 0:
+            raise ValueError("Platform limits need max_posts >= 1, per_seconds > 0, burst >= 1 and min_spacing_seconds >= 0")
+        self.max_posts = max_posts
+        self.per_seconds = per_seconds
+        self.burst = burst
+        self.min_spacing_seconds = min_spacing_seconds
+
+    @property
+    def emission_interval(self) -> float:
+        return self.per_seconds / self.max_posts
+
+    @property
+    def tolerance(self) -> float:
+        return (self.burst - 1) * self.emission_interval
+
+
+DEFAULT_PLATFORM_LIMITS = {
+    "blog": PlatformLimits(max_posts=24, per_seconds=86400, burst=2, min_spacing_seconds=600),
+    "youtube": PlatformLimits(max_posts=6, per_seconds=86400, burst=1, min_spacing_seconds=3600),
+    "twitter": PlatformLimits(max_posts=300, per_seconds=10800, burst=10, min_spacing_seconds=30)
+}
+
+
+class SlotAssignment:
+    """
+    The slot chosen for one requested item: `publish_at` (a timestamp) and why it was chosen.
+    """
+    __slots__ = ("platform", "requested_at", "publish_at", "reason")
+
+    def __init__(self, platform: str, requested_at: float, publish_at: float, reason: str):
+        self.platform = platform
+        self.requested_at = requested_at
+        self.publish_at = publish_at
+        self.reason = reason
+
+
+class _Lookahead:
+    # An iterator of existing publish times that can be peeked at any distance ahead
+    __slots__ = ("_times", "_buffer", "_position")
+
+    def __init__(self, times: Iterator[float]):
+        self._times = times
+        self._buffer: List[float] = []
+        self._position = 0
+
+    def peek(self, offset: int = 0) -> Optional[float]:
+        index = self._position + offset
+        while len(self._buffer) <= index:
+            value = next(self._times, None)
+            if value is None:
+                return None
+            self._buffer.append(value)
+        return self._buffer[index]
+
+    def advance(self) -> None:
+        self._position += 1
+        if self._position > 1024:
+            del self._buffer[:self._position]
+            self._position = 0
+
+
+def _timestamp(value) -> float:
+    if isinstance(value, (int, float)):
+        return float(value)
+    return parse_publish_datetime(value)[1]
+
+
+def _as_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    try:
+        return datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        raise ValueError("Invalid datetime format. Please use ISO 8601 format.")
+
+
+class SlotAllocator:
+    """
+    Assigns publish times on top of a `ScheduleStore` so that each platform's pending schedules
+    respect its `PlatformLimits`.
+
+    The store's per-platform time-bucket index is the interval index: every schedule occupies
+    `[publish_at - min_spacing, publish_at + min_spacing]`, and the schedules around a time are
+    found by walking the buckets next to it. `allocate()` places a whole batch in one sweep that
+    merges the platform's existing schedules with the sorted requested times: O(n + m log m)
+    for n existing and m new items rather than one query per item.
+    """
+    def __init__(self, store: ScheduleStore, limits: Dict[str, PlatformLimits] = None, resolution: float = 1.0):
+        if resolution <= 0:
+            raise ValueError("resolution must be positive")
+        self.store = store
+        self.resolution = resolution
+        self.limits = dict(DEFAULT_PLATFORM_LIMITS)
+        self.limits.update(limits or {})
+
+    def limits_for(self, platform: str) -> PlatformLimits:
+        limits = self.limits.get(platform)
+        if limits is None:
+            raise ValueError(f"No publish limits configured for platform: {platform}")
+        return limits
+
+    def _state_before(self, platform: str, start: float, limits: PlatformLimits) -> Tuple[float, Optional[float]]:
+        """
+        Returns (theoretical arrival time, last publish time) after the platform's schedules
+        before `start`. Walks back only to the most recent post that found the bucket full:
+        a gap of at least tolerance + emission interval resets the GCRA state.
+        """
+        interval, tolerance = limits.emission_interval, limits.tolerance
+        history: List[float] = []
+        previous = None
+        for entry in self.store.iter_platform(platform, start, reverse=True):
+            if previous is not None and previous - entry.publish_at >= tolerance + interval:
+                break
+            history.append(entry.publish_at)
+            previous = entry.publish_at
+        arrival = float("-inf")
+        for publish_at in reversed(history):
+            arrival = max(arrival, publish_at) + interval
+        return arrival, (history[0] if history else None)
+
+    @staticmethod
+    def _starves_existing(candidate: float, arrival: float, upcoming: _Lookahead, limits: PlatformLimits) -> bool:
+        """
+        Returns True if a post at `candidate` would leave the bucket too empty for a later
+        existing schedule. Only schedules up to the point where the two GCRA states converge
+        are checked.
+        """
+        interval, tolerance = limits.emission_interval, limits.tolerance
+        with_post = max(arrival, candidate) + interval
+        without_post = arrival
+        offset = 0
+        while with_post != without_post:
+            existing = upcoming.peek(offset)
+            if existing is None:
+                return False
+            if existing < with_post - tolerance:
+                return True
+            with_post = max(with_post, existing) + interval
+            without_post = max(without_post, existing) + interval
+            offset += 1
+        return False
+
+    def place(self, platform: str, requested: Sequence[float]) -> List[SlotAssignment]:
+        """
+        Places items requested at the given timestamps (sorted ascending) on `platform` as early
+        as possible, each at or after its requested time and in the same order, without
+        breaking the limits for existing schedules or each other. Times are rounded up to
+        `resolution` seconds. Nothing is stored.
+        """
+        limits = self.limits_for(platform)
+        interval, tolerance, spacing = limits.emission_interval, limits.tolerance, limits.min_spacing_seconds
+        if not requested:
+            return []
+        arrival, last = self._state_before(platform, requested[0], limits)
+        last_is_existing = last is not None
+        upcoming = _Lookahead(entry.publish_at for entry in self.store.iter_platform(platform, requested[0]))
+        assignments = []
+        resolution = self.resolution
+        cursor = requested[0]
+        for requested_at in requested:
+            candidate, reason = -(-max(requested_at, cursor) // resolution) * resolution, REASON_REQUESTED
+            if candidate > requested_at:
+                reason = assignments[-1].reason if assignments else REASON_REQUESTED
+            while True:
+                # Absorb the existing schedules at or before the candidate
+                existing = upcoming.peek()
+                while existing is not None and existing <= candidate:
+                    arrival = max(arrival, existing) + interval
+                    last, last_is_existing = existing, True
+                    upcoming.advance()
+                    existing = upcoming.peek()
+                if candidate < arrival - tolerance:
+                    candidate, reason = -(-(arrival - tolerance) // resolution) * resolution, REASON_RATE_LIMIT
+                    continue
+                if last is not None and candidate < last + spacing:
+                    candidate = -(-(last + spacing) // resolution) * resolution
+                    reason = REASON_CONFLICT if last_is_existing else REASON_MIN_SPACING
+                    continue
+                if existing is not None and (candidate + spacing > existing
+                                             or self._starves_existing(candidate, arrival, upcoming, limits)):
+                    candidate, reason = -(-existing // resolution) * resolution, REASON_CONFLICT
+                    continue
+                break
+            arrival = max(arrival, candidate) + interval
+            last, last_is_existing, cursor = candidate, False, candidate
+            assignments.append(SlotAssignment(platform, requested_at, candidate, reason))
+        return assignments
+
+    def allocate(self, items: Sequence[Tuple[str, Any]]) -> List[SlotAssignment]:
+        """
+        Places (platform, requested datetime or timestamp) items, returning one assignment per
+        item in input order. Items of each platform are swept together in order of requested time.
+        """
+        by_platform: Dict[str, List[Tuple[float, int]]] = defaultdict(list)
+        for index, (platform, requested) in enumerate(items):
+            by_platform[platform].append((_timestamp(requested), index))
+        assignments: List[Optional[SlotAssignment]] = [None] * len(items)
+        for platform, requests in by_platform.items():
+            requests.sort()
+            placed = self.place(platform, [requested_at for requested_at, _ in requests])
+            for (_, index), assignment in zip(requests, placed):
+                assignments[index] = assignment
+        return assignments
+
+    def schedule(self, items: Sequence[Tuple[str, str, Any]]) -> List[Tuple[ScheduleEntry, SlotAssignment]]:
+        """
+        Allocates slots for (content_id, platform, requested datetime) items and stores them,
+        atomically with respect to other writers of the store. Returns (entry, assignment)
+        pairs in input order. The stored datetimes keep the time zone of the requested ones.
+        """
+        requested = [_as_datetime(value) for _, _, value in items]
+        with self.store.lock:
+            assignments = self.allocate([(platform, value) for (_, platform, _), value in zip(items, requested)])
+            entries = self.store.schedule_many([
+                (content_id, platform, datetime.fromtimestamp(assignment.publish_at, value.tzinfo))
+                for (content_id, platform, _), value, assignment in zip(items, requested, assignments)
+            ])
+        return list(zip(entries, assignments))
+
+    def conflicts(self, platform: str, publish_datetime) -> List[ScheduleEntry]:
+        """
+        Returns the pending schedules on `platform` closer than its minimum spacing to
+        `publish_datetime` (or at the same time).
+        """
+        publish_at = _timestamp(publish_datetime)
+        spacing = self.limits_for(platform).min_spacing_seconds
+        found = []
+        for entry in self.store.iter_platform(platform, publish_at - spacing):
+            if entry.publish_at > publish_at + spacing:
+                break
+            if abs(entry.publish_at - publish_at) < spacing or entry.publish_at == publish_at:
+                found.append(entry)
+        return found
+
+    def check(self, platform: str, publish_datetime) -> Optional[str]:
+        """
+        Returns None if a post at `publish_datetime` fits the platform's limits as they stand,
+        otherwise the reason it does not.
+        """
+        publish_at = _timestamp(publish_datetime)
+        placed = self.place(platform, [publish_at])[0]
+        return None if placed.publish_at == publish_at else placed.reason
+
@@ -0,0 +1,207 @@
+import importlib
+import logging
+import os
+import threading
+from typing import Dict, Any, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Third-party packages register agents under this entry point group, e.g. in pyproject.toml:
+#   [project.entry-points."bmad_agents.agents"]
+#   my_agent = "my_package.agent:MyAgent"
+ENTRY_POINT_GROUP = "bmad_agents.agents"
+
+PACKAGE_DIR = os.path.dirname(os.path.abspath(__file__))
+
+
+class AgentSpec:
+    """
+    What the registry knows about an agent before its module is imported: where the class
+    lives and the `metadata` literal read from its source.
+    """
+    __slots__ = ("agent_name", "module", "class_name", "metadata", "_agent_class")
+
+    def __init__(self, agent_name: str, module: str, class_name: str, metadata: Dict[str, Any] = None,
+                 agent_class: type = None):
+        self.agent_name = agent_name
+        self.module = module
+        self.class_name = class_name
+        self.metadata = metadata or {}
+        self._agent_class = agent_class
+
+    @property
+    def loaded(self) -> bool:
+        return self._agent_class is not None
+
+    def load(self) -> type:
+        """
+        Imports the agent's module on first use and returns the class.
+        """
+        if self._agent_class is None:
+            agent_class = getattr(importlib.import_module(self.module), self.class_name)
+            self.metadata = agent_class.metadata
+            self._agent_class = agent_class
+            logger.debug(f"Loaded agent {self.agent_name} from {self.module}")
+        return self._agent_class
+
+    def __repr__(self) -> str:
+        return f"AgentSpec(agent_name={self.agent_name!r}, module={self.module!r}, class_name={self.class_name!r})"
+
+
+def scan_agent_source(path: str, module: str) -> List[AgentSpec]:
+    """
+    Finds agent classes in a source file without importing it: every top-level class that
+    assigns a string literal to `agent_name` and a dict literal to `metadata`.
+    """
+    import ast  # Only needed when a source file is actually scanned
+
+    with open(path, encoding="utf-8") as f:
+        tree = ast.parse(f.read(), filename=path)
+    specs = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        values = {}
+        for statement in node.body:
+            if (isinstance(statement, ast.Assign) and len(statement.targets) == 1
+                    and isinstance(statement.targets[0], ast.Name)
+                    and statement.targets[0].id in ("agent_name", "metadata")):
+                try:
+                    values[statement.targets[0].id] = ast.literal_eval(statement.value)
+                except ValueError:
+                    pass
+        if isinstance(values.get("agent_name"), str) and isinstance(values.get("metadata"), dict):
+            specs.append(AgentSpec(values["agent_name"], module, node.name, values["metadata"]))
+    return specs
+
+
+class AgentRegistry:
+    """
+    AgentRegistry maps `agent_name` to agent classes and imports each agent's module only
+    when that agent is first used.
+
+    Agents are found in three ways: classes registered explicitly with `register()`,
+    `<agent_name>/agent.py` packages next to this module, and the ENTRY_POINT_GROUP entry
+    points of installed distributions. Looking up a bundled agent by name reads only its
+    own `agent.py`, so a worker's cold start does not grow with the number of installed
+    agents; the other agent directories and the entry points are scanned only by
+    `discover()` or when a name is not found.
+    """
+    def __init__(self, package_dir: str = PACKAGE_DIR, package: str = __package__,
+                 entry_point_group: Optional[str] = ENTRY_POINT_GROUP):
+        self.package_dir = package_dir
+        self.package = package
+        self.entry_point_group = entry_point_group
+        self._specs: Dict[str, AgentSpec] = {}
+        self._discovered = False
+        self._lock = threading.RLock()
+
+    def register(self, agent_class: type) -> type:
+        """
+        Registers an already imported agent class. Usable as a class decorator.
+        """
+        with self._lock:
+            self._specs[agent_class.agent_name] = AgentSpec(
+                agent_class.agent_name, agent_class.__module__, agent_class.__name__,
+                agent_class.metadata, agent_class
+            )
+        return agent_class
+
+    def spec(self, agent_name: str) -> AgentSpec:
+        """
+        Returns the spec of an agent without importing its module.
+        """
+        with self._lock:
+            spec = self._specs.get(agent_name)
+            if spec is None:
+                self._scan_package(agent_name)
+                spec = self._specs.get(agent_name)
+            if spec is None and not self._discovered:
+                self.discover()
+                spec = self._specs.get(agent_name)
+        if spec is None:
+            raise ValueError(f"Unknown agent: {agent_name}")
+        return spec
+
+    def get(self, agent_name: str) -> type:
+        """
+        Returns the agent class, importing its module on first use.
+        """
+        return self.spec(agent_name).load()
+
+    def create(self, agent_name: str, config: Dict[str, Any] = None):
+        """
+        Returns a new, initialized instance of the agent.
+        """
+        agent = self.get(agent_name)()
+        agent.initialize(config)
+        return agent
+
+    def metadata(self, agent_name: str) -> Dict[str, Any]:
+        return self.spec(agent_name).metadata
+
+    def discover(self) -> Dict[str, AgentSpec]:
+        """
+        Scans every bundled agent package and entry point, without importing any agent.
+        """
+        with self._lock:
+            for entry in sorted(os.listdir(self.package_dir)):
+                if entry not in self._specs:
+                    self._scan_package(entry)
+            if self.entry_point_group:
+                self._scan_entry_points()
+            self._discovered = True
+            return dict(self._specs)
+
+    def names(self) -> List[str]:
+        return sorted(self.discover())
+
+    def __contains__(self, agent_name: str) -> bool:
+        try:
+            self.spec(agent_name)
+            return True
+        except ValueError:
+            return False
+
+    def _scan_package(self, directory: str) -> None:
+        path = os.path.join(self.package_dir, directory, "agent.py")
+        if not os.path.isfile(path):
+            return
+        for spec in scan_agent_source(path, f"{self.package}.{directory}.agent"):
+            self._specs.setdefault(spec.agent_name, spec)
+
+    def _scan_entry_points(self) -> None:
+        from importlib.metadata import entry_points
+        from importlib.util import find_spec
+
+        for entry_point in entry_points(group=self.entry_point_group):
+            if entry_point.name in self._specs:
+                continue
+            module, _, class_name = entry_point.value.partition(":")
+            spec = AgentSpec(entry_point.name, module, class_name)
+            try:
+                origin = find_spec(module).origin
+            except (ImportError, AttributeError, ValueError) as e:
+                logger.warning(f"Skipping agent entry point '{entry_point.name}': {e}")
+                continue
+            if origin and origin.endswith(".py"):
+                for scanned in scan_agent_source(origin, module):
+                    if scanned.class_name == class_name:
+                        spec.metadata = scanned.metadata
+            self._specs[entry_point.name] = spec
+
+
+# The default registry used by the helper functions below and by Workflow
+registry = AgentRegistry()
+
+
+def get_agent_class(agent_name: str) -> type:
+    return registry.get(agent_name)
+
+
+def create_agent(agent_name: str, config: Dict[str, Any] = None):
+    return registry.create(agent_name, config)
+
+
+def available_agents() -> List[str]:
+    return registry.names()
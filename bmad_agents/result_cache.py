@@ -0,0 +1,422 @@
+import hashlib
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, Iterable, List, Optional, Tuple
+
+from .validation import load_validator, schema_path
+
+logger = logging.getLogger(__name__)
+
+
+class _CacheCounters:
+    __slots__ = ("hits", "disk_hits", "misses")
+
+    def __init__(self):
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+
+    def to_dict(self) -> Dict[str, float]:
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "hit_ratio": (self.hits + self.disk_hits) / lookups if lookups else 0.0
+        }
+
+
+_defaults_cache: Dict[type, Dict[str, Any]] = {}
+
+# Built once: json.dumps() with non-default options constructs a new encoder on every call
+_KEY_ENCODER = json.JSONEncoder(sort_keys=True, separators=(",", ":"), ensure_ascii=False, default=str)
+_VALUE_ENCODER = json.JSONEncoder(separators=(",", ":"), ensure_ascii=False)
+
+
+def input_defaults(agent_class: type) -> Dict[str, Any]:
+    """
+    Returns the top-level `default` values declared in the agent's input schema.
+    """
+    defaults = _defaults_cache.get(agent_class)
+    if defaults is None:
+        defaults = {}
+        if "input_schema" in agent_class.metadata:
+            properties = load_validator(schema_path(agent_class, "input")).schema.get("properties", {})
+            defaults = {name: sub["default"] for name, sub in properties.items() if "default" in sub}
+        _defaults_cache[agent_class] = defaults
+    return defaults
+
+
+def canonical_key(agent, input_data: Dict[str, Any], exclude_fields: Iterable[str] = ()) -> str:
+    """
+    Returns the cache key of an agent input: a BLAKE2b digest of the agent name, its
+    `metadata["version"]`, the instance's `cache_scope` if it has one (e.g. the model
+    backend it calls) and the canonical JSON of the normalized input.
+
+    Normalizing fills in the input schema's defaults, so an input that spells out a
+    default shares its entry with one that omits it, and drops `exclude_fields`.
+    """
+    agent_class = agent if isinstance(agent, type) else type(agent)
+    normalized = {**input_defaults(agent_class), **input_data}
+    for field in exclude_fields:
+        normalized.pop(field, None)
+    version = agent_class.metadata.get("version", "")
+    scope = "" if agent is agent_class else getattr(agent, "cache_scope", "")
+    if scope:
+        # Appended to the version so that unscoped keys stay what they were
+        version = f"{version}\0{scope}"
+    canonical = f"{agent_class.agent_name}\0{version}\0{_KEY_ENCODER.encode(normalized)}"
+    return hashlib.blake2b(canonical.encode("utf-8"), digest_size=20).hexdigest()
+
+
+class DiskResultTier:
+    """
+    A SQLite table of zlib-compressed results that several worker processes can share.
+
+    Rows record the agent name and version they were produced by. The first time a
+    process sees an agent at a given version, rows written by other versions of that
+    agent are deleted; they could never be hit again because the version is part of
+    the key. With `max_bytes`, the oldest rows are trimmed every TRIM_INTERVAL writes.
+
+    Writes are buffered and committed `flush_every` rows at a time, so a miss does not pay
+    for a transaction; buffered rows are served from the buffer until then. `close()`
+    flushes, and a crash loses at most the buffered results.
+    """
+    TRIM_INTERVAL = 256
+
+    def __init__(self, path: str, max_bytes: Optional[int] = None, compression_level: int = 6,
+                 timeout: float = 30.0, flush_every: int = 64):
+        self.path = path
+        self.max_bytes = max_bytes
+        self.compression_level = compression_level
+        self.timeout = timeout
+        self.flush_every = flush_every
+        self._local = threading.local()
+        self._writes = 0
+        self._pending: Dict[str, Tuple[str, str, str, str]] = {}
+        self._pending_lock = threading.Lock()
+        self._current_versions: Dict[str, str] = {}
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS results ("
+                "key TEXT PRIMARY KEY, agent_name TEXT NOT NULL, version TEXT NOT NULL, "
+                "value BLOB NOT NULL, created_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS results_by_agent ON results (agent_name, version)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def ensure_version(self, agent_name: str, version: str) -> None:
+        if self._current_versions.get(agent_name) == version:
+            return
+        self.flush()
+        with self._connection() as conn:
+            deleted = conn.execute(
+                "DELETE FROM results WHERE agent_name = ? AND version != ?", (agent_name, version)
+            ).rowcount
+        self._current_versions[agent_name] = version
+        if deleted:
+            logger.info(f"Dropped {deleted} cached results of older {agent_name} versions")
+
+    def get(self, key: str) -> Optional[str]:
+        pending = self._pending.get(key)
+        if pending is not None:
+            return pending[3]
+        row = self._connection().execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        return zlib.decompress(row[0]).decode("utf-8") if row else None
+
+    def put_many(self, rows: List[Tuple[str, str, str, str]]) -> None:
+        """
+        Buffers (key, agent_name, version, value) rows, committing them once `flush_every` are pending.
+        """
+        with self._pending_lock:
+            for row in rows:
+                self._pending[row[0]] = row
+            if len(self._pending) < self.flush_every:
+                return
+        self.flush()
+
+    def flush(self) -> None:
+        with self._pending_lock:
+            rows = list(self._pending.values())
+            if not rows:
+                return
+            now = time.time()
+            with self._connection() as conn:
+                conn.executemany(
+                    "INSERT OR REPLACE INTO results (key, agent_name, version, value, created_at) VALUES (?, ?, ?, ?, ?)",
+                    [(key, agent_name, version, zlib.compress(value.encode("utf-8"), self.compression_level), now)
+                     for key, agent_name, version, value in rows]
+                )
+            self._pending.clear()
+        self._writes += len(rows)
+        if self.max_bytes is not None and self._writes >= self.TRIM_INTERVAL:
+            self._writes = 0
+            self.trim()
+
+    def trim(self) -> int:
+        """
+        Deletes the oldest rows until the stored values fit in `max_bytes`. Returns the rows deleted.
+        """
+        if self.max_bytes is None:
+            return 0
+        self.flush()
+        with self._connection() as conn:
+            total = conn.execute("SELECT COALESCE(SUM(LENGTH(value)), 0) FROM results").fetchone()[0]
+            if total <= self.max_bytes:
+                return 0
+            excess = total - self.max_bytes
+            doomed = []
+            for key, size in conn.execute("SELECT key, LENGTH(value) FROM results ORDER BY created_at"):
+                doomed.append((key,))
+                excess -= size
+                if excess <= 0:
+                    break
+            conn.executemany("DELETE FROM results WHERE key = ?", doomed)
+        return len(doomed)
+
+    def stats(self) -> Dict[str, int]:
+        self.flush()
+        entries, size = self._connection().execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(value)), 0) FROM results"
+        ).fetchone()
+        return {"entries": entries, "bytes": size}
+
+    def clear(self) -> None:
+        with self._pending_lock:
+            self._pending.clear()
+        with self._connection() as conn:
+            conn.execute("DELETE FROM results")
+
+    def close(self) -> None:
+        self.flush()
+        conn = getattr(self._local, "conn", None)
+        if conn is not None and self._local.pid == os.getpid():
+            conn.close()
+        self._local = threading.local()
+
+
+class ResultCache:
+    """
+    Memoizes the outputs of deterministic agents, keyed by `canonical_key()`.
+
+    Results are kept as JSON text, so every hit returns a fresh copy that callers may
+    mutate. The memory tier is an LRU bounded by `max_bytes` (and optionally
+    `max_entries`); with `disk_path`, misses fall through to a shared `DiskResultTier`
+    and disk hits are promoted to memory. Because the agent version is part of the key,
+    bumping `metadata["version"]` invalidates every older entry without a flush.
+    """
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_entries: Optional[int] = None,
+                 disk_path: Optional[str] = None, max_disk_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.disk = DiskResultTier(disk_path, max_disk_bytes) if disk_path else None
+        self._entries: "OrderedDict[str, str]" = OrderedDict()
+        self._bytes = 0
+        self.evictions = 0
+        self._counters: Dict[str, _CacheCounters] = {}
+        self._lock = threading.Lock()
+
+    def _counter(self, agent_name: str) -> _CacheCounters:
+        counters = self._counters.get(agent_name)
+        if counters is None:
+            counters = self._counters.setdefault(agent_name, _CacheCounters())
+        return counters
+
+    def get(self, agent_name: str, key: str) -> Optional[str]:
+        """
+        Returns the cached JSON text for `key`, or None.
+        """
+        with self._lock:
+            counters = self._counter(agent_name)
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                counters.hits += 1
+                return value
+        value = self.disk.get(key) if self.disk is not None else None
+        with self._lock:
+            if value is None:
+                counters.misses += 1
+                return None
+            counters.disk_hits += 1
+            self._store(key, value)
+        return value
+
+    def put(self, agent_name: str, version: str, key: str, value: str) -> None:
+        self.put_many(agent_name, version, [(key, value)])
+
+    def put_many(self, agent_name: str, version: str, items: List[Tuple[str, str]]) -> None:
+        with self._lock:
+            for key, value in items:
+                self._store(key, value)
+        if self.disk is not None and items:
+            self.disk.put_many([(key, agent_name, version, value) for key, value in items])
+
+    def _store(self, key: str, value: str) -> None:
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        size = len(value)
+        if size > self.max_bytes:
+            return
+        self._entries[key] = value
+        self._bytes += size
+        while self._bytes > self.max_bytes or (self.max_entries is not None and len(self._entries) > self.max_entries):
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+            self.evictions += 1
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns tier sizes, overall hit counters and hit ratio, and the same counters per agent.
+        """
+        with self._lock:
+            total = _CacheCounters()
+            for counters in self._counters.values():
+                total.hits += counters.hits
+                total.disk_hits += counters.disk_hits
+                total.misses += counters.misses
+            result = {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "evictions": self.evictions,
+                **total.to_dict(),
+                "agents": {name: counters.to_dict() for name, counters in sorted(self._counters.items())}
+            }
+        if self.disk is not None:
+            result["disk"] = self.disk.stats()
+        return result
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk is not None:
+            self.disk.clear()
+
+    def close(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+        if self.disk is not None:
+            self.disk.close()
+
+    def memoize(self, agent, exclude_fields: Iterable[str] = None):
+        """
+        Memoizes an agent instance in place and returns it.
+
+        `run()`, `arun()`, `process()` and `process_batch()` are replaced by wrappers that
+        serve cached results and call the agent only for misses. Output fields listed in
+        `metadata["volatile_output_fields"]` are left out of the cache and regenerated on
+        every hit by `agent.volatile_output(input_data, output_data)`; input fields listed in
+        `metadata["volatile_input_fields"]` (or `exclude_fields`) are left out of the key.
+        Memoizing twice is a no-op.
+        """
+        if getattr(agent, "_bmad_result_cache", None) is not None:
+            return agent
+        metadata = agent.metadata
+        agent_name = agent.agent_name
+        version = str(metadata.get("version", ""))
+        exclude = tuple(exclude_fields if exclude_fields is not None else metadata.get("volatile_input_fields", ()))
+        volatile = tuple(metadata.get("volatile_output_fields", ()))
+        if self.disk is not None:
+            self.disk.ensure_version(agent_name, version)
+        original_run = agent.run
+        original_arun = agent.arun
+        original_process = agent.process
+        original_process_batch = agent.process_batch
+        original_output = agent.output
+
+        def encode(output_data: Dict[str, Any]) -> str:
+            if volatile:
+                output_data = {k: v for k, v in output_data.items() if k not in volatile}
+            return _VALUE_ENCODER.encode(output_data)
+
+        def decode(value: str, input_data: Dict[str, Any]) -> Dict[str, Any]:
+            output_data = json.loads(value)
+            if volatile:
+                output_data.update(agent.volatile_output(input_data, output_data))
+            return output_data
+
+        def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
+            key = canonical_key(agent, input_data, exclude)
+            value = self.get(agent_name, key)
+            if value is not None:
+                return decode(value, input_data)
+            output_data = original_run(input_data)
+            self.put(agent_name, version, key, encode(output_data))
+            return output_data
+
+        async def arun(input_data: Dict[str, Any]) -> Dict[str, Any]:
+            key = canonical_key(agent, input_data, exclude)
+            value = self.get(agent_name, key)
+            if value is not None:
+                return decode(value, input_data)
+            output_data = await original_arun(input_data)
+            self.put(agent_name, version, key, encode(output_data))
+            return output_data
+
+        def process(input_data: Dict[str, Any]) -> None:
+            key = canonical_key(agent, input_data, exclude)
+            value = self.get(agent_name, key)
+            if value is not None:
+                agent.output_data = decode(value, input_data)
+                return
+            original_process(input_data)
+            self.put(agent_name, version, key, encode(original_output()))
+
+        def process_batch(inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+            outputs: List[Optional[Dict[str, Any]]] = [None] * len(inputs)
+            missed: List[int] = []
+            keys = [canonical_key(agent, input_data, exclude) for input_data in inputs]
+            for index, key in enumerate(keys):
+                value = self.get(agent_name, key)
+                if value is None:
+                    missed.append(index)
+                else:
+                    outputs[index] = decode(value, inputs[index])
+            if missed:
+                computed = original_process_batch([inputs[index] for index in missed])
+                stored = {}
+                for index, output_data in zip(missed, computed):
+                    outputs[index] = output_data
+                    stored[keys[index]] = encode(output_data)
+                self.put_many(agent_name, version, list(stored.items()))
+            if outputs:
+                agent.output_data = outputs[-1]
+            return outputs
+
+        run.__wrapped__ = original_run
+        arun.__wrapped__ = original_arun
+        process.__wrapped__ = original_process
+        process_batch.__wrapped__ = original_process_batch
+        agent.run = run
+        agent.arun = arun
+        agent.process = process
+        agent.process_batch = process_batch
+        agent._bmad_result_cache = self
+        return agent
+
+
+def create_result_cache(options: Dict[str, Any]) -> ResultCache:
+    """
+    Builds a cache from a config dict such as
+    {"max_bytes": 268435456, "disk_path": "/var/cache/bmad/results.db"}.
+    """
+    return ResultCache(**options)
@@ -1,27 +1,13 @@
 import json
 import logging
 import uuid
-from typing import Dict, Any
+from typing import Dict, Any, Tuple
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-class BMADAgentInterface:
-    """
-    BMADAgentInterface defines the standard methods for all BMAD agents.
-    """
-    def initialize(self, config: Dict[str, Any]) -> None:
-        raise NotImplementedError
+from ..interface import BMADAgentInterface, offload, loggable_config
+from .content import ContentTurn, as_content_turn
+from .context_store import ContextStore, BoundedContextStore, create_context_store
 
-    def process(self, input_data: Dict[str, Any]) -> None:
-        raise NotImplementedError
-
-    def output(self) -> Dict[str, Any]:
-        raise NotImplementedError
-
-    def shutdown(self) -> None:
-        raise NotImplementedError
+logger = logging.getLogger(__name__)
 
 class SEOBlogAgent(BMADAgentInterface):
     """
@@ -34,27 +20,92 @@ class SEOBlogAgent(BMADAgentInterface):
         "input_schema": "input_schema.json",
         "output_schema": "output_schema.json",
         "dependencies": ["image_prompt_agent", "keyword_expander_agent"],
+        "stateful_input_fields": ["context_id"],  # A follow-up appends to its session, so each one runs
         "version": "1.1.0"
     }
 
     def __init__(self):
         self.config = None
         self.output_data = None
-        self.context_store = {} # For multi-turn context memory
+        self.context_store = BoundedContextStore() # For multi-turn context memory
+        self.model_backend = None # Writes the new section of each post; mocked when None
 
     def initialize(self, config: Dict[str, Any] = None) -> None:
         """
         Initializes the agent with a given configuration.
         """
         self.config = config if config else {}
-        logger.info(f"SEO Blog Agent initialized with config: {self.config}")
+        store = self.config.get("context_store")
+        if isinstance(store, ContextStore):
+            self.context_store = store
+        elif store is not None:
+            self.context_store = create_context_store(store)
+        backend = self.config.get("model_backend")
+        if isinstance(backend, dict):
+            from ..model_backends import create_model_backend
+            backend = create_model_backend(backend)
+        self.model_backend = backend
+        logger.info(f"SEO Blog Agent initialized with config: {loggable_config(self.config)}")
+
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generates or continues a blog post and returns it, without keeping it on the
+        instance, so one agent can serve concurrent requests. Concurrent follow-ups to the
+        same `context_id` each extend the turn they read, and the last one stored is the one
+        the next follow-up continues.
+        """
+        return self._joined(self._generate(input_data))
+
+    async def arun(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async counterpart of `run()`. With the in-memory context store the post is built
+        inline; stores that do I/O (SQLite) are used from the default executor. The section
+        text is awaited from the model backend, if there is one.
+        """
+        if self.model_backend is None:
+            if isinstance(self.context_store, BoundedContextStore):
+                return self._joined(self._generate(input_data))
+            # Joining the content may read earlier turns from the store, so it is offloaded as well
+            return await offload(lambda: self._joined(self._generate(input_data)))
+        inline = isinstance(self.context_store, BoundedContextStore)
+        draft = self._prepare(input_data) if inline else await offload(self._prepare, input_data)
+        try:
+            section = await self.model_backend.agenerate(*self._section_request(draft))
+        except Exception as e:
+            logger.error(f"An error occurred during processing: {e}")
+            raise
+        if inline:
+            return self._joined(self._finish(draft, section))
+        return await offload(lambda: self._joined(self._finish(draft, section)))
 
     def process(self, input_data: Dict[str, Any]) -> None:
         """
-        Processes the input data to generate or continue a blog post.
-        This is a mock implementation with enhanced features.
+        Processes the input data to generate or continue a blog post, for `output()` to return.
+        """
+        self.output_data = self._generate(input_data)
+
+    def _generate(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Builds the post with its content still as a `ContentTurn` and records it in the
+        context store for follow-up turns. The new section is written by the model backend;
+        without one, this is a mock implementation with enhanced features.
+        """
+        draft = self._prepare(input_data)
+        if self.model_backend is None:
+            section = draft["mock_section"]
+        else:
+            try:
+                section = self.model_backend.generate(*self._section_request(draft))
+            except Exception as e:
+                logger.error(f"An error occurred during processing: {e}")
+                raise
+        return self._finish(draft, section)
+
+    def _prepare(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Reads the input and the turn it continues, if any, into a draft for `_finish()`.
         """
-        logger.info(f"Processing input data: {input_data}")
+        logger.debug("Processing input data: %s", input_data)
         try:
             topic = input_data['topic']
             keywords = input_data.get('keywords', [])
@@ -70,26 +121,71 @@ class SEOBlogAgent(BMADAgentInterface):
                 # In a real scenario, this would involve calling another agent.
                 # Here, we just mock the expansion.
                 expanded_keywords = keywords + [f"{kw} for beginners" for kw in keywords]
-                keywords = list(set(expanded_keywords)) # Remove duplicates
+                if input_data.get('collapse_near_duplicates'):
+                    from ..keyword_expander_agent.clustering import collapse_near_duplicates
+                    keywords = collapse_near_duplicates(expanded_keywords, input_data.get('similarity_threshold', 0.8))
+                else:
+                    keywords = list(set(expanded_keywords)) # Remove duplicates
 
             # Multi-turn context handling
-            if context_id and context_id in self.context_store:
+            previous_output = self.context_store.get(context_id) if context_id else None
+            if previous_output is not None:
                 logger.info(f"Continuing blog post from context_id: {context_id}")
+                mock_section = f"This is a new section added in a follow-up request, focusing on {', '.join(keywords)}."
+            else:
+                logger.info("Generating new blog post.")
+                mock_section = "This is the first section of the blog post."
+            return {
+                "topic": topic, "keywords": keywords, "audience": audience, "tone": tone, "style": style,
+                "context_id": context_id, "previous_output": previous_output, "mock_section": mock_section
+            }
+        except KeyError as e:
+            logger.error(f"Missing required input key: {e}")
+            raise ValueError(f"Missing required input key: {e}")
+        except Exception as e:
+            logger.error(f"An error occurred during processing: {e}")
+            raise
+
+    @staticmethod
+    def _section_request(draft: Dict[str, Any]) -> Tuple[str, Dict[str, Any]]:
+        """
+        Returns the prompt and parameters for the model backend to write the draft's new section.
+        """
+        keywords = ', '.join(draft['keywords'])
+        if draft['previous_output'] is not None:
+            prompt = (f"Write a follow-up section for the blog post \"{draft['previous_output']['title']}\", "
+                      f"expanding on {draft['topic']} and focusing on: {keywords}.")
+        else:
+            prompt = (f"Write the introduction of a {draft['style'].replace('-', ' ')} for {draft['audience']} "
+                      f"on {draft['topic']}, covering: {keywords}.")
+        return prompt, {"tone": draft['tone']}
+
+    def _finish(self, draft: Dict[str, Any], section: str) -> Dict[str, Any]:
+        """
+        Completes the post with its new section and stores it for follow-up turns.
+        """
+        try:
+            topic, keywords, style = draft['topic'], draft['keywords'], draft['style']
+            audience, tone = draft['audience'], draft['tone']
+            previous_output = draft['previous_output']
+            if previous_output is not None:
                 # Retrieve previous state
-                previous_output = self.context_store[context_id]
                 title = previous_output['title']
                 slug = previous_output['slug']
-                content = previous_output['content']
-                content += f"\n\n## Expanding on {topic}\n\nThis is a new section added in a follow-up request, focusing on {', '.join(keywords)}."
+                # Only the new section is stored for this turn; earlier sections are shared with the parent turn
+                content = as_content_turn(previous_output['content']).append(
+                    f"\n\n## Expanding on {topic}\n\n{section}"
+                )
                 tags = list(set(previous_output['tags'] + keywords))
-                new_context_id = context_id # Keep the same context id for now, or generate a new one
+                new_context_id = draft['context_id'] # Keep the same context id for now, or generate a new one
             else:
-                logger.info("Generating new blog post.")
                 # Generate new content
                 title = f"A {tone.title()} {style.replace('-', ' ').title()} for {audience.title()} on {topic.title()}"
                 slug = topic.lower().replace(" ", "-")
-                content = f"# {title}\n\nThis is a comprehensive guide on {topic}. In this post, we will explore the following keywords: {', '.join(keywords)}.\n\n"
-                content += "## Section 1: Introduction\n\nThis is the first section of the blog post."
+                content = ContentTurn([
+                    f"# {title}\n\nThis is a comprehensive guide on {topic}. In this post, we will explore the following keywords: {', '.join(keywords)}.\n\n",
+                    f"## Section 1: Introduction\n\n{section}"
+                ])
                 new_context_id = str(uuid.uuid4())
                 tags = keywords + [topic.lower().replace(" ", "-")]
 
@@ -98,7 +194,7 @@ class SEOBlogAgent(BMADAgentInterface):
             # Mock interaction with a dependency (Image Prompt Agent)
             image_prompts = [f"A {style} style image of '{topic}' with a focus on '{kw}'" for kw in keywords]
 
-            self.output_data = {
+            output_data = {
                 "title": title,
                 "slug": slug,
                 "meta_description": meta_description,
@@ -109,24 +205,40 @@ class SEOBlogAgent(BMADAgentInterface):
             }
 
             # Store the current state for potential follow-up
-            self.context_store[new_context_id] = self.output_data
+            self.context_store.put(new_context_id, output_data)
 
             logger.info("Successfully generated blog post content.")
-        except KeyError as e:
-            logger.error(f"Missing required input key: {e}")
-            raise ValueError(f"Missing required input key: {e}")
+            return output_data
         except Exception as e:
             logger.error(f"An error occurred during processing: {e}")
             raise
 
     def output(self) -> Dict[str, Any]:
         """
-        Returns the generated output data.
+        Returns the generated output data, joining the content sections into a single string.
         """
         if self.output_data is None:
             logger.warning("Output called before processing.")
             return {}
-        return self.output_data
+        return self._joined(self.output_data)
+
+    def coalesced_output(self, input_data: Dict[str, Any], output_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Gives a caller coalesced with an identical new-post request a session of its own: a
+        new `context_id` that continues from the same post. Follow-ups are never coalesced.
+        """
+        record = self.context_store.get(output_data["context_id"])
+        if record is None:
+            return output_data  # Already evicted; there is no session to continue from
+        context_id = str(uuid.uuid4())
+        # In-memory stores share the post's content turns between the two sessions; the SQLite
+        # store copies them so that either session can be deleted or expire on its own
+        self.context_store.put(context_id, {**record, "context_id": context_id})
+        return {**output_data, "context_id": context_id}
+
+    @staticmethod
+    def _joined(output_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {**output_data, "content": str(output_data["content"])}
 
     def shutdown(self) -> None:
         """
@@ -134,10 +246,16 @@ class SEOBlogAgent(BMADAgentInterface):
         """
         logger.info("SEO Blog Agent is shutting down.")
         self.output_data = None
-        self.context_store = {}
+        if not isinstance((self.config or {}).get("context_store"), ContextStore):
+            # A shared store belongs to whoever passed it in; closing an in-memory one clears it
+            self.context_store.close()
+        if isinstance((self.config or {}).get("model_backend"), dict):
+            # A backend instance from the config is shared and belongs to whoever passed it in
+            self.model_backend.close()
 
 # Example of how the BMAD orchestrator might use this agent
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     seo_agent = SEOBlogAgent()
     seo_agent.initialize()
 
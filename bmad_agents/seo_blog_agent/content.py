@@ -0,0 +1,78 @@
+import uuid
+from typing import Callable, Iterable, Iterator, List, Optional, Union
+
+
+class ContentTurn:
+    """
+    An immutable, append-only blog post body shared between turns.
+
+    Each turn holds only the sections it added plus a pointer to the turn it continues,
+    so a session's memory grows with the text that was added rather than with
+    turns x post length. The full text is joined on demand by `text()`. Persistent
+    stores may pass `load_parent` instead of `parent` so earlier turns are only read
+    when they are needed.
+    """
+    __slots__ = ("turn_id", "_parent", "_load_parent", "sections", "size", "stored")
+
+    def __init__(self, sections: Iterable[str], parent: Optional["ContentTurn"] = None,
+                 turn_id: str = None, size: int = None,
+                 load_parent: Callable[[], Optional["ContentTurn"]] = None):
+        self.turn_id = turn_id or uuid.uuid4().hex
+        self._parent = parent
+        self._load_parent = load_parent
+        self.sections = tuple(sections)
+        if size is None:
+            size = (parent.size if parent is not None else 0) + sum(len(s.encode("utf-8")) for s in self.sections)
+        self.size = size  # UTF-8 bytes of the full text, including all ancestors
+        self.stored = False  # Set by persistent stores once this turn has been written
+
+    @property
+    def parent(self) -> Optional["ContentTurn"]:
+        # Read once: another thread may finish loading the parent in between
+        load_parent = self._load_parent
+        if load_parent is not None:
+            self._parent = load_parent()
+            self._load_parent = None
+        return self._parent
+
+    def append(self, *sections: str) -> "ContentTurn":
+        """
+        Returns a new turn that continues this one with the given sections.
+        """
+        return ContentTurn(sections, parent=self)
+
+    def chain(self) -> List["ContentTurn"]:
+        """
+        Returns the turns from the first one up to and including this one.
+        """
+        turns = []
+        turn = self
+        while turn is not None:
+            turns.append(turn)
+            turn = turn.parent
+        turns.reverse()
+        return turns
+
+    def iter_sections(self) -> Iterator[str]:
+        for turn in self.chain():
+            yield from turn.sections
+
+    def text(self) -> str:
+        return "".join(self.iter_sections())
+
+    def __str__(self) -> str:
+        return self.text()
+
+    def __repr__(self) -> str:
+        return f"ContentTurn(turn_id={self.turn_id!r}, sections={len(self.sections)}, size={self.size})"
+
+
+def as_content_turn(content: Union[str, ContentTurn]) -> ContentTurn:
+    """
+    Wraps plain string content, e.g. from a snapshot written by an older version, in a turn.
+    """
+    if isinstance(content, ContentTurn):
+        return content
+    if not isinstance(content, str):
+        raise ValueError(f"Expected post content as a string or ContentTurn, got {type(content).__name__}.")
+    return ContentTurn([content])
@@ -0,0 +1,420 @@
+import json
+import logging
+import os
+import sqlite3
+import threading
+import time
+import uuid
+import zlib
+from collections import OrderedDict
+from typing import Dict, Any, Callable, Optional
+
+from .content import ContentTurn
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_MAX_BYTES = 64 * 1024 * 1024
+
+
+class ContextStore:
+    """
+    ContextStore defines the storage used by SEOBlogAgent for multi-turn context.
+    Records are the agent's output dicts, keyed by `context_id`.
+    """
+    def get(self, context_id: str) -> Optional[Dict[str, Any]]:
+        raise NotImplementedError
+
+    def put(self, context_id: str, record: Dict[str, Any]) -> None:
+        raise NotImplementedError
+
+    def delete(self, context_id: str) -> None:
+        raise NotImplementedError
+
+    def clear(self) -> None:
+        raise NotImplementedError
+
+    def stats(self) -> Dict[str, int]:
+        raise NotImplementedError
+
+    def close(self) -> None:
+        """
+        Releases the resources held by this process. Shared, persistent stores keep their data.
+        """
+        self.clear()
+
+    def __contains__(self, context_id: str) -> bool:
+        return self.get(context_id) is not None
+
+    def __getitem__(self, context_id: str) -> Dict[str, Any]:
+        record = self.get(context_id)
+        if record is None:
+            raise KeyError(context_id)
+        return record
+
+    def __setitem__(self, context_id: str, record: Dict[str, Any]) -> None:
+        self.put(context_id, record)
+
+    def __delitem__(self, context_id: str) -> None:
+        self.delete(context_id)
+
+
+class BoundedContextStore(ContextStore):
+    """
+    An in-memory context store with LRU and TTL eviction.
+
+    The size cap is measured in UTF-8 bytes of each record's `content`, which dominates the
+    memory of a session, rather than in entries. The TTL is sliding: reading or writing a
+    session pushes its expiry back, so active sessions survive while abandoned ones are
+    reclaimed. Because every access refreshes both recency and expiry, the least recently
+    used entry is always the first to expire. Safe to share between threads.
+    """
+    def __init__(self, max_bytes: Optional[int] = DEFAULT_MAX_BYTES, max_entries: Optional[int] = None,
+                 ttl_seconds: Optional[float] = None, clock: Callable[[], float] = time.monotonic):
+        self.max_bytes = max_bytes
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.clock = clock
+        self._entries = OrderedDict()  # context_id -> [record, size, expires_at]
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+
+    @staticmethod
+    def record_size(record: Dict[str, Any]) -> int:
+        content = record.get("content", "")
+        if isinstance(content, ContentTurn):
+            return content.size
+        return len(str(content).encode("utf-8"))
+
+    def _expiry(self, now: float) -> Optional[float]:
+        return None if self.ttl_seconds is None else now + self.ttl_seconds
+
+    def _remove(self, context_id: str) -> None:
+        _, size, _ = self._entries.pop(context_id)
+        self._bytes -= size
+
+    def _expire(self, now: float) -> None:
+        while self._entries:
+            context_id, (_, _, expires_at) = next(iter(self._entries.items()))
+            if expires_at is None or expires_at > now:
+                break
+            self._remove(context_id)
+            self.expirations += 1
+            logger.info(f"Context {context_id} expired.")
+
+    def get(self, context_id: str) -> Optional[Dict[str, Any]]:
+        now = self.clock()
+        with self._lock:
+            self._expire(now)
+            entry = self._entries.get(context_id)
+            if entry is None:
+                self.misses += 1
+                return None
+            entry[2] = self._expiry(now)
+            self._entries.move_to_end(context_id)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, context_id: str, record: Dict[str, Any]) -> None:
+        now = self.clock()
+        size = self.record_size(record)
+        with self._lock:
+            self._put(context_id, record, size, now)
+
+    def _put(self, context_id: str, record: Dict[str, Any], size: int, now: float) -> None:
+        if context_id in self._entries:
+            self._remove(context_id)
+        if self.max_bytes is not None and size > self.max_bytes:
+            self.evictions += 1
+            logger.warning(f"Context {context_id} is {size} bytes, larger than the {self.max_bytes} byte cap; not stored.")
+            return
+        self._entries[context_id] = [record, size, self._expiry(now)]
+        self._bytes += size
+        self._expire(now)
+        while ((self.max_bytes is not None and self._bytes > self.max_bytes)
+               or (self.max_entries is not None and len(self._entries) > self.max_entries)):
+            evicted = next(iter(self._entries))
+            self._remove(evicted)
+            self.evictions += 1
+            logger.info(f"Context {evicted} evicted to stay within limits.")
+
+    def delete(self, context_id: str) -> None:
+        with self._lock:
+            if context_id in self._entries:
+                self._remove(context_id)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "expirations": self.expirations
+            }
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+class SQLiteContextStore(ContextStore):
+    """
+    A disk-backed context store that several worker processes can share.
+
+    Each record is stored as a zlib-compressed JSON snapshot and is only read and
+    decompressed when a continuation request asks for it, so a worker does not keep
+    sessions in RAM. `ContentTurn` content is written as one row per turn holding only
+    that turn's compressed sections and its parent's id, so a follow-up writes just the
+    text it added. Turn rows belong to one session: storing a session that continues
+    another one's stored turns (a fork) copies them, so deleting or expiring either
+    session leaves the other's content intact. A session whose turns are gone reads as
+    expired. The database runs in WAL mode, which lets readers in other
+    processes proceed while one process writes. Connections are opened lazily per
+    thread and reopened after a fork, so one store can serve many threads. The optional TTL is sliding and uses wall-clock
+    time, so it is shared by all processes.
+    """
+    PURGE_INTERVAL = 256  # Expired rows are purged every this many writes
+
+    def __init__(self, path: str, ttl_seconds: Optional[float] = None, compression_level: int = 6,
+                 timeout: float = 30.0, clock: Callable[[], float] = time.time):
+        self.path = path
+        self.ttl_seconds = ttl_seconds
+        self.compression_level = compression_level
+        self.timeout = timeout
+        self.clock = clock
+        self._local = threading.local()
+        self._writes = 0
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self._counter_lock = threading.Lock()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        with self._connection() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS contexts ("
+                "context_id TEXT PRIMARY KEY, snapshot BLOB NOT NULL, expires_at REAL)"
+            )
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS turns ("
+                "turn_id TEXT PRIMARY KEY, context_id TEXT NOT NULL, parent_id TEXT, "
+                "size INTEGER NOT NULL, sections BLOB NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS turns_by_context ON turns (context_id)")
+
+    def _connection(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None or self._local.pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=self.timeout)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+            self._local.pid = os.getpid()
+        return conn
+
+    def _expiry(self, now: float) -> Optional[float]:
+        return None if self.ttl_seconds is None else now + self.ttl_seconds
+
+    def _encode(self, value: Any) -> bytes:
+        return zlib.compress(json.dumps(value, separators=(",", ":")).encode("utf-8"), self.compression_level)
+
+    @staticmethod
+    def _decode(blob: bytes) -> Any:
+        return json.loads(zlib.decompress(blob).decode("utf-8"))
+
+    def _write_turns(self, conn: sqlite3.Connection, context_id: str, head: ContentTurn) -> None:
+        # Walk back to the newest turn that is already on disk; only the turns after it are new.
+        new_turns = []
+        turn = head
+        while turn is not None and not turn.stored:
+            new_turns.append(turn)
+            turn = turn.parent
+        conn.executemany(
+            "INSERT OR IGNORE INTO turns (turn_id, context_id, parent_id, size, sections) VALUES (?, ?, ?, ?, ?)",
+            [(t.turn_id, context_id, t.parent.turn_id if t.parent else None, t.size, self._encode(t.sections))
+             for t in new_turns]
+        )
+
+    def _copy_turns(self, conn: sqlite3.Connection, context_id: str, head: ContentTurn) -> str:
+        # Returns the id of the session's own copy of a stored turn chain, copying the rows if
+        # they belong to another session.
+        row = conn.execute("SELECT context_id FROM turns WHERE turn_id = ?", (head.turn_id,)).fetchone()
+        if row is None:
+            raise ValueError(f"Turn {head.turn_id} is no longer stored; its session has expired or been deleted.")
+        if row[0] == context_id:
+            return head.turn_id
+        rows = self._chain_rows(conn, head.turn_id)
+        copies = {turn_id: uuid.uuid4().hex for turn_id, _, _, _ in rows}
+        conn.executemany(
+            "INSERT INTO turns (turn_id, context_id, parent_id, size, sections) VALUES (?, ?, ?, ?, ?)",
+            [(copies[turn_id], context_id, copies[parent_id] if parent_id else None, size, sections)
+             for turn_id, parent_id, size, sections in rows]
+        )
+        return copies[head.turn_id]
+
+    def _load_head(self, conn: sqlite3.Connection, head_id: str) -> Optional[ContentTurn]:
+        # Only the latest turn is read here; its ancestors are loaded if the full text is requested.
+        row = conn.execute("SELECT parent_id, size, sections FROM turns WHERE turn_id = ?", (head_id,)).fetchone()
+        if row is None:
+            return None
+        parent_id, size, sections = row
+        load_parent = (lambda: self._load_chain(self._connection(), parent_id)) if parent_id else None
+        turn = ContentTurn(self._decode(sections), turn_id=head_id, size=size, load_parent=load_parent)
+        turn.stored = True
+        return turn
+
+    @staticmethod
+    def _chain_rows(conn: sqlite3.Connection, head_id: str) -> list:
+        # (turn_id, parent_id, size, sections) of a turn and its ancestors, first turn first
+        return conn.execute(
+            "WITH RECURSIVE chain (turn_id, parent_id, size, sections, depth) AS ("
+            " SELECT turn_id, parent_id, size, sections, 0 FROM turns WHERE turn_id = ?"
+            " UNION ALL"
+            " SELECT t.turn_id, t.parent_id, t.size, t.sections, c.depth + 1"
+            " FROM turns t JOIN chain c ON t.turn_id = c.parent_id)"
+            " SELECT turn_id, parent_id, size, sections FROM chain ORDER BY depth DESC",
+            (head_id,)
+        ).fetchall()
+
+    def _load_chain(self, conn: sqlite3.Connection, head_id: str) -> ContentTurn:
+        rows = self._chain_rows(conn, head_id)
+        if not rows:
+            raise ValueError(f"Turn {head_id} is no longer stored; its session has expired or been deleted.")
+        turn = None
+        for turn_id, _, size, sections in rows:
+            turn = ContentTurn(self._decode(sections), parent=turn, turn_id=turn_id, size=size)
+            turn.stored = True
+        return turn
+
+    def get(self, context_id: str) -> Optional[Dict[str, Any]]:
+        now = self.clock()
+        conn = self._connection()
+        row = conn.execute(
+            "SELECT snapshot FROM contexts WHERE context_id = ? AND (expires_at IS NULL OR expires_at > ?)",
+            (context_id, now)
+        ).fetchone()
+        if row is None:
+            with self._counter_lock:
+                self.misses += 1
+            return None
+        if self.ttl_seconds is not None:
+            with conn:
+                conn.execute("UPDATE contexts SET expires_at = ? WHERE context_id = ?", (self._expiry(now), context_id))
+        record = self._decode(row[0])
+        head_id = record.pop("content_turn_id", None)
+        if head_id is not None:
+            record["content"] = self._load_head(conn, head_id)
+            if record["content"] is None:
+                logger.warning(f"Context {context_id} has lost its content turns; treating it as expired.")
+                with self._counter_lock:
+                    self.misses += 1
+                return None
+        with self._counter_lock:
+            self.hits += 1
+        return record
+
+    def put(self, context_id: str, record: Dict[str, Any]) -> None:
+        now = self.clock()
+        content = record.get("content")
+        if isinstance(content, ContentTurn):
+            record = {key: value for key, value in record.items() if key != "content"}
+            record["content_turn_id"] = content.turn_id
+        conn = self._connection()
+        with conn:
+            if isinstance(content, ContentTurn):
+                if content.stored:
+                    record["content_turn_id"] = self._copy_turns(conn, context_id, content)
+                else:
+                    self._write_turns(conn, context_id, content)
+            snapshot = self._encode(record)
+            conn.execute(
+                "INSERT OR REPLACE INTO contexts (context_id, snapshot, expires_at) VALUES (?, ?, ?)",
+                (context_id, snapshot, self._expiry(now))
+            )
+        if isinstance(content, ContentTurn):
+            turn = content
+            while turn is not None and not turn.stored:
+                turn.stored = True
+                turn = turn.parent
+        with self._counter_lock:
+            self._writes += 1
+            purge = self.ttl_seconds is not None and self._writes % self.PURGE_INTERVAL == 0
+        if purge:
+            self.purge_expired()
+
+    def purge_expired(self) -> int:
+        """
+        Deletes expired sessions and returns how many were removed.
+        """
+        now = self.clock()
+        conn = self._connection()
+        with conn:
+            conn.execute(
+                "DELETE FROM turns WHERE context_id IN (SELECT context_id FROM contexts WHERE expires_at <= ?)", (now,)
+            )
+            removed = conn.execute("DELETE FROM contexts WHERE expires_at <= ?", (now,)).rowcount
+        with self._counter_lock:
+            self.expirations += removed
+        return removed
+
+    def delete(self, context_id: str) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM turns WHERE context_id = ?", (context_id,))
+            conn.execute("DELETE FROM contexts WHERE context_id = ?", (context_id,))
+
+    def clear(self) -> None:
+        conn = self._connection()
+        with conn:
+            conn.execute("DELETE FROM turns")
+            conn.execute("DELETE FROM contexts")
+
+    def stats(self) -> Dict[str, int]:
+        conn = self._connection()
+        entries, size = conn.execute(
+            "SELECT COUNT(*), COALESCE(SUM(LENGTH(snapshot)), 0) FROM contexts"
+        ).fetchone()
+        size += conn.execute("SELECT COALESCE(SUM(LENGTH(sections)), 0) FROM turns").fetchone()[0]
+        return {
+            "entries": entries,
+            "bytes": size,
+            "hits": self.hits,
+            "misses": self.misses,
+            "evictions": 0,
+            "expirations": self.expirations
+        }
+
+    def __len__(self) -> int:
+        return self._connection().execute("SELECT COUNT(*) FROM contexts").fetchone()[0]
+
+    def close(self) -> None:
+        conn = getattr(self._local, "conn", None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+def create_context_store(options: Dict[str, Any] = None) -> ContextStore:
+    """
+    Builds a context store from the `context_store` section of the agent config.
+    The "memory" backend (default) accepts "max_bytes", "max_entries" and "ttl_seconds";
+    the "sqlite" backend accepts "path", "ttl_seconds" and "compression_level".
+    """
+    options = dict(options or {})
+    backend = options.pop("backend", "memory")
+    if backend == "memory":
+        return BoundedContextStore(**options)
+    if backend == "sqlite":
+        if "path" not in options:
+            raise ValueError("The sqlite context store requires a 'path' option.")
+        return SQLiteContextStore(**options)
+    raise ValueError(f"Unknown context store backend: {backend}")
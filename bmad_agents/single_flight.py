@@ -0,0 +1,250 @@
+import asyncio
+import copy
+import logging
+import threading
+import weakref
+from typing import Any, Dict, Iterable, Optional
+
+from .result_cache import canonical_key
+
+logger = logging.getLogger(__name__)
+
+
+class _FlightCounters:
+    __slots__ = ("calls", "executions", "followers", "max_followers")
+
+    def __init__(self):
+        self.calls = 0
+        self.executions = 0
+        self.followers = 0
+        self.max_followers = 0
+
+    def to_dict(self) -> Dict[str, float]:
+        return {
+            "calls": self.calls,
+            "executions": self.executions,
+            "followers": self.followers,
+            "max_followers": self.max_followers,
+            "coalesced_ratio": self.followers / self.calls if self.calls else 0.0
+        }
+
+
+def _follower_error(error: BaseException) -> BaseException:
+    """
+    Returns a copy of a leader's exception for one follower to raise. One exception object
+    raised from several threads would have its `__traceback__` rewritten by all of them;
+    the copy is built without calling `__init__`, so most exception types can be copied.
+    """
+    try:
+        copied = type(error).__new__(type(error), *error.args)
+        copied.__dict__.update(getattr(error, "__dict__", {}))
+    except Exception:
+        return RuntimeError(f"Coalesced call failed: {error!r}")
+    return copied
+
+
+class _Flight:
+    """
+    One execution of an agent call and the callers waiting for it.
+    """
+    __slots__ = ("done", "task", "output", "error", "followers", "waiters")
+
+    def __init__(self, task: "Optional[asyncio.Task]" = None):
+        self.done = threading.Event() if task is None else None
+        self.task = task
+        self.output = None  # For followers: a copy taken before the leader's caller can change it
+        self.error: Optional[BaseException] = None
+        self.followers = 0
+        self.waiters = 1
+
+
+class SingleFlight:
+    """
+    Coalesces concurrent identical calls to an agent: while a call is running, calls with the
+    same `canonical_key()` (followers) wait for it instead of running the agent again, and
+    receive its output or its exception. Nothing is kept once the call finishes, so this
+    is not a cache: the next identical call runs the agent again (put a `ResultCache` in
+    front for that).
+
+    Each follower gets its own deep copy of the output, passed through the agent's
+    `coalesced_output()` so an agent can give it what must not be shared, such as a new
+    session id, or its own copy of the exception, raised from the leader's. Calls that set
+    an input field listed in `metadata["stateful_input_fields"]` change state the field
+    names, so they always run on their own. `stats()` and `prometheus_text()` report, per
+    agent, the calls made, the executions they took and the followers that shared one.
+    """
+    def __init__(self):
+        self.in_flight = 0
+        self._counters: Dict[str, _FlightCounters] = {}
+        self._lock = threading.Lock()
+
+    def _counter(self, agent_name: str) -> _FlightCounters:
+        counters = self._counters.get(agent_name)
+        if counters is None:
+            counters = self._counters.setdefault(agent_name, _FlightCounters())
+        return counters
+
+    def _landed(self, flights: Dict[str, _Flight], key: str, flight: _Flight, counters: _FlightCounters,
+                output_data: Any) -> None:
+        """
+        Retires a finished flight: later calls start a new one, and its followers get a copy
+        of the output taken now, before the leader's caller has it.
+        """
+        with self._lock:
+            if flights.get(key) is flight:
+                del flights[key]
+            self.in_flight -= 1
+            followers = flight.followers
+            counters.max_followers = max(counters.max_followers, followers)
+        if followers and flight.error is None:
+            flight.output = copy.deepcopy(output_data)
+
+    def coalesce(self, agent, exclude_fields: Iterable[str] = None):
+        """
+        Coalesces an agent instance's `run()` and `arun()` in place and returns it.
+
+        Only calls to this instance are coalesced with each other. Input fields listed in
+        `metadata["volatile_input_fields"]` (or `exclude_fields`) are left out of the key.
+        Calls that set a `metadata["stateful_input_fields"]` field are passed straight through.
+        Sync callers wait for sync calls and async callers for async calls on the same event
+        loop. An async call whose callers have all been cancelled is cancelled too.
+        Coalescing twice is a no-op.
+        """
+        if getattr(agent, "_bmad_single_flight", None) is not None:
+            return agent
+        agent_name = agent.agent_name
+        exclude = tuple(exclude_fields if exclude_fields is not None
+                        else agent.metadata.get("volatile_input_fields", ()))
+        stateful = tuple(agent.metadata.get("stateful_input_fields", ()))
+        original_run = agent.run
+        original_arun = agent.arun
+        flights: Dict[str, _Flight] = {}
+        loop_flights: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[str, _Flight]]" = \
+            weakref.WeakKeyDictionary()
+
+        def join(flights: Dict[str, _Flight], key: str, start=None):
+            # Returns the flight for `key` and whether this caller leads it
+            with self._lock:
+                counters = self._counter(agent_name)
+                counters.calls += 1
+                flight = flights.get(key)
+                if flight is not None:
+                    flight.followers += 1
+                    flight.waiters += 1
+                    counters.followers += 1
+                    return flight, counters, False
+                counters.executions += 1
+                self.in_flight += 1
+                flight = flights[key] = _Flight(start() if start is not None else None)
+                return flight, counters, True
+
+        def run(input_data: Dict[str, Any]) -> Dict[str, Any]:
+            if stateful and any(input_data.get(field) is not None for field in stateful):
+                return original_run(input_data)
+            key = canonical_key(agent, input_data, exclude)
+            flight, counters, leader = join(flights, key)
+            if not leader:
+                flight.done.wait()
+                if flight.error is not None:
+                    raise _follower_error(flight.error) from flight.error
+                return agent.coalesced_output(input_data, copy.deepcopy(flight.output))
+            output_data = None
+            try:
+                output_data = original_run(input_data)
+                return output_data
+            except BaseException as e:
+                flight.error = e
+                raise
+            finally:
+                self._landed(flights, key, flight, counters, output_data)
+                flight.done.set()
+
+        async def arun(input_data: Dict[str, Any]) -> Dict[str, Any]:
+            if stateful and any(input_data.get(field) is not None for field in stateful):
+                return await original_arun(input_data)
+            key = canonical_key(agent, input_data, exclude)
+            loop = asyncio.get_running_loop()
+            with self._lock:
+                flights = loop_flights.get(loop)
+                if flights is None:
+                    flights = loop_flights[loop] = {}
+            flight, counters, leader = join(flights, key, lambda: loop.create_task(original_arun(input_data)))
+            if leader:
+                def landed(task: asyncio.Task) -> None:
+                    # Runs before any caller resumes, so the followers' copy is taken first
+                    if task.cancelled():
+                        flight.error = asyncio.CancelledError()
+                    elif task.exception() is not None:
+                        flight.error = task.exception()
+                    self._landed(flights, key, flight, counters, None if flight.error else task.result())
+                flight.task.add_done_callback(landed)
+            try:
+                output_data = await asyncio.shield(flight.task)
+            except asyncio.CancelledError:
+                with self._lock:
+                    flight.waiters -= 1
+                    abandoned = flight.waiters == 0 and not flight.task.done()
+                    if abandoned and flights.get(key) is flight:
+                        # Calls arriving from now on start afresh instead of joining a cancelled one
+                        del flights[key]
+                if abandoned:
+                    flight.task.cancel()
+                raise
+            except BaseException as e:
+                if leader:
+                    raise
+                raise _follower_error(e) from e
+            if leader:
+                return output_data
+            return agent.coalesced_output(input_data, copy.deepcopy(flight.output))
+
+        run.__wrapped__ = original_run
+        arun.__wrapped__ = original_arun
+        agent.run = run
+        agent.arun = arun
+        agent._bmad_single_flight = self
+        return agent
+
+    def stats(self) -> Dict[str, Any]:
+        """
+        Returns the executions in flight, overall call, execution and follower counters with
+        the share of calls that were coalesced, and the same counters per agent.
+        """
+        with self._lock:
+            total = _FlightCounters()
+            for counters in self._counters.values():
+                total.calls += counters.calls
+                total.executions += counters.executions
+                total.followers += counters.followers
+                total.max_followers = max(total.max_followers, counters.max_followers)
+            return {
+                "in_flight": self.in_flight,
+                **total.to_dict(),
+                "agents": {name: counters.to_dict() for name, counters in sorted(self._counters.items())}
+            }
+
+    def prometheus_text(self) -> str:
+        """
+        Renders the counters in the Prometheus text exposition format, e.g. for
+        `PrometheusSink(collectors=[single_flight])`.
+        """
+        metrics = (
+            ("calls", "counter", "bmad_single_flight_calls_total", "Calls to coalesced agent methods."),
+            ("executions", "counter", "bmad_single_flight_executions_total",
+             "Calls that ran the agent; the others waited for one of these."),
+            ("followers", "counter", "bmad_single_flight_followers_total",
+             "Calls that shared another call's execution instead of running the agent."),
+            ("max_followers", "gauge", "bmad_single_flight_max_followers",
+             "Most followers that have shared one execution.")
+        )
+        with self._lock:
+            counters = sorted(self._counters.items())
+            lines = []
+            for field, kind, name, description in metrics:
+                lines.append(f"# HELP {name} {description}")
+                lines.append(f"# TYPE {name} {kind}")
+                lines.extend(f'{name}{{agent="{agent}"}} {getattr(c, field)}' for agent, c in counters)
+            lines.append("# HELP bmad_single_flight_in_flight Coalesced executions currently running.")
+            lines.append("# TYPE bmad_single_flight_in_flight gauge")
+            lines.append(f"bmad_single_flight_in_flight {self.in_flight}")
+        return "\n".join(lines) + "\n"
@@ -0,0 +1,40 @@
+import unittest
+
+from ..content_formatter_agent.document import DocumentCache, render_formats
+from ..content_formatter_agent.markdown import render_markdown
+
+DOCUMENT = ("#   Growing *Tomatoes*  \n\nStart with [good soil](https://example.com/soil \"Soil\") & light.\n\n"
+            "* water often\n* feed weekly\n  1. nitrogen\n\n> Patience.\n\n```python\nplant()\n```\n")
+FORMATS = ("html", "markdown", "text")
+
+
+class RenderFormatsTest(unittest.TestCase):
+    def test_text_and_markdown_formats(self):
+        self.assertEqual(render_markdown("# T\n\n*x* [a](http://e.com)", target_format="text"), "T\n\nx a\n")
+        self.assertEqual(render_markdown("#   T  \n\n* x", target_format="markdown"), "# T\n\n* x\n")
+        with self.assertRaises(ValueError):
+            render_markdown("x", target_format="pdf")
+
+    def test_one_parse_matches_separate_renders(self):
+        expected = {target_format: render_markdown(DOCUMENT, target_format=target_format) for target_format in FORMATS}
+        self.assertEqual(render_formats(DOCUMENT, FORMATS), expected)
+
+    def test_cached_documents_render_like_fresh_ones(self):
+        expected = {target_format: render_markdown(DOCUMENT, target_format=target_format) for target_format in FORMATS}
+        cache = DocumentCache()
+        self.assertEqual(cache.render(DOCUMENT, ["html"]), {"html": expected["html"]})
+        self.assertEqual(cache.render(DOCUMENT, FORMATS), expected)
+        self.assertEqual(cache.get(DOCUMENT).render(["text"]), {"text": expected["text"]})
+        self.assertEqual(cache.stats()["misses"], 1)
+
+    def test_cache_stays_within_its_bounds(self):
+        cache = DocumentCache(max_entries=2, max_chars=len(DOCUMENT) * 3)
+        for i in range(4):
+            cache.render(DOCUMENT + f"\n{i}\n", ["html"])
+        self.assertEqual(cache.stats()["entries"], 2)
+        cache.render("x" * (len(DOCUMENT) * 4), ["text"])
+        self.assertEqual(cache.stats()["entries"], 2)  # Larger than max_chars: rendered, not kept
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,46 @@
+import os
+import tempfile
+import unittest
+
+from ..image_prompt_agent.agent import ImagePromptAgent
+from ..image_prompt_agent.asset_index import AssetIndex
+from ..result_cache import ResultCache
+
+
+class AlreadyGeneratedTest(unittest.TestCase):
+    def test_cache_hit_reports_images_generated_since(self):
+        agent = ImagePromptAgent()
+        agent.initialize()
+        ResultCache().memoize(agent)
+        input_data = {"base_subject": "a greenhouse at dawn", "style": "photorealistic"}
+        first = agent.run(input_data)
+        self.assertFalse(first["already_generated"])
+        agent.mark_generated([first])
+
+        # The prompt is not rebuilt on a hit, only looked up by the cached asset_key
+        agent._build_prompt = None
+        second = agent.run(input_data)
+        self.assertTrue(second["already_generated"])
+        self.assertEqual(second["asset_key"], first["asset_key"])
+        agent.shutdown()
+
+
+class SharedJournalTest(unittest.TestCase):
+    def test_misses_see_records_from_other_indexes(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "assets.db")
+            reader, writer = AssetIndex(path), AssetIndex(path)
+            self.assertNotIn("k1", reader)
+            writer.add_many([("k1", "one.png", None), ("k2", "two.png", "s3://bucket/two.png")])
+            self.assertIn("k1", reader)
+            self.assertEqual(reader.get("k2").uri, "s3://bucket/two.png")
+            writer.add("k3", "three.png")
+            self.assertEqual(reader.contains_many(["k1", "k3", "k4"]), [True, True, False])
+            self.assertEqual(reader.get_many(["k3", "k4"])["k3"].filename, "three.png")
+            self.assertEqual(len(reader), 3)
+            reader.close()
+            writer.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
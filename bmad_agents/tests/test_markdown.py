@@ -0,0 +1,77 @@
+import io
+import unittest
+
+from ..content_formatter_agent.markdown import escape_html, render_markdown, render_markdown_stream
+
+
+class EscapingTest(unittest.TestCase):
+    def test_raw_html_is_text(self):
+        html = render_markdown('# Title <b>\n\nHello *world* & <script>alert(1)</script> "q"')
+        self.assertEqual(html, "<h1>Title &lt;b&gt;</h1>\n"
+                               "<p>Hello <em>world</em> &amp; &lt;script&gt;alert(1)&lt;/script&gt; &quot;q&quot;</p>\n")
+
+    def test_code_is_escaped(self):
+        html = render_markdown('`<code> & stuff`\n\n```\n<pre> & "x"\n```')
+        self.assertEqual(html, "<p><code>&lt;code&gt; &amp; stuff</code></p>\n"
+                               "<pre><code>&lt;pre&gt; &amp; &quot;x&quot;\n</code></pre>\n")
+
+    def test_quotes_cannot_leave_attributes(self):
+        self.assertEqual(render_markdown('[a](https://e.com/x"onmouseover=y)'),
+                         '<p><a href="https://e.com/x%22onmouseover=y">a</a></p>\n')
+        self.assertEqual(render_markdown('![a"b](https://e.com/i.png "t\\"i<")'),
+                         '<p><img src="https://e.com/i.png" alt="a&quot;b" title="t&quot;i&lt;" /></p>\n')
+
+    def test_urls_are_percent_encoded(self):
+        self.assertEqual(render_markdown("[a](/p?x=<b>&y=ä)"), '<p><a href="/p?x=%3Cb%3E&amp;y=%C3%A4">a</a></p>\n')
+
+    def test_backslash_escapes_and_entities(self):
+        self.assertEqual(render_markdown("\\*not em\\* &amp; &copy;"), "<p>*not em* &amp; &copy;</p>\n")
+
+    def test_escape_html(self):
+        self.assertEqual(escape_html('<a href="x">&</a>'), "&lt;a href=&quot;x&quot;&gt;&amp;&lt;/a&gt;")
+
+
+class UrlBlocklistTest(unittest.TestCase):
+    def href(self, destination: str) -> str:
+        html = render_markdown(f"[a]({destination})")
+        self.assertTrue(html.startswith('<p><a href="'), html)
+        return html[len('<p><a href="'):html.index('"', len('<p><a href="'))]
+
+    def test_script_and_file_schemes_are_dropped(self):
+        for destination in ("javascript:alert(1)", "JaVaScRiPt:alert(1)", "\x01javascript:alert(1)",
+                            "vbscript:msgbox", "file:///etc/passwd", "data:text/html,<b>x</b>",
+                            "DATA:image/png;base64,AAAA"):
+            with self.subTest(destination=destination):
+                self.assertEqual(self.href(destination), "")
+
+    def test_autolinks_are_checked_too(self):
+        self.assertEqual(render_markdown("<javascript:alert(1)>"), '<p><a href="">javascript:alert(1)</a></p>\n')
+
+    def test_data_images_are_allowed_only_as_images(self):
+        self.assertEqual(render_markdown("![i](data:image/png;base64,AAAA) ![j](data:text/html,x)"),
+                         '<p><img src="data:image/png;base64,AAAA" alt="i" /> <img src="" alt="j" /></p>\n')
+
+    def test_ordinary_urls_are_kept(self):
+        for destination in ("https://example.com/a?b=1", "/relative/path", "mailto:someone@example.com", "#anchor"):
+            with self.subTest(destination=destination):
+                self.assertEqual(self.href(destination), destination)
+
+
+class StructureTest(unittest.TestCase):
+    def test_nested_lists_and_blockquotes(self):
+        self.assertEqual(render_markdown("- a\n- b\n  1. c\n\n> quote"),
+                         "<ul>\n<li>a</li>\n<li>b\n<ol>\n<li>c</li>\n</ol>\n</li>\n</ul>\n"
+                         "<blockquote>\n<p>quote</p>\n</blockquote>\n")
+
+    def test_chunk_boundaries_do_not_change_the_output(self):
+        document = "# Heading\n\nSome *emphasis* and a [link](https://example.com \"t\").\n\n```\ncode\n```\n- one\n- two\n"
+        expected = render_markdown(document)
+        for size in (1, 2, 3, 7, 64):
+            with self.subTest(chunk_size=size):
+                output = io.StringIO()
+                render_markdown_stream(io.StringIO(document), output, chunk_size=size)
+                self.assertEqual(output.getvalue(), expected)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,127 @@
+import collections
+import os
+import tempfile
+import unittest
+from typing import Any, Dict
+
+from ..interface import BMADAgentInterface
+from ..orchestrator import BatchExecutor, Workflow
+
+
+class _RecordingAgent(BMADAgentInterface):
+    metadata = {"dependencies": []}
+
+    def initialize(self, config: Dict[str, Any] = None) -> None:
+        pass
+
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {"agent": self.agent_name, "input": input_data}
+
+    def shutdown(self) -> None:
+        pass
+
+
+class ResearchAgent(_RecordingAgent):
+    agent_name = "research_agent"
+
+
+class OutlineAgent(_RecordingAgent):
+    agent_name = "outline_agent"
+    metadata = {"dependencies": ["research_agent"]}
+
+
+class DraftAgent(_RecordingAgent):
+    agent_name = "draft_agent"
+    metadata = {"dependencies": ["outline_agent", "research_agent"]}
+
+
+class DependencyOrderTest(unittest.TestCase):
+    def build(self) -> Workflow:
+        # Added in reverse, so the order cannot come from insertion
+        workflow = Workflow(validate_inputs=False)
+        workflow.add_node(DraftAgent, build_input=lambda context: {
+            "outline": context["outline_agent"]["agent"], "research": context["research_agent"]["agent"]})
+        workflow.add_node(OutlineAgent, build_input=lambda context: {"research": context["research_agent"]["agent"]})
+        workflow.add_node(ResearchAgent)
+        return workflow
+
+    def test_listed_dependencies_run_first(self):
+        workflow = self.build()
+        self.assertEqual(workflow.dependencies_of("draft_agent"), ["outline_agent", "research_agent"])
+        self.assertEqual(workflow.dependencies_of("research_agent"), [])
+        self.assertEqual(workflow.topological_order(), ["research_agent", "outline_agent", "draft_agent"])
+
+    def test_dependencies_feed_the_declaring_agent(self):
+        with self.build() as workflow:
+            outputs = workflow.run({"topic": "soil"})
+        self.assertEqual(outputs["research_agent"]["input"], {"topic": "soil"})
+        self.assertEqual(outputs["outline_agent"]["input"], {"research": "research_agent"})
+        self.assertEqual(outputs["draft_agent"]["input"], {"outline": "outline_agent", "research": "research_agent"})
+
+    def test_depends_on_replaces_derived_edges(self):
+        workflow = Workflow(validate_inputs=False)
+        workflow.add_node(OutlineAgent, depends_on=[])
+        workflow.add_node(ResearchAgent, depends_on=["outline_agent"])
+        self.assertEqual(workflow.topological_order(), ["outline_agent", "research_agent"])
+
+
+class CrashingAgent(_RecordingAgent):
+    """
+    Records each input it runs in the file named by `log`, and kills its process on `crash`.
+    """
+    agent_name = "crashing_agent"
+
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        with open(input_data["log"], "a") as log:
+            log.write(f"{input_data['index']}\n")
+        if input_data.get("crash"):
+            os._exit(1)
+        return super().run(input_data)
+
+
+def crashing_workflow() -> Workflow:
+    workflow = Workflow(validate_inputs=False)
+    workflow.add_node(CrashingAgent)
+    return workflow
+
+
+class BatchExecutorCrashTest(unittest.TestCase):
+    def test_only_chunks_in_flight_are_retried(self):
+        with tempfile.TemporaryDirectory() as directory:
+            log = os.path.join(directory, "runs.log")
+            inputs = [{"index": i, "log": log, "crash": i == 13} for i in range(40)]
+            with BatchExecutor(crashing_workflow, mode="process", max_workers=2, chunksize=4) as executor:
+                results = executor.map(inputs)
+            with open(log) as runs:
+                counts = collections.Counter(int(line) for line in runs)
+
+        self.assertEqual([result.index for result in results if not result.ok], [13])
+        self.assertTrue(results[13].error.startswith("BrokenProcessPool"))
+        self.assertTrue(all(results[i].output["crashing_agent"]["input"]["index"] == i for i in range(40) if i != 13))
+        # At most two chunks were in flight with the crashing one; the rest ran once
+        self.assertEqual({counts[i] for i in range(24, 40)}, {1})
+        self.assertLessEqual(sum(counts.values()) - 40, 3 * 2 * 4)
+
+    def test_chunks_the_retry_pool_never_took_still_get_results(self):
+        class BrokenRetryExecutor(BatchExecutor):
+            dispatches = 0
+
+            def _dispatch(self, chunks, results):
+                self.dispatches += 1
+                if self.dispatches == 2:
+                    # The fresh pool breaks before any of the retried chunks is submitted
+                    return [], list(chunks)
+                return super()._dispatch(chunks, results)
+
+        with tempfile.TemporaryDirectory() as directory:
+            log = os.path.join(directory, "runs.log")
+            inputs = [{"index": i, "log": log, "crash": i == 5} for i in range(16)]
+            with BrokenRetryExecutor(crashing_workflow, mode="process", max_workers=2, chunksize=4) as executor:
+                results = executor.map(inputs)
+
+        self.assertTrue(all(result is not None for result in results))
+        self.assertEqual([result.index for result in results if not result.ok], [5])
+
+
+if __name__ == "__main__":
+    unittest.main()
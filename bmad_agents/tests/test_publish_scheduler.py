@@ -0,0 +1,40 @@
+import os
+import tempfile
+import unittest
+
+from ..publish_scheduler_agent.agent import PublishSchedulerAgent
+from ..publish_scheduler_agent.schedule_store import ScheduleStore
+
+
+class ProcessBatchAtomicityTest(unittest.TestCase):
+    def check_rolled_back(self, store: ScheduleStore):
+        agent = PublishSchedulerAgent()
+        agent.initialize({"schedule_store": store})
+        agent.process_batch([{"content_id": "kept", "platform": "twitter", "publish_datetime": "2030-01-01T09:00:00"}])
+        batch = [
+            {"content_id": "plain", "platform": "twitter", "publish_datetime": "2030-01-02T09:00:00"},
+            # No limits are configured for this platform, so allocating its slot fails
+            {"content_id": "slotted", "platform": "carrier-pigeon", "publish_datetime": "2030-01-02T10:00:00",
+             "allocate_slot": True}
+        ]
+        with self.assertRaises(ValueError):
+            agent.process_batch(batch)
+        self.assertEqual([entry["content_id"] for entry in agent.upcoming()], ["kept"])
+        agent.shutdown()
+
+    def test_failed_allocation_stores_nothing(self):
+        self.check_rolled_back(ScheduleStore())
+
+    def test_failed_allocation_leaves_the_journal_untouched(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "schedules.db")
+            store = ScheduleStore(path)
+            self.check_rolled_back(store)
+            store.close()
+            reopened = ScheduleStore(path)
+            self.assertEqual([entry.content_id for entry in reopened.range()], ["kept"])
+            reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
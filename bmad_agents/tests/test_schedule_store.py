@@ -0,0 +1,88 @@
+import glob
+import os
+import shutil
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+from ..publish_scheduler_agent.schedule_store import ScheduleStore
+
+START = datetime(2030, 1, 1, 9, 0)
+
+
+class ScheduleStoreTest(unittest.TestCase):
+    def test_next_due_and_pop_due_follow_publish_time(self):
+        store = ScheduleStore()
+        ids = {}
+        for minutes in (30, 10, 20, 40):
+            ids[minutes] = store.schedule(f"post-{minutes}", "blog", START + timedelta(minutes=minutes)).schedule_id
+        store.cancel(ids[10])
+        store.reschedule(ids[40], START + timedelta(minutes=5))
+        self.assertEqual(store.next_due().schedule_id, ids[40])
+        popped = store.pop_due(now=(START + timedelta(minutes=25)).timestamp())
+        self.assertEqual([entry.schedule_id for entry in popped], [ids[40], ids[20]])
+        self.assertTrue(all(entry.status == "published" for entry in popped))
+        self.assertEqual([entry.schedule_id for entry in store.range()], [ids[30]])
+        self.assertEqual(store.pop_due(now=(START + timedelta(minutes=25)).timestamp()), [])
+
+    def test_range_filters_by_window_and_platform(self):
+        store = ScheduleStore(bucket_seconds=600)
+        for i in range(12):
+            store.schedule(f"post-{i}", ("blog", "twitter")[i % 2], START + timedelta(minutes=15 * i))
+        window = store.range(START + timedelta(minutes=30), START + timedelta(minutes=90), "twitter")
+        self.assertEqual([entry.content_id for entry in window], ["post-3", "post-5"])
+
+
+class JournalReloadTest(unittest.TestCase):
+    """
+    A store on a path must come back after a crash with exactly the acknowledged changes.
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.directory.name, "live", "schedules.db")
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def crash_image(self) -> str:
+        # Copies the database and its WAL files while the writer still has them open, as a
+        # process killed at this point would leave them; nothing is checkpointed or closed
+        image = os.path.join(self.directory.name, "crashed", "schedules.db")
+        os.makedirs(os.path.dirname(image))
+        for path in glob.glob(self.path + "*"):
+            shutil.copy(path, image + path[len(self.path):])
+        return image
+
+    def test_reload_after_crash(self):
+        store = ScheduleStore(self.path)
+        entries = [store.schedule(f"post-{i}", "blog", START + timedelta(hours=i)) for i in range(6)]
+        store.cancel(entries[1].schedule_id)
+        store.reschedule(entries[4].schedule_id, START - timedelta(hours=1))
+        published = store.pop_due(now=START.timestamp())
+        self.assertEqual([entry.schedule_id for entry in published], [entries[4].schedule_id, entries[0].schedule_id])
+
+        reloaded = ScheduleStore(self.crash_image())
+        self.assertEqual([entry.content_id for entry in reloaded.range()], ["post-2", "post-3", "post-5"])
+        self.assertEqual(reloaded.next_due().schedule_id, entries[2].schedule_id)
+        # Entries handed out before the crash are not handed out again
+        later = reloaded.pop_due(now=(START + timedelta(hours=3)).timestamp())
+        self.assertEqual([entry.content_id for entry in later], ["post-2", "post-3"])
+        self.assertEqual(reloaded.get(entries[1].schedule_id).status, "cancelled")
+        self.assertEqual(reloaded.get(entries[0].schedule_id).status, "published")
+        reloaded.close()
+        store.close()
+
+    def test_reloaded_store_keeps_scheduling(self):
+        store = ScheduleStore(self.path)
+        store.schedule("post-0", "blog", START)
+        store.close()
+        reopened = ScheduleStore(self.path)
+        reopened.schedule("post-1", "blog", START - timedelta(minutes=1))
+        self.assertEqual([entry.content_id for entry in reopened.pop_due(now=START.timestamp())], ["post-1", "post-0"])
+        with self.assertRaises(ValueError):
+            reopened.cancel("no-such-id")
+        reopened.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
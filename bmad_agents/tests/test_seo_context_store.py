@@ -0,0 +1,41 @@
+import os
+import tempfile
+import unittest
+
+from ..seo_blog_agent.agent import SEOBlogAgent
+from ..seo_blog_agent.context_store import BoundedContextStore, SQLiteContextStore
+
+
+class SharedContextStoreTest(unittest.TestCase):
+    def check_shared(self, store):
+        writer, reader = SEOBlogAgent(), SEOBlogAgent()
+        writer.initialize({"context_store": store})
+        reader.initialize({"context_store": store})
+        post = writer.run({"topic": "container gardening", "keywords": ["soil"]})
+        writer.shutdown()
+
+        self.assertIn(post["context_id"], store)
+        continued = reader.run({"topic": "container gardening", "keywords": ["light"], "context_id": post["context_id"]})
+        self.assertTrue(continued["content"].startswith(post["content"]))
+        reader.shutdown()
+
+    def test_shutdown_leaves_a_shared_memory_store_intact(self):
+        self.check_shared(BoundedContextStore())
+
+    def test_shutdown_leaves_a_shared_sqlite_store_intact(self):
+        with tempfile.TemporaryDirectory() as directory:
+            store = SQLiteContextStore(os.path.join(directory, "contexts.db"))
+            self.check_shared(store)
+            store.close()
+
+    def test_shutdown_clears_a_store_built_from_options(self):
+        agent = SEOBlogAgent()
+        agent.initialize({"context_store": {"max_entries": 10}})
+        agent.run({"topic": "container gardening"})
+        store = agent.context_store
+        agent.shutdown()
+        self.assertEqual(len(store), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
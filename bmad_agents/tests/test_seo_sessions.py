@@ -0,0 +1,83 @@
+import os
+import tempfile
+import unittest
+
+from ..seo_blog_agent.agent import SEOBlogAgent
+from ..seo_blog_agent.context_store import BoundedContextStore, SQLiteContextStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+class ForkedSessionTest(unittest.TestCase):
+    """
+    A caller coalesced with an identical new-post request gets a forked session, which must
+    outlive the session it was forked from.
+    """
+    def setUp(self):
+        self.directory = tempfile.TemporaryDirectory()
+        self.clock = FakeClock()
+
+    def tearDown(self):
+        self.directory.cleanup()
+
+    def stores(self):
+        yield BoundedContextStore(ttl_seconds=60, clock=self.clock)
+        yield SQLiteContextStore(os.path.join(self.directory.name, "contexts.db"), ttl_seconds=60, clock=self.clock)
+
+    def fork(self, store):
+        agent = SEOBlogAgent()
+        agent.initialize({"context_store": store})
+        input_data = {"topic": "container gardening", "keywords": ["soil"]}
+        original = agent.run(input_data)
+        fork = agent.coalesced_output(input_data, dict(original))
+        self.assertNotEqual(fork["context_id"], original["context_id"])
+        return agent, original, fork
+
+    def follow_up(self, agent, session):
+        return agent.run({"topic": "container gardening", "keywords": ["light"], "context_id": session["context_id"]})
+
+    def test_fork_survives_deleting_the_original(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                agent, original, fork = self.fork(store)
+                store.delete(original["context_id"])
+                continued = self.follow_up(agent, fork)
+                self.assertEqual(continued["context_id"], fork["context_id"])
+                self.assertTrue(continued["content"].startswith(original["content"]))
+                self.assertIn("## Expanding on container gardening", continued["content"])
+                store.close()
+
+    def test_fork_survives_the_original_expiring(self):
+        for store in self.stores():
+            with self.subTest(store=type(store).__name__):
+                agent, original, fork = self.fork(store)
+                self.clock.now += 40
+                self.assertIsNotNone(store.get(fork["context_id"]))  # Pushes the fork's expiry back
+                self.clock.now += 40
+                if isinstance(store, SQLiteContextStore):
+                    self.assertEqual(store.purge_expired(), 1)
+                self.assertIsNone(store.get(original["context_id"]))
+                continued = self.follow_up(agent, fork)
+                self.assertTrue(continued["content"].startswith(original["content"]))
+                store.close()
+
+    def test_session_without_turns_reads_as_expired(self):
+        store = SQLiteContextStore(os.path.join(self.directory.name, "contexts.db"))
+        agent, original, _ = self.fork(store)
+        with store._connection() as conn:
+            conn.execute("DELETE FROM turns WHERE context_id = ?", (original["context_id"],))
+        self.assertIsNone(store.get(original["context_id"]))
+        # The follow-up starts a new post instead of failing
+        restarted = self.follow_up(agent, original)
+        self.assertNotEqual(restarted["context_id"], original["context_id"])
+        store.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,159 @@
+import asyncio
+import threading
+import time
+import unittest
+from typing import Any, Dict
+
+from ..interface import BMADAgentInterface
+from ..seo_blog_agent.agent import SEOBlogAgent
+from ..single_flight import SingleFlight
+
+
+class GatedAgent(BMADAgentInterface):
+    """
+    Blocks every call until `gate` is set, then returns a fresh output or raises `error`.
+    """
+    agent_name = "gated_agent"
+    metadata = {"stateful_input_fields": ["session"]}
+
+    def __init__(self, error: Exception = None):
+        self.gate = threading.Event()
+        self.error = error
+        self.executions = 0
+
+    def initialize(self, config: Dict[str, Any] = None) -> None:
+        pass
+
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        self.executions += 1
+        self.gate.wait(5)
+        if self.error is not None:
+            raise self.error
+        return {"topic": input_data["topic"], "sections": ["intro"]}
+
+    async def arun(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        self.executions += 1
+        while not self.gate.is_set():
+            await asyncio.sleep(0.001)
+        if self.error is not None:
+            raise self.error
+        return {"topic": input_data["topic"], "sections": ["intro"]}
+
+    def shutdown(self) -> None:
+        pass
+
+
+def wait_for(condition, timeout: float = 5.0) -> None:
+    deadline = time.monotonic() + timeout
+    while not condition():
+        if time.monotonic() > deadline:
+            raise AssertionError("Timed out waiting for the calls to join the flight")
+        time.sleep(0.001)
+
+
+class SyncCoalescingTest(unittest.TestCase):
+    def burst(self, agent, callers: int = 5):
+        single_flight = SingleFlight()
+        single_flight.coalesce(agent)
+        results = [None] * callers
+
+        def call(index):
+            try:
+                results[index] = agent.run({"topic": "soil"})
+            except Exception as e:
+                results[index] = e
+
+        threads = [threading.Thread(target=call, args=(i,)) for i in range(callers)]
+        threads[0].start()
+        wait_for(lambda: agent.executions == 1)
+        for thread in threads[1:]:
+            thread.start()
+        wait_for(lambda: single_flight.stats()["followers"] == callers - 1)
+        agent.gate.set()
+        for thread in threads:
+            thread.join(5)
+        return single_flight, results
+
+    def test_followers_share_one_execution_with_copies_of_its_output(self):
+        agent = GatedAgent()
+        single_flight, outputs = self.burst(agent)
+        self.assertEqual(agent.executions, 1)
+        self.assertTrue(all(output == {"topic": "soil", "sections": ["intro"]} for output in outputs))
+        self.assertEqual(len({id(output) for output in outputs}), len(outputs))
+        self.assertEqual(len({id(output["sections"]) for output in outputs}), len(outputs))
+        stats = single_flight.stats()
+        self.assertEqual((stats["calls"], stats["executions"], stats["in_flight"]), (5, 1, 0))
+
+    def test_leader_failure_reaches_every_follower_as_its_own_exception(self):
+        error = ValueError("model unavailable")
+        agent = GatedAgent(error)
+        _, raised = self.burst(agent)
+        self.assertIs(raised[0], error)
+        followers = raised[1:]
+        self.assertTrue(all(type(e) is ValueError and e.args == error.args for e in followers))
+        self.assertTrue(all(e.__cause__ is error for e in followers))
+        self.assertEqual(len({id(e) for e in followers}), len(followers))
+
+    def test_next_call_runs_again(self):
+        agent = GatedAgent()
+        agent.gate.set()
+        SingleFlight().coalesce(agent)
+        agent.run({"topic": "soil"})
+        agent.run({"topic": "soil"})
+        self.assertEqual(agent.executions, 2)
+
+    def test_stateful_calls_are_not_coalesced(self):
+        agent = GatedAgent()
+        single_flight = SingleFlight()
+        single_flight.coalesce(agent)
+        threads = [threading.Thread(target=agent.run, args=({"topic": "soil", "session": "s1"},)) for _ in range(3)]
+        for thread in threads:
+            thread.start()
+        wait_for(lambda: agent.executions == 3)
+        agent.gate.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(single_flight.stats()["calls"], 0)
+
+
+class AsyncCoalescingTest(unittest.TestCase):
+    def test_leader_failure_reaches_every_follower_as_its_own_exception(self):
+        error = ValueError("model unavailable")
+        agent = GatedAgent(error)
+        single_flight = SingleFlight()
+        single_flight.coalesce(agent)
+
+        async def burst():
+            calls = [asyncio.ensure_future(agent.arun({"topic": "soil"})) for _ in range(4)]
+            await asyncio.sleep(0.01)
+            agent.gate.set()
+            return await asyncio.gather(*calls, return_exceptions=True)
+
+        raised = asyncio.run(burst())
+        self.assertEqual(agent.executions, 1)
+        self.assertIs(raised[0], error)
+        self.assertTrue(all(type(e) is ValueError and e.__cause__ is error for e in raised[1:]))
+        self.assertEqual(len({id(e) for e in raised}), len(raised))
+
+
+class SEOCoalescingTest(unittest.TestCase):
+    def test_identical_follow_ups_each_append_a_section(self):
+        agent = SEOBlogAgent()
+        agent.initialize()
+        SingleFlight().coalesce(agent)
+        post = agent.run({"topic": "container gardening", "keywords": ["soil"]})
+        follow_up = {"topic": "container gardening", "keywords": ["light"], "context_id": post["context_id"]}
+        threads = []
+        for _ in range(2):
+            thread = threading.Thread(target=agent.run, args=(follow_up,))
+            threads.append(thread)
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        content = str(agent.context_store.get(post["context_id"])["content"])
+        self.assertEqual(content.count("## Expanding on container gardening"), 2)
+        agent.shutdown()
+
+
+if __name__ == "__main__":
+    unittest.main()
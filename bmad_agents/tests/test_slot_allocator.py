@@ -0,0 +1,86 @@
+import random
+import unittest
+from datetime import datetime, timedelta
+
+from ..publish_scheduler_agent.schedule_store import ScheduleStore
+from ..publish_scheduler_agent.slot_allocator import (
+    REASON_CONFLICT, REASON_MIN_SPACING, REASON_RATE_LIMIT, REASON_REQUESTED, PlatformLimits, SlotAllocator
+)
+
+START = datetime(2030, 1, 1, 9, 0)
+LIMITS = {
+    "blog": PlatformLimits(max_posts=4, per_seconds=3600, burst=2, min_spacing_seconds=300),
+    "twitter": PlatformLimits(max_posts=20, per_seconds=3600, burst=5, min_spacing_seconds=30)
+}
+
+
+def violations(store, platform, limits):
+    """
+    Checks every pending schedule of a platform against its limits the slow way: one GCRA
+    pass over the sorted publish times plus the minimum spacing between neighbours.
+    """
+    times = sorted(entry.publish_at for entry in store.range(platform=platform))
+    found = []
+    arrival = float("-inf")
+    for previous, current in zip([None] + times, times):
+        if previous is not None and current - previous < limits.min_spacing_seconds:
+            found.append(f"{current}: {current - previous}s after the previous post")
+        if current < arrival - limits.tolerance:
+            found.append(f"{current}: over the rate limit")
+        arrival = max(arrival, current) + limits.emission_interval
+    return found
+
+
+class SlotAllocatorTest(unittest.TestCase):
+    def setUp(self):
+        self.store = ScheduleStore()
+        self.allocator = SlotAllocator(self.store, LIMITS)
+
+    def test_free_times_are_kept(self):
+        placed = self.allocator.schedule([("a", "blog", START), ("b", "blog", START + timedelta(hours=2))])
+        self.assertEqual([assignment.reason for _, assignment in placed], [REASON_REQUESTED, REASON_REQUESTED])
+        self.assertEqual([entry.publish_datetime for entry, _ in placed],
+                         [START.isoformat(), (START + timedelta(hours=2)).isoformat()])
+
+    def test_crowded_requests_are_spread_within_limits(self):
+        items = [(f"post-{i}", "blog", START) for i in range(6)]
+        placed = self.allocator.schedule(items)
+        times = [assignment.publish_at for _, assignment in placed]
+        self.assertEqual(times, sorted(times))
+        self.assertEqual(times[1] - times[0], 300)
+        self.assertEqual(placed[1][1].reason, REASON_MIN_SPACING)
+        self.assertEqual(placed[2][1].reason, REASON_RATE_LIMIT)
+        self.assertEqual(violations(self.store, "blog", LIMITS["blog"]), [])
+
+    def test_new_items_do_not_collide_with_or_starve_existing_ones(self):
+        self.store.schedule("existing", "blog", START + timedelta(minutes=2))
+        self.assertEqual(self.allocator.check("blog", START), REASON_CONFLICT)
+        self.assertIsNone(self.allocator.check("blog", START + timedelta(hours=1)))
+        self.assertEqual([entry.content_id for entry in self.allocator.conflicts("blog", START)], ["existing"])
+        placed = self.allocator.schedule([("new", "blog", START)])
+        self.assertEqual(placed[0][1].reason, REASON_CONFLICT)
+        self.assertEqual(violations(self.store, "blog", LIMITS["blog"]), [])
+
+    def test_random_batches_never_break_the_limits(self):
+        rng = random.Random(7)
+        # Schedules made without the allocator, far enough apart to conform on their own
+        for i in range(8):
+            self.store.schedule(f"fixed-{i}", "twitter", START + timedelta(minutes=75 * i))
+        for _ in range(5):
+            items = [(f"post-{i}", rng.choice(["blog", "twitter"]), START + timedelta(minutes=rng.randint(0, 600)))
+                     for i in range(60)]
+            placed = self.allocator.schedule(items)
+            for (_, _, requested), (entry, assignment) in zip(items, placed):
+                self.assertGreaterEqual(assignment.publish_at, requested.timestamp())
+                self.assertEqual(entry.publish_at, assignment.publish_at)
+        for platform, limits in LIMITS.items():
+            self.assertEqual(violations(self.store, platform, limits), [], platform)
+
+    def test_unknown_platform_is_rejected(self):
+        with self.assertRaises(ValueError):
+            self.allocator.schedule([("a", "carrier-pigeon", START)])
+        self.assertEqual(len(self.store), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,103 @@
+import glob
+import json
+import os
+import unittest
+
+from ..validation import SchemaValidationError, Validator, _compile
+
+AGENTS_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Values of every JSON type, plus the edge cases the generated test treats specially
+SAMPLES = [None, True, False, 0, 1, -1, 1.5, 10 ** 6, "", "x", "blog", "2030-01-01T09:00:00", "not a date",
+           [], ["a"], [1, "a"], {}, {"a": 1}]
+
+SCHEMA = {
+    "title": "Everything",
+    "type": "object",
+    "properties": {
+        "name": {"type": "string", "minLength": 1, "maxLength": 5},
+        "count": {"type": "integer", "minimum": 0, "maximum": 10},
+        "ratio": {"type": ["number", "null"], "minimum": 0},
+        "flag": {"type": "boolean"},
+        "when": {"type": "string", "format": "date-time"},
+        "kind": {"enum": ["a", "b", 1, None]},
+        "shape": {"enum": [[1], {"x": 1}]},
+        "tags": {"type": "array", "items": {"type": "string"}, "minItems": 1, "maxItems": 2},
+        "loose": {"minLength": 2, "minimum": 3, "minItems": 1, "required": ["k"]},
+        "nested": {"type": "object", "properties": {"x": {"type": "integer"}}, "additionalProperties": False}
+    },
+    "required": ["name"],
+    "additionalProperties": {"type": ["string", "integer"]}
+}
+
+
+def reference_errors(schema, value):
+    # The error-collecting checks, run whether or not the generated test passes
+    errors = []
+    _compile(schema)(value, "$", errors)
+    return errors
+
+
+def variants(schema):
+    """
+    Yields values around a schema: samples of every type, and objects with each property
+    (and one extra key) replaced by every sample and each required key dropped.
+    """
+    yield from SAMPLES
+    properties = schema.get("properties", {})
+    base = {}
+    for name, sub in properties.items():
+        for sample in SAMPLES:
+            if reference_errors(sub, sample) == []:
+                base[name] = sample
+                break
+    yield base
+    for name in list(properties) + ["extra"]:
+        for sample in SAMPLES:
+            yield {**base, name: sample}
+    for name in schema.get("required", ()):
+        yield {key: value for key, value in base.items() if key != name}
+
+
+class ValidatorParityTest(unittest.TestCase):
+    """
+    The generated yes/no test must accept exactly what the error-collecting checks accept.
+    """
+    def assert_parity(self, schema):
+        validator = Validator(schema)
+        for value in variants(schema):
+            errors = reference_errors(schema, value)
+            with self.subTest(schema=schema.get("title"), value=value):
+                self.assertEqual(validator.is_valid(value), errors == [], errors)
+                self.assertEqual(validator.errors(value), errors)
+
+    def test_every_keyword(self):
+        self.assert_parity(SCHEMA)
+
+    def test_agent_schemas(self):
+        paths = sorted(glob.glob(os.path.join(AGENTS_DIR, "*_agent", "*_schema.json")))
+        self.assertEqual(len(paths), 12)
+        for path in paths:
+            with open(path, encoding="utf-8") as f:
+                self.assert_parity(json.load(f))
+
+    def test_booleans_are_not_numbers(self):
+        validator = Validator({"type": "object", "properties": {"count": {"type": "integer"}}})
+        self.assertFalse(validator.is_valid({"count": True}))
+        self.assertTrue(validator.is_valid({"count": 3}))
+
+    def test_validate_reports_every_violation(self):
+        validator = Validator(SCHEMA)
+        with self.assertRaises(SchemaValidationError) as raised:
+            validator.validate({"count": -1, "tags": [], "nested": {"y": 1}})
+        self.assertEqual(len(raised.exception.errors), 4)
+        self.assertTrue(str(raised.exception).startswith("Everything validation failed: "))
+
+    def test_validate_many_returns_only_invalid_records(self):
+        validator = Validator(SCHEMA)
+        invalid = validator.validate_many([{"name": "ok"}, {"name": ""}, {"name": "ok", "flag": 1}])
+        self.assertEqual(sorted(invalid), [1, 2])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,398 @@
+import json
+import logging
+import os
+import sys
+import threading
+from datetime import datetime
+from typing import Dict, Any, Callable, List, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# A compiled check appends error messages for `value` (located at `path`) to `errors`
+Check = Callable[[Any, str, List[str]], None]
+
+_TYPE_CHECKS: Dict[str, Callable[[Any], bool]] = {
+    "string": lambda v: isinstance(v, str),
+    "integer": lambda v: isinstance(v, int) and not isinstance(v, bool),
+    "number": lambda v: isinstance(v, (int, float)) and not isinstance(v, bool),
+    "boolean": lambda v: isinstance(v, bool),
+    "array": lambda v: isinstance(v, list),
+    "object": lambda v: isinstance(v, dict),
+    "null": lambda v: v is None,
+}
+
+
+def _is_date_time(value: str) -> bool:
+    try:
+        datetime.fromisoformat(value)
+        return True
+    except ValueError:
+        return False
+
+
+_FORMAT_CHECKS: Dict[str, Callable[[str], bool]] = {
+    "date-time": _is_date_time,
+}
+
+
+class SchemaValidationError(ValueError):
+    """
+    Raised when data does not match an agent's JSON Schema. `errors` lists every violation.
+    """
+    def __init__(self, schema_title: str, errors: List[str]):
+        self.errors = errors
+        super().__init__(f"{schema_title} validation failed: {'; '.join(errors)}")
+
+
+def _compile(schema: Dict[str, Any]) -> Check:
+    """
+    Compiles the draft-07 subset used by the agent schemas (type, enum, required, properties,
+    additionalProperties, items, min/max constraints and the date-time format) into a
+    closure. Annotation keywords such as title, description and default are ignored.
+    """
+    checks: List[Check] = []
+
+    types = schema.get("type")
+    if types is not None:
+        names = [types] if isinstance(types, str) else list(types)
+        predicates = tuple(_TYPE_CHECKS[name] for name in names)
+        expected = " or ".join(names)
+
+        def check_type(value, path, errors):
+            for predicate in predicates:
+                if predicate(value):
+                    return
+            errors.append(f"{path}: expected {expected}, got {type(value).__name__}")
+        checks.append(check_type)
+
+    if "enum" in schema:
+        allowed = list(schema["enum"])
+
+        def check_enum(value, path, errors):
+            if value not in allowed:
+                errors.append(f"{path}: {value!r} is not one of {allowed}")
+        checks.append(check_enum)
+
+    if "format" in schema and schema["format"] in _FORMAT_CHECKS:
+        fmt = schema["format"]
+        matches = _FORMAT_CHECKS[fmt]
+
+        def check_format(value, path, errors):
+            if isinstance(value, str) and not matches(value):
+                errors.append(f"{path}: {value!r} is not a valid {fmt}")
+        checks.append(check_format)
+
+    for keyword, compare, message in (("minLength", lambda n, v: n < v, "shorter than"),
+                                      ("maxLength", lambda n, v: n > v, "longer than")):
+        if keyword in schema:
+            limit = schema[keyword]
+
+            def check_length(value, path, errors, limit=limit, compare=compare, message=message):
+                if isinstance(value, str) and compare(len(value), limit):
+                    errors.append(f"{path}: string is {message} {limit} characters")
+            checks.append(check_length)
+
+    for keyword, compare, message in (("minimum", lambda n, v: n < v, "less than"),
+                                      ("maximum", lambda n, v: n > v, "greater than")):
+        if keyword in schema:
+            limit = schema[keyword]
+
+            def check_bound(value, path, errors, limit=limit, compare=compare, message=message):
+                if isinstance(value, (int, float)) and not isinstance(value, bool) and compare(value, limit):
+                    errors.append(f"{path}: {value} is {message} {limit}")
+            checks.append(check_bound)
+
+    for keyword, compare, message in (("minItems", lambda n, v: n < v, "fewer than"),
+                                      ("maxItems", lambda n, v: n > v, "more than")):
+        if keyword in schema:
+            limit = schema[keyword]
+
+            def check_items_count(value, path, errors, limit=limit, compare=compare, message=message):
+                if isinstance(value, list) and compare(len(value), limit):
+                    errors.append(f"{path}: array has {message} {limit} items")
+            checks.append(check_items_count)
+
+    required = tuple(schema.get("required", ()))
+    properties = {name: _compile(sub) for name, sub in schema.get("properties", {}).items()}
+    additional = schema.get("additionalProperties", True)
+    additional_check = _compile(additional) if isinstance(additional, dict) else None
+    if required or properties or additional is not True:
+        def check_object(value, path, errors):
+            if not isinstance(value, dict):
+                return
+            for name in required:
+                if name not in value:
+                    errors.append(f"{path}: missing required property '{name}'")
+            for name, item in value.items():
+                check = properties.get(name)
+                if check is not None:
+                    check(item, f"{path}.{name}", errors)
+                elif additional is False:
+                    errors.append(f"{path}: unexpected property '{name}'")
+                elif additional_check is not None:
+                    additional_check(item, f"{path}.{name}", errors)
+        checks.append(check_object)
+
+    if isinstance(schema.get("items"), dict):
+        item_check = _compile(schema["items"])
+
+        def check_items(value, path, errors):
+            if isinstance(value, list):
+                for index, item in enumerate(value):
+                    item_check(item, f"{path}[{index}]", errors)
+        checks.append(check_items)
+
+    if not checks:
+        return lambda value, path, errors: None
+    if len(checks) == 1:
+        return checks[0]
+    checks = tuple(checks)
+
+    def check_all(value, path, errors):
+        for check in checks:
+            check(value, path, errors)
+    return check_all
+
+
+_PYTHON_TYPES: Dict[str, tuple] = {
+    "string": (str,),
+    "integer": (int,),
+    "number": (int, float),
+    "boolean": (bool,),
+    "array": (list,),
+    "object": (dict,),
+    "null": (type(None),),
+}
+
+_MISSING = object()
+
+
+class _PredicateBuilder:
+    """
+    Generates the source of a yes/no test for the same subset `_compile` understands.
+    Constants (type tuples, enums, key sets) are bound as globals of the generated function.
+    """
+    def __init__(self):
+        self.lines: List[str] = []
+        self.namespace: Dict[str, Any] = {"_MISSING": _MISSING}
+        self._names = 0
+
+    def name(self, prefix: str) -> str:
+        self._names += 1
+        return f"{prefix}{self._names}"
+
+    def constant(self, value: Any) -> str:
+        name = self.name("_c")
+        self.namespace[name] = value
+        return name
+
+    def emit(self, depth: int, line: str) -> None:
+        self.lines.append("    " * depth + line)
+
+    def build(self, schema: Dict[str, Any]) -> Callable[[Any], bool]:
+        self.emit(0, "def is_valid(value):")
+        self.schema(schema, "value", 1)
+        self.emit(1, "return True")
+        exec("\n".join(self.lines), self.namespace)
+        return self.namespace["is_valid"]
+
+    def schema(self, schema: Dict[str, Any], var: str, depth: int) -> None:
+        types = schema.get("type")
+        names = [types] if isinstance(types, str) else list(types or ())
+        if names:
+            python_types = tuple(t for name in names for t in _PYTHON_TYPES[name])
+            test = f"isinstance({var}, {self.constant(python_types)})"
+            if "boolean" not in names and int in python_types:
+                test += f" and not isinstance({var}, bool)"
+            self.emit(depth, f"if not ({test}): return False")
+        only = names[0] if len(names) == 1 else None
+
+        if "enum" in schema:
+            allowed = list(schema["enum"])
+            try:
+                allowed = frozenset(allowed)
+            except TypeError:
+                pass
+            test = f"{var} not in {self.constant(allowed)}"
+            if isinstance(allowed, frozenset) and only not in ("string", "integer", "number", "boolean", "null"):
+                # Lists and dicts cannot be looked up in a set; they are never among hashable values
+                test = f"{var}.__hash__ is None or {test}"
+            self.emit(depth, f"if {test}: return False")
+
+        string_checks = []
+        if schema.get("format") in _FORMAT_CHECKS:
+            string_checks.append(f"if not {self.constant(_FORMAT_CHECKS[schema['format']])}({var}): return False")
+        if "minLength" in schema:
+            string_checks.append(f"if len({var}) < {schema['minLength']!r}: return False")
+        if "maxLength" in schema:
+            string_checks.append(f"if len({var}) > {schema['maxLength']!r}: return False")
+        self.guarded(string_checks, only == "string", f"isinstance({var}, str)", depth)
+
+        number_checks = []
+        if "minimum" in schema:
+            number_checks.append(f"if {var} < {schema['minimum']!r}: return False")
+        if "maximum" in schema:
+            number_checks.append(f"if {var} > {schema['maximum']!r}: return False")
+        self.guarded(number_checks, only in ("integer", "number"),
+                     f"isinstance({var}, (int, float)) and not isinstance({var}, bool)", depth)
+
+        has_array_checks = "minItems" in schema or "maxItems" in schema or isinstance(schema.get("items"), dict)
+        if has_array_checks:
+            inner = depth
+            if only != "array":
+                self.emit(depth, f"if isinstance({var}, list):")
+                inner += 1
+            if "minItems" in schema:
+                self.emit(inner, f"if len({var}) < {schema['minItems']!r}: return False")
+            if "maxItems" in schema:
+                self.emit(inner, f"if len({var}) > {schema['maxItems']!r}: return False")
+            if isinstance(schema.get("items"), dict):
+                item = self.name("item")
+                self.emit(inner, f"for {item} in {var}:")
+                self.emit(inner + 1, "pass")
+                self.schema(schema["items"], item, inner + 1)
+
+        required = schema.get("required", ())
+        properties = schema.get("properties", {})
+        additional = schema.get("additionalProperties", True)
+        if required or properties or additional is not True:
+            inner = depth
+            if only != "object":
+                self.emit(depth, f"if isinstance({var}, dict):")
+                self.emit(depth + 1, "pass")
+                inner += 1
+            if required:
+                self.emit(inner, f"if not {self.constant(frozenset(required))} <= {var}.keys(): return False")
+            for name, sub in properties.items():
+                item = self.name("prop")
+                self.emit(inner, f"{item} = {var}.get({name!r}, _MISSING)")
+                self.emit(inner, f"if {item} is not _MISSING:")
+                self.emit(inner + 1, "pass")
+                self.schema(sub, item, inner + 1)
+            if additional is False:
+                self.emit(inner, f"if not {var}.keys() <= {self.constant(frozenset(properties))}: return False")
+            elif isinstance(additional, dict):
+                key, item = self.name("key"), self.name("extra")
+                self.emit(inner, f"for {key}, {item} in {var}.items():")
+                self.emit(inner + 1, f"if {key} in {self.constant(frozenset(properties))}: continue")
+                self.schema(additional, item, inner + 1)
+
+    def guarded(self, checks: List[str], type_known: bool, guard: str, depth: int) -> None:
+        if not checks:
+            return
+        if not type_known:
+            self.emit(depth, f"if {guard}:")
+            depth += 1
+        for check in checks:
+            self.emit(depth, check)
+
+
+def _compile_predicate(schema: Dict[str, Any]) -> Callable[[Any], bool]:
+    """
+    Compiles a schema into a generated function that only answers valid/invalid. It builds
+    no paths or messages and makes no nested calls, so valid data, the common case, costs
+    little more than a few isinstance() checks; `_compile` runs only to explain a failure.
+    """
+    return _PredicateBuilder().build(schema)
+
+
+class Validator:
+    """
+    A JSON Schema compiled once into nested closures: a fast yes/no test for valid data
+    and an error-collecting check that runs only when that test fails.
+    """
+    def __init__(self, schema: Dict[str, Any]):
+        self.schema = schema
+        self.title = schema.get("title", "Schema")
+        self._is_valid = _compile_predicate(schema)
+        self._check = _compile(schema)
+
+    def is_valid(self, value: Any) -> bool:
+        return self._is_valid(value)
+
+    def errors(self, value: Any) -> List[str]:
+        """
+        Returns every violation, or an empty list if `value` is valid.
+        """
+        errors: List[str] = []
+        if not self._is_valid(value):
+            self._check(value, "$", errors)
+        return errors
+
+    def validate(self, value: Any) -> None:
+        """
+        Raises SchemaValidationError if `value` is invalid.
+        """
+        if self._is_valid(value):
+            return
+        errors: List[str] = []
+        self._check(value, "$", errors)
+        raise SchemaValidationError(self.title, errors)
+
+    def validate_many(self, values: Sequence[Any]) -> Dict[int, List[str]]:
+        """
+        Checks many records in one call and returns {index: errors} for the invalid ones.
+        """
+        is_valid, check = self._is_valid, self._check
+        invalid: Dict[int, List[str]] = {}
+        for index, value in enumerate(values):
+            if is_valid(value):
+                continue
+            errors: List[str] = []
+            check(value, "$", errors)
+            if errors:
+                invalid[index] = errors
+        return invalid
+
+
+_cache: Dict[str, Tuple[int, Validator]] = {}
+_cache_lock = threading.Lock()
+
+
+def load_validator(path: str) -> Validator:
+    """
+    Returns the compiled validator for a schema file. Validators are cached per process
+    by absolute path and recompiled only when the file's modification time changes.
+    """
+    path = os.path.abspath(path)
+    mtime = os.stat(path).st_mtime_ns
+    cached = _cache.get(path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(path, encoding="utf-8") as f:
+        validator = Validator(json.load(f))
+    with _cache_lock:
+        _cache[path] = (mtime, validator)
+    logger.info(f"Compiled schema {path}")
+    return validator
+
+
+def schema_path(agent, kind: str) -> str:
+    """
+    Resolves `metadata["input_schema"]` or `metadata["output_schema"]` of an agent (instance
+    or class) relative to the directory of the module that defines it.
+    """
+    agent_class = agent if isinstance(agent, type) else type(agent)
+    filename = agent_class.metadata[f"{kind}_schema"]
+    if os.path.isabs(filename):
+        return filename
+    module_file = sys.modules[agent_class.__module__].__file__
+    return os.path.join(os.path.dirname(os.path.abspath(module_file)), filename)
+
+
+def validator_for(agent, kind: str) -> Validator:
+    return load_validator(schema_path(agent, kind))
+
+
+def validate_input(agent, input_data: Dict[str, Any]) -> None:
+    """
+    Raises SchemaValidationError if `input_data` does not match the agent's input schema.
+    """
+    validator_for(agent, "input").validate(input_data)
+
+
+def validate_output(agent, output_data: Dict[str, Any]) -> None:
+    """
+    Raises SchemaValidationError if `output_data` does not match the agent's output schema.
+    """
+    validator_for(agent, "output").validate(output_data)
@@ -1,27 +1,18 @@
 import json
 import logging
 import random
-from typing import Dict, Any
+from typing import Dict, Any, List, AsyncIterator, Iterator, TextIO, Tuple
 
-# Configure logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-logger = logging.getLogger(__name__)
-
-class BMADAgentInterface:
-    """
-    BMADAgentInterface defines the standard methods for all BMAD agents.
-    """
-    def initialize(self, config: Dict[str, Any]) -> None:
-        raise NotImplementedError
+from ..interface import BMADAgentInterface, loggable_config
+from .compact import CompactScript
 
-    def process(self, input_data: Dict[str, Any]) -> None:
-        raise NotImplementedError
-
-    def output(self) -> Dict[str, Any]:
-        raise NotImplementedError
+logger = logging.getLogger(__name__)
 
-    def shutdown(self) -> None:
-        raise NotImplementedError
+STORYBOARD_NOTES = [
+    "Opening shot should be engaging and establish the theme.",
+    "Use dynamic shots to maintain viewer interest.",
+    "Ensure audio quality is high for all dialogue and narration."
+]
 
 class VideoScriptAgent(BMADAgentInterface):
     """
@@ -37,89 +28,227 @@ class VideoScriptAgent(BMADAgentInterface):
         "version": "1.1.0"
     }
 
+    SCENES_PER_YIELD = 64  # Scenes generated between yields to the event loop in arun()
+
     def __init__(self):
         self.config = None
         self.output_data = None
         self.shot_types = ["wide shot", "medium shot", "close-up", "panning shot", "dolly zoom"]
+        self.model_backend = None # Writes the dialogue lines; mocked when None
 
     def initialize(self, config: Dict[str, Any] = None) -> None:
         """
         Initializes the agent with a given configuration.
         """
         self.config = config if config else {}
-        logger.info(f"Video Script Agent initialized with config: {self.config}")
+        backend = self.config.get("model_backend")
+        if isinstance(backend, dict):
+            from ..model_backends import create_model_backend
+            backend = create_model_backend(backend)
+        self.model_backend = backend
+        logger.info(f"Video Script Agent initialized with config: {loggable_config(self.config)}")
+
+    def run(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Generates a video script and returns it, without keeping it on the instance, so one
+        agent can serve concurrent requests.
+        """
+        return self._expanded(self._generate(input_data))
+
+    async def arun(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Async counterpart of `run()` that yields control to the event loop every
+        `SCENES_PER_YIELD` scenes, so a long script does not hold up other requests. With a
+        model backend, every dialogue line is awaited from it (in one `agenerate_many()`) first.
+        """
+        import asyncio  # Imported on first use; it dominates this module's import time
+
+        logger.debug("Processing input data: %s", input_data)
+        lines = None
+        if self.model_backend is not None:
+            lines = iter(await self.model_backend.agenerate_many(self._line_prompts(input_data)))
+        script = CompactScript()
+        for row in self._scene_rows(input_data, lines):
+            script.add_scene(*row)
+            if len(script) % self.SCENES_PER_YIELD == 0:
+                await asyncio.sleep(0)
+        return self._expanded(self._script_output(input_data, script))
 
     def process(self, input_data: Dict[str, Any]) -> None:
         """
-        Processes the input data to generate a video script with enhanced details.
-        This is a mock implementation.
+        Processes the input data to generate a video script, for `output()` to return.
         """
-        logger.info(f"Processing input data: {input_data}")
+        # Scenes are kept in a compact form and only expanded to dicts by output()
+        self.output_data = self._generate(input_data)
+
+    def _generate(self, input_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Builds a video script with enhanced details, its scenes still in a `CompactScript`.
+        The dialogue is written by the model backend, all lines in one `generate_many()`;
+        without one, this is a mock implementation.
+        """
+        logger.debug("Processing input data: %s", input_data)
         try:
-            topic = input_data['topic']
-            video_length_minutes = input_data.get('video_length_minutes', 5)
-            style = input_data.get('style', 'tutorial')
-            characters = input_data.get('characters', 1)
-
-            title = f"{style.title()} Video: {topic.title()}"
-
-            # Mock script generation
-            scenes = []
-            num_scenes = video_length_minutes * 2
-            total_duration = 0
-
-            for i in range(1, num_scenes + 1):
-                scene_duration = 30
-                total_duration += scene_duration
-
-                dialogue = []
-                if characters == 1:
-                    dialogue.append({"character": "Narrator", "line": f"This is the narration for scene {i} about {topic}."})
-                else:
-                    for char_num in range(1, characters + 1):
-                         dialogue.append({"character": f"Character {char_num}", "line": f"This is a line for Character {char_num} in scene {i}."})
-
-                visuals_desc = f"A {style} style visualization for '{topic}', scene {i}."
-
-                scene = {
-                    "scene_number": i,
-                    "shot_type": random.choice(self.shot_types),
-                    "visuals": visuals_desc,
-                    "dialogue": dialogue,
-                    "duration_seconds": scene_duration,
-                    "image_reference": f"{style} illustration of '{topic}', {random.choice(self.shot_types)}"
-                }
-                scenes.append(scene)
-
-            storyboard_notes = [
-                "Opening shot should be engaging and establish the theme.",
-                "Use dynamic shots to maintain viewer interest.",
-                "Ensure audio quality is high for all dialogue and narration."
-            ]
-
-            self.output_data = {
-                "title": title,
-                "script": scenes,
-                "storyboard_notes": storyboard_notes,
-                "total_estimated_duration_seconds": total_duration
+            lines = None
+            if self.model_backend is not None:
+                lines = iter(self.model_backend.generate_many(self._line_prompts(input_data)))
+            script = CompactScript()
+            for row in self._scene_rows(input_data, lines):
+                script.add_scene(*row)
+            return self._script_output(input_data, script)
+
+        except ValueError:
+            raise
+        except Exception as e:
+            logger.error(f"An error occurred during processing: {e}")
+            raise
+
+    def _script_output(self, input_data: Dict[str, Any], script: CompactScript) -> Dict[str, Any]:
+        output_data = {
+            "title": self._title(input_data),
+            "script": script,
+            "storyboard_notes": list(STORYBOARD_NOTES),
+            "total_estimated_duration_seconds": script.total_duration_seconds
+        }
+        logger.info("Successfully generated enhanced video script.")
+        return output_data
+
+    @staticmethod
+    def _expanded(output_data: Dict[str, Any]) -> Dict[str, Any]:
+        return {**output_data, "script": output_data["script"].to_dicts()}
+
+    def iter_scenes(self, input_data: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+        """
+        Yields the script one scene at a time as `{"scene": ..., "total_estimated_duration_seconds": ...}`,
+        where the total is the running duration up to and including that scene.
+        Input errors are raised immediately rather than on the first iteration. With a model
+        backend, each scene's lines are generated just before the scene is yielded.
+        """
+        lines = None
+        if self.model_backend is not None:
+            lines = (self.model_backend.generate(prompt) for prompt in self._line_prompts(input_data))
+        return self._scene_events(self._scene_rows(input_data, lines))
+
+    def _scene_events(self, rows: Iterator[Tuple]) -> Iterator[Dict[str, Any]]:
+        total_duration = 0
+        for scene_number, shot_type, visuals, dialogue, duration_seconds, image_reference in rows:
+            total_duration += duration_seconds
+            scene = {
+                "scene_number": scene_number,
+                "shot_type": shot_type,
+                "visuals": visuals,
+                "dialogue": [{"character": character, "line": line} for character, line in dialogue],
+                "duration_seconds": duration_seconds,
+                "image_reference": image_reference
             }
-            logger.info("Successfully generated enhanced video script.")
+            yield {"scene": scene, "total_estimated_duration_seconds": total_duration}
 
+    def _scene_rows(self, input_data: Dict[str, Any], lines: Iterator[str] = None) -> Iterator[Tuple]:
+        return self._generate_scene_rows(*self._settings(input_data), lines=lines)
+
+    def _settings(self, input_data: Dict[str, Any]) -> Tuple[str, int, str, int]:
+        try:
+            topic = input_data['topic']
         except KeyError as e:
             logger.error(f"Missing required input key: {e}")
             raise ValueError(f"Missing required input key: {e}")
-        except Exception as e:
-            logger.error(f"An error occurred during processing: {e}")
-            raise
+        video_length_minutes = input_data.get('video_length_minutes', 5)
+        style = input_data.get('style', 'tutorial')
+        characters = input_data.get('characters', 1)
+        return topic, video_length_minutes, style, characters
+
+    def _line_prompts(self, input_data: Dict[str, Any]) -> List[str]:
+        """
+        Returns the model backend prompts for every dialogue line of the script, in the order
+        the scenes use them.
+        """
+        topic, video_length_minutes, style, characters = self._settings(input_data)
+        num_scenes = video_length_minutes * 2
+        video = f"a {style} video about {topic}"
+        if characters == 1:
+            return [f"Write the narration for scene {i} of {num_scenes} of {video}."
+                    for i in range(1, num_scenes + 1)]
+        return [f"Write the line of Character {char_num} in scene {i} of {num_scenes} of {video}, "
+                f"a conversation between {characters} characters."
+                for i in range(1, num_scenes + 1) for char_num in range(1, characters + 1)]
+
+    async def aiter_scenes(self, input_data: Dict[str, Any]) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Async counterpart of `iter_scenes()` that yields control to the event loop after every scene.
+        With a model backend, every dialogue line is awaited from it before the first scene.
+        """
+        import asyncio  # Imported on first use; it dominates this module's import time
+
+        if self.model_backend is None:
+            events = self.iter_scenes(input_data)
+        else:
+            lines = iter(await self.model_backend.agenerate_many(self._line_prompts(input_data)))
+            events = self._scene_events(self._scene_rows(input_data, lines))
+        for event in events:
+            yield event
+            await asyncio.sleep(0)
+
+    def write_jsonl(self, input_data: Dict[str, Any], stream: TextIO) -> int:
+        """
+        Streams the script to `stream` as JSON lines: a header with the title and storyboard notes,
+        one line per scene as it is generated, and a footer with the total duration.
+        Returns the total estimated duration in seconds.
+        """
+        events = self.iter_scenes(input_data)
+        stream.write(json.dumps({"title": self._title(input_data), "storyboard_notes": STORYBOARD_NOTES}) + "\n")
+        total_duration = 0
+        for event in events:
+            stream.write(json.dumps(event) + "\n")
+            total_duration = event["total_estimated_duration_seconds"]
+        stream.write(json.dumps({"total_estimated_duration_seconds": total_duration}) + "\n")
+        return total_duration
+
+    def _title(self, input_data: Dict[str, Any]) -> str:
+        return f"{input_data.get('style', 'tutorial').title()} Video: {input_data['topic'].title()}"
+
+    def _generate_scene_rows(self, topic: str, video_length_minutes: int, style: str,
+                             characters: int, lines: Iterator[str] = None) -> Iterator[Tuple]:
+        """
+        Yields (scene_number, shot_type, visuals, dialogue, duration_seconds, image_reference)
+        tuples, with dialogue as a list of (character, line) pairs. The lines are taken from
+        `lines` in the order of `_line_prompts()`, or mocked if it is None.
+        """
+        # Mock script generation
+        num_scenes = video_length_minutes * 2
+
+        for i in range(1, num_scenes + 1):
+            scene_duration = 30
+
+            if lines is not None:
+                speakers = ["Narrator"] if characters == 1 else [f"Character {n}" for n in range(1, characters + 1)]
+                dialogue = [(speaker, next(lines)) for speaker in speakers]
+            elif characters == 1:
+                dialogue = [("Narrator", f"This is the narration for scene {i} about {topic}.")]
+            else:
+                dialogue = [
+                    (f"Character {char_num}", f"This is a line for Character {char_num} in scene {i}.")
+                    for char_num in range(1, characters + 1)
+                ]
+
+            visuals_desc = f"A {style} style visualization for '{topic}', scene {i}."
+
+            yield (
+                i,
+                random.choice(self.shot_types),
+                visuals_desc,
+                dialogue,
+                scene_duration,
+                f"{style} illustration of '{topic}', {random.choice(self.shot_types)}"
+            )
 
     def output(self) -> Dict[str, Any]:
         """
-        Returns the generated output data.
+        Returns the generated output data, expanding the compact script into scene dicts.
         """
         if self.output_data is None:
             logger.warning("Output called before processing.")
             return {}
-        return self.output_data
+        return self._expanded(self.output_data)
 
     def shutdown(self) -> None:
         """
@@ -127,9 +256,13 @@ class VideoScriptAgent(BMADAgentInterface):
         """
         logger.info("Video Script Agent is shutting down.")
         self.output_data = None
+        if isinstance((self.config or {}).get("model_backend"), dict):
+            # A backend instance from the config is shared and belongs to whoever passed it in
+            self.model_backend.close()
 
 # Example of how the BMAD orchestrator might use this agent
 if __name__ == '__main__':
+    logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(name)s - %(levelname)s - %(message)s')
     video_agent = VideoScriptAgent()
     video_agent.initialize()
 
@@ -0,0 +1,104 @@
+from array import array
+from typing import Dict, Any, Iterable, Iterator, List, Tuple
+
+
+class StringTable:
+    """
+    Interns repeated strings (shot types, character names, image references) as small integers.
+    """
+    __slots__ = ("values", "_index")
+
+    def __init__(self):
+        self.values: List[str] = []
+        self._index: Dict[str, int] = {}
+
+    def intern(self, value: str) -> int:
+        index = self._index.get(value)
+        if index is None:
+            index = self._index[value] = len(self.values)
+            self.values.append(value)
+        return index
+
+    def __getitem__(self, index: int) -> str:
+        return self.values[index]
+
+    def __len__(self) -> int:
+        return len(self.values)
+
+
+class CompactScene:
+    """
+    A scene record holding table indices instead of repeated strings.
+    Its dialogue lives in the owning script's arrays between `dialogue_start` and `dialogue_end`.
+    """
+    __slots__ = ("scene_number", "shot_type", "visuals", "dialogue_start", "dialogue_end",
+                 "duration_seconds", "image_reference")
+
+    def __init__(self, scene_number: int, shot_type: int, visuals: str, dialogue_start: int,
+                 dialogue_end: int, duration_seconds: int, image_reference: int):
+        self.scene_number = scene_number
+        self.shot_type = shot_type
+        self.visuals = visuals
+        self.dialogue_start = dialogue_start
+        self.dialogue_end = dialogue_end
+        self.duration_seconds = duration_seconds
+        self.image_reference = image_reference
+
+
+class CompactScript:
+    """
+    A memory-compact video script.
+
+    Shot types, character names and image references are interned in shared tables, and the
+    dialogue of all scenes is stored as two flat arrays: character indices in an `array` and
+    the line texts in a list. The JSON shape produced by `VideoScriptAgent` is rebuilt only
+    when `to_dicts()` is called for serialization.
+    """
+    __slots__ = ("shot_types", "characters", "image_references", "scenes",
+                 "dialogue_characters", "dialogue_lines", "total_duration_seconds")
+
+    def __init__(self):
+        self.shot_types = StringTable()
+        self.characters = StringTable()
+        self.image_references = StringTable()
+        self.scenes: List[CompactScene] = []
+        self.dialogue_characters = array("I")
+        self.dialogue_lines: List[str] = []
+        self.total_duration_seconds = 0
+
+    def add_scene(self, scene_number: int, shot_type: str, visuals: str,
+                  dialogue: Iterable[Tuple[str, str]], duration_seconds: int, image_reference: str) -> None:
+        start = len(self.dialogue_lines)
+        intern_character = self.characters.intern
+        for character, line in dialogue:
+            self.dialogue_characters.append(intern_character(character))
+            self.dialogue_lines.append(line)
+        self.scenes.append(CompactScene(
+            scene_number, self.shot_types.intern(shot_type), visuals, start, len(self.dialogue_lines),
+            duration_seconds, self.image_references.intern(image_reference)
+        ))
+        self.total_duration_seconds += duration_seconds
+
+    def scene_dict(self, scene: CompactScene) -> Dict[str, Any]:
+        characters = self.characters.values
+        return {
+            "scene_number": scene.scene_number,
+            "shot_type": self.shot_types[scene.shot_type],
+            "visuals": scene.visuals,
+            "dialogue": [
+                {"character": characters[self.dialogue_characters[i]], "line": self.dialogue_lines[i]}
+                for i in range(scene.dialogue_start, scene.dialogue_end)
+            ],
+            "duration_seconds": scene.duration_seconds,
+            "image_reference": self.image_references[scene.image_reference]
+        }
+
+    def __iter__(self) -> Iterator[Dict[str, Any]]:
+        for scene in self.scenes:
+            yield self.scene_dict(scene)
+
+    def __len__(self) -> int:
+        return len(self.scenes)
+
+    def to_dicts(self) -> List[Dict[str, Any]]:
+        return list(self)